@@ -0,0 +1,594 @@
+#!/usr/bin/env python3
+"""
+Emit generated entries as newline-delimited activity events for GL Publisher load tests.
+
+oracle-gl-publisher's queue-processor and batched-activities-processor consume
+activities, not CSVs. This turns the entries generate_bulk_writeoff.py and
+generate_error_scenarios.py produce (same seeds, pools and error mix) into one
+JSON activity per line, and publishes them at a controlled rate:
+
+    {"idempotencyKey": "DCOE-9999-42-17", "activityType": "BULK_JOURNAL_WRITEOFF",
+     "entryNum": 17, "jiraId": "DCOE-9999", "assetId": "...", "accountingDate": "2026-01-15",
+     ..., "lines": [{"transCode": "DEL", "naturalAcct": "...", "enteredDr": "0.0000012345", ...},
+                    {"transCode": "REC", ...}],
+     "expectedOutcome": "valid"}
+
+expectedOutcome is 'valid' or the injected error type (or
+'collided-entry-num' for a valid entry a duplicate-entry-num repeats), so DLQ
+and queue-lag tests can check what should have been rejected. A
+duplicate-entry-num activity carries the entryNum and idempotencyKey of the
+entry it repeats.
+
+Sinks (--sink):
+    out.ndjson          file (optionally compressed with --compress)
+    -                   stdout
+    fifo:PATH           named pipe, created if missing; waits for a reader
+    broker:DIR          local broker stand-in: --partitions append-only logs
+                        DIR/<topic>-<p>.ndjson, keyed by asset like a Kafka
+                        producer, with end offsets in DIR/<topic>.json
+
+Usage:
+    # 1M activities, 5% errors shuffled, 20k/s into a 12-partition local broker
+    python activity_events.py --source errors --entries 1000000 --error-percent 5 --shuffle \\
+        --rate 20000 --sink broker:/tmp/gl-broker --partitions 12
+
+    # Valid write-offs as fast as possible into a file
+    python activity_events.py --source writeoff --entries 500000 --sink writeoffs.ndjson
+
+    # Feed a consumer through a named pipe at 500/s, bursts of up to 2000
+    python activity_events.py --source errors --entries 100000 --rate 500 --burst 2000 --sink fifo:/tmp/activities
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import zlib
+from collections import defaultdict
+from operator import itemgetter
+from datetime import date
+from typing import Dict, Iterator, List, NamedTuple, Optional, Sequence
+
+from compressed_output import COMPRESSIONS, OutputFile
+from entry_manifest import VALID
+from entry_options import EntryOptions, entry_options_from_args
+from entry_rng import new_seed
+from key_distributions import add_distribution_arguments
+from line_fanout import add_fanout_arguments
+from telemetry import DEFAULT_INTERVAL, Telemetry, write_metrics
+
+import generate_bulk_writeoff
+import generate_error_scenarios
+
+# =============================================================================
+# CONSTANTS
+# =============================================================================
+
+ACTIVITY_TYPE = "BULK_JOURNAL_WRITEOFF"
+SOURCES = ["writeoff", "errors"]
+
+DEFAULT_BATCH_SIZE = 1000       # activities serialized and written together
+DEFAULT_PARTITIONS = 12
+DEFAULT_TOPIC = "gl-publisher-tx-ingress-stream"
+
+# Entry-level fields, taken from the entry's first line: CSV column -> payload key
+ENTRY_FIELDS = {
+    "JIRA_ID": "jiraId",
+    "ASSET_ID": "assetId",
+    "POSITION": "position",
+    "ACCOUNTING_DATE": "accountingDate",
+    "CURRENCY": "currency",
+    "BUSINESS_UNIT": "businessUnit",
+    "LINE_DESCRIPTION": "description",
+}
+
+# Per-line fields; empty CSV fields become null
+LINE_FIELDS = {
+    "TRANS_CODE": "transCode",
+    "NATURAL_ACCT": "naturalAcct",
+    "SUB_ACCT": "subAcct",
+    "ENTERED_DR": "enteredDr",
+    "ENTERED_CR": "enteredCr",
+    "TRANS_SUBCODE": "transSubcode",
+    "FX_RATE": "fxRate",
+    "BV_DELTA_DR": "bvDeltaDr",
+    "BV_DELTA_CR": "bvDeltaCr",
+    "RELATED_ASSET_ID": "relatedAssetId",
+    "COMMISSION": "commission",
+    "REFERENCE_VALUE": "referenceValue",
+    "REFERENCE_TYPE": "referenceType",
+    "EXTERNAL_SOURCE": "externalSource",
+}
+
+_HEADERS = generate_bulk_writeoff.CSV_HEADERS
+_ENTRY_INDEX = _HEADERS.index("ENTRY_NUM")
+_ASSET_INDEX = _HEADERS.index("ASSET_ID")
+
+# Distinct field values kept JSON-encoded (accounts, assets, amounts, dates);
+# the cache is dropped and rebuilt if it grows past this
+MAX_CACHED_FIELDS = 1 << 17
+
+
+# =============================================================================
+# ACTIVITIES
+# =============================================================================
+
+class Activity(NamedTuple):
+    """One entry to emit: partition key (the asset), idempotency key, outcome and CSV rows."""
+    key: str
+    idempotency_key: str
+    entry_num: int
+    outcome: str
+    rows: Sequence[Sequence[str]]
+
+
+def build_activity(rows: Sequence[Sequence[str]], outcome: str, run_id: str) -> Activity:
+    """Wrap one entry's CSV rows as an activity.
+
+    entryNum is the ENTRY_NUM in the rows and the idempotency key is
+    '<run_id>-<ENTRY_NUM>', so re-emitting the same run produces duplicates the
+    consumer should drop, and a new run does not. A duplicate-entry-num entry
+    carries its partner's ENTRY_NUM, so it repeats that activity's key.
+    """
+    entry_num = int(rows[0][_ENTRY_INDEX])
+    return Activity(rows[0][_ASSET_INDEX], f"{run_id}-{entry_num}", entry_num, outcome, rows)
+
+
+class _JsonFields(dict):
+    """field value -> its JSON encoding; empty CSV fields encode as null."""
+
+    def __init__(self):
+        super().__init__({"": "null"})
+
+    def __missing__(self, value: str) -> str:
+        encoded = self[value] = _encode_json(value)
+        return encoded
+
+
+_encode_json = json.JSONEncoder(ensure_ascii=False).encode
+
+
+def _template(fields: Dict[str, str]) -> str:
+    return ",".join(f'"{key}":%s' for key in fields.values())
+
+
+class ActivitySerializer:
+    """Encode activities as compact JSON lines, a batch at a time.
+
+    Payloads are never built as dicts: each line is one %-format of a
+    precompiled template with the entry's fields, and field values (which
+    repeat heavily across a run) are JSON-encoded once and cached.
+    json.loads of a line gives the payload in the module docstring.
+    """
+
+    def __init__(self):
+        self._fields = _JsonFields()
+        self._line = "{" + _template(LINE_FIELDS) + "}"
+        self._entry = (
+            '{"idempotencyKey":"%s","activityType":"' + ACTIVITY_TYPE + '","entryNum":%d,'
+            + _template(ENTRY_FIELDS) + ',"lines":[%s],"expectedOutcome":%s'
+        )
+        self._line_values = itemgetter(*(_HEADERS.index(column) for column in LINE_FIELDS))
+        self._entry_values = itemgetter(*(_HEADERS.index(column) for column in ENTRY_FIELDS))
+
+    def serialize(self, activities: Sequence[Activity], emitted_at: Optional[str] = None) -> List[bytes]:
+        """One bytes object (with newline) per activity. emitted_at, if given,
+        is added to every payload of the batch as 'emittedAt'."""
+        fields = self._fields
+        if len(fields) > MAX_CACHED_FIELDS:
+            fields = self._fields = _JsonFields()
+        lookup = fields.__getitem__
+        line = self._line
+        entry = self._entry
+        line_values = self._line_values
+        entry_values = self._entry_values
+        end = f',"emittedAt":{_encode_json(emitted_at)}}}\n' if emitted_at is not None else "}\n"
+
+        out = []
+        for activity in activities:
+            rows = activity.rows
+            lines = ",".join([line % tuple(map(lookup, line_values(row))) for row in rows])
+            out.append((entry % (
+                activity.idempotency_key, activity.entry_num, *map(lookup, entry_values(rows[0])),
+                lines, lookup(activity.outcome)
+            ) + end).encode())
+        return out
+
+
+def iter_activity_batches(
+    source: str,
+    num_entries: int,
+    accounting_date: Optional[str] = None,
+    seed: Optional[int] = None,
+    error_percent: float = 10.0,
+    error_type: Optional[str] = None,
+    shuffle: bool = False,
+    unbalanced: bool = False,
+    use_writeoff_accounts: bool = True,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    entry_options: EntryOptions = EntryOptions()
+) -> Iterator[List[Activity]]:
+    """Lazily generate activities in batches of up to batch_size.
+
+    Entries are the ones the source generator writes to CSV for the same
+    arguments, seed and entry_options ('writeoff' or 'errors'); only the
+    encoding differs.
+    """
+    if seed is None:
+        seed = new_seed()
+    run_id = f"{generate_bulk_writeoff.JIRA_ID}-{seed}"
+
+    if source == "writeoff":
+        if accounting_date is None:
+            accounting_date = date.today().isoformat()
+        outcome = "unbalanced" if unbalanced else VALID
+        entry_lines = generate_bulk_writeoff.entry_lines
+        entries = (
+            (outcome, entry_lines(entry, accounting_date))
+            for entry in generate_bulk_writeoff.iter_entries(
+                num_entries, unbalanced, use_writeoff_accounts, seed, entry_options=entry_options
+            )
+        )
+    elif source == "errors":
+        entries = (
+            (entry.error_type or VALID, entry.rows)
+            for entry in generate_error_scenarios.iter_entries(
+                num_entries, error_percent, error_type, accounting_date, shuffle, seed, entry_options
+            )
+        )
+    else:
+        raise ValueError(f"Unknown source: {source}. Valid: {SOURCES}")
+
+    batch: List[Activity] = []
+    for outcome, rows in entries:
+        batch.append(build_activity(rows, outcome, run_id))
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# =============================================================================
+# RATE LIMITING
+# =============================================================================
+
+class TokenBucket:
+    """Token bucket: `rate` tokens/s on average, at most `burst` at once.
+
+    acquire(n) may take more than `burst` tokens: the bucket goes into debt
+    and the caller sleeps until it is paid back, so the long-run rate holds
+    for any request size. Sleeps are to absolute deadlines, so sleep
+    overshoot doesn't accumulate.
+    """
+
+    def __init__(self, rate: float, burst: Optional[float] = None, clock=time.perf_counter, sleep=time.sleep):
+        if rate <= 0:
+            raise ValueError(f"rate must be positive, got {rate}")
+        self.rate = rate
+        self.burst = max(1.0, burst if burst is not None else rate / 10)
+        self.tokens = self.burst
+        self._clock = clock
+        self._sleep = sleep
+        self._updated = clock()
+        self.waited = 0.0
+
+    def acquire(self, n: int = 1) -> float:
+        """Take n tokens, sleeping as long as needed; returns the seconds slept."""
+        now = self._clock()
+        self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        self.tokens -= n
+        if self.tokens >= 0:
+            return 0.0
+        deadline = now - self.tokens / self.rate
+        while True:
+            remaining = deadline - self._clock()
+            if remaining <= 0:
+                break
+            self._sleep(remaining)
+        waited = self._clock() - now
+        self.waited += waited
+        return waited
+
+
+# =============================================================================
+# SINKS
+# =============================================================================
+
+class Sink:
+    """Where serialized activities go.
+
+    write(lines, activities) gets one batch: the encoded lines and the
+    activities they came from (for keys). close() returns a description.
+    """
+
+    name = ""
+
+    def write(self, lines: List[bytes], activities: Sequence[Activity]) -> None:
+        raise NotImplementedError
+
+    def close(self) -> str:
+        return self.name
+
+
+class StreamSink(Sink):
+    """A file (optionally compressed), stdout, or a named pipe."""
+
+    def __init__(self, path: str, compress: Optional[str] = None, compress_level: Optional[int] = None):
+        if path == "-":
+            self.name = "stdout"
+            self._file = sys.stdout.buffer
+            self._owned = False
+        elif path.startswith("fifo:"):
+            fifo = path[len("fifo:"):]
+            if not os.path.exists(fifo):
+                os.mkfifo(fifo)
+            print(f"Waiting for a reader on {fifo} ...", file=sys.stderr, flush=True)
+            self.name = fifo
+            self._file = open(fifo, "wb")
+            self._owned = True
+        else:
+            self._file = OutputFile(path, compress, compress_level)
+            self.name = self._file.name
+            self._owned = True
+
+    def write(self, lines: List[bytes], activities: Sequence[Activity]) -> None:
+        self._file.write(b"".join(lines))
+        # Flush so a consumer on the other end sees events at the emitted rate
+        self._file.flush()
+
+    def close(self) -> str:
+        if self._owned:
+            self._file.close()
+        return self.name
+
+
+class LocalBrokerSink(Sink):
+    """Local broker stand-in: one append-only NDJSON log per partition.
+
+    Activities are partitioned by key (the asset) with a stable hash, so like
+    a keyed Kafka producer every activity for an asset lands in one partition,
+    in order. A message's offset is its line number in the partition log.
+    End offsets are written to <dir>/<topic>.json on close, for lag checks.
+    """
+
+    def __init__(self, directory: str, topic: str = DEFAULT_TOPIC, partitions: int = DEFAULT_PARTITIONS):
+        if partitions < 1:
+            raise ValueError(f"partitions must be at least 1, got {partitions}")
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.topic = topic
+        self.name = f"broker:{directory} ({topic}, {partitions} partitions)"
+        self._logs = [
+            open(os.path.join(directory, f"{topic}-{p}.ndjson"), "ab") for p in range(partitions)
+        ]
+        self._start_offsets = [self._count_lines(log.name) for log in self._logs]
+        self.end_offsets = list(self._start_offsets)
+        self._partition_of: Dict[str, int] = {}
+
+    @staticmethod
+    def _count_lines(path: str) -> int:
+        count = 0
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                count += block.count(b"\n")
+        return count
+
+    def partition(self, key: str) -> int:
+        p = self._partition_of.get(key)
+        if p is None:
+            p = self._partition_of[key] = zlib.crc32(key.encode()) % len(self._logs)
+        return p
+
+    def write(self, lines: List[bytes], activities: Sequence[Activity]) -> None:
+        by_partition: Dict[int, List[bytes]] = defaultdict(list)
+        partition = self.partition
+        for line, activity in zip(lines, activities):
+            by_partition[partition(activity.key)].append(line)
+        for p, messages in by_partition.items():
+            self._logs[p].write(b"".join(messages))
+            self._logs[p].flush()
+            self.end_offsets[p] += len(messages)
+
+    def close(self) -> str:
+        for log in self._logs:
+            log.close()
+        with open(os.path.join(self.directory, f"{self.topic}.json"), "w") as f:
+            json.dump({
+                "topic": self.topic,
+                "partitions": len(self._logs),
+                "start_offsets": self._start_offsets,
+                "end_offsets": self.end_offsets,
+            }, f, indent=2)
+            f.write("\n")
+        return self.name
+
+
+def open_sink(
+    spec: str,
+    compress: Optional[str] = None,
+    compress_level: Optional[int] = None,
+    topic: str = DEFAULT_TOPIC,
+    partitions: int = DEFAULT_PARTITIONS
+) -> Sink:
+    """Open a sink from its --sink spec: a path, '-', 'fifo:PATH' or 'broker:DIR'."""
+    if spec.startswith("broker:"):
+        return LocalBrokerSink(spec[len("broker:"):], topic, partitions)
+    if compress and (spec == "-" or spec.startswith("fifo:")):
+        raise ValueError("--compress only applies to file sinks")
+    return StreamSink(spec, compress, compress_level)
+
+
+# =============================================================================
+# EMISSION
+# =============================================================================
+
+def emit(
+    batches: Iterator[List[Activity]],
+    sink: Sink,
+    num_entries: int,
+    rate: Optional[float] = None,
+    burst: Optional[float] = None,
+    emitted_at: bool = False,
+    telemetry: Optional[Telemetry] = None
+) -> Dict[str, object]:
+    """Serialize and publish activity batches to a sink, rate-limited if rate is given.
+
+    With a rate, each batch is published in slices of at most `burst`
+    activities (default: 100ms worth), each waiting for its tokens, so the
+    stream is smooth rather than one burst per batch.
+
+    Returns:
+        Metrics: events, bytes, counts per outcome, throttled seconds
+    """
+    bucket = TokenBucket(rate, burst) if rate else None
+    slice_size = max(1, int(bucket.burst)) if bucket else None
+    counts: Dict[str, int] = defaultdict(int)
+    serialize = ActivitySerializer().serialize
+    telemetry = telemetry or Telemetry(num_entries, rows_per_entry=1, interval=None)
+    clock = time.perf_counter
+    events = 0
+    total_bytes = 0
+
+    while True:
+        sampling_started = clock()
+        batch = next(batches, None)
+        if batch is None:
+            break
+        telemetry.add("sampling", clock() - sampling_started)
+        for activity in batch:
+            counts[activity.outcome] += 1
+
+        for start in range(0, len(batch), slice_size or len(batch)):
+            part = batch[start:start + slice_size] if slice_size else batch
+            if bucket:
+                bucket.acquire(len(part))
+            formatting_started = clock()
+            stamp = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime()) + "Z" if emitted_at else None
+            lines = serialize(part, stamp)
+            writing_started = clock()
+            sink.write(lines, part)
+            telemetry.add("formatting", writing_started - formatting_started)
+            telemetry.add("writing", clock() - writing_started)
+            events += len(part)
+            total_bytes += sum(map(len, lines))
+            telemetry.update(events, total_bytes, rows_done=events)
+
+    telemetry.finish()
+    return {
+        "events": events,
+        "bytes": total_bytes,
+        "counts": dict(counts),
+        "throttled_s": round(bucket.waited, 4) if bucket else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Emit generated entries as NDJSON activity events at a controlled rate"
+    )
+    parser.add_argument("--source", choices=SOURCES, default="errors",
+                        help="Generator whose entries to emit (default: errors)")
+    parser.add_argument("--entries", type=int, default=1000, help="Number of activities (default: 1000)")
+    parser.add_argument("--sink", type=str, default="activities.ndjson",
+                        help="File path, '-' for stdout, fifo:PATH or broker:DIR (default: activities.ndjson)")
+    parser.add_argument("--rate", type=float, default=None,
+                        help="Activities per second (default: as fast as possible)")
+    parser.add_argument("--burst", type=float, default=None,
+                        help="Most activities published at once with --rate (default: rate/10)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                        help=f"Activities generated and serialized per batch (default: {DEFAULT_BATCH_SIZE})")
+    parser.add_argument("--emitted-at", action="store_true",
+                        help="Stamp each activity with emittedAt (UTC, to the second) for lag measurement; "
+                             "without it, the same seed gives byte-identical output")
+    parser.add_argument("--topic", type=str, default=DEFAULT_TOPIC,
+                        help=f"broker: topic name (default: {DEFAULT_TOPIC})")
+    parser.add_argument("--partitions", type=int, default=DEFAULT_PARTITIONS,
+                        help=f"broker: number of partitions (default: {DEFAULT_PARTITIONS})")
+    parser.add_argument("--compress", choices=COMPRESSIONS, default=None,
+                        help="Compress a file sink; adds .gz/.zst/.xz to its name")
+    parser.add_argument("--compress-level", type=int, default=None, help="Compression level")
+    parser.add_argument("--date", type=str, default=None, help="Accounting date (YYYY-MM-DD)")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="Generation seed; same seed and options give the same entries (default: random)")
+    parser.add_argument("--error-percent", type=float, default=10.0,
+                        help="errors: percentage of entries with errors (default: 10)")
+    parser.add_argument("--error-type", type=str, default="mixed",
+                        choices=generate_error_scenarios.ERROR_TYPES + ["mixed"],
+                        help="errors: specific error type or 'mixed' for all but duplicate-entry-num")
+    parser.add_argument("--shuffle", action="store_true",
+                        help="errors: shuffle errors throughout (default: errors at end)")
+    parser.add_argument("--unbalanced", action="store_true", help="writeoff: make every entry unbalanced")
+    parser.add_argument("--no-writeoff-accounts", action="store_true",
+                        help="writeoff: pair accounts of the same asset instead of write-off accounts")
+    parser.add_argument("--pool-file", type=str, default=None,
+                        help="Query 2 export (CSV or JSON) of source accounts")
+    parser.add_argument("--writeoff-file", type=str, default=None,
+                        help="Query 3 export (CSV or JSON) of write-off accounts")
+    parser.add_argument("--progress-interval", type=float, default=DEFAULT_INTERVAL,
+                        help=f"Seconds between progress lines; 0 disables them (default: {DEFAULT_INTERVAL:g})")
+    parser.add_argument("--metrics-out", type=str, default=None, help="Write the final metrics to this JSON file")
+    add_fanout_arguments(parser)
+    add_distribution_arguments(parser)
+
+    args = parser.parse_args()
+    if args.rate is not None and args.rate <= 0:
+        parser.error("--rate must be positive")
+    if args.batch_size < 1:
+        parser.error("--batch-size must be at least 1")
+    entry_options = entry_options_from_args(parser, args)
+    if args.source != "writeoff" and not entry_options.lines.is_pair:
+        parser.error("--lines-per-entry only applies to --source writeoff")
+    seed = args.seed if args.seed is not None else new_seed()
+
+    # Progress goes to stderr when the events themselves go to stdout
+    log = sys.stderr if args.sink == "-" else sys.stdout
+    try:
+        sink = open_sink(args.sink, args.compress, args.compress_level, args.topic, args.partitions)
+    except ValueError as e:
+        parser.error(str(e))
+    rate = f"{args.rate:,.0f}/s" if args.rate else "unthrottled"
+    print(f"Emitting {args.entries:,} {args.source} activities to {sink.name} ({rate}, seed {seed})",
+          file=log, flush=True)
+
+    telemetry = Telemetry(args.entries, rows_per_entry=1, interval=args.progress_interval or None, out=log)
+    batches = iter_activity_batches(
+        args.source, args.entries, args.date, seed,
+        error_percent=args.error_percent,
+        error_type=args.error_type,
+        shuffle=args.shuffle,
+        unbalanced=args.unbalanced,
+        use_writeoff_accounts=not args.no_writeoff_accounts,
+        batch_size=args.batch_size,
+        entry_options=entry_options
+    )
+    try:
+        result = emit(batches, sink, args.entries, args.rate, args.burst, args.emitted_at, telemetry)
+    except BrokenPipeError:
+        print("Reader went away; stopped early", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        try:
+            sink.close()
+        except BrokenPipeError:
+            pass
+
+    elapsed = telemetry.elapsed or 1e-9
+    print(f"Emitted {result['events']:,} activities ({result['bytes'] / 1024 / 1024:.1f} MB) in {elapsed:.2f}s "
+          f"= {result['events'] / elapsed:,.0f}/s (throttled {result['throttled_s']:.1f}s)", file=log)
+    for outcome, count in sorted(result["counts"].items()):
+        print(f"  {outcome}: {count:,}", file=log)
+    if args.metrics_out:
+        write_metrics(args.metrics_out, telemetry.metrics(
+            source=args.source, seed=seed, sink=sink.name, rate=args.rate,
+            distributions=entry_options.distributions.to_dict(), lines_per_entry=entry_options.lines.spec,
+            events=result["events"], counts=result["counts"], throttled_s=result["throttled_s"],
+            events_per_s=round(result["events"] / elapsed, 1)
+        ))
+        print(f"Metrics: {args.metrics_out}", file=log)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""
+Batched amount generation and formatting shared by the bulk journal generators.
+
+Every amount the generators produce is ``mantissa / 10**exponent`` with the
+mantissa in 1..9999 and the exponent in 8..10. All of those are whole numbers
+of 1e-10 units, so amounts are carried around as *scaled integers*
+(``amount * 10**10``) instead of ``Decimal`` objects:
+
+    scaled = mantissa * 10 ** (10 - exponent)
+
+Drawing a batch is one ``rng.choices`` call over a precomputed table of every
+(mantissa, exponent) combination, and formatting is a dict lookup into a
+precomputed table of the fixed 10-decimal strings. No per-row ``Decimal`` is
+built, and the strings are identical to ``f"{Decimal(...):.10f}"``.
+
+Balancing: DR and CR are rendered from the same scaled integer, so a balanced
+entry is balanced by construction. Unbalanced entries are ``scaled + 1``
+(exactly 0.0000000001 more), matching the old ``Decimal("0.0000000001")`` bump.
+
+Fan-out entries (see line_fanout) split one side's total across several lines
+with split_scaled, which is exact in integers however many lines there are.
+
+Widening (--unique, see unique_entries): widening level w draws mantissas in
+1..10**(4 + w) - 1 with the same exponents, about 10x the distinct amounts
+per level. Slot i is still mantissa i // 3 + 1 and exponent 8 + i % 3, so
+level 0 is exactly SCALED_AMOUNTS and every level extends the one before.
+"""
+
+import random
+from decimal import Decimal
+from typing import Dict, List, Optional, Sequence
+
+# =============================================================================
+# CONSTANTS
+# =============================================================================
+
+AMOUNT_DECIMALS = 10
+AMOUNT_SCALE = 10 ** AMOUNT_DECIMALS
+
+MANTISSA_MIN, MANTISSA_MAX = 1, 9999
+EXPONENT_MIN, EXPONENT_MAX = 8, 10
+
+# Smallest representable step, used to unbalance an entry by one unit
+UNBALANCE_STEP = 1
+
+# How many entries the generators draw amounts for at a time
+DEFAULT_BATCH_SIZE = 4096
+
+# Widening levels beyond 0 (see num_amounts); the widest draws amounts up to ~100
+MAX_WIDENING = 6
+
+# One slot per (mantissa, exponent) combination so that drawing a uniform slot
+# reproduces the distribution of randint(1, 9999) / 10**randint(8, 10).
+SCALED_AMOUNTS: List[int] = [
+    mantissa * 10 ** (AMOUNT_DECIMALS - exponent)
+    for mantissa in range(MANTISSA_MIN, MANTISSA_MAX + 1)
+    for exponent in range(EXPONENT_MIN, EXPONENT_MAX + 1)
+]
+
+
+def num_amounts(widening: int = 0) -> int:
+    """Number of amount slots at a widening level (level 0: len(SCALED_AMOUNTS))."""
+    if not 0 <= widening <= MAX_WIDENING:
+        raise ValueError(f"Widening must be in 0..{MAX_WIDENING}, got {widening}")
+    num_exponents = EXPONENT_MAX - EXPONENT_MIN + 1
+    return num_exponents * (10 ** (len(str(MANTISSA_MAX)) + widening) - 1)
+
+
+def scaled_amount(slot: int) -> int:
+    """Scaled amount of a slot; SCALED_AMOUNTS[slot] for slots below its length."""
+    mantissa, exponent = divmod(slot, EXPONENT_MAX - EXPONENT_MIN + 1)
+    return (mantissa + MANTISSA_MIN) * 10 ** (AMOUNT_DECIMALS - EXPONENT_MIN - exponent)
+
+
+def max_scaled_amount(widening: int = 0) -> int:
+    """Largest amount drawn at a widening level (the biggest mantissa at the smallest exponent)."""
+    return scaled_amount(num_amounts(widening) - (EXPONENT_MAX - EXPONENT_MIN + 1))
+
+
+def _format_uncached(scaled: int) -> str:
+    """Render a scaled integer as a fixed 10-decimal string."""
+    sign = "-" if scaled < 0 else ""
+    whole, frac = divmod(abs(scaled), AMOUNT_SCALE)
+    return f"{sign}{whole}.{frac:0{AMOUNT_DECIMALS}d}"
+
+
+# Covers every drawable amount plus its unbalanced (+1) and negated variants
+_FORMATTED: Dict[int, str] = {}
+for _scaled in SCALED_AMOUNTS:
+    for _value in (_scaled, _scaled + UNBALANCE_STEP, -_scaled):
+        _FORMATTED[_value] = _format_uncached(_value)
+_FORMATTED[0] = _format_uncached(0)
+
+# Same table pre-encoded for the bytes row templates (see row_templates)
+_FORMATTED_BYTES: Dict[int, bytes] = {k: v.encode() for k, v in _FORMATTED.items()}
+
+# Reverse table, for reading generated amounts back as scaled integers
+_PARSED: Dict[str, int] = {v: k for k, v in _FORMATTED.items()}
+
+
+def draw_scaled_amounts(count: int, rng: Optional[random.Random] = None) -> List[int]:
+    """Draw `count` random amounts as scaled integers (units of 1e-10)."""
+    rng = rng or random
+    return rng.choices(SCALED_AMOUNTS, k=count)
+
+
+def format_scaled(scaled: int) -> str:
+    """Format a scaled integer amount with 10 decimal places."""
+    text = _FORMATTED.get(scaled)
+    if text is None:
+        text = _format_uncached(scaled)
+    return text
+
+
+def format_scaled_batch(amounts: Sequence[int]) -> List[str]:
+    """Format a batch of scaled integer amounts with 10 decimal places."""
+    get = _FORMATTED.get
+    return [get(a) or _format_uncached(a) for a in amounts]
+
+
+def format_scaled_bytes(scaled: int) -> bytes:
+    """Format a scaled integer amount as ASCII bytes with 10 decimal places."""
+    text = _FORMATTED_BYTES.get(scaled)
+    if text is None:
+        text = _format_uncached(scaled).encode()
+    return text
+
+
+def format_scaled_bytes_batch(amounts: Sequence[int]) -> List[bytes]:
+    """Format a batch of scaled integer amounts as ASCII bytes."""
+    get = _FORMATTED_BYTES.get
+    return [get(a) or _format_uncached(a).encode() for a in amounts]
+
+
+def parse_scaled(text: str) -> Optional[int]:
+    """Parse a decimal amount string into a scaled integer; None for an empty field.
+
+    Raises ValueError if the amount has more than AMOUNT_DECIMALS decimal places.
+    """
+    scaled = _PARSED.get(text)
+    if scaled is not None:
+        return scaled
+    if not text:
+        return None
+    value = Decimal(text).scaleb(AMOUNT_DECIMALS)
+    if value != value.to_integral_value():
+        raise ValueError(f"Amount {text!r} has more than {AMOUNT_DECIMALS} decimal places")
+    return int(value)
+
+
+def split_scaled(total: int, weights: Sequence[int]) -> List[int]:
+    """Split a scaled integer into len(weights) positive parts that sum exactly to `total`.
+
+    Every part gets one unit, and the rest is cut in proportion to the
+    (positive integer) weights at floor(rest * cumulative / sum) boundaries, so
+    the parts always add back up without rounding drift, in integers only.
+    Raises ValueError if `total` has fewer units than there are parts.
+    """
+    count = len(weights)
+    if total < count:
+        raise ValueError(f"Cannot split {total} units into {count} positive parts")
+    rest = total - count
+    weight_sum = sum(weights)
+    parts = []
+    cumulative = previous = 0
+    for weight in weights:
+        cumulative += weight
+        cut = rest * cumulative // weight_sum
+        parts.append(cut - previous + 1)
+        previous = cut
+    return parts
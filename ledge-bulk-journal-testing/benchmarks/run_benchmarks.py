@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the bulk journal generators and the validator.
+
+Runs generate_bulk_writeoff.generate_csv and generate_error_scenarios.generate_csv
+across sizes and modes, and validate_bulk_csv.validate_file on their output in one
+process and with a worker per CPU; records wall time, rows/s, MB/s and peak RSS
+to a JSON results file, and compares them with a stored baseline
+(benchmarks/baseline.json).
+
+Every case runs in a fresh subprocess so peak RSS is per case and one case's
+warm caches don't flatter the next.
+
+Usage:
+    # Full matrix (10k, 100k, 500k, 5M entries x every mode) against the baseline
+    python benchmarks/run_benchmarks.py
+
+    # Quick check: smaller sizes, only the write-off cases
+    python benchmarks/run_benchmarks.py --sizes 10k,100k --cases writeoff
+
+    # Validator throughput, single-process and multi-worker
+    python benchmarks/run_benchmarks.py --sizes 500k,5M --cases validate
+
+    # Record a new baseline (after an intended performance change, or on a new machine)
+    python benchmarks/run_benchmarks.py --update-baseline
+
+    # Print the README performance table from the results
+    python benchmarks/run_benchmarks.py --sizes 10k,100k,500k --cases writeoff/default --markdown
+
+Exit status is 1 if any case regressed by more than --tolerance against the
+baseline, so the suite can gate CI or a pre-scale-test check.
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timezone
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SCRIPTS_DIR = os.path.dirname(BENCH_DIR)
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baseline.json")
+DEFAULT_RESULTS = "benchmark_results.json"
+
+DEFAULT_SIZES = "10k,100k,500k,5M"
+DEFAULT_TOLERANCE = 0.25
+
+# Absolute slack on top of the tolerance, so sub-second cases don't flap on noise
+MIN_REGRESSION = {"wall_s": 0.1, "peak_rss_mb": 5.0}
+
+# Fixed seed and date so every run generates exactly the same files
+BENCH_SEED = 20260101
+BENCH_DATE = "2026-01-30"
+
+sys.path.insert(0, SCRIPTS_DIR)
+
+from generate_error_scenarios import ERROR_TYPES  # noqa: E402
+
+
+class Case(NamedTuple):
+    """One benchmarked configuration; `kwargs` go to the script's generate_csv.
+
+    A validator case has the (script, kwargs) of the generator whose file it
+    checks as `source`; its `kwargs` then go to validate_file.
+    """
+    name: str
+    script: str
+    kwargs: Dict[str, object]
+    source: Optional[Tuple[str, Dict[str, object]]] = None
+
+
+def build_cases() -> List[Case]:
+    """Every mode of both generators."""
+    cases = [
+        Case("writeoff/default", "generate_bulk_writeoff", {}),
+        Case("writeoff/unbalanced", "generate_bulk_writeoff", {"unbalanced": True}),
+        Case("writeoff/no-writeoff-accounts", "generate_bulk_writeoff", {"use_writeoff_accounts": False}),
+        Case("errors/mixed", "generate_error_scenarios", {"error_percent": 10.0}),
+        Case("errors/mixed-shuffle", "generate_error_scenarios", {"error_percent": 10.0, "shuffle": True}),
+    ]
+    # Each error type on every entry, so the mutator's own cost is what's measured
+    for error_type in ERROR_TYPES:
+        cases.append(Case(
+            f"errors/{error_type}", "generate_error_scenarios",
+            {"error_percent": 100.0, "error_type": error_type, "shuffle": True}
+        ))
+    # The validator in one process, then with its default of a worker per CPU
+    sources = {
+        "writeoff": ("generate_bulk_writeoff", {}),
+        "errors": ("generate_error_scenarios", {"error_percent": 10.0, "shuffle": True}),
+    }
+    for name, source in sources.items():
+        cases.append(Case(f"validate/{name}", "validate_bulk_csv", {"workers": 1}, source))
+        cases.append(Case(f"validate/{name}-parallel", "validate_bulk_csv", {}, source))
+    return cases
+
+
+def parse_size(text: str) -> int:
+    """'10k' -> 10000, '5M' -> 5000000, '250' -> 250."""
+    text = text.strip()
+    multiplier = {"k": 1000, "m": 1000 * 1000}.get(text[-1:].lower(), 1)
+    if multiplier != 1:
+        text = text[:-1]
+    return int(float(text) * multiplier)
+
+
+def format_size(entries: int) -> str:
+    if entries % 1000000 == 0:
+        return f"{entries // 1000000}M"
+    if entries % 1000 == 0:
+        return f"{entries // 1000}k"
+    return str(entries)
+
+
+def case_key(case_name: str, entries: int) -> str:
+    return f"{case_name}/{format_size(entries)}"
+
+
+# =============================================================================
+# CHILD PROCESS: run one case
+# =============================================================================
+
+def generate(script: str, kwargs: Dict[str, object], entries: int, output_path: str) -> None:
+    module = __import__(script)
+    module.generate_csv(entries, output_path, **dict(kwargs, accounting_date=BENCH_DATE, seed=BENCH_SEED))
+
+
+def run_case_in_process(case: Case, entries: int) -> Dict[str, float]:
+    """Generate one file (and validate it, for a validator case) and measure it.
+    Runs inside the child process."""
+    with tempfile.TemporaryDirectory() as tmp:
+        output_path = os.path.join(tmp, "bench.csv")
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            if case.source is None:
+                started = time.perf_counter()
+                generate(case.script, case.kwargs, entries, output_path)
+            else:
+                # Only the validation is timed; peak RSS is this process's, not its workers'
+                generate(*case.source, entries, output_path)
+                validator = __import__(case.script)
+                started = time.perf_counter()
+                validator.validate_file(output_path, date.fromisoformat(BENCH_DATE), **case.kwargs)
+            wall = time.perf_counter() - started
+        size = os.path.getsize(output_path)
+
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak_rss_mb = peak_rss / (1024 * 1024) if sys.platform == "darwin" else peak_rss / 1024
+    rows = entries * 2
+    return {
+        "entries": entries,
+        "rows": rows,
+        "bytes": size,
+        "wall_s": round(wall, 4),
+        "rows_per_s": round(rows / wall, 1),
+        "mb_per_s": round(size / (1024 * 1024) / wall, 2),
+        "peak_rss_mb": round(peak_rss_mb, 1),
+    }
+
+
+def run_case(case: Case, entries: int) -> Dict[str, float]:
+    """Run one case in a fresh interpreter and return its measurements."""
+    completed = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--run-case", case.name, "--run-entries", str(entries)],
+        capture_output=True, text=True, check=False
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"{case_key(case.name, entries)} failed:\n{completed.stderr}")
+    return json.loads(completed.stdout)
+
+
+# =============================================================================
+# BASELINE COMPARISON
+# =============================================================================
+
+def compare(
+    results: Dict[str, Dict[str, float]],
+    baseline: Dict[str, Dict[str, float]],
+    tolerance: float
+) -> List[str]:
+    """Regressions: wall time or peak RSS more than `tolerance` (and MIN_REGRESSION) above the baseline."""
+    regressions = []
+    for key, result in results.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+        for metric, slack in MIN_REGRESSION.items():
+            if result[metric] > max(base[metric] * (1 + tolerance), base[metric] + slack):
+                change = result[metric] / base[metric] - 1
+                regressions.append(
+                    f"{key}: {metric} {result[metric]} vs baseline {base[metric]} (+{change:.0%})"
+                )
+    return regressions
+
+
+def machine_info() -> Dict[str, object]:
+    return {
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def markdown_table(results: Dict[str, Dict[str, float]]) -> str:
+    """README-style table: Entries | Rows | Time | File Size | Rows/s | Peak RSS."""
+    lines = [
+        "| Case | Entries | Rows | Time | File Size | Rows/s | Peak RSS |",
+        "|------|---------|------|------|-----------|--------|----------|",
+    ]
+    for key, r in results.items():
+        case_name = key.rsplit("/", 1)[0]
+        lines.append(
+            f"| {case_name} | {r['entries']:,} | {r['rows']:,} | {r['wall_s']:.2f}s "
+            f"| {r['bytes'] / (1024 * 1024):.0f} MB | {r['rows_per_s']:,.0f} | {r['peak_rss_mb']:.0f} MB |"
+        )
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the bulk journal generators and the validator")
+    parser.add_argument("--sizes", type=str, default=DEFAULT_SIZES,
+                        help=f"Comma-separated entry counts, k/M suffixes allowed (default: {DEFAULT_SIZES})")
+    parser.add_argument("--cases", type=str, default=None,
+                        help="Comma-separated case name prefixes, e.g. writeoff,errors/unbalanced (default: all)")
+    parser.add_argument("--results", type=str, default=DEFAULT_RESULTS,
+                        help=f"Where to write the results JSON (default: {DEFAULT_RESULTS})")
+    parser.add_argument("--baseline", type=str, default=DEFAULT_BASELINE,
+                        help="Baseline JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help=f"Allowed slowdown / RSS growth before a case counts as a regression "
+                             f"(default: {DEFAULT_TOLERANCE})")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="Merge these results into the baseline instead of comparing")
+    parser.add_argument("--markdown", action="store_true",
+                        help="Also print the results as a markdown table")
+    parser.add_argument("--list", action="store_true", help="List the case names and exit")
+    # Internal: run a single case in this process and print its JSON
+    parser.add_argument("--run-case", type=str, default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--run-entries", type=int, default=None, help=argparse.SUPPRESS)
+
+    args = parser.parse_args()
+    cases = build_cases()
+
+    if args.run_case:
+        case = next(c for c in cases if c.name == args.run_case)
+        print(json.dumps(run_case_in_process(case, args.run_entries)))
+        return
+
+    if args.list:
+        for case in cases:
+            print(case.name)
+        return
+
+    if args.cases:
+        prefixes = [p.strip() for p in args.cases.split(",") if p.strip()]
+        cases = [c for c in cases if any(c.name.startswith(p) for p in prefixes)]
+        if not cases:
+            parser.error(f"--cases {args.cases!r} matches no case (see --list)")
+    sizes = [parse_size(s) for s in args.sizes.split(",") if s.strip()]
+
+    results: Dict[str, Dict[str, float]] = {}
+    for entries in sizes:
+        for case in cases:
+            key = case_key(case.name, entries)
+            result = run_case(case, entries)
+            results[key] = result
+            print(f"{key:<45} {result['wall_s']:>9.2f}s {result['rows_per_s']:>12,.0f} rows/s "
+                  f"{result['mb_per_s']:>8.1f} MB/s {result['peak_rss_mb']:>7.1f} MB RSS")
+
+    report = {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "machine": machine_info(),
+        "seed": BENCH_SEED,
+        "results": results,
+    }
+    with open(args.results, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults: {args.results}")
+
+    if args.markdown:
+        print()
+        print(markdown_table(results))
+
+    baseline: Optional[dict] = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    if args.update_baseline:
+        merged = dict(baseline["results"]) if baseline else {}
+        merged.update(results)
+        report["results"] = dict(sorted(merged.items()))
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+        print(f"Baseline updated: {args.baseline}")
+        return
+
+    if baseline is None:
+        print("No baseline to compare against (run with --update-baseline to record one)")
+        return
+
+    if baseline.get("machine") != machine_info():
+        print("Note: baseline was recorded on a different machine/Python; timings may not be comparable")
+    regressions = compare(results, baseline["results"], args.tolerance)
+    missing = [key for key in results if key not in baseline["results"]]
+    if missing:
+        print(f"{len(missing)} case(s) not in the baseline: {', '.join(missing)}")
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {args.tolerance:.0%}:")
+        for line in regressions:
+            print(f"  {line}")
+        sys.exit(1)
+    print(f"\nNo regressions beyond {args.tolerance:.0%} against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
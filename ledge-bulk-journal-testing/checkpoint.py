@@ -0,0 +1,236 @@
+"""
+Crash-safe CSV output with periodic checkpoints, so an interrupted run can resume.
+
+A 50M-entry run that dies at 80% (OOM, ctrl-C, a full disk) used to leave a
+truncated CSV behind. Instead, the generators write to a temp file next to
+the output and only rename it into place once the last entry is written:
+
+    out.csv.partial       the CSV so far (renamed to out.csv on success)
+    out.csv.checkpoint    JSON: the last checkpoint, rewritten atomically
+
+Checkpoints are taken between batches, i.e. on entry boundaries, at most every
+`interval` seconds. Each one fsyncs the partial file first and then records:
+
+    next_entry    first ENTRY_NUM not yet written
+    data_bytes    length of the partial file up to there
+    rng           the random state: entries are keyed on (seed, ENTRY_NUM)
+                  (see entry_rng), so the seed and next_entry are all of it
+    options       everything else the output depends on, to refuse a resume
+                  with different options
+    state         generator extras (outcome counts, the manifest writer, ...)
+
+Resuming truncates the partial file to data_bytes, which drops anything
+written after the last checkpoint (possibly half an entry), and generation
+continues at next_entry. Since every entry only depends on (seed, ENTRY_NUM),
+the finished file is byte-identical to an uninterrupted run with the same seed.
+"""
+
+import json
+import os
+import tempfile
+import time
+from typing import Dict, NamedTuple, Optional
+
+PARTIAL_SUFFIX = ".partial"
+CHECKPOINT_SUFFIX = ".checkpoint"
+VERSION = 1
+
+# Seconds between checkpoints; each costs an fsync of the data written since the last
+DEFAULT_CHECKPOINT_INTERVAL = 30.0
+
+
+def partial_path(output_path: str) -> str:
+    """Temp file the CSV is written to until it is complete, e.g. out.csv.partial."""
+    return output_path + PARTIAL_SUFFIX
+
+
+def checkpoint_path(output_path: str) -> str:
+    """Checkpoint record of an unfinished run, e.g. out.csv.checkpoint."""
+    return output_path + CHECKPOINT_SUFFIX
+
+
+class Checkpoint(NamedTuple):
+    """One checkpoint of a run (see module docstring)."""
+    next_entry: int
+    data_bytes: int
+    seed: int
+    options: Dict[str, object]
+    state: Dict[str, object] = {}
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "version": VERSION,
+            "next_entry": self.next_entry,
+            "data_bytes": self.data_bytes,
+            "rng": {"kind": "counter", "seed": self.seed, "next_entry": self.next_entry},
+            "options": self.options,
+            "state": self.state,
+        }
+
+    @classmethod
+    def from_dict(cls, record: Dict[str, object]) -> "Checkpoint":
+        if record.get("version") != VERSION:
+            raise ValueError(f"Unsupported checkpoint version: {record.get('version')!r}")
+        return cls(
+            record["next_entry"], record["data_bytes"], record["rng"]["seed"],
+            record["options"], record.get("state", {})
+        )
+
+
+def read_checkpoint(output_path: str) -> Optional[Checkpoint]:
+    """The checkpoint of an unfinished run writing output_path, or None if there isn't one.
+
+    Raises ValueError if the checkpoint exists but its partial file is gone or
+    shorter than the checkpoint says.
+    """
+    path = checkpoint_path(output_path)
+    try:
+        with open(path) as f:
+            checkpoint = Checkpoint.from_dict(json.load(f))
+    except FileNotFoundError:
+        return None
+    except (KeyError, TypeError, json.JSONDecodeError) as e:
+        raise ValueError(f"{path}: not a valid checkpoint ({e})") from None
+    partial = partial_path(output_path)
+    if not os.path.exists(partial) or os.path.getsize(partial) < checkpoint.data_bytes:
+        raise ValueError(f"{path}: {partial} is missing or shorter than the checkpoint")
+    return checkpoint
+
+
+def option_mismatches(checkpoint: Checkpoint, options: Dict[str, object]) -> Dict[str, tuple]:
+    """{option: (checkpointed, requested)} for every option that differs."""
+    # Round-trip through JSON so tuples and lists compare equal
+    requested = json.loads(json.dumps(options))
+    names = sorted(set(checkpoint.options) | set(requested))
+    return {
+        name: (checkpoint.options.get(name), requested.get(name))
+        for name in names if checkpoint.options.get(name) != requested.get(name)
+    }
+
+
+def check_resume(checkpoint: Checkpoint, seed: int, options: Dict[str, object]) -> None:
+    """Raise ValueError unless a run with `seed` and `options` continues the checkpointed file."""
+    mismatches = option_mismatches(checkpoint, options)
+    if seed != checkpoint.seed:
+        mismatches["seed"] = (checkpoint.seed, seed)
+    if mismatches:
+        details = ", ".join(f"{name} {old!r} -> {new!r}" for name, (old, new) in sorted(mismatches.items()))
+        raise ValueError(f"Cannot resume: the checkpoint was written with other options ({details})")
+
+
+def write_atomic(path: str, *chunks: bytes) -> None:
+    """Write then rename, so a crash mid-write leaves the previous file intact."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for chunk in chunks:
+                f.write(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class CheckpointedFile:
+    """Plain binary output written via a temp file, with checkpoints (see module docstring).
+
+    Has the write() / close() / raw_bytes / name interface of
+    compressed_output.OutputFile. close() only renames the temp file into place
+    after commit(); leaving the `with` block on an exception keeps the temp
+    file and the last checkpoint, for a later resume.
+
+    Args:
+        output_path: Final path of the CSV
+        seed, options: Recorded in every checkpoint (see Checkpoint)
+        interval: Seconds between checkpoints; None or 0 for none (the temp
+                  file and the rename still apply)
+        resume_from: Checkpoint to continue from; the temp file is truncated
+                     to its data_bytes
+    """
+
+    def __init__(
+        self,
+        output_path: str,
+        seed: int,
+        options: Dict[str, object],
+        interval: Optional[float] = DEFAULT_CHECKPOINT_INTERVAL,
+        resume_from: Optional[Checkpoint] = None
+    ):
+        self.name = output_path
+        self.seed = seed
+        self.options = options
+        self.interval = interval
+        self._partial = partial_path(output_path)
+        self._checkpoint = checkpoint_path(output_path)
+        self._committed = False
+        if resume_from is not None:
+            self._file = open(self._partial, "r+b")
+            self._file.truncate(resume_from.data_bytes)
+            self._file.seek(resume_from.data_bytes)
+            self.raw_bytes = resume_from.data_bytes
+        else:
+            self._file = open(self._partial, "wb")
+            self.raw_bytes = 0
+            if os.path.exists(self._checkpoint):
+                # A fresh run over an unfinished one: its checkpoint no longer applies
+                os.remove(self._checkpoint)
+        self._next_checkpoint = time.monotonic() + interval if interval else None
+
+    def write(self, data: bytes) -> int:
+        self._file.write(data)
+        self.raw_bytes += len(data)
+        return len(data)
+
+    def checkpoint_due(self) -> bool:
+        return self._next_checkpoint is not None and time.monotonic() >= self._next_checkpoint
+
+    def checkpoint(self, next_entry: int, state: Optional[Dict[str, object]] = None) -> None:
+        """Record that everything before ENTRY_NUM next_entry is written (call between batches)."""
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        record = Checkpoint(next_entry, self.raw_bytes, self.seed, self.options, state or {})
+        write_atomic(self._checkpoint, json.dumps(record.to_dict()).encode())
+        if self.interval:
+            self._next_checkpoint = time.monotonic() + self.interval
+
+    def commit(self) -> None:
+        """Mark the output complete: close() will rename it into place."""
+        self._committed = True
+
+    def close(self) -> None:
+        if self._file.closed:
+            return
+        if not self._committed:
+            self._file.close()
+            return
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        os.replace(self._partial, self.name)
+        if os.path.exists(self._checkpoint):
+            os.remove(self._checkpoint)
+
+    def __enter__(self) -> "CheckpointedFile":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+
+# =============================================================================
+# CLI
+# =============================================================================
+
+def add_checkpoint_arguments(parser) -> None:
+    """The --resume and --checkpoint-interval options."""
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue the interrupted run that left OUTPUT.checkpoint "
+                             "(same options; its seed is reused; single plain CSV only)")
+    parser.add_argument("--checkpoint-interval", type=float, default=DEFAULT_CHECKPOINT_INTERVAL,
+                        metavar="SECONDS",
+                        help="Seconds between checkpoints of a plain CSV "
+                             f"(default: {DEFAULT_CHECKPOINT_INTERVAL:g}; 0 for none)")
@@ -0,0 +1,225 @@
+"""
+Columnar (Parquet / Arrow IPC) output for the bulk journal generators.
+
+Analysing a generated file (sums by ASSET_ID and SUB_ACCT, counts by error
+type, ...) is much faster from a columnar file than from re-parsing CSV text.
+ColumnarWriter writes the same logical schema as the CSV (CSV_HEADERS) as
+Arrow record batches, one generation batch at a time:
+
+    ENTRY_NUM                int64
+    ENTERED_DR, ENTERED_CR   decimal128(38, 10), null where the CSV field is empty
+    every other column       dictionary<int32, string>
+
+Every text column is low-cardinality (a few hundred accounts at most, most
+columns constant), so they are all dictionary-encoded. Each column keeps one
+dictionary for the whole file that only ever grows, so batches are written as
+dictionary deltas and the Arrow IPC file format accepts them.
+
+Memory is bounded by one Parquet row group (ROW_GROUP_ROWS rows).
+
+Needs the optional `pyarrow` package (pip install pyarrow); it is imported
+only when a ColumnarWriter is created.
+"""
+
+import os
+from typing import Dict, List, Optional, Sequence, Union
+
+from amount_engine import AMOUNT_DECIMALS, parse_scaled
+
+FORMATS: List[str] = ["parquet", "arrow"]
+
+SUFFIXES = {
+    "parquet": ".parquet",
+    "arrow": ".arrow",
+}
+
+INTEGER_COLUMNS = ("ENTRY_NUM",)
+AMOUNT_COLUMNS = ("ENTERED_DR", "ENTERED_CR")
+AMOUNT_PRECISION = 38
+
+# Parquet row group size; batches are buffered up to this many rows
+ROW_GROUP_ROWS = 128 * 1024
+
+# A column is a list of values, or a single string when every row has that value
+Column = Union[Sequence, str]
+
+
+def columnar_path(output_path: str, fmt: str) -> str:
+    """Path of the columnar file written next to a CSV, e.g. out.csv -> out.parquet."""
+    root, ext = os.path.splitext(output_path)
+    return root + SUFFIXES[fmt]
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.compute  # noqa: F401 - used as pyarrow.compute
+    except ImportError:
+        raise ImportError("Parquet/Arrow output needs the pyarrow package: pip install pyarrow") from None
+    return pyarrow
+
+
+def arrow_schema(headers: Sequence[str]):
+    """Arrow schema for the CSV_HEADERS columns (see module docstring)."""
+    pa = _require_pyarrow()
+    fields = []
+    for name in headers:
+        if name in INTEGER_COLUMNS:
+            fields.append(pa.field(name, pa.int64(), nullable=False))
+        elif name in AMOUNT_COLUMNS:
+            fields.append(pa.field(name, pa.decimal128(AMOUNT_PRECISION, AMOUNT_DECIMALS)))
+        else:
+            fields.append(pa.field(name, pa.dictionary(pa.int32(), pa.string()), nullable=False))
+    return pa.schema(fields)
+
+
+def rows_to_columns(rows: Sequence[Sequence[str]], headers: Sequence[str]) -> Dict[str, Column]:
+    """Transpose CSV rows (lists of strings) into columns for ColumnarWriter.write_columns.
+
+    ENTRY_NUM becomes int and the amounts become scaled integers (None if empty).
+    """
+    columns: Dict[str, Column] = {}
+    transposed = list(zip(*rows)) if rows else [()] * len(headers)
+    for name, values in zip(headers, transposed):
+        if name in INTEGER_COLUMNS:
+            columns[name] = [int(v) for v in values]
+        elif name in AMOUNT_COLUMNS:
+            columns[name] = [parse_scaled(v) for v in values]
+        else:
+            columns[name] = values
+    return columns
+
+
+class ColumnarWriter:
+    """Stream column batches into a Parquet or Arrow IPC file.
+
+    Args:
+        path: Output path (see columnar_path)
+        headers: Column names, in CSV order
+        fmt: 'parquet' or 'arrow'
+        row_group_rows: Parquet row group size (batches are buffered up to it)
+    """
+
+    def __init__(
+        self,
+        path: str,
+        headers: Sequence[str],
+        fmt: str = "parquet",
+        row_group_rows: int = ROW_GROUP_ROWS
+    ):
+        if fmt not in SUFFIXES:
+            raise ValueError(f"Unknown columnar format {fmt!r}, expected one of {FORMATS}")
+        pa = self._pa = _require_pyarrow()
+        self.path = path
+        self.fmt = fmt
+        self.headers = list(headers)
+        self.schema = arrow_schema(headers)
+        self.rows_written = 0
+        self._row_group_rows = row_group_rows
+        self._pending: list = []
+        self._pending_rows = 0
+        # Per text column: value -> index, and the Arrow dictionary built from it
+        self._dictionaries: Dict[str, Dict[str, int]] = {
+            name: {} for name in self.headers
+            if name not in INTEGER_COLUMNS and name not in AMOUNT_COLUMNS
+        }
+        self._dictionary_arrays: Dict[str, object] = {}
+
+        if fmt == "parquet":
+            import pyarrow.parquet as pq
+            self._writer = pq.ParquetWriter(path, self.schema)
+        else:
+            self._writer = pa.ipc.new_file(
+                path, self.schema, options=pa.ipc.IpcWriteOptions(emit_dictionary_deltas=True)
+            )
+
+    # -- column conversion ---------------------------------------------------
+
+    def _dictionary_column(self, name: str, values: Column, num_rows: int):
+        """Dictionary-encode against the column's file-wide dictionary."""
+        pa = self._pa
+        known = self._dictionaries[name]
+        size_before = len(known)
+
+        if isinstance(values, str):
+            index = known.setdefault(values, len(known))
+            indices = pa.repeat(pa.scalar(index, pa.int32()), num_rows)
+        else:
+            # Encode in C against a batch-local dictionary, then remap the
+            # (few) local entries onto the file-wide one
+            local = pa.array(values, pa.string()).dictionary_encode()
+            mapping = [known.setdefault(v, len(known)) for v in local.dictionary.to_pylist()]
+            indices = pa.compute.take(pa.array(mapping, pa.int32()), local.indices)
+
+        if len(known) != size_before or name not in self._dictionary_arrays:
+            self._dictionary_arrays[name] = pa.array(list(known), pa.string())
+        return pa.DictionaryArray.from_arrays(indices, self._dictionary_arrays[name])
+
+    def _amount_column(self, values: Sequence[Optional[int]]):
+        """Scaled integers -> decimal128 (same unscaled value, scale AMOUNT_DECIMALS)."""
+        pa = self._pa
+        data = b"".join((v or 0).to_bytes(16, "little", signed=True) for v in values)
+        validity = None
+        null_count = 0
+        if None in values:
+            valid = pa.array([v is not None for v in values], pa.bool_())
+            validity = valid.buffers()[1]
+            null_count = len(values) - valid.true_count
+        return pa.Array.from_buffers(
+            self.schema.field(AMOUNT_COLUMNS[0]).type, len(values),
+            [validity, pa.py_buffer(data)], null_count=null_count
+        )
+
+    # -- writing -------------------------------------------------------------
+
+    def write_columns(self, columns: Dict[str, Column]) -> None:
+        """Write one batch. Values per column as produced by rows_to_columns;
+        a plain string stands for a column that is constant over the batch."""
+        pa = self._pa
+        num_rows = len(columns[INTEGER_COLUMNS[0]])
+        if not num_rows:
+            return
+        arrays = []
+        for name in self.headers:
+            values = columns[name]
+            if name in INTEGER_COLUMNS:
+                arrays.append(pa.array(values, pa.int64()))
+            elif name in AMOUNT_COLUMNS:
+                arrays.append(self._amount_column(values))
+            else:
+                arrays.append(self._dictionary_column(name, values, num_rows))
+        batch = pa.record_batch(arrays, schema=self.schema)
+        self.rows_written += num_rows
+
+        if self.fmt == "arrow":
+            self._writer.write_batch(batch)
+            return
+        self._pending.append(batch)
+        self._pending_rows += num_rows
+        if self._pending_rows >= self._row_group_rows:
+            self._flush()
+
+    def write_rows(self, rows: Sequence[Sequence[str]]) -> None:
+        """Write one batch of CSV rows (lists of strings)."""
+        self.write_columns(rows_to_columns(rows, self.headers))
+
+    def _flush(self) -> None:
+        if self._pending:
+            table = self._pa.Table.from_batches(self._pending, schema=self.schema)
+            self._writer.write_table(table, row_group_size=self._pending_rows)
+            self._pending = []
+            self._pending_rows = 0
+
+    def close(self) -> str:
+        """Finish the file and return its path."""
+        if self._writer is not None:
+            self._flush()
+            self._writer.close()
+            self._writer = None
+        return self.path
+
+    def __enter__(self) -> "ColumnarWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -0,0 +1,247 @@
+"""
+Streaming compressed output for the bulk journal generators.
+
+A 500k-entry file is ~150 MB of very repetitive text, so fixtures are usually
+stored and shipped compressed. Rather than writing the CSV and compressing it
+afterwards, OutputFile compresses as it goes:
+
+    generator thread  --bytes chunks-->  bounded queue  -->  compressor thread  -->  out.csv.gz
+
+The queue holds at most a few batches, so memory stays bounded and generation
+overlaps with compression (zlib and lzma release the GIL while they work, and
+zstd is additionally multithreaded). The uncompressed file never touches disk.
+
+Formats:
+    gzip  zlib, stdlib             -> .gz
+    xz    lzma, stdlib             -> .xz
+    zstd  optional `zstandard` package (pip install zstandard) -> .zst
+
+All three formats allow concatenating independently compressed streams, which
+is what lets --workers shards be compressed in parallel and stitched by append.
+"""
+
+import gzip
+import io
+import lzma
+import queue
+import threading
+import zlib
+from typing import BinaryIO, List, Optional
+
+COMPRESSIONS: List[str] = ["gzip", "zstd", "xz"]
+
+SUFFIXES = {
+    "gzip": ".gz",
+    "zstd": ".zst",
+    "xz": ".xz",
+}
+
+DEFAULT_LEVELS = {
+    "gzip": 6,
+    "zstd": 3,
+    "xz": 6,
+}
+
+# Chunks (one generation batch each, ~1 MB) buffered between the threads
+DEFAULT_QUEUE_CHUNKS = 16
+
+_MB = 1024 * 1024
+
+
+def compressed_path(path: str, compress: Optional[str]) -> str:
+    """Path the output is actually written to, e.g. out.csv -> out.csv.gz."""
+    if not compress:
+        return path
+    suffix = SUFFIXES[compress]
+    return path if path.endswith(suffix) else path + suffix
+
+
+def _new_compressor(compress: str, level: Optional[int]):
+    """A streaming compressor object with compress(bytes) and flush() methods."""
+    if compress not in SUFFIXES:
+        raise ValueError(f"Unknown compression {compress!r}, expected one of {COMPRESSIONS}")
+    if level is None:
+        level = DEFAULT_LEVELS[compress]
+
+    if compress == "gzip":
+        # wbits=31: gzip container; the header mtime is 0, so output is reproducible
+        return zlib.compressobj(level, zlib.DEFLATED, 31)
+    if compress == "xz":
+        return lzma.LZMACompressor(format=lzma.FORMAT_XZ, preset=level)
+
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError("zstd output needs the zstandard package: pip install zstandard") from None
+    # threads=-1: one compression thread per CPU
+    return zstandard.ZstdCompressor(level=level, threads=-1).compressobj()
+
+
+def open_input(path: str) -> BinaryIO:
+    """Open a generated file for reading, decompressing by suffix (.gz/.zst/.xz).
+
+    Concatenated streams (stitched --workers shards) read back as one file.
+    """
+    if path.endswith(SUFFIXES["gzip"]):
+        return gzip.open(path, "rb")
+    if path.endswith(SUFFIXES["xz"]):
+        return lzma.open(path, "rb")
+    if path.endswith(SUFFIXES["zstd"]):
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError("Reading .zst files needs the zstandard package: pip install zstandard") from None
+        reader = zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), read_across_frames=True)
+        return io.BufferedReader(reader)
+    return open(path, "rb")
+
+
+class OutputFile:
+    """Binary output file that is optionally compressed on a background thread.
+
+    Supports write(bytes), flush() and close() (and the context manager
+    protocol), so it can be handed to write_entries() or used as a
+    RotatingWriter opener.
+
+    Args:
+        path: Output path; the compression suffix is appended (see compressed_path)
+        compress: None for plain output, or one of COMPRESSIONS
+        level: Compression level (default: DEFAULT_LEVELS for the format)
+        max_queued: Maximum chunks waiting for the compressor thread
+    """
+
+    def __init__(
+        self,
+        path: str,
+        compress: Optional[str] = None,
+        level: Optional[int] = None,
+        max_queued: int = DEFAULT_QUEUE_CHUNKS
+    ):
+        # Build the compressor first so a missing zstandard fails before any file exists
+        self._compressor = _new_compressor(compress, level) if compress else None
+        self.compress = compress
+        self.level = level
+        self.name = compressed_path(path, compress)
+        self.raw_bytes = 0
+        self.stored_bytes = 0
+        self._file = open(self.name, 'wb')
+        self._closed = False
+        self._error: Optional[BaseException] = None
+        self._queue: Optional[queue.Queue] = None
+        self._thread: Optional[threading.Thread] = None
+        if compress:
+            self._queue = queue.Queue(maxsize=max_queued)
+            self._thread = threading.Thread(
+                target=self._run, name=f"{compress}-compressor", daemon=True
+            )
+            self._thread.start()
+
+    def _store(self, data: bytes) -> None:
+        if data:
+            self._file.write(data)
+            self.stored_bytes += len(data)
+
+    def _sync(self) -> None:
+        """Store everything compressed so far so that the file decompresses up to the last write."""
+        if self.compress == "gzip":
+            self._store(self._compressor.flush(zlib.Z_SYNC_FLUSH))
+        elif self.compress == "zstd":
+            import zstandard
+            self._store(self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK))
+        else:
+            # lzma has no sync flush: end this stream and start another (streams concatenate)
+            self._store(self._compressor.flush())
+            self._compressor = _new_compressor(self.compress, self.level)
+        self._file.flush()
+
+    def _run(self) -> None:
+        """Compressor thread: drain the queue until the None sentinel.
+
+        A threading.Event in the queue is a flush() request, set once it is done.
+        """
+        try:
+            while True:
+                chunk = self._queue.get()
+                if chunk is None:
+                    self._store(self._compressor.flush())
+                    return
+                if isinstance(chunk, threading.Event):
+                    self._sync()
+                    chunk.set()
+                    continue
+                self._store(self._compressor.compress(chunk))
+        except BaseException as exc:
+            self._error = exc
+            # Keep consuming so a blocked writer wakes up and sees the error
+            while True:
+                chunk = self._queue.get()
+                if chunk is None:
+                    return
+                if isinstance(chunk, threading.Event):
+                    chunk.set()
+
+    def write(self, data: bytes) -> int:
+        if self._error is not None:
+            raise self._error
+        if self._queue is None:
+            self._store(data)
+        else:
+            self._queue.put(data)
+        self.raw_bytes += len(data)
+        return len(data)
+
+    def flush(self) -> None:
+        """Push every byte written so far through the compressor and into the file.
+
+        Waits for the compressor thread, so a consumer tailing the file (or a
+        crash right after) sees every complete write.
+        """
+        if self._error is not None:
+            raise self._error
+        if self._queue is not None:
+            done = threading.Event()
+            self._queue.put(done)
+            done.wait()
+            if self._error is not None:
+                raise self._error
+        else:
+            self._file.flush()
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+        self._file.close()
+        if self._error is not None:
+            raise self._error
+
+    def __enter__(self) -> "OutputFile":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def describe_throughput(
+    raw_bytes: int,
+    stored_bytes: int,
+    seconds: float,
+    compress: Optional[str] = None
+) -> List[str]:
+    """End-of-run summary lines: sizes, compression ratio and effective MB/s.
+
+    MB/s is uncompressed CSV bytes produced per wall-clock second, including
+    compression time, so runs with and without --compress compare directly.
+    """
+    raw_mb = raw_bytes / _MB
+    rate = raw_mb / seconds if seconds > 0 else float("inf")
+    if not compress:
+        return [f"Throughput: {rate:.1f} MB/s"]
+    ratio = raw_bytes / stored_bytes if stored_bytes else float("inf")
+    return [
+        f"Compression: {compress}, {raw_mb:.2f} MB -> {stored_bytes / _MB:.2f} MB ({ratio:.1f}x)",
+        f"Throughput: {rate:.1f} MB/s uncompressed",
+    ]
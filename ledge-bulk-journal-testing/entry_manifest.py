@@ -0,0 +1,476 @@
+#!/usr/bin/env python3
+"""
+Expected-outcome manifests for generated bulk journal files.
+
+generate_error_scenarios.py writes a manifest next to its CSV (out.csv ->
+out.manifest) in the same pass as the CSV itself. For every ENTRY_NUM it records:
+
+    outcome         'valid' or the injected error type
+    failure point   where that error type is expected to be rejected
+    location        part file, byte offset and length of the entry's lines
+
+so checking a load result against what was meant to fail doesn't need the
+LINE_DESCRIPTION text or a second read of the CSV.
+
+Entries are stored in blocks of BLOCK_SIZE (one generation batch each):
+
+    outcome runs    run-length encoded, one uint16 per run: the run's offset in
+                    the block (12 bits) and its outcome code (4 bits). Errors
+                    are sparse, so a 50M-entry file with 1% errors needs ~2 MB.
+    layout          per block the shortest entry length, a uint32 checkpoint
+                    every CHECKPOINT_EVERY entries and one uint8/16/32 per entry
+                    (its length minus the shortest): ~1 byte per entry.
+
+Any entry's outcome is a bisect over its block's runs and its offset is a
+checkpoint plus at most CHECKPOINT_EVERY - 1 small deltas, so lookups take
+constant time however large the file. Offsets are into the uncompressed
+CSV, counting each part's header.
+
+File layout (little-endian; sections 8-byte aligned):
+
+    b"LMAN", u32 version
+    layout records, one per block: u32 checkpoints, then the length deltas
+    runs: u16[]
+    blocks: u64 data offset[], u64 layout position[], u32 first run[] (+1 end),
+            u32 shortest length[], u8 delta width[]
+    JSON footer (outcomes, counts, parts, run options, section offsets)
+    u64 footer offset, u32 footer length, b"LMAN"
+
+Usage:
+    python entry_manifest.py scattered.manifest
+    python entry_manifest.py scattered.manifest --entry 4321
+    python entry_manifest.py scattered.manifest --runs --outcome unbalanced
+"""
+
+import argparse
+import base64
+import json
+import mmap
+import os
+import struct
+from array import array
+from bisect import bisect_right
+from collections import Counter
+from itertools import accumulate, compress, islice, repeat
+from operator import lshift, ne, or_, sub
+from typing import BinaryIO, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+MAGIC = b"LMAN"
+VERSION = 1
+
+# Entries per block; generation batches (amount_engine.DEFAULT_BATCH_SIZE) are one block each
+BLOCK_SIZE = 4096
+
+# Entries between layout checkpoints: an offset lookup adds at most this many deltas
+CHECKPOINT_EVERY = 64
+
+VALID = "valid"
+
+_CODE_BITS = 4
+_CODE_MASK = (1 << _CODE_BITS) - 1
+MAX_OUTCOMES = 1 << _CODE_BITS
+
+_PRELUDE = struct.Struct("<4sI")
+_TRAILER = struct.Struct("<QI4s")
+
+# array typecode for each delta width
+_WIDTH_TYPES = {1: "B", 2: "H", 4: "I"}
+
+
+def manifest_path(output_path: str) -> str:
+    """Path of the manifest written next to a CSV, e.g. out.csv -> out.manifest."""
+    root, _ = os.path.splitext(output_path)
+    return root + ".manifest"
+
+
+def _pad(f: BinaryIO) -> None:
+    """Pad a file being written to the next multiple of 8 bytes."""
+    f.write(b"\0" * (-f.tell() % 8))
+
+
+class EntryLocation(NamedTuple):
+    """Where an entry's lines are: part file, byte offset in it, length in bytes."""
+    path: Optional[str]
+    offset: int
+    length: int
+
+
+class OutcomeRun(NamedTuple):
+    """A run of consecutive entries with the same expected outcome."""
+    first_entry: int
+    last_entry: int
+    outcome: str
+
+
+# =============================================================================
+# WRITING
+# =============================================================================
+
+class ManifestWriter:
+    """Writes a manifest one generation batch at a time.
+
+    Args:
+        path: Manifest path (see manifest_path)
+        outcomes: (outcome, expected failure point) per outcome code; the first
+                  must be VALID. At most MAX_OUTCOMES.
+        block_size: Entries per batch; every add_batch() but the last must
+                    have exactly this many
+        state: A state() taken earlier of a writer for the same path, to
+               continue that manifest (e.g. when resuming a checkpointed run)
+    """
+
+    # Per-block arrays, saved by state() as raw bytes
+    _STATE_ARRAYS = ("_runs", "_offsets", "_layout_pos", "_run_start", "_base", "_width")
+
+    def __init__(
+        self,
+        path: str,
+        outcomes: Sequence[Tuple[str, Optional[str]]],
+        block_size: int = BLOCK_SIZE,
+        state: Optional[Dict[str, object]] = None
+    ):
+        if not outcomes or outcomes[0][0] != VALID:
+            raise ValueError(f"The first outcome must be {VALID!r}")
+        if len(outcomes) > MAX_OUTCOMES:
+            raise ValueError(f"At most {MAX_OUTCOMES} outcomes fit in a manifest, got {len(outcomes)}")
+        if not 0 < block_size <= 1 << (16 - _CODE_BITS):
+            raise ValueError(f"block_size must be in 1..{1 << (16 - _CODE_BITS)}, got {block_size}")
+        self.path = path
+        self.outcomes = [tuple(outcome) for outcome in outcomes]
+        self.block_size = block_size
+        self._codes = {name: code for code, (name, _) in enumerate(self.outcomes)}
+        self._codes[None] = 0
+        self.counts = {name: 0 for name, _ in self.outcomes}
+        self.entries = 0
+        self.data_bytes = 0
+        self._layout = True
+        self._last_short = False
+        self._runs = array("H")
+        self._offsets = array("Q")
+        self._layout_pos = array("Q")
+        self._run_start = array("I")
+        self._base = array("I")
+        self._width = array("B")
+        if state is not None:
+            self._restore(state)
+            return
+        self._file = open(path, "wb")
+        self._file.write(_PRELUDE.pack(MAGIC, VERSION))
+
+    def state(self) -> Dict[str, object]:
+        """Everything needed to continue this manifest later, as JSON-able values.
+
+        What is written so far is flushed and synced first, so the state can be
+        recorded in a generation checkpoint (see checkpoint).
+        """
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        return {
+            "file_bytes": self._file.tell(),
+            "entries": self.entries,
+            "data_bytes": self.data_bytes,
+            "counts": self.counts,
+            "layout": self._layout,
+            "last_short": self._last_short,
+            "arrays": {
+                name: base64.b64encode(getattr(self, name).tobytes()).decode("ascii")
+                for name in self._STATE_ARRAYS
+            },
+        }
+
+    def _restore(self, state: Dict[str, object]) -> None:
+        self.entries = state["entries"]
+        self.data_bytes = state["data_bytes"]
+        self.counts = dict(state["counts"])
+        self._layout = state["layout"]
+        self._last_short = state["last_short"]
+        for name in self._STATE_ARRAYS:
+            getattr(self, name).frombytes(base64.b64decode(state["arrays"][name]))
+        # Drop anything written after the state was taken
+        self._file = open(self.path, "r+b")
+        self._file.truncate(state["file_bytes"])
+        self._file.seek(state["file_bytes"])
+
+    def add_batch(self, outcomes: Sequence[Optional[str]], lengths: Optional[Sequence[int]] = None) -> None:
+        """Record one batch: each entry's outcome (None or VALID for valid) and,
+        if a CSV is written, the encoded length of each entry in bytes."""
+        if self._last_short:
+            raise ValueError(f"Only the last batch may have fewer than {self.block_size} entries")
+        if not outcomes or len(outcomes) > self.block_size:
+            raise ValueError(f"Batches must have 1..{self.block_size} entries, got {len(outcomes)}")
+        self._last_short = len(outcomes) < self.block_size
+        if lengths is None:
+            self._layout = False
+
+        # Outcome runs, cut at the block boundary; run starts are found in C
+        # (map/compress) since most neighbouring entries have the same outcome
+        count = len(outcomes)
+        starts = [0]
+        starts.extend(compress(range(1, count), map(ne, outcomes, islice(outcomes, 1, None))))
+        self._run_start.append(len(self._runs))
+        run_codes = map(self._codes.__getitem__, map(outcomes.__getitem__, starts))
+        self._runs.extend(map(or_, map(lshift, starts, repeat(_CODE_BITS)), run_codes))
+        for outcome, num in Counter(outcomes).items():
+            self.counts[self.outcomes[self._codes[outcome]][0]] += num
+        self.entries += count
+
+        # Layout: checkpoints, then each length relative to the shortest
+        self._offsets.append(self.data_bytes)
+        if not self._layout:
+            self._layout_pos.append(0)
+            self._base.append(0)
+            self._width.append(0)
+            return
+        if len(lengths) != len(outcomes):
+            raise ValueError(f"Got {len(lengths)} lengths for {len(outcomes)} entries")
+        base = min(lengths)
+        spread = max(lengths) - base
+        width = 1 if spread < 1 << 8 else 2 if spread < 1 << 16 else 4
+        starts = array("I", [0])
+        starts.extend(accumulate(lengths))
+        self._layout_pos.append(self._file.tell())
+        self._base.append(base)
+        self._width.append(width)
+        self._file.write(starts[:-1:CHECKPOINT_EVERY].tobytes())
+        self._file.write(array(_WIDTH_TYPES[width], map(sub, lengths, repeat(base))).tobytes())
+        _pad(self._file)
+        self.data_bytes += starts[-1]
+
+    def close(self, **info: object) -> str:
+        """Write the runs, block table and footer; `info` (parts, seed, ...) goes in the footer."""
+        f = self._file
+        _pad(f)
+        sections: Dict[str, int] = {"runs": f.tell()}
+        f.write(self._runs.tobytes())
+        self._run_start.append(len(self._runs))
+        for name, column in (
+            ("block_offsets", self._offsets),
+            ("block_layout", self._layout_pos),
+            ("block_runs", self._run_start),
+            ("block_base", self._base),
+            ("block_width", self._width),
+        ):
+            _pad(f)
+            sections[name] = f.tell()
+            f.write(column.tobytes())
+
+        footer = {
+            "version": VERSION,
+            "entries": self.entries,
+            "block_size": self.block_size,
+            "checkpoint_every": CHECKPOINT_EVERY,
+            "num_blocks": len(self._offsets),
+            "num_runs": len(self._runs),
+            "layout": self._layout and self.entries > 0,
+            "data_bytes": self.data_bytes,
+            "outcomes": [list(outcome) for outcome in self.outcomes],
+            "counts": self.counts,
+            "sections": sections,
+        }
+        footer.update(info)
+        encoded = json.dumps(footer).encode()
+        footer_offset = f.tell()
+        f.write(encoded)
+        f.write(_TRAILER.pack(footer_offset, len(encoded), MAGIC))
+        f.close()
+        return self.path
+
+    def __enter__(self) -> "ManifestWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        if not self._file.closed:
+            self.close()
+
+
+# =============================================================================
+# READING
+# =============================================================================
+
+class EntryManifest:
+    """Read-only, memory-mapped view of a manifest.
+
+    footer holds everything written with it: outcomes, counts, parts (path and
+    first ENTRY_NUM of each CSV part), csv_header_bytes and the run options.
+    """
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        data = memoryview(self._map)
+        magic, version = _PRELUDE.unpack_from(data)
+        footer_offset, footer_len, end_magic = _TRAILER.unpack_from(data, len(data) - _TRAILER.size)
+        if magic != MAGIC or end_magic != MAGIC:
+            raise ValueError(f"{path} is not an entry manifest")
+        if version != VERSION:
+            raise ValueError(f"{path} is manifest version {version}, expected {VERSION}")
+        self.path = path
+        self.footer = json.loads(bytes(data[footer_offset:footer_offset + footer_len]))
+        self.entries: int = self.footer["entries"]
+        self.block_size: int = self.footer["block_size"]
+        self.checkpoint_every: int = self.footer["checkpoint_every"]
+        self.outcomes: List[Tuple[str, Optional[str]]] = [tuple(o) for o in self.footer["outcomes"]]
+        self.counts: Dict[str, int] = self.footer["counts"]
+        self.has_layout: bool = self.footer["layout"]
+
+        blocks = self.footer["num_blocks"]
+        sections = self.footer["sections"]
+
+        def column(name: str, fmt: str, count: int) -> memoryview:
+            start = sections[name]
+            return data[start:start + count * struct.calcsize(fmt)].cast(fmt)
+
+        self._data = data
+        self._runs = column("runs", "H", self.footer["num_runs"])
+        self._offsets = column("block_offsets", "Q", blocks)
+        self._layout_pos = column("block_layout", "Q", blocks)
+        self._run_start = column("block_runs", "I", blocks + 1)
+        self._base = column("block_base", "I", blocks)
+        self._width = column("block_width", "B", blocks)
+
+        parts = self.footer.get("parts") or []
+        self._part_paths = [part["path"] for part in parts]
+        self._part_first = [part["first_entry"] for part in parts]
+
+    def __len__(self) -> int:
+        return self.entries
+
+    def close(self) -> None:
+        for view in (self._runs, self._offsets, self._layout_pos, self._run_start, self._base, self._width, self._data):
+            view.release()
+        self._map.close()
+
+    def __enter__(self) -> "EntryManifest":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _index(self, entry_num: int) -> int:
+        if not 1 <= entry_num <= self.entries:
+            raise IndexError(f"ENTRY_NUM must be in 1..{self.entries}, got {entry_num}")
+        return entry_num - 1
+
+    def outcome_code(self, entry_num: int) -> int:
+        block, offset = divmod(self._index(entry_num), self.block_size)
+        runs = self._runs
+        lo, hi = self._run_start[block], self._run_start[block + 1]
+        run = bisect_right(runs, offset << _CODE_BITS | _CODE_MASK, lo, hi) - 1
+        return runs[run] & _CODE_MASK
+
+    def block_outcomes(self, block: int) -> List[str]:
+        """Outcome of every entry of one block (of block_size entries), in order."""
+        names = [name for name, _ in self.outcomes]
+        runs = self._runs[self._run_start[block]:self._run_start[block + 1]]
+        length = min(self.block_size, self.entries - block * self.block_size)
+        outcomes: List[str] = []
+        for i, run in enumerate(runs):
+            end = runs[i + 1] >> _CODE_BITS if i + 1 < len(runs) else length
+            outcomes.extend([names[run & _CODE_MASK]] * (end - (run >> _CODE_BITS)))
+        return outcomes
+
+    def outcome(self, entry_num: int) -> str:
+        """VALID or the error type injected into an entry."""
+        return self.outcomes[self.outcome_code(entry_num)][0]
+
+    def failure_point(self, entry_num: int) -> Optional[str]:
+        """Where an entry is expected to be rejected (None if it should load)."""
+        return self.outcomes[self.outcome_code(entry_num)][1]
+
+    def _data_offset(self, index: int) -> Tuple[int, int]:
+        """(offset in the concatenated data sections, length) of an entry."""
+        block, k = divmod(index, self.block_size)
+        checkpoint, rest = divmod(k, self.checkpoint_every)
+        width = self._width[block]
+        block_len = min(self.block_size, self.entries - block * self.block_size)
+        checkpoints = -(-block_len // self.checkpoint_every)
+        pos = self._layout_pos[block]
+        start = self._data[pos + 4 * checkpoint:pos + 4 * checkpoint + 4].cast("I")[0]
+        deltas_pos = pos + 4 * checkpoints
+        deltas = self._data[
+            deltas_pos + width * (k - rest):deltas_pos + width * (k + 1)
+        ].cast(_WIDTH_TYPES[width])
+        base = self._base[block]
+        offset = self._offsets[block] + start + base * rest + sum(deltas[:rest])
+        return offset, base + deltas[rest]
+
+    def location(self, entry_num: int) -> EntryLocation:
+        """Part file, byte offset and length of an entry's lines in the (uncompressed) CSV."""
+        if not self.has_layout:
+            raise ValueError(f"{self.path} has no layout (no CSV was written with it)")
+        index = self._index(entry_num)
+        offset, length = self._data_offset(index)
+        path = None
+        if self._part_first:
+            part = bisect_right(self._part_first, entry_num) - 1
+            first = self._part_first[part]
+            path = self._part_paths[part]
+            offset -= self._data_offset(first - 1)[0]
+        return EntryLocation(path, offset + self.footer.get("csv_header_bytes", 0), length)
+
+    def runs(self, outcome: Optional[str] = None) -> Iterator[OutcomeRun]:
+        """Runs of consecutive entries with the same outcome (all, or one outcome's), in order."""
+        names = [name for name, _ in self.outcomes]
+        runs = self._runs
+        run_start = self._run_start
+        current_code = None
+        current_first = 1
+        for block in range(len(self._offsets)):
+            block_first = block * self.block_size + 1
+            for run in runs[run_start[block]:run_start[block + 1]]:
+                code = run & _CODE_MASK
+                if code != current_code:
+                    first = block_first + (run >> _CODE_BITS)
+                    if current_code is not None and (outcome is None or names[current_code] == outcome):
+                        yield OutcomeRun(current_first, first - 1, names[current_code])
+                    current_code, current_first = code, first
+        if current_code is not None and (outcome is None or names[current_code] == outcome):
+            yield OutcomeRun(current_first, self.entries, names[current_code])
+
+    def entry_nums(self, outcome: str) -> Iterator[int]:
+        """Every ENTRY_NUM expected to have one outcome, in order."""
+        for run in self.runs(outcome):
+            yield from range(run.first_entry, run.last_entry + 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect an expected-outcome manifest")
+    parser.add_argument("manifest", help="Manifest written by generate_error_scenarios.py (out.manifest)")
+    parser.add_argument("--entry", type=int, action="append", default=[], metavar="ENTRY_NUM",
+                        help="Print this entry's outcome, failure point and location (repeatable)")
+    parser.add_argument("--runs", action="store_true",
+                        help="List runs of entries with the same outcome")
+    parser.add_argument("--outcome", type=str, default=None,
+                        help="With --runs, only list runs of this outcome")
+
+    args = parser.parse_args()
+    with EntryManifest(args.manifest) as manifest:
+        if args.entry:
+            for entry_num in args.entry:
+                line = f"{entry_num}: {manifest.outcome(entry_num)}"
+                failure = manifest.failure_point(entry_num)
+                if failure:
+                    line += f" (expected to fail at: {failure})"
+                if manifest.has_layout:
+                    path, offset, length = manifest.location(entry_num)
+                    line += f" @ {path or 'CSV'} bytes {offset:,}..{offset + length:,}"
+                print(line)
+            return
+        if args.runs:
+            for run in manifest.runs(args.outcome):
+                print(f"{run.first_entry}-{run.last_entry}\t{run.outcome}")
+            return
+
+        footer = manifest.footer
+        print(f"Entries: {manifest.entries:,} in {footer['num_runs']:,} outcome runs "
+              f"({os.path.getsize(args.manifest) / 1024:.1f} KB)")
+        for name, failure in manifest.outcomes:
+            count = manifest.counts.get(name, 0)
+            if count:
+                print(f"  {name:<22} {count:>12,}" + (f"   {failure}" if failure else ""))
+        for part in footer.get("parts") or []:
+            print(f"  part {part['path']} from ENTRY_NUM {part['first_entry']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+What the generators draw entries from, and how.
+
+A run's pool exports (see pool_index), key distributions (key_distributions),
+lines per entry (line_fanout) and, with --unique, its filter of used tuples
+(unique_entries) travel together as one EntryOptions:
+
+    options = EntryOptions.build(pool_file="q2.csv", source_distribution="zipf", lines="1-20/1")
+    for entry in generate_bulk_writeoff.iter_entries(1000, seed=7, entry_options=options):
+        ...
+
+generate_csv / stream_csv build it from their arguments and pass it down
+with the seed to every iterator, writer and worker process. Nothing is kept
+at module level, so one call never draws with options another chose. The
+default, EntryOptions(), is the versioned pools with uniform 1/1 entries.
+"""
+
+from typing import List, NamedTuple, Optional, Tuple, Union
+
+from key_distributions import KeyDistributions, KeySamplers, key_samplers, parse_distributions
+from line_fanout import PAIR, LinesPerEntry, parse_lines_per_entry
+from pool_index import PoolIndex, file_digest, load_pools, resolve_pool_files
+from unique_entries import UniqueTuples
+
+
+class EntryOptions(NamedTuple):
+    """Everything besides the seed and entry layout that decides which entries are drawn."""
+    pool_files: Tuple[str, str] = resolve_pool_files()
+    distributions: KeyDistributions = KeyDistributions()
+    lines: LinesPerEntry = PAIR
+    unique: Optional[UniqueTuples] = None   # claims every entry's tuple (--unique)
+
+    @classmethod
+    def build(
+        cls,
+        pool_file: Optional[str] = None,
+        writeoff_file: Optional[str] = None,
+        asset_distribution: Optional[str] = None,
+        source_distribution: Optional[str] = None,
+        dest_distribution: Optional[str] = None,
+        lines: Union[str, LinesPerEntry, None] = None
+    ) -> "EntryOptions":
+        """From generate_csv's arguments; None keeps the default of each.
+
+        Raises ValueError for a bad distribution or line count spec.
+        """
+        if isinstance(lines, str):
+            lines = parse_lines_per_entry(lines)
+        return cls(
+            resolve_pool_files(pool_file, writeoff_file),
+            parse_distributions(asset_distribution, source_distribution, dest_distribution),
+            PAIR if lines is None else lines,
+        )
+
+    def pools(self) -> PoolIndex:
+        """The PoolIndex of the exports (shared per process, see pool_index.load_pools)."""
+        return load_pools(*self.pool_files)
+
+    def samplers(self) -> KeySamplers:
+        """Alias tables for the skewed draws (see key_distributions.key_samplers)."""
+        return key_samplers(self.pools(), self.distributions)
+
+    def pool_digests(self) -> List[str]:
+        """Content digests of the exports, as checkpoints and unique state record them."""
+        return [file_digest(path) for path in self.pool_files]
+
+
+def entry_options_from_args(parser, args) -> EntryOptions:
+    """EntryOptions from --pool-file, --writeoff-file, the --*-distribution
+    options and --lines-per-entry (where the parser has them); a bad spec is
+    a usage error."""
+    try:
+        return EntryOptions.build(
+            args.pool_file, args.writeoff_file,
+            args.asset_distribution, args.source_distribution, args.dest_distribution,
+            getattr(args, "lines_per_entry", None)
+        )
+    except ValueError as e:
+        parser.error(str(e))
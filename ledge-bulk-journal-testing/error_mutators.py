@@ -0,0 +1,303 @@
+"""
+Error types for generate_error_scenarios, as a table of registered mutators.
+
+Every error entry starts out as a valid entry: the same asset, source
+account, write-off account and amount draws. Each error type is then a
+mutator that edits the fields it declares. It is applied to a whole batch
+of entries of that type at once: an ErrorBatch holds the varying fields as
+per-line columns, and the generator renders the batch through a template
+compiled for that type. The hot loop never branches on the error type.
+
+    @register("wrong-currency", fields=("CURRENCY",),
+              failure_point="GL import validation", help="CURRENCY is not STAT")
+    def _wrong_currency(batch):
+        ...
+
+Registration order is ERROR_TYPES order. It decides which type 'mixed'
+placement draws for each error, so new types go at the end, and adding one
+changes which types a seeded 'mixed' run produces. Single-type runs are
+unaffected.
+
+Mutators draw from batch.rngs[i], entry i's EntryDraws (or a random.Random).
+The draws come after the entry's base draws, in the order the mutator makes
+them, so an entry is the same whether it is built alone or in a batch.
+
+A colliding type (duplicate-entry-num) is written with another entry's
+ENTRY_NUM: the placement pairs each such entry with one of its batch (see
+error_placement.pair_collisions) and passes that number as
+batch.partner_nums. A valid entry it is paired with gets the COLLIDED outcome.
+Colliding types are left out of 'mixed' (MIXED_TYPES), as each one also
+makes a valid entry fail: they run only as their own --error-type.
+"""
+
+from datetime import date, timedelta
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from amount_engine import UNBALANCE_STEP, format_scaled_batch
+
+# =============================================================================
+# INVALID DATA
+# =============================================================================
+
+INVALID_ASSET_IDS = [
+    "00000000000000099999",  # Non-existent
+    "00000000000000000001",  # Too low
+    "99999999999999999999",  # Obviously fake
+    "INVALID_ASSET_ID_XXX",  # Wrong format
+    "",                       # Empty
+]
+
+INVALID_ACCOUNT_IDS = [
+    ("XXXXXX99999", "000000"),   # Non-existent account
+    ("", "000000"),              # Empty account
+    ("TOOLONG12345678", "000000"),  # Too long (>12 chars)
+    ("SHORT", "000000"),         # Too short
+]
+
+MISMATCHED_NATURAL_ACCOUNTS = [
+    "999999",  # Non-existent natural account
+    "123456",  # Random invalid
+    "",        # Empty
+]
+
+WRONG_CURRENCIES = [
+    "USD",   # Monetary currency on a statistical journal
+    "BTC",   # The asset's own currency code
+    "stat",  # Wrong case
+    "",      # Empty
+]
+
+BAD_FX_RATES = [
+    "0",       # Zero
+    "-1",      # Negative
+    "1.5",     # Not 1 for a STAT journal
+    "",        # Empty
+    "N/A",     # Not a number
+]
+
+# Lines of an entry; the amount field each one carries
+LINES = ("DEL", "REC")
+AMOUNT_FIELDS = {"DEL": "ENTERED_DR", "REC": "ENTERED_CR"}
+
+# Fields that vary per entry in every entry, valid or not
+ENTRY_FIELDS = ("ENTRY_NUM", "ASSET_ID", "NATURAL_ACCT", "SUB_ACCT")
+
+# Outcome of a valid entry whose ENTRY_NUM a colliding entry is written with:
+# the import rejects the whole group, so it fails along with its duplicate.
+# It is never placed, only given to paired entries, which otherwise stay the
+# valid entries they were.
+COLLIDED = "collided-entry-num"
+
+
+# =============================================================================
+# BATCHES AND THE REGISTRY
+# =============================================================================
+
+class ErrorBatch:
+    """Entries of one error type, as per-line columns a mutator edits in place.
+
+    dels[field][i] and recs[field][i] are entry i's values on its DEL and
+    REC line, for each field the mutator declares (the generator may add
+    the other varying fields, but a mutator must not rely on them). Values
+    are strings, except ENTRY_NUM (int). entry_nums[i] is the entry's own
+    ENTRY_NUM and amounts[i] its base amount, scaled (see amount_engine).
+    partner_nums[i] is the ENTRY_NUM the placement paired it with (colliding
+    types), else its own.
+    """
+
+    __slots__ = ("entry_nums", "amounts", "rngs", "dels", "recs", "partner_nums")
+
+    def __init__(
+        self,
+        entry_nums: List[int],
+        amounts: List[int],
+        rngs: Sequence,
+        dels: Dict[str, list],
+        recs: Dict[str, list],
+        partner_nums: Optional[List[int]] = None
+    ):
+        self.entry_nums = entry_nums
+        self.amounts = amounts
+        self.rngs = rngs
+        self.dels = dels
+        self.recs = recs
+        self.partner_nums = entry_nums if partner_nums is None else partner_nums
+
+    def __len__(self) -> int:
+        return len(self.entry_nums)
+
+    def fill(self, field: str, values: Sequence) -> None:
+        """Set a field on both lines of every entry."""
+        self.dels[field][:] = values
+        self.recs[field][:] = values
+
+
+class ErrorMutator(NamedTuple):
+    """One error type: the fields it touches and where it should be rejected."""
+    name: str
+    fields: Tuple[str, ...]         # CSV columns the mutator changes
+    failure_point: str              # recorded in the manifest
+    help: str
+    apply: Callable[[ErrorBatch], None]
+    collides: bool = False          # written with another entry's ENTRY_NUM
+
+
+MUTATORS: Dict[str, ErrorMutator] = {}
+
+# Registered error types, in registration order, and where each should fail
+ERROR_TYPES: List[str] = []
+EXPECTED_FAILURE_POINTS: Dict[str, str] = {}
+
+# Error types the placement pairs with another entry (see ErrorBatch.partner_nums)
+COLLIDING_TYPES: List[str] = []
+
+# Error types a 'mixed' run draws from: all but the colliding ones
+MIXED_TYPES: List[str] = []
+
+
+def register(
+    name: str,
+    fields: Sequence[str],
+    failure_point: str,
+    help: str,
+    collides: bool = False,
+    placed: bool = True
+) -> Callable[[Callable[[ErrorBatch], None]], Callable[[ErrorBatch], None]]:
+    """Decorator: register fn(batch) as the mutator for error type `name`.
+
+    fields are the CSV columns it changes; a column not declared here is not
+    in the batch, so it cannot change by accident. collides: entries are
+    written with batch.partner_nums. placed=False registers an outcome the
+    placement never draws (COLLIDED), so it is not in ERROR_TYPES.
+    """
+    def decorate(apply: Callable[[ErrorBatch], None]) -> Callable[[ErrorBatch], None]:
+        if name in MUTATORS or name == "mixed":
+            raise ValueError(f"Error type already registered: {name}")
+        MUTATORS[name] = ErrorMutator(name, tuple(fields), failure_point, help, apply, collides)
+        if placed:
+            ERROR_TYPES.append(name)
+            if not collides:
+                MIXED_TYPES.append(name)
+        if collides:
+            COLLIDING_TYPES.append(name)
+        EXPECTED_FAILURE_POINTS[name] = failure_point
+        return apply
+    return decorate
+
+
+def outcome_types(error_types: Sequence[str]) -> List[str]:
+    """Outcomes besides valid that placing error_types can give: those, plus
+    COLLIDED if one of them collides."""
+    if set(error_types) & set(COLLIDING_TYPES):
+        return list(error_types) + [COLLIDED]
+    return list(error_types)
+
+
+def describe_error_types() -> str:
+    """'name  help' lines for a CLI epilog."""
+    width = max(map(len, ERROR_TYPES + ["mixed"])) + 1
+    lines = [f"  {name:<{width}}{MUTATORS[name].help}" for name in ERROR_TYPES]
+    excluded = f" but {', '.join(COLLIDING_TYPES)}" if COLLIDING_TYPES else ""
+    lines.append(f"  {'mixed':<{width}}Random mix of all error types{excluded} (default)")
+    return "\n".join(lines)
+
+
+# =============================================================================
+# MUTATORS
+# =============================================================================
+
+@register("unbalanced", ("ENTERED_CR",), "GL Publisher validation",
+          "DR != CR (will fail balancing validation)")
+def _unbalanced(batch: ErrorBatch) -> None:
+    batch.recs["ENTERED_CR"][:] = format_scaled_batch([amount + UNBALANCE_STEP for amount in batch.amounts])
+
+
+@register("invalid-asset", ("ASSET_ID",), "GL Publisher lookup",
+          "Non-existent asset ID")
+def _invalid_asset(batch: ErrorBatch) -> None:
+    batch.fill("ASSET_ID", [rng.choice(INVALID_ASSET_IDS) for rng in batch.rngs])
+
+
+@register("invalid-account", ("SUB_ACCT", "NATURAL_ACCT"), "GL Publisher lookup",
+          "Non-existent sub-account ID")
+def _invalid_account(batch: ErrorBatch) -> None:
+    for i, rng in enumerate(batch.rngs):
+        sub_acct, natural_acct = rng.choice(INVALID_ACCOUNT_IDS)
+        line = batch.dels if rng.choice([True, False]) else batch.recs
+        line["SUB_ACCT"][i] = sub_acct
+        line["NATURAL_ACCT"][i] = natural_acct
+
+
+@register("invalid-natural-acct", ("NATURAL_ACCT",), "GL import validation",
+          "Natural account doesn't match sub-account type")
+def _invalid_natural(batch: ErrorBatch) -> None:
+    for i, rng in enumerate(batch.rngs):
+        line = batch.dels if rng.choice([True, False]) else batch.recs
+        line["NATURAL_ACCT"][i] = rng.choice(MISMATCHED_NATURAL_ACCOUNTS)
+
+
+@register("future-date", ("ACCOUNTING_DATE",), "GL period validation",
+          "Accounting date 30+ days in future")
+def _future_date(batch: ErrorBatch) -> None:
+    today = date.today()
+    batch.fill("ACCOUNTING_DATE", [
+        (today + timedelta(days=rng.randint(30, 365))).isoformat() for rng in batch.rngs
+    ])
+
+
+@register("past-date", ("ACCOUNTING_DATE",), "GL period validation",
+          "Accounting date in closed period (>2 years ago)")
+def _past_date(batch: ErrorBatch) -> None:
+    today = date.today()
+    batch.fill("ACCOUNTING_DATE", [
+        (today - timedelta(days=rng.randint(730, 1000))).isoformat() for rng in batch.rngs
+    ])
+
+
+@register("missing-amount", ("ENTERED_DR", "ENTERED_CR"), "GL Publisher validation",
+          "Both DR and CR are empty")
+def _missing_amount(batch: ErrorBatch) -> None:
+    empty = [""] * len(batch)
+    batch.dels["ENTERED_DR"][:] = empty
+    batch.recs["ENTERED_CR"][:] = empty
+
+
+@register("negative-amount", ("ENTERED_DR", "ENTERED_CR"), "GL import validation",
+          "Negative amounts")
+def _negative_amount(batch: ErrorBatch) -> None:
+    negated = format_scaled_batch([-amount for amount in batch.amounts])
+    batch.dels["ENTERED_DR"][:] = negated
+    batch.recs["ENTERED_CR"][:] = negated
+
+
+@register("zero-amount", ("ENTERED_DR", "ENTERED_CR"), "GL import validation",
+          "Zero amounts")
+def _zero_amount(batch: ErrorBatch) -> None:
+    zeros = ["0.0000000000"] * len(batch)
+    batch.dels["ENTERED_DR"][:] = zeros
+    batch.recs["ENTERED_CR"][:] = zeros
+
+
+@register("duplicate-entry-num", ("ENTRY_NUM",), "GL Publisher validation",
+          "ENTRY_NUM repeats an earlier valid entry's (both are rejected)", collides=True)
+def _duplicate_entry_num(batch: ErrorBatch) -> None:
+    batch.fill("ENTRY_NUM", batch.partner_nums)
+
+
+@register("wrong-currency", ("CURRENCY",), "GL import validation",
+          "CURRENCY is not STAT")
+def _wrong_currency(batch: ErrorBatch) -> None:
+    batch.fill("CURRENCY", [rng.choice(WRONG_CURRENCIES) for rng in batch.rngs])
+
+
+@register("bad-fx-rate", ("FX_RATE",), "GL import validation",
+          "FX_RATE is not 1 (zero, negative, empty or not a number)")
+def _bad_fx_rate(batch: ErrorBatch) -> None:
+    batch.fill("FX_RATE", [rng.choice(BAD_FX_RATES) for rng in batch.rngs])
+
+
+@register(COLLIDED, (), "GL Publisher validation",
+          "Valid entry whose ENTRY_NUM a duplicate-entry-num entry repeats", placed=False)
+def _collided(batch: ErrorBatch) -> None:
+    # Only the description and expected outcome differ from the valid entry
+    pass
@@ -0,0 +1,261 @@
+"""
+Constant-memory placement of error entries for generate_error_scenarios.py.
+
+Deciding which of N entries are errors used to mean building an N-element plan
+list and shuffling it. ErrorPlacement answers "what is entry i?" without that
+list, while still placing exactly `num_errors` errors uniformly at random:
+
+1. The entry range is cut into fixed-size blocks (one generation batch each).
+2. A seeded binary split tree hands every block its exact share of the errors:
+   at each node the error count is split between the two halves with an
+   exact hypergeometric draw, so the counts always add up to `num_errors`
+   and every set of error positions is equally likely.
+3. Inside a block the error offsets are a seeded ``rng.sample`` of the block.
+
+Every node and block has its own RNG derived from (seed, position), so any
+block can be computed directly - in O(block_size + log(num_blocks)) time and
+O(block_size) memory - without visiting the blocks before it.
+
+Colliding error types (duplicate-entry-num) are written with another entry's
+ENTRY_NUM. After placement each one is paired with an entry of its block,
+preferably an earlier valid one (see pair_collisions); a valid entry that is
+paired becomes `collided`, since the import rejects it with its duplicate.
+Pairing only looks at the block's outcomes, so it keeps blocks independent.
+"""
+
+import math
+import random
+from itertools import chain
+from typing import Collection, Dict, List, Optional, Sequence, Tuple
+
+from entry_manifest import VALID
+
+DEFAULT_BLOCK_SIZE = 4096
+
+# Up to this many draws the hypergeometric split is sampled directly; above it
+# the CDF is inverted from the mode outwards. Both are exact.
+_SAMPLED_HYPERGEOMETRIC_LIMIT = 64
+
+
+def _log_choose(n: int, k: int) -> float:
+    return math.lgamma(n + 1) - math.lgamma(k + 1) - math.lgamma(n - k + 1)
+
+
+def _hypergeometric(rng: random.Random, draws: int, good: int, total: int) -> int:
+    """Number of `good` items among `draws` taken without replacement from `total`."""
+    if draws == 0 or good == 0:
+        return 0
+    if good == total:
+        return draws
+    if draws > total - draws:
+        # Symmetry: count the good items that were *not* drawn instead
+        return good - _hypergeometric(rng, total - draws, good, total)
+    if draws <= _SAMPLED_HYPERGEOMETRIC_LIMIT:
+        return sum(1 for x in rng.sample(range(total), draws) if x < good)
+
+    # Inversion: walk out from the mode, alternately up and down, taking each
+    # value's probability off one uniform draw. Each probability follows from
+    # its neighbour's by the ratio of binomials, so this takes O(standard
+    # deviation) steps, not O(draws).
+    bad = total - good
+    low, high = max(0, draws - bad), min(draws, good)
+    mode = min(max((draws + 1) * (good + 1) // (total + 2), low), high)
+    p_mode = math.exp(_log_choose(good, mode) + _log_choose(bad, draws - mode) - _log_choose(total, draws))
+    u = rng.random() - p_mode
+    up = down = mode
+    p_up = p_down = p_mode
+    while u >= 0 and (up < high or down > low):
+        if up < high:
+            p_up *= (good - up) * (draws - up) / ((up + 1) * (bad - draws + up + 1))
+            up += 1
+            u -= p_up
+            if u < 0:
+                return up
+        if down > low:
+            p_down *= down * (bad - draws + down) / ((good - down + 1) * (draws - down + 1))
+            down -= 1
+            u -= p_down
+            if u < 0:
+                return down
+    # u < 0 at the mode, or float rounding left a sliver of probability over
+    return mode
+
+
+def collision_span(block: int, num_entries: int, block_size: int) -> range:
+    """Blocks whose entries are paired together (see pair_collisions): just the
+    block, except that a one-entry last block goes with the block before it."""
+    num_blocks = -(-num_entries // block_size)
+    if num_blocks > 1 and num_entries % block_size == 1 and block >= num_blocks - 2:
+        return range(num_blocks - 2, num_blocks)
+    return range(block, block + 1)
+
+
+def pair_collisions(outcomes: List[Optional[str]], colliding: Collection[str], collided: str) -> Dict[int, int]:
+    """Pick the entry whose ENTRY_NUM each colliding entry is written with.
+
+    outcomes are one span's (see collision_span). Each colliding entry takes
+    the most recent earlier valid entry that no other one has taken, and the
+    valid entries taken become `collided` (in place). Colliding entries left
+    without one (at the start of a span, or where errors outnumber valid
+    entries) pair up with each other, the second taking the first's number;
+    an odd one out takes the nearest entry that keeps its own number. So every
+    colliding entry shares its number, and no group has more than three.
+
+    Valid entries may be given as None, VALID or `collided`, so pairing a
+    span's manifest outcomes again gives the same pairs.
+
+    Returns:
+        {position: position whose ENTRY_NUM it is written with}, for every
+        entry not written with its own
+    """
+    partners: Dict[int, int] = {}
+    unclaimed: List[int] = []
+    leftover: List[int] = []
+    for position, outcome in enumerate(outcomes):
+        if outcome in colliding:
+            if unclaimed:
+                partners[position] = unclaimed.pop()
+            else:
+                leftover.append(position)
+        elif outcome is None or outcome == VALID or outcome == collided:
+            unclaimed.append(position)
+
+    for first, second in zip(leftover[::2], leftover[1::2]):
+        partners[second] = first
+    if len(leftover) % 2:
+        odd = leftover[-1]
+        nearest = chain(range(odd - 1, -1, -1), range(odd + 1, len(outcomes)))
+        partner = next((position for position in nearest if position not in partners), None)
+        if partner is None:
+            raise ValueError(f"A {outcomes[odd]} entry needs another entry to collide with")
+        partners[odd] = partner
+
+    for partner in partners.values():
+        if outcomes[partner] is None or outcomes[partner] == VALID:
+            outcomes[partner] = collided
+    return partners
+
+
+class ErrorPlacement:
+    """Seeded, O(1)-memory map from entry index to outcome (None or an error type).
+
+    Args:
+        num_entries: Total number of entries
+        num_errors: Exact number of entries that are errors
+        error_types: Error types to draw from (uniformly) for each error entry
+        shuffle: If True, scatter errors uniformly; if False, errors are the
+                 last num_errors entries (the legacy layout)
+        seed: Seed for the placement; same seed, same placement
+        block_size: Entries per block (and per generation batch)
+        colliding: Error types written with another entry's ENTRY_NUM (see
+                   pair_collisions)
+        collided: Outcome of a valid entry a colliding one is paired with
+    """
+
+    def __init__(
+        self,
+        num_entries: int,
+        num_errors: int,
+        error_types: Sequence[str],
+        shuffle: bool,
+        seed: int,
+        block_size: int = DEFAULT_BLOCK_SIZE,
+        colliding: Collection[str] = (),
+        collided: Optional[str] = None
+    ):
+        if not 0 <= num_errors <= num_entries:
+            raise ValueError(f"num_errors must be in 0..{num_entries}, got {num_errors}")
+        self.num_entries = num_entries
+        self.num_errors = num_errors
+        self.num_valid = num_entries - num_errors
+        self.error_types = list(error_types)
+        self.shuffle = shuffle
+        self.seed = seed
+        self.block_size = block_size
+        self.num_blocks = -(-num_entries // block_size)
+        self.colliding = frozenset(colliding).intersection(self.error_types)
+        self.collided = collided
+        # Splits on the last walked path: consecutive blocks share most of it
+        self._splits: Dict[Tuple[int, int], int] = {}
+
+    def _rng(self, *key: object) -> random.Random:
+        # String seeds are hashed with SHA-512: stable across runs and processes
+        return random.Random(":".join(map(str, (self.seed,) + key)))
+
+    def _block_len(self, block: int) -> int:
+        return min(self.block_size, self.num_entries - block * self.block_size)
+
+    def block_error_count(self, block: int) -> int:
+        """Exact number of errors in one block."""
+        if not self.shuffle:
+            start = block * self.block_size
+            return max(0, start + self._block_len(block) - max(start, self.num_valid))
+
+        # Walk the split tree from the root down to this block
+        lo, hi, count = 0, self.num_blocks, self.num_errors
+        path: Dict[Tuple[int, int], int] = {}
+        while hi - lo > 1 and count:
+            mid = (lo + hi) // 2
+            left = self._splits.get((lo, hi))
+            if left is None:
+                size = min(hi * self.block_size, self.num_entries) - lo * self.block_size
+                left_size = (mid - lo) * self.block_size
+                left = _hypergeometric(self._rng("split", lo, hi), count, left_size, size)
+            path[lo, hi] = left
+            if block < mid:
+                hi, count = mid, left
+            else:
+                lo, count = mid, count - left
+        self._splits = path
+        return count
+
+    def _placed_outcomes(self, block: int) -> List[Optional[str]]:
+        """Outcome of every entry in a block before pairing: None or its error type."""
+        length = self._block_len(block)
+        count = self.block_error_count(block)
+        outcomes: List[Optional[str]] = [None] * length
+        if not count:
+            return outcomes
+
+        rng = self._rng("block", block)
+        if self.shuffle:
+            offsets = sorted(rng.sample(range(length), count))
+        else:
+            offsets = range(length - count, length)
+        for offset, err_type in zip(offsets, rng.choices(self.error_types, k=count)):
+            outcomes[offset] = err_type
+        return outcomes
+
+    def block_plan(self, block: int) -> Tuple[List[Optional[str]], Dict[int, int]]:
+        """(outcomes, partners) of a block: the outcome of every entry (None for
+        valid, else its error type or `collided`), and {offset: ENTRY_NUM it is
+        written with} for entries not written with their own."""
+        if not self.colliding:
+            return self._placed_outcomes(block), {}
+        span = collision_span(block, self.num_entries, self.block_size)
+        outcomes = [outcome for b in span for outcome in self._placed_outcomes(b)]
+        start = (block - span[0]) * self.block_size
+        stop = start + self._block_len(block)
+        if self.colliding.isdisjoint(outcomes):
+            return outcomes[start:stop], {}
+        first_entry = span[0] * self.block_size + 1
+        partners = {
+            position - start: first_entry + partner
+            for position, partner in pair_collisions(outcomes, self.colliding, self.collided).items()
+            if start <= position < stop
+        }
+        return outcomes[start:stop], partners
+
+    def block_outcomes(self, block: int) -> List[Optional[str]]:
+        """Outcome of every entry in a block: None for valid, else its error type or `collided`."""
+        return self.block_plan(block)[0]
+
+    def outcome(self, index: int) -> Optional[str]:
+        """Outcome of the entry at 0-based index (ENTRY_NUM - 1)."""
+        return self.entry_plan(index)[0]
+
+    def entry_plan(self, index: int) -> Tuple[Optional[str], int]:
+        """(outcome, ENTRY_NUM it is written with) of the entry at 0-based index."""
+        block, offset = divmod(index, self.block_size)
+        outcomes, partners = self.block_plan(block)
+        return outcomes[offset], partners.get(offset, index + 1)
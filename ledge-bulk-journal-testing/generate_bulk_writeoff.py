@@ -17,610 +17,101 @@ Usage:
 
     # Specify accounting date
     python scripts/generate_bulk_writeoff.py --entries 1000 --date 2026-01-15 --output dated_test.csv
+
+    # Split 20M entries across 8 worker processes and stitch into one file
+    python scripts/generate_bulk_writeoff.py --entries 20000000 --workers 8 --output huge.csv
+
+    # Rotate into part files of at most 1M rows (entry pairs are never split)
+    python scripts/generate_bulk_writeoff.py --entries 2000000 --max-rows-per-file 1000000 --output parts.csv
+
+    # Compress while generating (gzip, xz, or zstd with the zstandard package)
+    python scripts/generate_bulk_writeoff.py --entries 500000 --compress gzip --output large_writeoff.csv
+
+    # Also write large_writeoff.parquet from the same pass (needs pyarrow)
+    python scripts/generate_bulk_writeoff.py --entries 500000 --format csv,parquet --output large_writeoff.csv
+
+    # Draw accounts from fresh staging exports (Query 2 / Query 3, CSV or JSON)
+    python scripts/generate_bulk_writeoff.py --entries 500000 --pool-file q2.csv --writeoff-file q3.json --output fresh.csv
+
+    # Soak test: stream 20k rows/s for 4h to stdout, ramping up over 5 min, with 3x bursts of 10s every 10 min
+    python scripts/generate_bulk_writeoff.py --rate 20000 --duration 4h --ramp 5m --burst 3x10/600 --output - | consumer
+
+    # Real write-off batches: 1-1000 DEL lines (mostly few) against one write-off REC line per entry
+    python scripts/generate_bulk_writeoff.py --entries 100000 --lines-per-entry 1-1000:zipf/1 --output fanout.csv
+
+    # Skew traffic: Zipf over assets, and 1% of write-off accounts taking 80% of entries
+    python scripts/generate_bulk_writeoff.py --entries 500000 --asset-distribution zipf:1.1 --dest-distribution hot:1:80 --output hot_keys.csv
+
+    # Every (asset, source, destination, amount) used once, across this file and earlier ones
+    python scripts/generate_bulk_writeoff.py --entries 50000000 --unique --unique-state tuples.bloom --output huge.csv
+
+    # Continue a run that was interrupted (same options; the seed comes from the checkpoint)
+    python scripts/generate_bulk_writeoff.py --entries 50000000 --output huge.csv --resume
+
+    # Reproduce a file, or just one entry of it, from the seed printed by a run
+    python scripts/generate_bulk_writeoff.py --entries 500000 --seed 42 --output large_writeoff.csv
+    python scripts/generate_bulk_writeoff.py --seed 42 --only-entry 123456
 """
 
-import csv
+import os
 import random
+import shutil
+import sys
+import time
 import argparse
-from decimal import Decimal
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import date
-from typing import List, Tuple, Dict
-from collections import defaultdict
+from typing import BinaryIO, Callable, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
 
-# =============================================================================
-# STAGING DATA - From Query 2 results (SUB_ACCT, NATURAL_ACCT, ASSET_ID)
-# Grouped by ASSET_ID for pairing accounts with the same asset
-# =============================================================================
-
-RAW_DATA = """BR00144R7USD,000000,00000000000000026258
-BR00145R6USD,000000,00000000000000026258
-BR00161X2CAD,000000,00000000000000026258
-BR00161X2CAD,201110,00000000000000026258
-HD8500104CAD,000000,00000000000000026258
-HD8500401CAD,000000,00000000000000026258
-HQ04X3S05CAD,000000,00000000000000026258
-HQ05LN209CAD,000000,00000000000000026258
-HQ0N5TW10CAD,000000,00000000000000026258
-TO0002006CAD,000000,00000000000000026258
-TO0003803CAD,000000,00000000000000026258
-BR00037W6CAD,000000,00000000000000026242
-BR00040R2CAD,000000,00000000000000026242
-BR00135L1USD,000000,00000000000000026242
-BR00136L0USD,000000,00000000000000026242
-HQ011XM14CAD,000000,00000000000000026242
-HQ015R819CAD,000000,00000000000000026242
-HQ01Q1912CAD,000000,00000000000000026242
-BR00135L1USD,000000,00000000000000026261
-BR00136L0USD,000000,00000000000000026261
-BR00142X6USD,120325,00000000000000026261
-BR00144R7USD,000000,00000000000000026261
-BR00145R6USD,000000,00000000000000026261
-BR00149W1USD,000000,00000000000000026261
-BR00149W1USD,201120,00000000000000026261
-BR00153R5USD,000000,00000000000000026261
-BR00156W1USD,000000,00000000000000026261
-BR0017205USD,000000,00000000000000026261
-H63496519CAD,000000,00000000000000026261
-HQ00QYR12CAD,000000,00000000000000026261
-HQ00ZZZ10CAD,000000,00000000000000026261
-HQ011XM14CAD,000000,00000000000000026261
-HQ01F5S14CAD,000000,00000000000000026261
-HQ01Q1912CAD,000000,00000000000000026261
-HQ01TRZ13CAD,000000,00000000000000026261
-HQ01YS617CAD,000000,00000000000000026261
-HQ01Z5Q14CAD,000000,00000000000000026261
-HQ022J818CAD,000000,00000000000000026261
-HQ02CCT19CAD,000000,00000000000000026261
-HQ02CPF15CAD,000000,00000000000000026261
-HQ02CYF16CAD,000000,00000000000000026261
-HQ02GXW15CAD,000000,00000000000000026261
-HQ02NYC17CAD,000000,00000000000000026261
-HQ04CLS16CAD,000000,00000000000000026261
-HQ04L2M14CAD,000000,00000000000000026261
-HQ04Q9R19CAD,000000,00000000000000026261
-HQ051B611CAD,000000,00000000000000026261
-HQ054JX11CAD,000000,00000000000000026261
-HQ0573L16CAD,000000,00000000000000026261
-HQ05JP215CAD,000000,00000000000000026261
-HQ05RVR16CAD,000000,00000000000000026261
-HQ05RZK14CAD,000000,00000000000000026261
-HQ05S6M15CAD,000000,00000000000000026261
-HQ05VJC14CAD,000000,00000000000000026261
-HQ063DL16CAD,000000,00000000000000026261
-HQ06KB410CAD,000000,00000000000000026261
-HQ07FQK13CAD,000000,00000000000000026261
-HQ07FZM11CAD,000000,00000000000000026261
-HQ0QV8R16CAD,000000,00000000000000026261
-X1000SK17CAD,000000,00000000000000026261
-X1000TL14CAD,000000,00000000000000026261
-BR00135L1USD,000000,00000000000000026236
-BR00136L0USD,000000,00000000000000026236
-BR00142X6USD,000000,00000000000000026236
-BR00142X6USD,120325,00000000000000026236
-BR00143R8USD,000000,00000000000000026236
-BR00144R7USD,000000,00000000000000026236
-BR00145R6USD,000000,00000000000000026236
-BR00148W2USD,000000,00000000000000026236
-BR00149W1USD,000000,00000000000000026236
-BR00149W1USD,201120,00000000000000026236
-BR00164L5USD,000000,00000000000000026236
-BR00190X7USD,000000,00000000000000026236
-BR00190X7USD,120325,00000000000000026236
-H63496519CAD,000000,00000000000000026236
-H63496519CAD,201010,00000000000000026236
-HQ011XM14CAD,000000,00000000000000026236
-HQ015R819CAD,000000,00000000000000026236
-HQ01B2C12CAD,000000,00000000000000026236
-HQ01F5S14CAD,000000,00000000000000026236
-HQ01Q1912CAD,000000,00000000000000026236
-HQ01WRF11CAD,000000,00000000000000026236
-HQ01YS617CAD,000000,00000000000000026236
-HQ022J818CAD,000000,00000000000000026236
-HQ023N016CAD,000000,00000000000000026236
-HQ023TX17CAD,000000,00000000000000026236
-HQ0243B17CAD,000000,00000000000000026236
-HQ0244B15CAD,000000,00000000000000026236
-HQ0246J12CAD,000000,00000000000000026236
-HQ0247S10CAD,000000,00000000000000026236
-HQ026ZM12CAD,000000,00000000000000026236
-HQ027MC11CAD,000000,00000000000000026236
-HQ027MF18CAD,000000,00000000000000026236
-HQ027MH16CAD,000000,00000000000000026236
-HQ028W912CAD,000000,00000000000000026236
-HQ029T215CAD,000000,00000000000000026236
-HQ02CCT19CAD,000000,00000000000000026236
-HQ02CPF15CAD,000000,00000000000000026236
-HQ02CYF16CAD,000000,00000000000000026236
-HQ02DQ414CAD,000000,00000000000000026236
-HQ02GXW15CAD,000000,00000000000000026236
-HQ02QCD11CAD,000000,00000000000000026236
-HQ0353610CAD,000000,00000000000000026236
-HQ04CLS16CAD,000000,00000000000000026236
-HQ04L7B15CAD,000000,00000000000000026236
-HQ04MJR11CAD,000000,00000000000000026236
-HQ04NCC11CAD,000000,00000000000000026236
-HQ04NTT16CAD,000000,00000000000000026236
-HQ04Q9R19CAD,000000,00000000000000026236
-HQ04YH516CAD,000000,00000000000000026236
-HQ0534C18CAD,000000,00000000000000026236
-HQ053PK12CAD,000000,00000000000000026236
-HQ0543D18CAD,000000,00000000000000026236
-HQ054JX11CAD,000000,00000000000000026236
-HQ0573L16CAD,000000,00000000000000026236
-HQ05D6R16CAD,000000,00000000000000026236
-HQ05KFS17CAD,000000,00000000000000026236
-HQ05PKY14CAD,000000,00000000000000026236
-HQ05Q8G10CAD,000000,00000000000000026236
-HQ05QLY11CAD,000000,00000000000000026236
-HQ05QML13CAD,000000,00000000000000026236
-HQ05QPF13CAD,000000,00000000000000026236
-HQ05R5J12CAD,000000,00000000000000026236
-HQ05RLL14CAD,000000,00000000000000026236
-HQ05RVJ15CAD,000000,00000000000000026236
-HQ05RVR16CAD,000000,00000000000000026236
-HQ05RZK14CAD,000000,00000000000000026236
-HQ05RZN11CAD,000000,00000000000000026236
-HQ05S6M15CAD,000000,00000000000000026236
-HQ05T5X14CAD,000000,00000000000000026236
-HQ05TPQ18CAD,000000,00000000000000026236
-HQ05VJC14CAD,000000,00000000000000026236
-HQ05Z0212CAD,000000,00000000000000026236
-HQ060QQ15CAD,000000,00000000000000026236
-HQ061C211CAD,000000,00000000000000026236
-HQ0627Y16CAD,000000,00000000000000026236
-HQ062Q318CAD,000000,00000000000000026236
-HQ0637715CAD,000000,00000000000000026236
-HQ063CB19CAD,000000,00000000000000026236
-HQ063DL16CAD,000000,00000000000000026236
-HQ064Q613CAD,000000,00000000000000026236
-HQ065C712CAD,000000,00000000000000026236
-HQ069H311CAD,000000,00000000000000026236
-HQ069LV11CAD,000000,00000000000000026236
-HQ069TH10CAD,000000,00000000000000026236
-HQ069ZQ16CAD,000000,00000000000000026236
-HQ06B0T17CAD,000000,00000000000000026236
-HQ06B0Y11CAD,000000,00000000000000026236
-HQ06C3J11CAD,000000,00000000000000026236
-HQ06CDS19CAD,000000,00000000000000026236
-HQ06DG615CAD,000000,00000000000000026236
-HQ06K9118CAD,000000,00000000000000026236
-HQ06KB410CAD,000000,00000000000000026236
-HQ06L2Y16CAD,000000,00000000000000026236
-HQ072XP17CAD,000000,00000000000000026236
-HQ0761Z12CAD,000000,00000000000000026236
-HQ07FMY17CAD,000000,00000000000000026236
-HQ07FQK13CAD,000000,00000000000000026236
-HQ07FZM11CAD,000000,00000000000000026236
-HQ07N8P19CAD,000000,00000000000000026236
-HQ08LSS12CAD,000000,00000000000000026236
-HQ08Y9G13CAD,000000,00000000000000026236
-HQ0D2NN18CAD,000000,00000000000000026236
-HQ0D9RH19CAD,000000,00000000000000026236
-HQ0DL7S17CAD,000000,00000000000000026236
-HQ0HM8B13CAD,000000,00000000000000026236
-HQ0P91Y10CAD,000000,00000000000000026236
-HQ0P97915CAD,000000,00000000000000026236
-HQ0PZHQ15CAD,000000,00000000000000026236
-HQ0QN6N13CAD,000000,00000000000000026236
-HQ0QQPQ15CAD,000000,00000000000000026236
-HQ0QV8R16CAD,000000,00000000000000026236
-HQ0RY1916CAD,000000,00000000000000026236
-HQ0RY1D11CAD,000000,00000000000000026236
-HQ0RZDR19CAD,000000,00000000000000026236
-HQ0SN7Z14CAD,000000,00000000000000026236
-HQ0T7WX17CAD,000000,00000000000000026236
-HQ0TT6Z18CAD,000000,00000000000000026236
-HQ0V6QP15CAD,000000,00000000000000026236
-HQ0V6VD17CAD,000000,00000000000000026236
-HQ0ZL0617CAD,000000,00000000000000026236
-HQ0ZNR913CAD,000000,00000000000000026236
-HQ10XWY19CAD,000000,00000000000000026236
-HQ11MYR13CAD,000000,00000000000000026236
-HQ11MYV18CAD,000000,00000000000000026236
-HQ11MYX16CAD,000000,00000000000000026236
-HQ11VBT11CAD,000000,00000000000000026236
-HQ12B4R19CAD,000000,00000000000000026236
-HQ12B6S13CAD,000000,00000000000000026236
-HQ12BKZ14CAD,000000,00000000000000026236
-HQ132LY11CAD,000000,00000000000000026236
-HQ140LS18CAD,000000,00000000000000026236
-HQ14MB214CAD,000000,00000000000000026236
-HQ164XY16CAD,000000,00000000000000026236
-HQ1813810CAD,000000,00000000000000026236
-HQ1813R19CAD,000000,00000000000000026236
-HQ1815112CAD,000000,00000000000000026236
-HQ1817J19CAD,000000,00000000000000026236
-HQ18N9W16CAD,000000,00000000000000026236
-HQ195MJ10CAD,000000,00000000000000026236
-HQ19HTQ14CAD,000000,00000000000000026236
-HQ1B9D417CAD,000000,00000000000000026236
-HQ1C17317CAD,000000,00000000000000026236
-HQ1CJ2C19CAD,000000,00000000000000026236
-HQ1CKQ918CAD,000000,00000000000000026236
-HQ1DQK111CAD,000000,00000000000000026236
-HQ1DT2G12CAD,000000,00000000000000026236
-X10003717CAD,000000,00000000000000026236
-X10008K11CAD,000000,00000000000000026236
-X10008L10CAD,000000,00000000000000026236
-X10008L10CAD,201010,00000000000000026236
-X1000SK17CAD,000000,00000000000000026236
-X1000TL14CAD,000000,00000000000000026236
-BR00135L1USD,000000,00000000000000026237
-BR00136L0USD,000000,00000000000000026237
-BR00142X6USD,000000,00000000000000026237
-BR00142X6USD,120325,00000000000000026237
-BR00142X6USD,201120,00000000000000026237
-BR00143R8USD,000000,00000000000000026237
-BR00144R7USD,000000,00000000000000026237
-BR00145R6USD,000000,00000000000000026237
-BR00149W1USD,000000,00000000000000026237
-BR00149W1USD,201120,00000000000000026237
-BR00152R6USD,000000,00000000000000026237
-BR00153R5USD,000000,00000000000000026237
-BR00164L5USD,000000,00000000000000026237
-BR0017205USD,000000,00000000000000026237
-BR00176R8USD,000000,00000000000000026237
-BR00184R8USD,000000,00000000000000026237
-BR00189X0USD,000000,00000000000000026237
-BR00189X0USD,120325,00000000000000026237
-BR00189X0USD,201120,00000000000000026237
-BR00271W9USD,000000,00000000000000026237
-BR00273R0USD,000000,00000000000000026237
-H63496519CAD,000000,00000000000000026237
-H82820111CAD,000000,00000000000000026237
-HQ011XM14CAD,000000,00000000000000026237
-HQ015R819CAD,000000,00000000000000026237
-HQ01B2C12CAD,000000,00000000000000026237
-HQ01CMM16CAD,000000,00000000000000026237
-HQ01F5S14CAD,000000,00000000000000026237
-HQ01GQS17CAD,000000,00000000000000026237
-HQ01L1J16CAD,000000,00000000000000026237
-HQ01M0Y10CAD,000000,00000000000000026237
-HQ01N7417CAD,000000,00000000000000026237
-HQ01NJG18CAD,000000,00000000000000026237
-HQ01Q1912CAD,000000,00000000000000026237
-HQ01RR112CAD,000000,00000000000000026237
-HQ01S4B11CAD,000000,00000000000000026237
-HQ01TRZ13CAD,000000,00000000000000026237
-HQ01TS811CAD,000000,00000000000000026237
-HQ01XK813CAD,000000,00000000000000026237
-HQ01YS617CAD,000000,00000000000000026237
-HQ01Z5Q14CAD,000000,00000000000000026237
-HQ020N415CAD,000000,00000000000000026237
-HQ022J818CAD,000000,00000000000000026237
-HQ0246J12CAD,000000,00000000000000026237
-HQ0247S10CAD,000000,00000000000000026237
-HQ024YP14CAD,000000,00000000000000026237
-HQ024YS11CAD,000000,00000000000000026237
-HQ025VG19CAD,000000,00000000000000026237
-HQ026ZM12CAD,000000,00000000000000026237
-HQ027MC11CAD,000000,00000000000000026237
-HQ027MH16CAD,000000,00000000000000026237
-HQ0289T11CAD,000000,00000000000000026237
-HQ028W912CAD,000000,00000000000000026237
-HQ029T215CAD,000000,00000000000000026237
-HQ02CCT19CAD,000000,00000000000000026237
-HQ02CPF15CAD,000000,00000000000000026237
-HQ02CYF16CAD,000000,00000000000000026237
-HQ02DX310CAD,000000,00000000000000026237
-HQ02GX713CAD,000000,00000000000000026237
-HQ02GXW15CAD,000000,00000000000000026237
-HQ02H5M16CAD,000000,00000000000000026237
-HQ02NYC17CAD,000000,00000000000000026237
-HQ030M514CAD,000000,00000000000000026237
-HQ034CJ17CAD,000000,00000000000000026237
-HQ03PT413CAD,000000,00000000000000026237
-HQ03PTD13CAD,000000,00000000000000026237
-HQ04CLS16CAD,000000,00000000000000026237
-HQ04CM212CAD,000000,00000000000000026237
-HQ04GTC12CAD,000000,00000000000000026237
-HQ04L2M14CAD,000000,00000000000000026237
-HQ04NCC11CAD,000000,00000000000000026237
-HQ04NTT16CAD,000000,00000000000000026237
-HQ04Q9R19CAD,000000,00000000000000026237
-HQ04T9015CAD,000000,00000000000000026237
-HQ04V7818CAD,000000,00000000000000026237
-HQ04W8F17CAD,000000,00000000000000026237
-HQ0501Y13CAD,000000,00000000000000026237
-HQ050YN13CAD,000000,00000000000000026237
-HQ0512215CAD,000000,00000000000000026237
-HQ051B611CAD,000000,00000000000000026237
-HQ0532X19CAD,000000,00000000000000026237
-HQ0573L16CAD,000000,00000000000000026237
-HQ05D6R16CAD,000000,00000000000000026237
-HQ05FJ510CAD,000000,00000000000000026237
-HQ05H2010CAD,000000,00000000000000026237
-HQ05H5M19CAD,000000,00000000000000026237
-HQ05JP215CAD,000000,00000000000000026237
-HQ05KFS17CAD,000000,00000000000000026237
-HQ05PKY14CAD,000000,00000000000000026237
-HQ05QLY11CAD,000000,00000000000000026237
-HQ05QML13CAD,000000,00000000000000026237
-HQ05QPF13CAD,000000,00000000000000026237
-HQ05QS310CAD,000000,00000000000000026237
-HQ05QTK19CAD,000000,00000000000000026237
-HQ05QZR18CAD,000000,00000000000000026237
-HQ05R2Z11CAD,000000,00000000000000026237
-HQ05R6F14CAD,000000,00000000000000026237
-HQ05R7711CAD,000000,00000000000000026237
-HQ05R7L15CAD,000000,00000000000000026237
-HQ05R8214CAD,000000,00000000000000026237
-HQ05RLL14CAD,000000,00000000000000026237
-HQ05RVR16CAD,000000,00000000000000026237
-HQ05RZK14CAD,000000,00000000000000026237
-HQ05RZN11CAD,000000,00000000000000026237
-HQ05S0T11CAD,000000,00000000000000026237
-HQ05S1L17CAD,000000,00000000000000026237
-HQ05S4M10CAD,000000,00000000000000026237
-HQ05S6M15CAD,000000,00000000000000026237
-HQ05S9716CAD,000000,00000000000000026237
-HQ05T1K17CAD,000000,00000000000000026237
-HQ05VJC14CAD,000000,00000000000000026237
-HQ05VQ912CAD,000000,00000000000000026237
-HQ05W1213CAD,000000,00000000000000026237
-HQ05Z9619CAD,000000,00000000000000026237
-HQ05ZCM14CAD,000000,00000000000000026237
-HQ05ZTQ13CAD,000000,00000000000000026237
-HQ060NS10CAD,000000,00000000000000026237
-HQ060XF12CAD,000000,00000000000000026237
-HQ060XP11CAD,000000,00000000000000026237
-HQ0627Y16CAD,000000,00000000000000026237
-HQ062Q318CAD,000000,00000000000000026237
-HQ0637715CAD,000000,00000000000000026237
-HQ063CB19CAD,000000,00000000000000026237
-HQ065C712CAD,000000,00000000000000026237
-HQ069NB19CAD,000000,00000000000000026237
-HQ06C3J11CAD,000000,00000000000000026237
-HQ06CDS19CAD,000000,00000000000000026237
-HQ06DG615CAD,000000,00000000000000026237
-HQ06DHV15CAD,000000,00000000000000026237
-HQ06H2711CAD,000000,00000000000000026237
-HQ06JVR13CAD,000000,00000000000000026237
-HQ06JWW15CAD,000000,00000000000000026237
-HQ06K9118CAD,000000,00000000000000026237
-HQ06KB410CAD,000000,00000000000000026237
-HQ06L2Y16CAD,000000,00000000000000026237
-HQ0761Z12CAD,000000,00000000000000026237
-HQ07FQK13CAD,000000,00000000000000026237
-HQ07FZM11CAD,000000,00000000000000026237
-HQ07HK115CAD,000000,00000000000000026237
-HQ07N8P19CAD,000000,00000000000000026237
-HQ08LSS12CAD,000000,00000000000000026237
-HQ08Y9G13CAD,000000,00000000000000026237
-HQ0HNF612CAD,000000,00000000000000026237
-HQ0HNR616CAD,000000,00000000000000026237
-HQ0PZHQ15CAD,000000,00000000000000026237
-HQ0QQPQ15CAD,000000,00000000000000026237
-HQ0QV8R16CAD,000000,00000000000000026237
-HQ0SN7Z14CAD,000000,00000000000000026237
-HQ0T7WX17CAD,000000,00000000000000026237
-HQ0TT6Z18CAD,000000,00000000000000026237
-HQ0V6VD17CAD,000000,00000000000000026237
-HQ12B4R19CAD,000000,00000000000000026237
-HQ12B6S13CAD,000000,00000000000000026237
-HQ12D3Q10CAD,000000,00000000000000026237
-HQ13CY910CAD,000000,00000000000000026237
-HQ14TM718CAD,000000,00000000000000026237
-HQ15NN917CAD,000000,00000000000000026237
-HQ1813R19CAD,000000,00000000000000026237
-HQ1815112CAD,000000,00000000000000026237
-HQ1817J19CAD,000000,00000000000000026237
-HQ1BNK316CAD,000000,00000000000000026237
-HQ1BWLV13CAD,000000,00000000000000026237
-HQ1C1TQ14CAD,000000,00000000000000026237
-HQ1CJ2C19CAD,000000,00000000000000026237
-HQ1GMD718CAD,000000,00000000000000026237
-X1000RY14CAD,000000,00000000000000026237
-X1000SK17CAD,000000,00000000000000026237
-X1000TL14CAD,000000,00000000000000026237
-BR00135L1USD,000000,00000000000000026264
-BR00136L0USD,000000,00000000000000026264
-BR00142X6USD,000000,00000000000000026264
-BR00142X6USD,120325,00000000000000026264
-BR00143R8USD,000000,00000000000000026264
-BR00144R7USD,000000,00000000000000026264
-BR00145R6USD,000000,00000000000000026264
-BR00148W2USD,000000,00000000000000026264
-BR00152R6USD,000000,00000000000000026264
-BR00153R5USD,000000,00000000000000026264
-BR00157W0USD,000000,00000000000000026264
-BR0017205USD,000000,00000000000000026264
-BR00188R4USD,000000,00000000000000026264
-BR00189X0USD,000000,00000000000000026264
-BR00189X0USD,120325,00000000000000026264
-BR00190X7USD,000000,00000000000000026264
-BR00190X7USD,120325,00000000000000026264
-H63496519CAD,000000,00000000000000026264
-HQ00HQN13CAD,000000,00000000000000026264
-HQ011XM14CAD,000000,00000000000000026264
-HQ01B2C12CAD,000000,00000000000000026264
-HQ01F5S14CAD,000000,00000000000000026264
-HQ01YS617CAD,000000,00000000000000026264
-HQ01Z5Q14CAD,000000,00000000000000026264
-HQ022J818CAD,000000,00000000000000026264
-HQ0247S10CAD,000000,00000000000000026264
-HQ029T215CAD,000000,00000000000000026264
-HQ02CCT19CAD,000000,00000000000000026264
-HQ02CPF15CAD,000000,00000000000000026264
-HQ02CYF16CAD,000000,00000000000000026264
-HQ02GX713CAD,000000,00000000000000026264
-HQ02GXW15CAD,000000,00000000000000026264
-HQ04CLS16CAD,000000,00000000000000026264
-HQ04NTT16CAD,000000,00000000000000026264
-HQ04NTV13CAD,000000,00000000000000026264
-HQ04Q9R19CAD,000000,00000000000000026264
-HQ04T9015CAD,000000,00000000000000026264
-HQ0532X19CAD,000000,00000000000000026264
-HQ054JX11CAD,000000,00000000000000026264
-HQ0573L16CAD,000000,00000000000000026264
-HQ05D6R16CAD,000000,00000000000000026264
-HQ05JP215CAD,000000,00000000000000026264
-HQ05KFS17CAD,000000,00000000000000026264
-HQ05PKY14CAD,000000,00000000000000026264
-HQ05QML13CAD,000000,00000000000000026264
-HQ05QPF13CAD,000000,00000000000000026264
-HQ05R8214CAD,000000,00000000000000026264
-HQ05RZK14CAD,000000,00000000000000026264
-HQ05RZN11CAD,000000,00000000000000026264
-HQ05S0S12CAD,000000,00000000000000026264
-HQ05S4M10CAD,000000,00000000000000026264
-HQ05S6M15CAD,000000,00000000000000026264
-HQ05SDT13CAD,000000,00000000000000026264
-HQ05T1K17CAD,000000,00000000000000026264
-HQ05TDR14CAD,000000,00000000000000026264
-HQ05VJC14CAD,000000,00000000000000026264
-HQ05VQ912CAD,000000,00000000000000026264
-HQ0601810CAD,000000,00000000000000026264
-HQ0627Y16CAD,000000,00000000000000026264
-HQ063CB19CAD,000000,00000000000000026264
-HQ063DL16CAD,000000,00000000000000026264
-HQ067L116CAD,000000,00000000000000026264
-HQ06C3J11CAD,000000,00000000000000026264
-HQ06CDS19CAD,000000,00000000000000026264
-HQ06DHV15CAD,000000,00000000000000026264
-HQ06JWW15CAD,000000,00000000000000026264
-HQ06K9118CAD,000000,00000000000000026264
-HQ06KB410CAD,000000,00000000000000026264
-HQ06L2Y16CAD,000000,00000000000000026264
-HQ06TJ117CAD,000000,00000000000000026264
-HQ0761Z12CAD,000000,00000000000000026264
-HQ07FQK13CAD,000000,00000000000000026264
-HQ07FZM11CAD,000000,00000000000000026264
-HQ07HK115CAD,000000,00000000000000026264
-HQ07N8P19CAD,000000,00000000000000026264
-HQ08LSS12CAD,000000,00000000000000026264
-HQ08Y9G13CAD,000000,00000000000000026264
-HQ0D9RH19CAD,000000,00000000000000026264
-HQ0MD4K11CAD,000000,00000000000000026264
-HQ0P90N14CAD,000000,00000000000000026264
-HQ0P91Y10CAD,000000,00000000000000026264
-HQ0P97915CAD,000000,00000000000000026264
-HQ0PZHQ15CAD,000000,00000000000000026264
-HQ0QV8R16CAD,000000,00000000000000026264
-HQ0SN7Z14CAD,000000,00000000000000026264
-HQ0TT6Z18CAD,000000,00000000000000026264
-HQ0W2V310CAD,000000,00000000000000026264
-HQ0YRV715CAD,000000,00000000000000026264
-HQ1078810CAD,000000,00000000000000026264
-HQ12B6S13CAD,000000,00000000000000026264
-HQ12D3Q10CAD,000000,00000000000000026264
-HQ1813810CAD,000000,00000000000000026264
-HQ1813R19CAD,000000,00000000000000026264
-HQ1815112CAD,000000,00000000000000026264
-HQ1817J19CAD,000000,00000000000000026264
-HQ1886B12CAD,000000,00000000000000026264
-HQ1CNC114CAD,000000,00000000000000026264
-HQ1CNHB12CAD,000000,00000000000000026264
-HQ1D0GW14CAD,000000,00000000000000026264
-HQ1DGP319CAD,000000,00000000000000026264
-HQ1DQK111CAD,000000,00000000000000026264
-BR00135L1USD,000000,00000000000000026255
-BR00136L0USD,000000,00000000000000026255
-BR00149W1USD,000000,00000000000000026255
-BR00149W1USD,201120,00000000000000026255
-BR00164L5USD,000000,00000000000000026255
-HQ02NYC17CAD,000000,00000000000000026255
-HQ0573L16CAD,000000,00000000000000026255
-HQ05VJC14CAD,000000,00000000000000026255
-HQ05Z9D11CAD,000000,00000000000000026255
-HQ0627Y16CAD,000000,00000000000000026255
-HQ063CB19CAD,000000,00000000000000026255
-HQ067LG10CAD,000000,00000000000000026255
-HQ06DHV15CAD,000000,00000000000000026255
-HQ06K9118CAD,000000,00000000000000026255
-HQ06KB410CAD,000000,00000000000000026255
-HQ07FQK13CAD,000000,00000000000000026255
-HQ07FZM11CAD,000000,00000000000000026255
-HQ0PZHQ15CAD,000000,00000000000000026255
-HQ0QV8R16CAD,000000,00000000000000026255
-HQ0TT6Z18CAD,000000,00000000000000026255
-HQ12B4R19CAD,000000,00000000000000026255
-HQ1815112CAD,000000,00000000000000026255
-X10008L10CAD,000000,00000000000000026255
-BR00135L1USD,000000,00000000000000026277
-BR00136L0USD,000000,00000000000000026277
-BR00142X6USD,000000,00000000000000026277
-BR00142X6USD,120325,00000000000000026277
-BR00143R8USD,000000,00000000000000026277
-BR00145R6USD,000000,00000000000000026277
-BR00164L5USD,000000,00000000000000026277
-BR00189X0USD,000000,00000000000000026277
-BR00189X0USD,120325,00000000000000026277
-BR00190X7USD,000000,00000000000000026277
-BR00190X7USD,120325,00000000000000026277
-HQ011XM14CAD,000000,00000000000000026277
-HQ015R819CAD,000000,00000000000000026277
-HQ01F5S14CAD,000000,00000000000000026277
-HQ01Q1912CAD,000000,00000000000000026277
-HQ01YS617CAD,000000,00000000000000026277
-HQ02GXW15CAD,000000,00000000000000026277
-HQ02NYC17CAD,000000,00000000000000026277
-HQ04CLS16CAD,000000,00000000000000026277
-HQ04NTV13CAD,000000,00000000000000026277
-HQ04Q9R19CAD,000000,00000000000000026277
-HQ051B611CAD,000000,00000000000000026277
-HQ0532X19CAD,000000,00000000000000026277
-HQ0573L16CAD,000000,00000000000000026277
-HQ05D6R16CAD,000000,00000000000000026277
-HQ05FJ510CAD,000000,00000000000000026277
-HQ05PKY14CAD,000000,00000000000000026277
-HQ05QPF13CAD,000000,00000000000000026277
-HQ05RVR16CAD,000000,00000000000000026277
-HQ05RZK14CAD,000000,00000000000000026277
-HQ05S6M15CAD,000000,00000000000000026277
-HQ05VJC14CAD,000000,00000000000000026277
-HQ060NS10CAD,000000,00000000000000026277
-HQ0627Y16CAD,000000,00000000000000026277
-HQ063CB19CAD,000000,00000000000000026277
-HQ06C3J11CAD,000000,00000000000000026277
-HQ06CDS19CAD,000000,00000000000000026277
-HQ06JWW15CAD,000000,00000000000000026277
-HQ06K9118CAD,000000,00000000000000026277
-HQ06KB410CAD,000000,00000000000000026277
-HQ06L2Y16CAD,000000,00000000000000026277
-HQ07FQK13CAD,000000,00000000000000026277
-HQ07FZM11CAD,000000,00000000000000026277
-HQ08LSS12CAD,000000,00000000000000026277
-HQ08Y9G13CAD,000000,00000000000000026277
-HQ0QV8R16CAD,000000,00000000000000026277
-HQ0RY1916CAD,000000,00000000000000026277
-HQ0RY2211CAD,000000,00000000000000026277
-HQ0RY2617CAD,000000,00000000000000026277
-HQ0RY3Y14CAD,000000,00000000000000026277
-HQ0SN7Z14CAD,000000,00000000000000026277
-HQ13CY910CAD,000000,00000000000000026277
-HQ1813810CAD,000000,00000000000000026277
-HQ1817J19CAD,000000,00000000000000026277
-HQ1B8RV17CAD,000000,00000000000000026277
-HQ1CJ2C19CAD,000000,00000000000000026277
-HQ1DQK111CAD,000000,00000000000000026277"""
-
-# =============================================================================
-# WRITE-OFF / SUSPENSE ACCOUNTS (Destination accounts for write-offs)
-# =============================================================================
-
-WRITEOFF_ACCOUNTS = [
-    ("HQ0C7XCK3CAD", "201030"),
-    ("HM93593K8CAD", "201030"),
-    ("WB7218549CAD", "201030"),
-    ("H19930702CAD", "201010"),
-    ("WB7658603CAD", "201060"),
-    ("HQ11SKM04CAD", "201010"),
-    ("WK06HDB00CAD", "201010"),
-    ("H516808K7CAD", "201030"),
-    ("H521649K0CAD", "201030"),
-    ("HQ1FJ3B11CAD", "201010"),
-    ("W67452909CAD", "201010"),
-    ("WK061B3K6CAD", "201030"),
-    ("HQ1VB5G06CAD", "201010"),
-    ("HQ1W8R0K3CAD", "201030"),
-    ("W641704K1CAD", "201030"),
-    ("HP8175918CAD", "201010"),
-    ("WK05NGF04CAD", "201060"),
-    ("WK05833K9CAD", "201030"),
-    ("HQ1GG6405CAD", "201010"),
-    ("HQ1466NK8CAD", "201030"),
-]
+from amount_engine import (
+    DEFAULT_BATCH_SIZE,
+    SCALED_AMOUNTS,
+    UNBALANCE_STEP,
+    draw_scaled_amounts,
+    format_scaled,
+    format_scaled_bytes_batch,
+    split_scaled,
+)
+from checkpoint import (
+    DEFAULT_CHECKPOINT_INTERVAL,
+    Checkpoint,
+    CheckpointedFile,
+    add_checkpoint_arguments,
+    check_resume,
+    checkpoint_path,
+    partial_path,
+    read_checkpoint,
+)
+from columnar_output import FORMATS as COLUMNAR_FORMATS, Column, ColumnarWriter, columnar_path
+from compressed_output import COMPRESSIONS, OutputFile, compressed_path, describe_throughput
+from entry_options import EntryOptions, entry_options_from_args
+from entry_rng import EntryRandom, new_seed
+from key_distributions import add_distribution_arguments
+from line_fanout import LINE_BITS_MIN, SPLIT_WEIGHT_RANGE, add_fanout_arguments
+from output_rotation import RotatingWriter, check_limits
+from pool_index import LazyTable, PoolIndex
+from rate_stream import (
+    DEFAULT_BUFFER_BATCHES,
+    DEFAULT_REPORT_INTERVAL,
+    RateProfile,
+    StreamOutput,
+    add_stream_arguments,
+    describe as describe_stream,
+    planned_entries,
+    profile_from_args,
+    stream,
+)
+from row_templates import RowTemplate, Slot, encode_field, encode_row
+from split_bulk_csv import split_csv
+from telemetry import DEFAULT_INTERVAL, Telemetry, peak_rss_mb, write_metrics
+from unique_entries import (
+    DEFAULT_MEMORY_MB as DEFAULT_UNIQUE_MEMORY_MB,
+    FilterFull,
+    add_unique_arguments,
+    checkpoint_filter_path,
+    open_unique_tuples,
+    resume_unique_tuples,
+)
 
 # =============================================================================
 # CONSTANTS
@@ -649,73 +140,40 @@ CSV_HEADERS = [
 ]
 
 
-def parse_raw_data() -> Dict[str, List[Tuple[str, str]]]:
+def parse_raw_data(entry_options: EntryOptions = EntryOptions()) -> Dict[str, List[Tuple[str, str]]]:
     """
-    Parse raw data and group by ASSET_ID.
+    Source accounts of the options' pool files, grouped by ASSET_ID.
     Returns: {asset_id: [(sub_acct, natural_acct), ...]}
     """
-    assets_to_accounts: Dict[str, List[Tuple[str, str]]] = defaultdict(list)
-
-    for line in RAW_DATA.strip().split('\n'):
-        parts = line.split(',')
-        if len(parts) >= 3:
-            sub_acct, natural_acct, asset_id = parts[0], parts[1], parts[2]
-            assets_to_accounts[asset_id].append((sub_acct, natural_acct))
-
-    # Only keep assets with at least 2 accounts (for pairing)
-    return {k: v for k, v in assets_to_accounts.items() if len(v) >= 2}
+    # Only assets with at least 2 accounts (for pairing), see pool_index
+    return entry_options.pools().to_dict()
 
 
-def generate_random_amount() -> Decimal:
-    """Generate a random tiny amount (8-10 decimal places)."""
-    mantissa = random.randint(1, 9999)
-    exponent = random.randint(8, 10)
-    return Decimal(mantissa) / Decimal(10 ** exponent)
-
-
-def format_amount(amount: Decimal) -> str:
-    """Format amount with 10 decimal places."""
-    return f"{amount:.10f}"
-
-
-def generate_entry_pair(
+def build_line(
     entry_num: int,
     accounting_date: str,
     asset_id: str,
-    source: Tuple[str, str],
-    dest: Tuple[str, str],
-    unbalanced: bool = False
-) -> List[List[str]]:
+    account: Tuple[str, str],
+    trans_code: str,
+    dr_str: str,
+    cr_str: str
+) -> List[str]:
     """
-    Generate a balanced (or unbalanced) pair of journal lines for one entry.
+    Build one journal line: DEL lines carry ENTERED_DR, REC lines ENTERED_CR.
     """
-    source_sub_acct, source_natural_acct = source
-    dest_sub_acct, dest_natural_acct = dest
-
-    dr_amount = generate_random_amount()
-
-    if unbalanced:
-        # Generate a different CR amount (off by a tiny bit)
-        cr_amount = dr_amount + Decimal("0.0000000001")
-    else:
-        cr_amount = dr_amount
-
-    dr_str = format_amount(dr_amount)
-    cr_str = format_amount(cr_amount)
-
-    # Line 1: DEL (Delivery) - Debit side
-    del_line = [
+    sub_acct, natural_acct = account
+    return [
         str(entry_num),
         JIRA_ID,
         asset_id,
         POSITION,
         accounting_date,
-        source_natural_acct,
-        source_sub_acct,
-        "DEL",
+        natural_acct,
+        sub_acct,
+        trans_code,
         CURRENCY,
-        dr_str,   # ENTERED_DR
-        "",       # ENTERED_CR (empty)
+        dr_str,   # ENTERED_DR (empty on REC)
+        cr_str,   # ENTERED_CR (empty on DEL)
         LINE_DESCRIPTION,
         TRANS_SUBCODE,
         FX_RATE,
@@ -729,33 +187,1076 @@ def generate_entry_pair(
         EXTERNAL_SOURCE
     ]
 
-    # Line 2: REC (Receipt) - Credit side
-    rec_line = [
-        str(entry_num),
-        JIRA_ID,
-        asset_id,
-        POSITION,
-        accounting_date,
-        dest_natural_acct,
-        dest_sub_acct,
-        "REC",
-        CURRENCY,
-        "",       # ENTERED_DR (empty)
-        cr_str,   # ENTERED_CR
-        LINE_DESCRIPTION,
-        TRANS_SUBCODE,
-        FX_RATE,
-        BUSINESS_UNIT,
-        BV_DELTA,
-        BV_DELTA,
-        RELATED_ASSET_ID,
-        COMMISSION,
-        REFERENCE_VALUE,
-        REFERENCE_TYPE,
-        EXTERNAL_SOURCE
+
+def build_entry_lines(
+    entry_num: int,
+    accounting_date: str,
+    asset_id: str,
+    source: Tuple[str, str],
+    dest: Tuple[str, str],
+    dr_str: str,
+    cr_str: str
+) -> List[List[str]]:
+    """
+    Build the DEL/REC pair of journal lines for one entry from formatted amounts.
+    """
+    return [
+        # Line 1: DEL (Delivery) - Debit side
+        build_line(entry_num, accounting_date, asset_id, source, "DEL", dr_str, ""),
+        # Line 2: REC (Receipt) - Credit side
+        build_line(entry_num, accounting_date, asset_id, dest, "REC", "", cr_str),
+    ]
+
+
+def generate_entry_pair(
+    entry_num: int,
+    accounting_date: str,
+    asset_id: str,
+    source: Tuple[str, str],
+    dest: Tuple[str, str],
+    unbalanced: bool = False,
+    rng: Optional[random.Random] = None,
+    scaled_amount: Optional[int] = None
+) -> List[List[str]]:
+    """
+    Generate a balanced (or unbalanced) pair of journal lines for one entry.
+
+    scaled_amount is the DR amount in units of 1e-10 (see amount_engine); one is
+    drawn if not given. CR is the same integer, or one unit more if unbalanced.
+    """
+    if scaled_amount is None:
+        scaled_amount = draw_scaled_amounts(1, rng)[0]
+
+    dr_str = format_scaled(scaled_amount)
+    if unbalanced:
+        # Generate a different CR amount (off by a tiny bit)
+        cr_str = format_scaled(scaled_amount + UNBALANCE_STEP)
+    else:
+        cr_str = dr_str
+
+    return build_entry_lines(entry_num, accounting_date, asset_id, source, dest, dr_str, cr_str)
+
+
+def shard_path(output_path: str, shard_index: int) -> str:
+    """Path of the shard file written by one worker, e.g. out.shard0003.csv."""
+    root, ext = os.path.splitext(output_path)
+    return f"{root}.shard{shard_index:04d}{ext}"
+
+
+def split_entry_range(num_entries: int, num_shards: int) -> List[Tuple[int, int]]:
+    """
+    Split ENTRY_NUMs 1..num_entries into contiguous [start, stop) ranges.
+    Shard sizes differ by at most one entry.
+    """
+    num_shards = max(1, min(num_shards, num_entries))
+    base, extra = divmod(num_entries, num_shards)
+    ranges = []
+    start = 1
+    for i in range(num_shards):
+        stop = start + base + (1 if i < extra else 0)
+        ranges.append((start, stop))
+        start = stop
+    return ranges
+
+
+def _template_line(accounting_date: str, trans_code: str, dr: object, cr: object) -> list:
+    """Fields of one journal line for a RowTemplate, with the amount slots given."""
+    return [
+        Slot("entry_num", numeric=True), JIRA_ID, Slot("asset_id"), POSITION,
+        accounting_date, Slot("natural_acct"), Slot("sub_acct"), trans_code, CURRENCY,
+        dr, cr, LINE_DESCRIPTION, TRANS_SUBCODE, FX_RATE, BUSINESS_UNIT,
+        BV_DELTA, BV_DELTA, RELATED_ASSET_ID, COMMISSION,
+        REFERENCE_VALUE, REFERENCE_TYPE, EXTERNAL_SOURCE
+    ]
+
+
+def compile_pair_template(accounting_date: str) -> RowTemplate:
+    """
+    Compile the DEL/REC line pair into one bytes template for a given date.
+    Slots: entry_num, asset_id, source natural/sub, DR, entry_num, asset_id,
+    dest natural/sub, CR - everything else is a constant baked into the template.
+    """
+    return RowTemplate(
+        _template_line(accounting_date, "DEL", Slot("entered_dr"), ""),
+        _template_line(accounting_date, "REC", "", Slot("entered_cr")),
+    )
+
+
+def compile_line_templates(accounting_date: str) -> Tuple[RowTemplate, RowTemplate]:
+    """
+    Compile a single DEL line and a single REC line, for fan-out entries.
+    Slots: entry_num, asset_id, natural/sub, amount.
+    """
+    return (
+        RowTemplate(_template_line(accounting_date, "DEL", Slot("entered_dr"), "")),
+        RowTemplate(_template_line(accounting_date, "REC", "", Slot("entered_cr"))),
+    )
+
+
+class JournalLine(NamedTuple):
+    """One line of a fan-out entry; the amount is a scaled integer (units of 1e-10)."""
+    trans_code: str
+    account: Tuple[str, str]
+    amount: int
+
+
+class JournalEntry(NamedTuple):
+    """One generated entry; amounts are scaled integers (units of 1e-10).
+
+    A fan-out entry (see line_fanout) lists every line in `lines`; source and
+    dest are then its first DEL and REC accounts, and the amounts the side
+    totals. `lines` is empty for a plain DEL/REC pair.
+    """
+    entry_num: int
+    asset_id: str
+    source: Tuple[str, str]
+    dest: Tuple[str, str]
+    dr_amount: int
+    cr_amount: int
+    lines: Tuple[JournalLine, ...] = ()
+
+
+def entry_lines(entry: JournalEntry, accounting_date: str) -> List[List[str]]:
+    """CSV rows of one JournalEntry, pair or fan-out."""
+    if not entry.lines:
+        return build_entry_lines(
+            entry.entry_num, accounting_date, entry.asset_id, entry.source, entry.dest,
+            format_scaled(entry.dr_amount), format_scaled(entry.cr_amount)
+        )
+    rows = []
+    for line in entry.lines:
+        amount = format_scaled(line.amount)
+        dr_str, cr_str = (amount, "") if line.trans_code == "DEL" else ("", amount)
+        rows.append(build_line(
+            entry.entry_num, accounting_date, entry.asset_id, line.account, line.trans_code, dr_str, cr_str
+        ))
+    return rows
+
+
+# Staging data comes from the pool files (see pool_index): source accounts from
+# Query 2 grouped by ASSET_ID for pairing, write-off accounts from Query 3.
+# Pool members carry their encoded CSV fields alongside the raw values:
+# asset: (asset_id, asset_bytes, first member, member count),
+# account: ((sub, natural), natural_bytes, sub_bytes)
+_PoolAccount = Tuple[Tuple[str, str], bytes, bytes]
+_PoolAsset = Tuple[str, bytes, int, int]
+
+
+class _EncodedPools(NamedTuple):
+    assets: List[_PoolAsset]
+    members: List[int]      # account ids, contiguous per asset
+    writeoff: List[int]     # account ids of the write-off accounts
+    accounts: LazyTable     # account id -> _PoolAccount, encoded on first use
+
+
+def _encode_account(account: Tuple[str, str]) -> _PoolAccount:
+    """(sub_acct, natural_acct) -> pool member with encoded fields in column order."""
+    sub_acct, natural_acct = account
+    return account, encode_field(natural_acct), encode_field(sub_acct)
+
+
+def _encoded_pools(index: PoolIndex) -> _EncodedPools:
+    """Lay the pools out for the hot loop: account ids index into a table of
+    encoded members, so it only splices bytes, and only the accounts a run
+    actually draws are ever encoded."""
+    if not index.num_assets:
+        raise ValueError("No valid asset/account pairs found!")
+
+    offsets = index.offsets
+    assets = [
+        (asset_id, encode_field(asset_id), offsets[i], offsets[i + 1] - offsets[i])
+        for i, asset_id in enumerate(index.asset_ids)
+    ]
+    accounts = LazyTable(lambda account_id: _encode_account(index.accounts[account_id]))
+    return _EncodedPools(assets, index.members.tolist(), index.writeoff.tolist(), accounts)
+
+
+def _sample_batches(
+    start: int,
+    stop: int,
+    unbalanced: bool,
+    use_writeoff_accounts: bool,
+    seed: int,
+    entry_options: EntryOptions
+) -> Iterator[Tuple[int, List[Tuple[_PoolAsset, _PoolAccount, _PoolAccount]], List[int], List[int]]]:
+    """
+    Draw entries start..stop-1 one batch at a time.
+
+    Yields (batch_start, picks, dr_amounts, cr_amounts) where picks holds one
+    (asset, source, dest) pool triple per entry. Every public iterator is built
+    on this, so they all produce the same entries for the same seed.
+
+    Each entry's draws come from its own counter-based random bits (see
+    entry_rng), in the order asset, source, dest, amount, each uniform or
+    from the options' key distribution (see key_distributions). With
+    --unique, the amount is claimed from the options' filter instead (see
+    unique_entries).
+    """
+    pools = _encoded_pools(entry_options.pools())
+    assets = pools.assets
+    members = pools.members
+    writeoff = pools.writeoff
+    encoded = pools.accounts
+    # Alias tables for skewed draws, None for uniform ones (see key_distributions)
+    asset_table, source_tables, dest_tables = entry_options.samplers()
+    counter_rng = EntryRandom(seed)
+    num_assets = len(assets)
+    num_writeoff = len(writeoff)
+    num_amounts = len(SCALED_AMOUNTS)
+    unique = entry_options.unique
+
+    for batch_start in range(start, stop, DEFAULT_BATCH_SIZE):
+        batch_stop = min(batch_start + DEFAULT_BATCH_SIZE, stop)
+        picks = []
+        dr_amounts = []
+        for entry_num, bits in enumerate(counter_rng.bits_range(batch_start, batch_stop), batch_start):
+            # Pick random asset and source account
+            if asset_table is None:
+                bits, a = divmod(bits, num_assets)
+            else:
+                bits, a = asset_table.draw(bits)
+            asset = assets[a]
+            first = asset[2]
+            num_accounts = asset[3]
+            if source_tables is None:
+                bits, i = divmod(bits, num_accounts)
+            else:
+                bits, i = source_tables[num_accounts].draw(bits)
+            source_id = members[first + i]
+
+            if use_writeoff_accounts or num_accounts < 2:
+                # Use dedicated write-off account as destination (also the
+                # fallback if only one account for this asset)
+                if dest_tables is None:
+                    bits, j = divmod(bits, num_writeoff)
+                else:
+                    bits, j = dest_tables[num_writeoff].draw(bits)
+                dest_id = writeoff[j]
+            else:
+                # Pick a different account for the same asset: one of the
+                # other num_accounts - 1, without building a list of them
+                # (pool_index.other_index, inlined)
+                if dest_tables is None:
+                    bits, j = divmod(bits, num_accounts - 1)
+                else:
+                    bits, j = dest_tables[num_accounts - 1].draw(bits)
+                dest_id = members[first + j + (j >= i)]
+
+            picks.append((asset, encoded[source_id], encoded[dest_id]))
+            if unique is None:
+                dr_amounts.append(SCALED_AMOUNTS[bits % num_amounts])
+            else:
+                dr_amounts.append(unique.claim(a, source_id, dest_id, bits, counter_rng, entry_num))
+        if unique is not None:
+            unique.end_batch(batch_stop - batch_start, batch_stop)
+
+        if unbalanced:
+            # Generate a different CR amount (off by a tiny bit)
+            cr_amounts = [a + UNBALANCE_STEP for a in dr_amounts]
+        else:
+            cr_amounts = dr_amounts
+
+        yield batch_start, picks, dr_amounts, cr_amounts
+
+
+# One fan-out entry: (asset, DEL accounts, DR amounts, REC accounts, CR amounts)
+_FanOutEntry = Tuple[_PoolAsset, List[_PoolAccount], List[int], List[_PoolAccount], List[int]]
+
+
+def _sample_fanout_batches(
+    start: int,
+    stop: int,
+    unbalanced: bool,
+    use_writeoff_accounts: bool,
+    seed: int,
+    entry_options: EntryOptions
+) -> Iterator[Tuple[int, List[_FanOutEntry]]]:
+    """
+    Draw fan-out entries start..stop-1 one batch at a time (see line_fanout).
+
+    Yields (batch_start, entries). Lane 0 of each entry's bits gives the asset
+    and the two line counts. The lines (DEL lines first) then draw their
+    account, then their amount or split weight, from lanes 1, 2, ... in turn
+    (see line_fanout.LINE_BITS_MIN). Accounts are drawn as in _sample_batches;
+    a same-asset destination skips the first DEL account.
+    """
+    pools = _encoded_pools(entry_options.pools())
+    assets = pools.assets
+    members = pools.members
+    writeoff = pools.writeoff
+    encoded = pools.accounts
+    asset_table, source_tables, dest_tables = entry_options.samplers()
+    counter_rng = EntryRandom(seed)
+    lane_bits = counter_rng.bits
+    draw_debits = entry_options.lines.debits.draw
+    draw_credits = entry_options.lines.credits.draw
+    num_assets = len(assets)
+    num_writeoff = len(writeoff)
+    num_amounts = len(SCALED_AMOUNTS)
+
+    for batch_start in range(start, stop, DEFAULT_BATCH_SIZE):
+        batch_stop = min(batch_start + DEFAULT_BATCH_SIZE, stop)
+        entries = []
+        for entry_num, bits in zip(range(batch_start, batch_stop), counter_rng.bits_range(batch_start, batch_stop)):
+            if asset_table is None:
+                bits, i = divmod(bits, num_assets)
+            else:
+                bits, i = asset_table.draw(bits)
+            asset = assets[i]
+            first = asset[2]
+            num_accounts = asset[3]
+            bits, num_debits = draw_debits(bits)
+            bits, num_credits = draw_credits(bits)
+            # The longer side draws an amount per line, the other splits their total
+            debits_drawn = num_debits >= num_credits
+
+            # Lines share lane bits until too few are left for another line
+            lane = 1
+            bits = 0
+            sources = []
+            debit_draws = []
+            first_source = None
+            for _ in range(num_debits):
+                if bits < LINE_BITS_MIN:
+                    bits = lane_bits(entry_num, lane)
+                    lane += 1
+                if source_tables is None:
+                    bits, i = divmod(bits, num_accounts)
+                else:
+                    bits, i = source_tables[num_accounts].draw(bits)
+                if first_source is None:
+                    first_source = i
+                sources.append(encoded[members[first + i]])
+                if debits_drawn:
+                    bits, k = divmod(bits, num_amounts)
+                    debit_draws.append(SCALED_AMOUNTS[k])
+                else:
+                    bits, k = divmod(bits, SPLIT_WEIGHT_RANGE)
+                    debit_draws.append(k + 1)
+
+            dests = []
+            credit_draws = []
+            for _ in range(num_credits):
+                if bits < LINE_BITS_MIN:
+                    bits = lane_bits(entry_num, lane)
+                    lane += 1
+                if use_writeoff_accounts or num_accounts < 2:
+                    if dest_tables is None:
+                        bits, j = divmod(bits, num_writeoff)
+                    else:
+                        bits, j = dest_tables[num_writeoff].draw(bits)
+                    dests.append(encoded[writeoff[j]])
+                else:
+                    if dest_tables is None:
+                        bits, j = divmod(bits, num_accounts - 1)
+                    else:
+                        bits, j = dest_tables[num_accounts - 1].draw(bits)
+                    dests.append(encoded[members[first + j + (j >= first_source)]])
+                if debits_drawn:
+                    bits, k = divmod(bits, SPLIT_WEIGHT_RANGE)
+                    credit_draws.append(k + 1)
+                else:
+                    bits, k = divmod(bits, num_amounts)
+                    credit_draws.append(SCALED_AMOUNTS[k])
+
+            if debits_drawn:
+                dr_amounts = debit_draws
+                cr_amounts = split_scaled(sum(debit_draws), credit_draws)
+            else:
+                dr_amounts = split_scaled(sum(credit_draws), debit_draws)
+                cr_amounts = credit_draws
+            if unbalanced:
+                # The last REC line is off by a tiny bit
+                cr_amounts[-1] += UNBALANCE_STEP
+            entries.append((asset, sources, dr_amounts, dests, cr_amounts))
+
+        yield batch_start, entries
+
+
+def iter_entries(
+    num_entries: int,
+    unbalanced: bool = False,
+    use_writeoff_accounts: bool = True,
+    seed: Optional[int] = None,
+    start: int = 1,
+    entry_options: EntryOptions = EntryOptions()
+) -> Iterator[JournalEntry]:
+    """Lazily generate entries start..start+num_entries-1 as JournalEntry tuples.
+
+    With the same seed and entry_options, entry N is the same no matter which
+    range it is generated in, so iter_entries(1, seed=s, start=N) rebuilds
+    just entry N. With lines per entry other than 1/1, entries carry their
+    lines (see JournalEntry).
+    """
+    if seed is None:
+        seed = new_seed()
+
+    if not entry_options.lines.is_pair:
+        for batch_start, entries in _sample_fanout_batches(
+            start, start + num_entries, unbalanced, use_writeoff_accounts, seed, entry_options
+        ):
+            for entry_num, (asset, sources, dr_amounts, dests, cr_amounts) in enumerate(entries, batch_start):
+                lines = tuple(
+                    [JournalLine("DEL", source[0], dr) for source, dr in zip(sources, dr_amounts)]
+                    + [JournalLine("REC", dest[0], cr) for dest, cr in zip(dests, cr_amounts)]
+                )
+                yield JournalEntry(
+                    entry_num, asset[0], sources[0][0], dests[0][0],
+                    sum(dr_amounts), sum(cr_amounts), lines
+                )
+        return
+
+    for batch_start, picks, dr_amounts, cr_amounts in _sample_batches(
+        start, start + num_entries, unbalanced, use_writeoff_accounts, seed, entry_options
+    ):
+        for entry_num, (asset, source, dest), dr, cr in zip(
+            range(batch_start, batch_start + len(picks)), picks, dr_amounts, cr_amounts
+        ):
+            yield JournalEntry(entry_num, asset[0], source[0], dest[0], dr, cr)
+
+
+def iter_rows(
+    num_entries: int,
+    accounting_date: Optional[str] = None,
+    unbalanced: bool = False,
+    use_writeoff_accounts: bool = True,
+    seed: Optional[int] = None,
+    start: int = 1,
+    entry_options: EntryOptions = EntryOptions()
+) -> Iterator[List[str]]:
+    """Lazily generate CSV rows (DEL then REC lines per entry), without the header."""
+    if accounting_date is None:
+        accounting_date = date.today().isoformat()
+
+    for entry in iter_entries(num_entries, unbalanced, use_writeoff_accounts, seed, start, entry_options):
+        yield from entry_lines(entry, accounting_date)
+
+
+def _pair_columns(
+    batch_start: int,
+    picks: List[Tuple[_PoolAsset, _PoolAccount, _PoolAccount]],
+    dr_amounts: List[int],
+    cr_amounts: List[int],
+    accounting_date: str
+) -> Dict[str, Column]:
+    """Columns (see columnar_output) for one batch: DEL/REC rows interleaved, as in the CSV."""
+    def interleave(dels: list, recs: list) -> list:
+        column = [None] * (2 * len(dels))
+        column[0::2] = dels
+        column[1::2] = recs
+        return column
+
+    entry_nums = range(batch_start, batch_start + len(picks))
+    asset_ids = [asset[0] for asset, _, _ in picks]
+    return {
+        "ENTRY_NUM": interleave(entry_nums, entry_nums),
+        "JIRA_ID": JIRA_ID,
+        "ASSET_ID": interleave(asset_ids, asset_ids),
+        "POSITION": POSITION,
+        "ACCOUNTING_DATE": accounting_date,
+        "NATURAL_ACCT": interleave([s[0][1] for _, s, _ in picks], [d[0][1] for _, _, d in picks]),
+        "SUB_ACCT": interleave([s[0][0] for _, s, _ in picks], [d[0][0] for _, _, d in picks]),
+        "TRANS_CODE": ["DEL", "REC"] * len(picks),
+        "CURRENCY": CURRENCY,
+        "ENTERED_DR": interleave(dr_amounts, [None] * len(picks)),
+        "ENTERED_CR": interleave([None] * len(picks), cr_amounts),
+        "LINE_DESCRIPTION": LINE_DESCRIPTION,
+        "TRANS_SUBCODE": TRANS_SUBCODE,
+        "FX_RATE": FX_RATE,
+        "BUSINESS_UNIT": BUSINESS_UNIT,
+        "BV_DELTA_DR": BV_DELTA,
+        "BV_DELTA_CR": BV_DELTA,
+        "RELATED_ASSET_ID": RELATED_ASSET_ID,
+        "COMMISSION": COMMISSION,
+        "REFERENCE_VALUE": REFERENCE_VALUE,
+        "REFERENCE_TYPE": REFERENCE_TYPE,
+        "EXTERNAL_SOURCE": EXTERNAL_SOURCE,
+    }
+
+
+def _fanout_columns(
+    batch_start: int,
+    entries: List[_FanOutEntry],
+    accounting_date: str
+) -> Dict[str, Column]:
+    """Columns (see columnar_output) for one batch of fan-out entries, lines in CSV order."""
+    entry_nums, asset_ids, naturals, subs, codes, drs, crs = [], [], [], [], [], [], []
+    for entry_num, (asset, sources, dr_amounts, dests, cr_amounts) in enumerate(entries, batch_start):
+        num_lines = len(sources) + len(dests)
+        entry_nums += [entry_num] * num_lines
+        asset_ids += [asset[0]] * num_lines
+        for account in sources + dests:
+            naturals.append(account[0][1])
+            subs.append(account[0][0])
+        codes += ["DEL"] * len(sources) + ["REC"] * len(dests)
+        drs += dr_amounts + [None] * len(dests)
+        crs += [None] * len(sources) + cr_amounts
+
+    columns = _pair_columns(batch_start, [], [], [], accounting_date)
+    columns.update({
+        "ENTRY_NUM": entry_nums,
+        "ASSET_ID": asset_ids,
+        "NATURAL_ACCT": naturals,
+        "SUB_ACCT": subs,
+        "TRANS_CODE": codes,
+        "ENTERED_DR": drs,
+        "ENTERED_CR": crs,
+    })
+    return columns
+
+
+def _iter_fanout_batches(
+    num_entries: int,
+    accounting_date: str,
+    unbalanced: bool,
+    use_writeoff_accounts: bool,
+    seed: int,
+    start: int,
+    encode: bool,
+    columns: bool,
+    telemetry: Optional[Telemetry],
+    entry_options: EntryOptions
+) -> Iterator[Tuple[Optional[List[bytes]], Optional[Dict[str, Column]]]]:
+    """_iter_batches for fan-out entries: each entry is rendered line by line
+    from single-line templates and joined into one bytes object."""
+    del_template, rec_template = compile_line_templates(accounting_date)
+    render_del = del_template.render
+    render_rec = rec_template.render
+    clock = time.perf_counter
+    batches = _sample_fanout_batches(
+        start, start + num_entries, unbalanced, use_writeoff_accounts, seed, entry_options
+    )
+
+    while True:
+        sampling_started = clock()
+        batch = next(batches, None)
+        if batch is None:
+            return
+        formatting_started = clock()
+        batch_start, entries = batch
+
+        encoded = None
+        if encode:
+            encoded = []
+            for entry_num, (asset, sources, dr_amounts, dests, cr_amounts) in enumerate(entries, batch_start):
+                asset_bytes = asset[1]
+                lines = [
+                    render_del(entry_num, asset_bytes, source[1], source[2], dr_str)
+                    for source, dr_str in zip(sources, format_scaled_bytes_batch(dr_amounts))
+                ]
+                lines += [
+                    render_rec(entry_num, asset_bytes, dest[1], dest[2], cr_str)
+                    for dest, cr_str in zip(dests, format_scaled_bytes_batch(cr_amounts))
+                ]
+                encoded.append(b"".join(lines))
+        batch_columns = None
+        if columns:
+            batch_columns = _fanout_columns(batch_start, entries, accounting_date)
+        if telemetry:
+            telemetry.add("sampling", formatting_started - sampling_started)
+            telemetry.add("formatting", clock() - formatting_started)
+        yield encoded, batch_columns
+
+
+def _iter_batches(
+    num_entries: int,
+    accounting_date: Optional[str] = None,
+    unbalanced: bool = False,
+    use_writeoff_accounts: bool = True,
+    seed: Optional[int] = None,
+    start: int = 1,
+    encode: bool = True,
+    columns: bool = False,
+    telemetry: Optional[Telemetry] = None,
+    entry_options: EntryOptions = EntryOptions()
+) -> Iterator[Tuple[Optional[List[bytes]], Optional[Dict[str, Column]]]]:
+    """Yield (encoded entries, columns) per batch, each None unless asked for.
+
+    Both come from the same sampled batch, so CSV and columnar output can be
+    written in one pass. With telemetry, sampling and formatting time is
+    accounted per batch.
+    """
+    if accounting_date is None:
+        accounting_date = date.today().isoformat()
+    if seed is None:
+        seed = new_seed()
+
+    if not entry_options.lines.is_pair:
+        yield from _iter_fanout_batches(
+            num_entries, accounting_date, unbalanced, use_writeoff_accounts, seed, start,
+            encode, columns, telemetry, entry_options
+        )
+        return
+
+    render = compile_pair_template(accounting_date).render
+    clock = time.perf_counter
+    batches = _sample_batches(start, start + num_entries, unbalanced, use_writeoff_accounts, seed, entry_options)
+
+    while True:
+        sampling_started = clock()
+        batch = next(batches, None)
+        if batch is None:
+            return
+        formatting_started = clock()
+        batch_start, picks, dr_amounts, cr_amounts = batch
+
+        encoded = None
+        if encode:
+            dr_strs = format_scaled_bytes_batch(dr_amounts)
+            cr_strs = dr_strs if cr_amounts is dr_amounts else format_scaled_bytes_batch(cr_amounts)
+            encoded = [
+                render(
+                    entry_num, asset[1], source[1], source[2], dr_str,
+                    entry_num, asset[1], dest[1], dest[2], cr_str
+                )
+                for entry_num, (asset, source, dest), dr_str, cr_str in zip(
+                    range(batch_start, batch_start + len(picks)), picks, dr_strs, cr_strs
+                )
+            ]
+        batch_columns = None
+        if columns:
+            batch_columns = _pair_columns(batch_start, picks, dr_amounts, cr_amounts, accounting_date)
+        if telemetry:
+            telemetry.add("sampling", formatting_started - sampling_started)
+            telemetry.add("formatting", clock() - formatting_started)
+        yield encoded, batch_columns
+
+
+def iter_encoded_batches(
+    num_entries: int,
+    accounting_date: Optional[str] = None,
+    unbalanced: bool = False,
+    use_writeoff_accounts: bool = True,
+    seed: Optional[int] = None,
+    start: int = 1,
+    entry_options: EntryOptions = EntryOptions()
+) -> Iterator[List[bytes]]:
+    """Lazily generate batches of encoded entries: one bytes object (DEL + REC lines) per entry.
+
+    This is the form output rotation needs, since it may only cut between entries.
+    """
+    for encoded, _ in _iter_batches(
+        num_entries, accounting_date, unbalanced, use_writeoff_accounts, seed, start,
+        entry_options=entry_options
+    ):
+        yield encoded
+
+
+def iter_column_batches(
+    num_entries: int,
+    accounting_date: Optional[str] = None,
+    unbalanced: bool = False,
+    use_writeoff_accounts: bool = True,
+    seed: Optional[int] = None,
+    start: int = 1,
+    entry_options: EntryOptions = EntryOptions()
+) -> Iterator[Dict[str, Column]]:
+    """Lazily generate batches as columns for columnar_output.ColumnarWriter.
+
+    Amounts are scaled integers (None for the empty side of each line).
+    """
+    for _, batch_columns in _iter_batches(
+        num_entries, accounting_date, unbalanced, use_writeoff_accounts, seed, start,
+        encode=False, columns=True, entry_options=entry_options
+    ):
+        yield batch_columns
+
+
+def iter_chunks(
+    num_entries: int,
+    accounting_date: Optional[str] = None,
+    unbalanced: bool = False,
+    use_writeoff_accounts: bool = True,
+    seed: Optional[int] = None,
+    start: int = 1,
+    header: bool = True,
+    entry_options: EntryOptions = EntryOptions()
+) -> Iterator[bytes]:
+    """Lazily generate the CSV as encoded byte chunks, one batch of entries each.
+
+    Memory is bounded by one batch (DEFAULT_BATCH_SIZE entries) regardless of
+    num_entries. The concatenated chunks are exactly the CSV file contents.
+    """
+    if header:
+        yield encode_row(CSV_HEADERS)
+
+    for batch in iter_encoded_batches(
+        num_entries, accounting_date, unbalanced, use_writeoff_accounts, seed, start, entry_options
+    ):
+        yield b"".join(batch)
+
+
+def write_entries(
+    fileobj: BinaryIO,
+    num_entries: int,
+    accounting_date: Optional[str] = None,
+    unbalanced: bool = False,
+    use_writeoff_accounts: bool = True,
+    seed: Optional[int] = None,
+    start: int = 1,
+    header: bool = True,
+    progress: Optional[Callable[[int], None]] = None,
+    entry_options: EntryOptions = EntryOptions()
+) -> int:
+    """Stream entries into any binary file-like object (file, pipe, BytesIO, socket file).
+
+    Args:
+        fileobj: Anything with a write(bytes) method
+        progress: Optional callback, called after each batch with the number
+                  of entries written so far
+        entry_options: Pools, key distributions and lines per entry to draw
+                       with (see entry_options)
+
+    Returns:
+        Number of bytes written
+    """
+    written = 0
+    entries_done = 0
+    chunks = iter_chunks(
+        num_entries, accounting_date, unbalanced, use_writeoff_accounts, seed, start, header, entry_options
+    )
+    if header:
+        written += fileobj.write(next(chunks))
+    for chunk in chunks:
+        written += fileobj.write(chunk)
+        entries_done = min(entries_done + DEFAULT_BATCH_SIZE, num_entries)
+        if progress:
+            progress(entries_done)
+    return written
+
+
+def write_entry_range(
+    output_path: str,
+    start: int,
+    stop: int,
+    accounting_date: str,
+    unbalanced: bool = False,
+    use_writeoff_accounts: bool = True,
+    seed: Optional[int] = None,
+    write_header: bool = True,
+    telemetry: Optional[Telemetry] = None,
+    compress: Optional[str] = None,
+    compress_level: Optional[int] = None,
+    entry_options: EntryOptions = EntryOptions()
+) -> int:
+    """Write entries start..stop-1 to output_path. Returns the uncompressed bytes written.
+
+    This is the unit of work for both the serial path and each --workers shard.
+    With compress set, the file is compressed as it is written and gets the
+    format's suffix (see compressed_output.compressed_path).
+    """
+    clock = time.perf_counter
+    entries_done = 0
+    # Fan-out entries vary in length, so their rows are counted rather than assumed
+    rows_done = None if entry_options.lines.is_pair else 0
+    with OutputFile(output_path, compress, compress_level) as f:
+        if write_header:
+            f.write(encode_row(CSV_HEADERS))
+        for encoded, _ in _iter_batches(
+            stop - start, accounting_date, unbalanced, use_writeoff_accounts, seed, start,
+            telemetry=telemetry, entry_options=entry_options
+        ):
+            writing_started = clock()
+            chunk = b"".join(encoded)
+            f.write(chunk)
+            entries_done += len(encoded)
+            if telemetry:
+                if rows_done is not None:
+                    rows_done += chunk.count(b"\n")
+                telemetry.add("writing", clock() - writing_started)
+                telemetry.update(entries_done, f.raw_bytes, rows_done)
+    return f.raw_bytes
+
+
+def write_checkpointed(
+    output_path: str,
+    num_entries: int,
+    accounting_date: str,
+    unbalanced: bool = False,
+    use_writeoff_accounts: bool = True,
+    seed: Optional[int] = None,
+    telemetry: Optional[Telemetry] = None,
+    options: Optional[Dict[str, object]] = None,
+    checkpoint_interval: Optional[float] = DEFAULT_CHECKPOINT_INTERVAL,
+    resume_from: Optional[Checkpoint] = None,
+    entry_options: EntryOptions = EntryOptions()
+) -> int:
+    """Write entries 1..num_entries to output_path via a temp file, with checkpoints.
+
+    The file only appears at output_path once complete (see checkpoint). With
+    resume_from, the temp file is cut back to that checkpoint and generation
+    continues at its next_entry. With --unique (entry_options.unique), the
+    filter is saved with each checkpoint (see unique_entries.checkpoint_filter_path). Returns the
+    uncompressed bytes written by this call.
+    """
+    if seed is None:
+        seed = new_seed()
+    start = resume_from.next_entry if resume_from else 1
+    clock = time.perf_counter
+    entries_done = 0
+    rows_done = None if entry_options.lines.is_pair else 0
+    unique = entry_options.unique
+    with CheckpointedFile(output_path, seed, options or {}, checkpoint_interval, resume_from) as f:
+        resumed_bytes = f.raw_bytes
+        if resume_from is None:
+            f.write(encode_row(CSV_HEADERS))
+        for encoded, _ in _iter_batches(
+            num_entries + 1 - start, accounting_date, unbalanced, use_writeoff_accounts, seed, start,
+            telemetry=telemetry, entry_options=entry_options
+        ):
+            writing_started = clock()
+            chunk = b"".join(encoded)
+            f.write(chunk)
+            entries_done += len(encoded)
+            if f.checkpoint_due():
+                if unique is not None:
+                    unique.save(checkpoint_filter_path(output_path), next_entry=start + entries_done)
+                f.checkpoint(start + entries_done)
+            if telemetry:
+                if rows_done is not None:
+                    rows_done += chunk.count(b"\n")
+                telemetry.add("writing", clock() - writing_started)
+                telemetry.update(entries_done, f.raw_bytes - resumed_bytes, rows_done)
+        f.commit()
+    if unique is not None and os.path.exists(checkpoint_filter_path(output_path)):
+        os.remove(checkpoint_filter_path(output_path))
+    return f.raw_bytes - resumed_bytes
+
+
+def checkpoint_options(
+    num_entries: int,
+    accounting_date: str,
+    unbalanced: bool,
+    use_writeoff_accounts: bool,
+    entry_options: EntryOptions,
+    unique_state: Optional[str] = None
+) -> Dict[str, object]:
+    """Everything besides the seed that a checkpointed file's bytes depend on."""
+    unique = entry_options.unique
+    return {
+        "script": "generate_bulk_writeoff",
+        "entries": num_entries,
+        "accounting_date": accounting_date,
+        "unbalanced": unbalanced,
+        "use_writeoff_accounts": use_writeoff_accounts,
+        "pools": entry_options.pool_digests(),
+        "distributions": entry_options.distributions.to_dict(),
+        "lines_per_entry": entry_options.lines.spec,
+        "unique": dict(unique.spec, state=unique_state) if unique else None,
+    }
+
+
+def _write_shard(
+    shard_index: int,
+    output_path: str,
+    start: int,
+    stop: int,
+    accounting_date: str,
+    unbalanced: bool,
+    use_writeoff_accounts: bool,
+    seed: int,
+    write_header: bool,
+    compress: Optional[str] = None,
+    compress_level: Optional[int] = None,
+    entry_options: EntryOptions = EntryOptions()
+) -> Tuple[int, str, int, int, Dict[str, float]]:
+    """Process-pool entry point: generate one shard of the seeded entry sequence.
+
+    entry_options are the parent's, so workers draw from the same exports
+    (they map the parent's cache file rather than re-parsing), with the same
+    skew and lines per entry.
+
+    Returns (shard_index, path written, uncompressed bytes, rows, phase seconds).
+    """
+    path = shard_path(output_path, shard_index)
+    telemetry = Telemetry(stop - start, interval=None)
+    raw_bytes = write_entry_range(
+        path, start, stop, accounting_date,
+        unbalanced=unbalanced,
+        use_writeoff_accounts=use_writeoff_accounts,
+        seed=seed,
+        write_header=write_header,
+        telemetry=telemetry,
+        compress=compress,
+        compress_level=compress_level,
+        entry_options=entry_options
+    )
+    return shard_index, compressed_path(path, compress), raw_bytes, telemetry.rows_done, telemetry.phase_seconds
+
+
+def generate_sharded(
+    num_entries: int,
+    output_path: str,
+    accounting_date: str,
+    unbalanced: bool = False,
+    use_writeoff_accounts: bool = True,
+    workers: int = 2,
+    keep_shards: bool = False,
+    seed: Optional[int] = None,
+    compress: Optional[str] = None,
+    compress_level: Optional[int] = None,
+    telemetry: Optional[Telemetry] = None,
+    entry_options: EntryOptions = EntryOptions()
+) -> List[str]:
+    """Generate entries in parallel, one contiguous ENTRY_NUM range per worker.
+
+    Args:
+        num_entries: Number of journal entries to generate
+        output_path: Path to output CSV file (shards are named after it)
+        accounting_date: Accounting date (YYYY-MM-DD)
+        unbalanced: If True, generate entries where DR != CR
+        use_writeoff_accounts: See generate_csv
+        workers: Number of worker processes (and shards)
+        keep_shards: If True, leave one standalone CSV per shard (each with a header)
+                     instead of stitching them into output_path
+        seed: Generation seed, random if not given. Entries are keyed on
+              (seed, ENTRY_NUM), so the stitched file is identical to a
+              serial run with the same seed.
+        compress: Compress each shard in its worker (see compressed_output).
+                  Compressed streams can be concatenated, so stitching is
+                  still a plain append.
+        compress_level: Compression level, format default if not given
+        telemetry: Updated as each shard finishes; shard phase times are
+                   summed, so they can add up to more than the wall time
+        entry_options: Passed to every worker (see entry_options); not with
+                       a unique filter, which needs entries in order
+
+    Returns:
+        List of files written (just output_path unless keep_shards is set)
+    """
+    if seed is None:
+        seed = new_seed()
+
+    ranges = split_entry_range(num_entries, workers)
+    shard_files: Dict[int, str] = {}
+    entries_done = 0
+    rows_done = 0
+    raw_total = 0
+
+    with ProcessPoolExecutor(max_workers=len(ranges)) as pool:
+        futures = [
+            pool.submit(
+                _write_shard, i, output_path, start, stop, accounting_date,
+                unbalanced, use_writeoff_accounts, seed,
+                # Only the first shard carries the header when stitching
+                keep_shards or i == 0,
+                compress, compress_level, entry_options
+            )
+            for i, (start, stop) in enumerate(ranges)
+        ]
+        for future in as_completed(futures):
+            shard_index, path, raw_bytes, rows, phase_seconds = future.result()
+            shard_files[shard_index] = path
+            start, stop = ranges[shard_index]
+            print(f"  Shard {shard_index}: entries {start}-{stop - 1} ({stop - start} entries) -> {path}")
+            entries_done += stop - start
+            rows_done += rows
+            raw_total += raw_bytes
+            if telemetry:
+                telemetry.merge(phase_seconds)
+                telemetry.update(entries_done, raw_total, rows_done, force=True)
+
+    ordered = [shard_files[i] for i in range(len(ranges))]
+    if keep_shards:
+        return ordered
+
+    # Stitch: shard 0 (with the header) becomes the output, the rest are appended
+    # in ENTRY_NUM order so the result is one CSV with contiguous entry numbers.
+    output_path = compressed_path(output_path, compress)
+    os.replace(ordered[0], output_path)
+    with open(output_path, 'ab') as out:
+        for path in ordered[1:]:
+            with open(path, 'rb') as shard:
+                shutil.copyfileobj(shard, out, 16 * 1024 * 1024)
+            os.remove(path)
+    return [output_path]
+
+
+def write_outputs(
+    output_path: str,
+    num_entries: int,
+    accounting_date: str,
+    unbalanced: bool = False,
+    use_writeoff_accounts: bool = True,
+    seed: Optional[int] = None,
+    formats: Sequence[str] = ("csv",),
+    max_rows_per_file: Optional[int] = None,
+    max_bytes_per_file: Optional[int] = None,
+    compress: Optional[str] = None,
+    compress_level: Optional[int] = None,
+    telemetry: Optional[Telemetry] = None,
+    entry_options: EntryOptions = EntryOptions()
+) -> Tuple[List[str], List[str], int]:
+    """Generate entries once and write every requested output format in the same pass.
+
+    Args:
+        formats: Any of 'csv', 'parquet', 'arrow'. Columnar files are named
+                 after output_path (see columnar_output.columnar_path).
+        max_rows_per_file, max_bytes_per_file: Rotate the CSV (see generate_csv)
+        compress, compress_level: Compress the CSV (see generate_csv)
+        telemetry: Progress and phase timing (see telemetry)
+        entry_options: What entries are drawn from (see entry_options)
+
+    Returns:
+        (CSV paths, columnar paths, uncompressed CSV bytes written)
+    """
+    rotate = max_rows_per_file is not None or max_bytes_per_file is not None
+    header = encode_row(CSV_HEADERS)
+    write_csv = "csv" in formats
+
+    csv_writer = None
+    if write_csv and rotate:
+        csv_writer = RotatingWriter(
+            output_path, header, max_rows_per_file, max_bytes_per_file,
+            opener=lambda path: OutputFile(path, compress, compress_level)
+        )
+    elif write_csv:
+        csv_writer = OutputFile(output_path, compress, compress_level)
+        csv_writer.write(header)
+    columnar_writers = [
+        ColumnarWriter(columnar_path(output_path, fmt), CSV_HEADERS, fmt)
+        for fmt in formats if fmt != "csv"
     ]
 
-    return [del_line, rec_line]
+    clock = time.perf_counter
+    entries_done = 0
+    rows_done = None if entry_options.lines.is_pair else 0
+    for encoded, batch_columns in _iter_batches(
+        num_entries, accounting_date, unbalanced, use_writeoff_accounts, seed,
+        encode=write_csv, columns=bool(columnar_writers), telemetry=telemetry, entry_options=entry_options
+    ):
+        writing_started = clock()
+        if rotate:
+            csv_writer.write_batch(encoded)
+        elif write_csv:
+            csv_writer.write(b"".join(encoded))
+        for writer in columnar_writers:
+            writer.write_columns(batch_columns)
+        entries_done = min(entries_done + DEFAULT_BATCH_SIZE, num_entries)
+        if telemetry:
+            telemetry.add("writing", clock() - writing_started)
+            raw_bytes = 0
+            if rotate:
+                raw_bytes = csv_writer.bytes_written
+            elif write_csv:
+                raw_bytes = csv_writer.raw_bytes
+            if rows_done is not None:
+                if batch_columns is not None:
+                    rows_done += len(batch_columns["ENTRY_NUM"])
+                else:
+                    rows_done += sum(entry.count(b"\n") for entry in encoded)
+            telemetry.update(entries_done, raw_bytes, rows_done)
+
+    csv_paths: List[str] = []
+    raw_bytes = 0
+    if rotate:
+        csv_paths = csv_writer.close()
+        raw_bytes = csv_writer.bytes_written
+    elif write_csv:
+        csv_writer.close()
+        csv_paths = [csv_writer.name]
+        raw_bytes = csv_writer.raw_bytes
+    return csv_paths, [writer.close() for writer in columnar_writers], raw_bytes
 
 
 def generate_csv(
@@ -763,8 +1264,29 @@ def generate_csv(
     output_path: str,
     accounting_date: str = None,
     unbalanced: bool = False,
-    use_writeoff_accounts: bool = True
-) -> None:
+    use_writeoff_accounts: bool = True,
+    workers: int = 1,
+    keep_shards: bool = False,
+    seed: Optional[int] = None,
+    max_rows_per_file: Optional[int] = None,
+    max_bytes_per_file: Optional[int] = None,
+    compress: Optional[str] = None,
+    compress_level: Optional[int] = None,
+    formats: Sequence[str] = ("csv",),
+    progress_interval: Optional[float] = DEFAULT_INTERVAL,
+    metrics_out: Optional[str] = None,
+    pool_file: Optional[str] = None,
+    writeoff_file: Optional[str] = None,
+    asset_distribution: Optional[str] = None,
+    source_distribution: Optional[str] = None,
+    dest_distribution: Optional[str] = None,
+    lines: Optional[str] = None,
+    checkpoint_interval: Optional[float] = DEFAULT_CHECKPOINT_INTERVAL,
+    resume: bool = False,
+    unique: bool = False,
+    unique_memory_mb: float = DEFAULT_UNIQUE_MEMORY_MB,
+    unique_state: Optional[str] = None
+) -> Dict[str, object]:
     """Generate the bulk journal CSV file.
 
     Args:
@@ -774,75 +1296,376 @@ def generate_csv(
         unbalanced: If True, generate entries where DR != CR (for error testing)
         use_writeoff_accounts: If True, use dedicated write-off accounts as destination
                                If False, use random account pairs from same asset
-    """
+        workers: Number of processes; >1 splits the ENTRY_NUM range into shards
+        keep_shards: With workers > 1, keep the per-worker shard files instead of
+                     stitching them into output_path
+        seed: Generation seed; a random one is picked (and printed) if not given.
+              The same seed and options always regenerate the same file.
+        max_rows_per_file: Rotate into numbered part files of at most this many
+                           data rows each (see output_rotation)
+        max_bytes_per_file: Rotate into numbered part files of at most this many
+                            bytes each, header included
+        compress: Compress the output while writing: 'gzip', 'zstd' or 'xz'
+                  (see compressed_output). The format suffix is added to the
+                  output path(s).
+        compress_level: Compression level, format default if not given
+        formats: Outputs to write in one pass: 'csv' and/or the columnar
+                 'parquet' / 'arrow' (see columnar_output, needs pyarrow)
+        progress_interval: Seconds between live progress lines (rows/s, MB/s,
+                           ETA, RSS, phase split); None or 0 to disable
+        metrics_out: If given, write the final metrics record there as JSON
+        pool_file: Query 2 export (CSV/JSON) to draw source accounts from,
+                   instead of pools/source_accounts.csv (see pool_index)
+        writeoff_file: Query 3 export to draw write-off accounts from,
+                       instead of pools/writeoff_accounts.csv
+        asset_distribution, source_distribution, dest_distribution: How each
+                       key is drawn, e.g. 'zipf:1.2' or 'hot:1:80' (see
+                       key_distributions); None for uniform
+        lines: DEL/REC lines per entry, e.g. '50' or '1-1000:zipf/1' (see
+               line_fanout); None for 1/1
+        checkpoint_interval: Seconds between checkpoints of a single plain CSV,
+                             which is written via output_path.partial and
+                             renamed when complete (see checkpoint); None or 0
+                             for no checkpoints
+        resume: Continue the unfinished run that left output_path.checkpoint.
+                Its seed and accounting date are used unless given; every
+                other option must match. Only for a single plain CSV.
+        unique: Never repeat an (asset, source, destination, amount) tuple
+                (see unique_entries); runs in one process, 1/1 lines only
+        unique_memory_mb: Memory of the filter of seen tuples
+        unique_state: Load the filter from this file if it exists and save it
+                      back when done, to stay unique across a set of files
 
-    assets_to_accounts = parse_raw_data()
+    Returns:
+        The final metrics record (see telemetry.Telemetry.metrics)
+    """
+    entry_options = EntryOptions.build(
+        pool_file, writeoff_file, asset_distribution, source_distribution, dest_distribution, lines
+    )
+    fanout = entry_options.lines
+    pools = entry_options.pools()
 
-    if not assets_to_accounts:
+    if not pools.num_assets:
         raise ValueError("No valid asset/account pairs found!")
 
+    rotate = max_rows_per_file is not None or max_bytes_per_file is not None
+    columnar = [fmt for fmt in formats if fmt != "csv"]
+    resume_from = None
+    if resume:
+        if rotate or columnar or compress:
+            raise ValueError("Resuming needs a single plain CSV (no rotation, compression or columnar output)")
+        resume_from = read_checkpoint(output_path)
+        if resume_from is None:
+            print(f"No checkpoint for {output_path}; starting from the beginning")
+        else:
+            seed = resume_from.seed if seed is None else seed
+            accounting_date = accounting_date or resume_from.options.get("accounting_date")
+
     if accounting_date is None:
         accounting_date = date.today().isoformat()
 
-    # Build list of valid (asset_id, accounts) pairs
-    asset_list = list(assets_to_accounts.items())
+    if seed is None:
+        seed = new_seed()
+
+    tracker = None
+    if unique:
+        if not fanout.is_pair:
+            raise ValueError("--unique needs one DEL and one REC line per entry (--lines-per-entry 1/1)")
+        if resume_from is not None and resume_from.options.get("unique"):
+            tracker = resume_unique_tuples(output_path, resume_from.next_entry)
+        else:
+            tracker = open_unique_tuples(unique_state, unique_memory_mb, entry_options.pool_digests())
+        entry_options = entry_options._replace(unique=tracker)
+
+    options = checkpoint_options(
+        num_entries, accounting_date, unbalanced, use_writeoff_accounts, entry_options, unique_state
+    )
+    if resume_from is not None:
+        check_resume(resume_from, seed, options)
+
+    if rotate:
+        check_limits(max_rows_per_file, max_bytes_per_file, encode_row(CSV_HEADERS))
 
-    print(f"Generating {num_entries} entries ({num_entries * 2} rows)...")
-    print(f"Unique assets: {len(asset_list)}")
-    print(f"Total source account combinations: {sum(len(v) for v in assets_to_accounts.values())}")
-    print(f"Write-off destination accounts: {len(WRITEOFF_ACCOUNTS)}")
+    if fanout.is_pair:
+        print(f"Generating {num_entries} entries ({num_entries * 2} rows)...")
+    else:
+        print(f"Generating {num_entries} entries (~{num_entries * fanout.mean_lines():.0f} rows)...")
+        print(f"Lines per entry: {fanout.spec} (DEL/REC)")
+    print(f"Unique assets: {pools.num_assets}")
+    print(f"Total source account combinations: {len(pools.members)}")
+    print(f"Write-off destination accounts: {len(pools.writeoff)}")
     print(f"Accounting date: {accounting_date}")
     print(f"Unbalanced mode: {unbalanced}")
     print(f"Use write-off accounts: {use_writeoff_accounts}")
+    if not entry_options.distributions.is_uniform:
+        print(f"Key distributions: {entry_options.distributions.describe()}")
+    if tracker is not None:
+        print(f"Unique tuples: {tracker.spec['memory_bytes'] / (1 << 20):g} MB filter"
+              + (f", {tracker.entries:,} tuples already used" if tracker.entries else ""))
+    print(f"Seed: {seed}")
+    if compress:
+        print(f"Compression: {compress}")
+    if columnar:
+        print(f"Formats: {', '.join(formats)}")
+    if resume_from is not None:
+        print(f"Resuming at entry {resume_from.next_entry} ({resume_from.data_bytes:,} bytes kept)")
 
-    with open(output_path, 'w', newline='') as f:
-        writer = csv.writer(f)
-        writer.writerow(CSV_HEADERS)
-
-        for entry_num in range(1, num_entries + 1):
-            # Pick random asset and source account
-            asset_id, accounts = random.choice(asset_list)
-            source = random.choice(accounts)
+    if workers > 1 and rotate and compress:
+        # Compressed files can't be split afterwards without decompressing them
+        print("Note: --workers is ignored when rotating compressed output")
+        workers = 1
+    if workers > 1 and columnar:
+        print("Note: --workers is ignored with columnar output (written in a single pass)")
+        workers = 1
+    if workers > 1 and resume_from is not None:
+        print("Note: --workers is ignored when resuming (the rest is written in a single pass)")
+        workers = 1
+    if workers > 1 and tracker is not None:
+        print("Note: --workers is ignored with --unique (tuples are claimed in ENTRY_NUM order)")
+        workers = 1
 
-            if use_writeoff_accounts:
-                # Use dedicated write-off account as destination
-                dest = random.choice(WRITEOFF_ACCOUNTS)
-            else:
-                # Pick a different account for the same asset
-                other_accounts = [a for a in accounts if a != source]
-                if other_accounts:
-                    dest = random.choice(other_accounts)
-                else:
-                    # Fallback to write-off account if only one account for this asset
-                    dest = random.choice(WRITEOFF_ACCOUNTS)
-
-            # Generate balanced/unbalanced pair
-            rows = generate_entry_pair(
-                entry_num,
-                accounting_date,
-                asset_id,
-                source,
-                dest,
-                unbalanced=unbalanced
+    resumed_entries = resume_from.next_entry - 1 if resume_from else 0
+    telemetry = Telemetry(num_entries - resumed_entries, interval=progress_interval)
+    columnar_outputs: List[str] = []
+    if workers > 1 and num_entries > 1:
+        print(f"Workers: {workers}")
+        outputs = generate_sharded(
+            num_entries, output_path, accounting_date,
+            unbalanced=unbalanced,
+            use_writeoff_accounts=use_writeoff_accounts,
+            workers=workers,
+            keep_shards=keep_shards and not rotate,
+            seed=seed,
+            compress=compress,
+            compress_level=compress_level,
+            telemetry=telemetry,
+            entry_options=entry_options
+        )
+        raw_bytes = telemetry.bytes_done
+        if rotate:
+            # Shards are cut by ENTRY_NUM range, not by size, so rotate the
+            # stitched file on entry boundaries instead.
+            outputs = split_csv(
+                output_path, output_path, max_rows_per_file, max_bytes_per_file, workers=workers
             )
-            writer.writerows(rows)
+            os.remove(output_path)
+    elif rotate or columnar:
+        outputs, columnar_outputs, raw_bytes = write_outputs(
+            output_path, num_entries, accounting_date,
+            unbalanced=unbalanced,
+            use_writeoff_accounts=use_writeoff_accounts,
+            seed=seed,
+            formats=formats,
+            max_rows_per_file=max_rows_per_file,
+            max_bytes_per_file=max_bytes_per_file,
+            compress=compress,
+            compress_level=compress_level,
+            telemetry=telemetry,
+            entry_options=entry_options
+        )
+    elif compress:
+        raw_bytes = write_entry_range(
+            output_path, 1, num_entries + 1, accounting_date,
+            unbalanced=unbalanced,
+            use_writeoff_accounts=use_writeoff_accounts,
+            seed=seed,
+            telemetry=telemetry,
+            compress=compress,
+            compress_level=compress_level,
+            entry_options=entry_options
+        )
+        outputs = [compressed_path(output_path, compress)]
+    else:
+        raw_bytes = write_checkpointed(
+            output_path, num_entries, accounting_date,
+            unbalanced=unbalanced,
+            use_writeoff_accounts=use_writeoff_accounts,
+            seed=seed,
+            telemetry=telemetry,
+            options=options,
+            checkpoint_interval=checkpoint_interval,
+            resume_from=resume_from,
+            entry_options=entry_options
+        )
+        outputs = [output_path]
+    telemetry.finish()
+
+    stored_bytes = 0
+    for path in outputs:
+        print(f"Done! Output: {path}")
+
+        # Print file size
+        size = os.path.getsize(path)
+        stored_bytes += size
+        print(f"File size: {size / (1024 * 1024):.2f} MB")
+
+    for path in columnar_outputs:
+        print(f"Done! Output: {path}")
+        print(f"File size: {os.path.getsize(path) / (1024 * 1024):.2f} MB")
+
+    if outputs:
+        for line in describe_throughput(raw_bytes, stored_bytes, telemetry.elapsed, compress):
+            print(line)
+    if tracker is not None:
+        for line in tracker.describe():
+            print(line)
+        if unique_state:
+            tracker.save(unique_state)
+            print(f"Unique state: {unique_state}")
+    print(f"Time split: {telemetry.split_line()} (wall {telemetry.elapsed:.2f}s)")
+    print(f"Peak RSS: {peak_rss_mb():.0f} MB")
+    print(f"Seed: {seed} (pass --seed {seed} to regenerate this file)")
+
+    metrics = telemetry.metrics(
+        script="generate_bulk_writeoff",
+        seed=seed,
+        accounting_date=accounting_date,
+        unbalanced=unbalanced,
+        use_writeoff_accounts=use_writeoff_accounts,
+        distributions=entry_options.distributions.to_dict(),
+        lines_per_entry=fanout.spec,
+        workers=workers,
+        resumed_at=resume_from.next_entry if resume_from else None,
+        unique=tracker.summary() if tracker else None,
+        formats=list(formats),
+        compress=compress,
+        stored_bytes=stored_bytes,
+        outputs=outputs + columnar_outputs,
+    )
+    if metrics_out:
+        write_metrics(metrics_out, metrics)
+        print(f"Metrics: {metrics_out}")
+    return metrics
+
 
-            # Progress indicator
-            if entry_num % 50000 == 0:
-                print(f"  Generated {entry_num} entries...")
+def stream_csv(
+    output: str,
+    profile: RateProfile,
+    duration: Optional[float] = None,
+    num_entries: Optional[int] = None,
+    accounting_date: Optional[str] = None,
+    unbalanced: bool = False,
+    use_writeoff_accounts: bool = True,
+    seed: Optional[int] = None,
+    max_rows_per_file: Optional[int] = None,
+    max_bytes_per_file: Optional[int] = None,
+    buffer_batches: int = DEFAULT_BUFFER_BATCHES,
+    report_interval: Optional[float] = DEFAULT_REPORT_INTERVAL,
+    metrics_out: Optional[str] = None,
+    pool_file: Optional[str] = None,
+    writeoff_file: Optional[str] = None,
+    asset_distribution: Optional[str] = None,
+    source_distribution: Optional[str] = None,
+    dest_distribution: Optional[str] = None,
+    lines: Optional[str] = None,
+    unique: bool = False,
+    unique_memory_mb: float = DEFAULT_UNIQUE_MEMORY_MB,
+    unique_state: Optional[str] = None
+) -> Dict[str, object]:
+    """Stream entries at the profile's row rate instead of as fast as possible (see rate_stream).
+
+    Args:
+        output: '-' for stdout, 'fifo:PATH', or a file path (rolled into parts
+                with max_rows_per_file / max_bytes_per_file)
+        profile: Target rows/s over time (rate, ramp, bursts)
+        duration: Seconds to stream for; stops earlier if num_entries run out
+        num_entries: Entries to stream; by default as many as `duration` needs
+        report_interval: Seconds between drift lines; None or 0 to disable
+        pool_file, writeoff_file, asset_distribution, source_distribution,
+        dest_distribution, lines: As for generate_csv
+        unique, unique_memory_mb, unique_state: Unique tuples, as for
+                generate_csv; the state is saved however the stream ends
+
+    Returns:
+        The final metrics record, including drift and scheduling lateness
+    """
+    if duration is None and num_entries is None:
+        raise ValueError("Streaming needs a duration, a number of entries, or both")
+    entry_options = EntryOptions.build(
+        pool_file, writeoff_file, asset_distribution, source_distribution, dest_distribution, lines
+    )
+    fanout = entry_options.lines
+    if accounting_date is None:
+        accounting_date = date.today().isoformat()
+    if seed is None:
+        seed = new_seed()
+    if num_entries is None:
+        num_entries = planned_entries(profile, duration, fanout.mean_lines())
+    tracker = None
+    if unique:
+        if not fanout.is_pair:
+            raise ValueError("--unique needs one DEL and one REC line per entry (--lines-per-entry 1/1)")
+        tracker = open_unique_tuples(unique_state, unique_memory_mb, entry_options.pool_digests())
+        entry_options = entry_options._replace(unique=tracker)
+
+    header = encode_row(CSV_HEADERS)
+    if max_rows_per_file is not None or max_bytes_per_file is not None:
+        check_limits(max_rows_per_file, max_bytes_per_file, header)
+    # Keep stdout for the rows when streaming to it
+    log = sys.stderr if output == "-" else sys.stdout
+    output_stream = StreamOutput(output, header, max_rows_per_file, max_bytes_per_file)
+    limit = f"for {duration:g}s" if duration is not None else f"for {num_entries:,} entries"
+    print(f"Streaming to {output_stream.name} at {profile.describe()}, {limit} (seed {seed})", file=log, flush=True)
+    if not entry_options.distributions.is_uniform:
+        print(f"Key distributions: {entry_options.distributions.describe()}", file=log, flush=True)
+    if not fanout.is_pair:
+        print(f"Lines per entry: {fanout.spec} (DEL/REC)", file=log, flush=True)
+
+    try:
+        stats = stream(
+            iter_encoded_batches(
+                num_entries, accounting_date, unbalanced, use_writeoff_accounts, seed,
+                entry_options=entry_options
+            ),
+            output_stream, profile, duration, buffer_batches, report_interval, log
+        )
+    finally:
+        outputs = output_stream.close()
+        if tracker is not None and unique_state:
+            # Also after an interrupt: the tuples of every entry drawn so far stay taken
+            tracker.save(unique_state)
+    for line in describe_stream(stats):
+        print(line, file=log)
+    if tracker is not None:
+        for line in tracker.describe():
+            print(line, file=log)
+    print(f"Seed: {seed}", file=log)
+
+    metrics = stats.metrics()
+    metrics.update(
+        script="generate_bulk_writeoff",
+        seed=seed,
+        accounting_date=accounting_date,
+        distributions=entry_options.distributions.to_dict(),
+        lines_per_entry=fanout.spec,
+        unique=tracker.summary() if tracker else None,
+        rate=profile.rate,
+        duration_s=duration,
+        outputs=outputs,
+    )
+    if metrics_out:
+        write_metrics(metrics_out, metrics)
+        print(f"Metrics: {metrics_out}", file=log)
+    return metrics
 
-    print(f"Done! Output: {output_path}")
 
-    # Print file size
-    import os
-    size_mb = os.path.getsize(output_path) / (1024 * 1024)
-    print(f"File size: {size_mb:.2f} MB")
+def _stop_filter_full(parser, args, error: Exception) -> None:
+    """Exit 1 on a full --unique filter. The unfinished CSV and its checkpoint
+    are removed: a --resume would replay the same draws into the same filter
+    and stop at the same entry."""
+    removed = []
+    for path in (partial_path(args.output), checkpoint_path(args.output), checkpoint_filter_path(args.output)):
+        if os.path.exists(path):
+            os.remove(path)
+            removed.append(path)
+    note = f"Removed the unfinished output ({', '.join(removed)}): it can't be resumed.\n" if removed else ""
+    parser.exit(1, f"{parser.prog}: error: {error}\n{note}")
 
 
 def main():
     parser = argparse.ArgumentParser(description="Generate bulk journal test CSV")
-    parser.add_argument("--entries", type=int, default=10000,
-                        help="Number of journal entries (default: 10000)")
+    parser.add_argument("--entries", type=int, default=None,
+                        help="Number of journal entries (default: 10000, or as many as --rate/--duration need)")
     parser.add_argument("--output", type=str, default="bulk_writeoff_test.csv",
                         help="Output file path")
     parser.add_argument("--date", type=str, default=None,
@@ -851,15 +1674,138 @@ def main():
                         help="Generate unbalanced entries (DR != CR) for error testing")
     parser.add_argument("--no-writeoff-accounts", action="store_true",
                         help="Don't use dedicated write-off accounts; pair accounts from same asset instead")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Worker processes; splits the ENTRY_NUM range into shards (default: 1)")
+    parser.add_argument("--keep-shards", action="store_true",
+                        help="With --workers, leave one CSV per shard instead of stitching them")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="Generation seed; same seed and options give the same file (default: random)")
+    parser.add_argument("--max-rows-per-file", type=int, default=None,
+                        help="Rotate output into numbered part files of at most N data rows each")
+    parser.add_argument("--max-bytes-per-file", type=int, default=None,
+                        help="Rotate output into numbered part files of at most N bytes each")
+    parser.add_argument("--progress-interval", type=float, default=DEFAULT_INTERVAL,
+                        help=f"Seconds between progress lines; 0 disables them (default: {DEFAULT_INTERVAL:g})")
+    parser.add_argument("--metrics-out", type=str, default=None,
+                        help="Write the final metrics (rows/s, MB/s, peak RSS, phase times) to this JSON file")
+    parser.add_argument("--format", type=str, default="csv",
+                        help="Comma-separated outputs to write in one pass: csv, parquet, arrow "
+                             "(e.g. csv,parquet; columnar formats need pyarrow; default: csv)")
+    parser.add_argument("--compress", choices=COMPRESSIONS, default=None,
+                        help="Compress while writing; adds .gz/.zst/.xz to the output name "
+                             "(zstd needs the zstandard package)")
+    parser.add_argument("--compress-level", type=int, default=None,
+                        help="Compression level (default: gzip 6, zstd 3, xz 6)")
+    parser.add_argument("--pool-file", type=str, default=None,
+                        help="Query 2 export (CSV or JSON) of source accounts "
+                             "(default: pools/source_accounts.csv)")
+    parser.add_argument("--writeoff-file", type=str, default=None,
+                        help="Query 3 export (CSV or JSON) of write-off accounts "
+                             "(default: pools/writeoff_accounts.csv)")
+    parser.add_argument("--only-entry", type=int, default=None, metavar="ENTRY_NUM",
+                        help="Print just this entry's rows (with header) to stdout instead of "
+                             "writing a file; use with the --seed and options of the original run")
+    add_fanout_arguments(parser)
+    add_distribution_arguments(parser)
+    add_stream_arguments(parser)
+    add_checkpoint_arguments(parser)
+    add_unique_arguments(parser)
 
     args = parser.parse_args()
-    generate_csv(
-        args.entries,
-        args.output,
-        args.date,
-        args.unbalanced,
-        use_writeoff_accounts=not args.no_writeoff_accounts
-    )
+    profile = profile_from_args(parser, args)
+    entry_options = entry_options_from_args(parser, args)
+
+    formats = [fmt.strip() for fmt in args.format.split(",") if fmt.strip()]
+    unknown = sorted(set(formats) - set(["csv"] + COLUMNAR_FORMATS))
+    if unknown or not formats:
+        parser.error(f"--format: expected csv, parquet and/or arrow, got {args.format!r}")
+
+    if args.unique and not entry_options.lines.is_pair:
+        parser.error("--unique needs one DEL and one REC line per entry (--lines-per-entry 1/1)")
+
+    if args.only_entry is not None:
+        if args.seed is None:
+            parser.error("--only-entry requires --seed")
+        if args.unique:
+            parser.error("--only-entry can't rebuild entries of a --unique run (each depends on the ones before)")
+        write_entries(
+            sys.stdout.buffer, 1, args.date, args.unbalanced,
+            use_writeoff_accounts=not args.no_writeoff_accounts,
+            seed=args.seed, start=args.only_entry, entry_options=entry_options
+        )
+        return
+
+    rotate = args.max_rows_per_file is not None or args.max_bytes_per_file is not None
+    if args.resume and (args.compress or formats != ["csv"] or rotate):
+        parser.error("--resume needs a single plain CSV (no --compress, --format or --max-*-per-file)")
+
+    if profile is not None:
+        if args.compress or formats != ["csv"] or args.workers > 1:
+            parser.error("--rate streams plain CSV from one process (no --compress, --format or --workers)")
+        if args.resume:
+            parser.error("--resume does not apply to --rate (a stream has no fixed end to resume towards)")
+        if args.duration is None and args.entries is None:
+            parser.error("--rate needs --duration, --entries, or both")
+        try:
+            stream_csv(
+                args.output,
+                profile,
+                duration=args.duration,
+                num_entries=args.entries,
+                accounting_date=args.date,
+                unbalanced=args.unbalanced,
+                use_writeoff_accounts=not args.no_writeoff_accounts,
+                seed=args.seed,
+                max_rows_per_file=args.max_rows_per_file,
+                max_bytes_per_file=args.max_bytes_per_file,
+                buffer_batches=args.buffer_batches,
+                report_interval=args.progress_interval,
+                metrics_out=args.metrics_out,
+                pool_file=args.pool_file,
+                writeoff_file=args.writeoff_file,
+                asset_distribution=args.asset_distribution,
+                source_distribution=args.source_distribution,
+                dest_distribution=args.dest_distribution,
+                lines=args.lines_per_entry,
+                unique=args.unique,
+                unique_memory_mb=args.unique_memory,
+                unique_state=args.unique_state
+            )
+        except FilterFull as e:
+            _stop_filter_full(parser, args, e)
+        return
+
+    try:
+        generate_csv(
+            args.entries if args.entries is not None else 10000,
+            args.output,
+            args.date,
+            args.unbalanced,
+            use_writeoff_accounts=not args.no_writeoff_accounts,
+            workers=args.workers,
+            keep_shards=args.keep_shards,
+            seed=args.seed,
+            max_rows_per_file=args.max_rows_per_file,
+            max_bytes_per_file=args.max_bytes_per_file,
+            compress=args.compress,
+            compress_level=args.compress_level,
+            formats=formats,
+            progress_interval=args.progress_interval,
+            metrics_out=args.metrics_out,
+            pool_file=args.pool_file,
+            writeoff_file=args.writeoff_file,
+            asset_distribution=args.asset_distribution,
+            source_distribution=args.source_distribution,
+            dest_distribution=args.dest_distribution,
+            lines=args.lines_per_entry,
+            checkpoint_interval=args.checkpoint_interval,
+            resume=args.resume,
+            unique=args.unique,
+            unique_memory_mb=args.unique_memory,
+            unique_state=args.unique_state
+        )
+    except FilterFull as e:
+        _stop_filter_full(parser, args, e)
 
 
 if __name__ == "__main__":
@@ -17,74 +17,88 @@ Usage:
 
     # Specific error type only (10% of entries)
     python generate_error_scenarios.py --entries 1000 --error-percent 10 --error-type unbalanced --output unbalanced.csv
-"""
 
-import csv
-import random
-import argparse
-from decimal import Decimal
-from datetime import date, timedelta
-from typing import List, Tuple, Optional
-from collections import defaultdict
+    # 500k entries compressed on the fly into scattered.csv.gz
+    python generate_error_scenarios.py --entries 500000 --shuffle --compress gzip --output scattered.csv
 
-# =============================================================================
-# VALID STAGING DATA
-# =============================================================================
+    # Also write scattered.parquet from the same pass, e.g. for counts by error type (needs pyarrow)
+    python generate_error_scenarios.py --entries 500000 --shuffle --format csv,parquet --output scattered.csv
 
-VALID_ASSETS = [
-    "00000000000000026236",  # BTC
-    "00000000000000026237",  # ETH
-    "00000000000000026264",  # SOL
-    "00000000000000026261",  # ADA
-    "00000000000000026255",  # DOGE
-    "00000000000000026277",  # USDC
-]
+    # Look up what entry 4321 was meant to be, and where it is (scattered.manifest is written alongside)
+    python entry_manifest.py scattered.manifest --entry 4321
 
-VALID_ACCOUNTS = [
-    ("HQ0243B17CAD", "000000"),
-    ("HQ011XM14CAD", "000000"),
-    ("BR00135L1USD", "000000"),
-    ("BR00136L0USD", "000000"),
-    ("HQ05VJC14CAD", "000000"),
-    ("HQ07FQK13CAD", "000000"),
-    ("HQ0QV8R16CAD", "000000"),
-    ("BR00142X6USD", "000000"),
-    ("BR00144R7USD", "000000"),
-    ("BR00145R6USD", "000000"),
-]
+    # Soak test: 5% errors streamed at 10k rows/s for 2h into a FIFO a consumer tails
+    python generate_error_scenarios.py --error-percent 5 --shuffle --rate 10000 --duration 2h --output fifo:/tmp/journal
 
-WRITEOFF_ACCOUNTS = [
-    ("HQ0C7XCK3CAD", "201030"),
-    ("HM93593K8CAD", "201030"),
-    ("WB7218549CAD", "201030"),
-    ("H19930702CAD", "201010"),
-    ("WB7658603CAD", "201060"),
-]
-
-# =============================================================================
-# INVALID DATA FOR ERROR SCENARIOS
-# =============================================================================
+    # Valid entries hammering a hot set: 2% of the write-off accounts take 90% of them
+    python generate_error_scenarios.py --entries 500000 --shuffle --dest-distribution hot:2 --output hot_dests.csv
 
-INVALID_ASSET_IDS = [
-    "00000000000000099999",  # Non-existent
-    "00000000000000000001",  # Too low
-    "99999999999999999999",  # Obviously fake
-    "INVALID_ASSET_ID_XXX",  # Wrong format
-    "",                       # Empty
-]
+    # Rebuild entry 4321 of a seeded run (same --entries/--error-percent/--shuffle/--date)
+    python generate_error_scenarios.py --entries 500000 --shuffle --seed 42 --only-entry 4321
+"""
 
-INVALID_ACCOUNT_IDS = [
-    ("XXXXXX99999", "000000"),   # Non-existent account
-    ("", "000000"),              # Empty account
-    ("TOOLONG12345678", "000000"),  # Too long (>12 chars)
-    ("SHORT", "000000"),         # Too short
-]
+import os
+import random
+import sys
+import time
+import argparse
+from datetime import date
+from typing import BinaryIO, Callable, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+from collections import defaultdict
 
-MISMATCHED_NATURAL_ACCOUNTS = [
-    "999999",  # Non-existent natural account
-    "123456",  # Random invalid
-    "",        # Empty
-]
+from amount_engine import (
+    DEFAULT_BATCH_SIZE,
+    SCALED_AMOUNTS,
+    format_scaled,
+    format_scaled_batch,
+    format_scaled_bytes,
+    format_scaled_bytes_batch,
+)
+from checkpoint import (
+    DEFAULT_CHECKPOINT_INTERVAL,
+    Checkpoint,
+    CheckpointedFile,
+    add_checkpoint_arguments,
+    check_resume,
+    partial_path,
+    read_checkpoint,
+)
+from columnar_output import FORMATS as COLUMNAR_FORMATS, Column, ColumnarWriter, columnar_path, rows_to_columns
+from compressed_output import COMPRESSIONS, OutputFile, describe_throughput
+from entry_manifest import VALID, ManifestWriter, manifest_path
+from entry_options import EntryOptions, entry_options_from_args
+from entry_rng import EntryDraws, EntryRandom, LazyDraws, new_seed
+from error_mutators import (
+    AMOUNT_FIELDS,
+    COLLIDED,
+    COLLIDING_TYPES,
+    ENTRY_FIELDS,
+    ERROR_TYPES,
+    EXPECTED_FAILURE_POINTS,
+    LINES,
+    MIXED_TYPES,
+    MUTATORS,
+    ErrorBatch,
+    describe_error_types,
+    outcome_types,
+)
+from error_placement import ErrorPlacement
+from key_distributions import add_distribution_arguments
+from output_rotation import RotatingWriter, check_limits
+from pool_index import LazyTable
+from rate_stream import (
+    DEFAULT_BUFFER_BATCHES,
+    DEFAULT_REPORT_INTERVAL,
+    RateProfile,
+    StreamOutput,
+    add_stream_arguments,
+    describe as describe_stream,
+    planned_entries,
+    profile_from_args,
+    stream,
+)
+from telemetry import DEFAULT_INTERVAL, Telemetry, peak_rss_mb, write_metrics
+from row_templates import RowTemplate, Slot, encode_field, encode_row, encode_rows
 
 # =============================================================================
 # CONSTANTS
@@ -102,6 +116,7 @@ COMMISSION = "0"
 REFERENCE_VALUE = ""
 REFERENCE_TYPE = "NONE"
 EXTERNAL_SOURCE = ""
+VALID_DESCRIPTION = "VALID ENTRY - SHOULD PASS"
 
 CSV_HEADERS = [
     "ENTRY_NUM", "JIRA_ID", "ASSET_ID", "POSITION", "ACCOUNTING_DATE",
@@ -110,44 +125,70 @@ CSV_HEADERS = [
     "BUSINESS_UNIT", "BV_DELTA_DR", "BV_DELTA_CR", "RELATED_ASSET_ID",
     "COMMISSION", "REFERENCE_VALUE", "REFERENCE_TYPE", "EXTERNAL_SOURCE"
 ]
+_FIELD_POSITIONS = {name: i for i, name in enumerate(CSV_HEADERS)}
 
-ERROR_TYPES = [
-    "unbalanced",           # DR != CR
-    "invalid-asset",        # Asset ID doesn't exist
-    "invalid-account",      # Sub account doesn't exist
-    "invalid-natural-acct", # Natural account doesn't match
-    "future-date",          # Accounting date in future
-    "past-date",            # Accounting date too far in past (closed period)
-    "missing-amount",       # Both DR and CR empty
-    "negative-amount",      # Negative amounts
-    "zero-amount",          # Zero amounts
-]
 
+def draw_valid_indexes(rng, entry_options: EntryOptions = EntryOptions()) -> Tuple[int, int, int]:
+    """Draw (asset number, source account id, dest account id) from the options'
+    pool files (see pool_index); draw_valid_accounts looks them up.
+
+    Each draw is uniform or from the options' key distribution (see key_distributions).
+    """
+    pools = entry_options.pools()
+    asset_table, source_tables, dest_tables = entry_options.samplers()
+    if asset_table is None:
+        asset = rng.randint(0, pools.num_assets - 1)
+    else:
+        asset = asset_table.sample(rng)
+    num_accounts = pools.asset_size(asset)
+    if source_tables is None:
+        source = rng.randint(0, num_accounts - 1)
+    else:
+        source = source_tables[num_accounts].sample(rng)
+    num_writeoff = len(pools.writeoff)
+    if dest_tables is None:
+        dest = rng.randint(0, num_writeoff - 1)
+    else:
+        dest = dest_tables[num_writeoff].sample(rng)
+    return asset, pools.members[pools.offsets[asset] + source], pools.writeoff[dest]
 
-def generate_random_amount() -> Decimal:
-    """Generate a random tiny amount."""
-    mantissa = random.randint(1, 9999)
-    exponent = random.randint(8, 10)
-    return Decimal(mantissa) / Decimal(10 ** exponent)
 
+def draw_valid_accounts(
+    rng,
+    entry_options: EntryOptions = EntryOptions()
+) -> Tuple[str, Tuple[str, str], Tuple[str, str]]:
+    """Draw (asset_id, source, dest) from the options' pool files (see pool_index).
 
-def format_amount(amount: Decimal) -> str:
-    """Format amount with 10 decimal places."""
-    return f"{amount:.10f}"
+    The source is one of the asset's own Query 2 accounts, so valid entries
+    only use account/asset combinations that exist in staging; the dest is a
+    Query 3 write-off account. Every entry starts with these three draws.
+    """
+    pools = entry_options.pools()
+    asset, source, dest = draw_valid_indexes(rng, entry_options)
+    return pools.asset_ids[asset], pools.accounts[source], pools.accounts[dest]
 
 
 def generate_valid_entry(
     entry_num: int,
-    accounting_date: str
+    accounting_date: str,
+    scaled_amount: Optional[int] = None,
+    rng: Optional[random.Random] = None,
+    entry_options: EntryOptions = EntryOptions()
 ) -> List[List[str]]:
-    """Generate a valid (balanced) entry pair."""
-    asset_id = random.choice(VALID_ASSETS)
-    source_acct, source_natural = random.choice(VALID_ACCOUNTS)
-    dest_acct, dest_natural = random.choice(WRITEOFF_ACCOUNTS)
-    amount = generate_random_amount()
-    amount_str = format_amount(amount)
+    """Generate a valid (balanced) entry pair.
+
+    scaled_amount is the amount in units of 1e-10 (see amount_engine); one is
+    drawn if not given. rng is anything with choice/randint, e.g. the
+    per-entry EntryDraws; defaults to the global random module. The accounts
+    come from entry_options' pools (see entry_options).
+    """
+    rng = rng or random
+    asset_id, (source_acct, source_natural), (dest_acct, dest_natural) = draw_valid_accounts(rng, entry_options)
+    if scaled_amount is None:
+        scaled_amount = rng.choice(SCALED_AMOUNTS)
+    amount_str = format_scaled(scaled_amount)
 
-    description = "VALID ENTRY - SHOULD PASS"
+    description = VALID_DESCRIPTION
 
     del_line = [
         str(entry_num), JIRA_ID, asset_id, POSITION, accounting_date,
@@ -173,78 +214,831 @@ def generate_valid_entry(
 def generate_error_entry(
     entry_num: int,
     error_type: str,
-    accounting_date: str
+    accounting_date: str,
+    scaled_amount: Optional[int] = None,
+    rng: Optional[random.Random] = None,
+    partner_num: Optional[int] = None,
+    entry_options: EntryOptions = EntryOptions()
 ) -> List[List[str]]:
-    """Generate an entry pair with a specific error type."""
-    asset_id = random.choice(VALID_ASSETS)
-    source_acct, source_natural = random.choice(VALID_ACCOUNTS)
-    dest_acct, dest_natural = random.choice(WRITEOFF_ACCOUNTS)
-    amount = generate_random_amount()
-    dr_amount = format_amount(amount)
-    cr_amount = format_amount(amount)
-    entry_date = accounting_date
-
-    description = f"ERROR: {error_type.upper()}"
-
-    # Apply the error
-    if error_type == "unbalanced":
-        cr_amount = format_amount(amount + Decimal("0.0000000001"))
-
-    elif error_type == "invalid-asset":
-        asset_id = random.choice(INVALID_ASSET_IDS)
-
-    elif error_type == "invalid-account":
-        invalid = random.choice(INVALID_ACCOUNT_IDS)
-        if random.choice([True, False]):
-            source_acct, source_natural = invalid
+    """Generate an entry pair with a specific error type.
+
+    scaled_amount is the base amount in units of 1e-10 (see amount_engine); one
+    is drawn if not given. rng is as for generate_valid_entry. The error is
+    applied by the type's registered mutator (see error_mutators), as a batch
+    of one. partner_num is the ENTRY_NUM a colliding type (duplicate-entry-num)
+    is written with, and is required for those. entry_options are as for
+    generate_valid_entry.
+    """
+    if partner_num is None and error_type in COLLIDING_TYPES:
+        raise ValueError(f"A {error_type} entry needs the partner_num it repeats")
+    rng = rng or random
+    asset, source, dest = draw_valid_indexes(rng, entry_options)
+    if scaled_amount is None:
+        scaled_amount = rng.choice(SCALED_AMOUNTS)
+    layout = error_layout(error_type, accounting_date)
+    base = EntryBase([entry_num], [asset], [source], [dest], [scaled_amount])
+    batch = layout.new_batch(
+        base, PoolFields(entry_options.pools()), [rng], full=True, partner_nums=[partner_num or entry_num]
+    )
+    layout.mutator.apply(batch)
+    return layout.rows(batch, 0)
+
+
+class EntryBase(NamedTuple):
+    """The draws every entry starts with, for a group of entries."""
+    entry_nums: List[int]
+    assets: Sequence[int]           # asset numbers in the pools
+    sources: Sequence[int]          # source account ids
+    dests: Sequence[int]            # write-off account ids
+    amounts: List[int]              # scaled (see amount_engine)
+
+
+class PoolFields:
+    """Pool assets and accounts by number, as text and as CSV-encoded bytes,
+    converted on first use."""
+
+    def __init__(self, pools):
+        self.asset_texts = LazyTable(pools.asset_ids.__getitem__)
+        self.asset_bytes = LazyTable(lambda asset: encode_field(pools.asset_ids[asset]))
+        # (sub_acct, natural_acct) in both, as in the pools
+        self.account_texts = LazyTable(pools.accounts.__getitem__)
+        self.account_bytes = LazyTable(
+            lambda account_id: tuple(map(encode_field, pools.accounts[account_id]))
+        )
+
+    def columns(self, base: EntryBase, encoded: bool, names: Sequence[str]) -> List[Dict[str, Sequence]]:
+        """The named base fields (of ENTRY_FIELDS and the amounts) of every entry,
+        as a {field: values} per line (DEL, REC)."""
+        if encoded:
+            asset_table, account_table, amounts = self.asset_bytes, self.account_bytes, format_scaled_bytes_batch
         else:
-            dest_acct, dest_natural = invalid
+            asset_table, account_table, amounts = self.asset_texts, self.account_texts, format_scaled_batch
+        shared = {}
+        if "ENTRY_NUM" in names:
+            shared["ENTRY_NUM"] = base.entry_nums
+        if "ASSET_ID" in names:
+            shared["ASSET_ID"] = list(map(asset_table.__getitem__, base.assets))
+        amount_values = amounts(base.amounts) if set(AMOUNT_FIELDS.values()) & set(names) else None
+        lines = []
+        for code, account_ids in zip(LINES, (base.sources, base.dests)):
+            values = dict(shared)
+            if "SUB_ACCT" in names or "NATURAL_ACCT" in names:
+                values["SUB_ACCT"], values["NATURAL_ACCT"] = zip(*map(account_table.__getitem__, account_ids))
+            if AMOUNT_FIELDS[code] in names:
+                values[AMOUNT_FIELDS[code]] = amount_values
+            lines.append(values)
+        return lines
+
+
+def error_line(trans_code: str, accounting_date: str, description: str) -> List[str]:
+    """The constant fields of an error entry's DEL or REC line ('' where every entry differs)."""
+    return [
+        "", JIRA_ID, "", POSITION, accounting_date,
+        "", "", trans_code, CURRENCY,
+        "", "",
+        description, TRANS_SUBCODE, FX_RATE, BUSINESS_UNIT,
+        BV_DELTA, BV_DELTA, RELATED_ASSET_ID, COMMISSION,
+        REFERENCE_VALUE, REFERENCE_TYPE, EXTERNAL_SOURCE
+    ]
 
-    elif error_type == "invalid-natural-acct":
-        if random.choice([True, False]):
-            source_natural = random.choice(MISMATCHED_NATURAL_ACCOUNTS)
-        else:
-            dest_natural = random.choice(MISMATCHED_NATURAL_ACCOUNTS)
 
-    elif error_type == "future-date":
-        future = date.today() + timedelta(days=random.randint(30, 365))
-        entry_date = future.isoformat()
+def valid_entry_rows(base: EntryBase, pool_fields: PoolFields, accounting_date: str) -> List[List[List[str]]]:
+    """Valid entries from their base draws as CSV rows, the rows generate_valid_entry
+    builds one entry at a time."""
+    names = list(ENTRY_FIELDS) + list(AMOUNT_FIELDS.values())
+    lines = []
+    for code, values in zip(LINES, pool_fields.columns(base, False, names)):
+        line = error_line(code, accounting_date, VALID_DESCRIPTION)
+        positions = [_FIELD_POSITIONS[name] for name in values]
+        rows = []
+        for entry_values in zip(*values.values()):
+            row = list(line)
+            for position, value in zip(positions, entry_values):
+                row[position] = str(value)
+            rows.append(row)
+        lines.append(rows)
+    return [list(entry) for entry in zip(*lines)]
+
+
+class ErrorLayout:
+    """How one error type's entries are built: its mutator, the fields that vary
+    per line (ENTRY_FIELDS, the line's amount and the mutator's declared
+    fields), the constant rest of each line, and the bytes template for both."""
+
+    def __init__(self, error_type: str, accounting_date: str):
+        if error_type not in MUTATORS:
+            raise ValueError(f"Unknown error type: {error_type}. Valid: {ERROR_TYPES}")
+        self.mutator = MUTATORS[error_type]
+        description = f"ERROR: {error_type.upper()}"
+        self.lines = [error_line(code, accounting_date, description) for code in LINES]
+        self.fields = [
+            [name for name in CSV_HEADERS
+             if name in ENTRY_FIELDS or name == AMOUNT_FIELDS[code] or name in self.mutator.fields]
+            for code in LINES
+        ]
+        self.template = RowTemplate(*(
+            [Slot(name, numeric=name == "ENTRY_NUM") if name in varying else value
+             for name, value in zip(CSV_HEADERS, line)]
+            for line, varying in zip(self.lines, self.fields)
+        ))
+        # str -> CSV-encoded bytes, for the few distinct values mutators produce
+        self._encoded = LazyTable(encode_field)
+
+    def _is_base(self, code: str, name: str) -> bool:
+        return name in ENTRY_FIELDS or name == AMOUNT_FIELDS[code]
+
+    def new_batch(
+        self,
+        base: EntryBase,
+        pool_fields: PoolFields,
+        rngs: Sequence,
+        full: bool = False,
+        partner_nums: Optional[List[int]] = None
+    ) -> ErrorBatch:
+        """A batch of entries before the mutator is applied.
+
+        It has columns for the mutator's declared fields only, unless full
+        (every varying field, as rows() needs). partner_nums: see ErrorBatch.
+        """
+        wanted = [
+            [name for name in fields if full or name in self.mutator.fields]
+            for fields in self.fields
+        ]
+        base_lines = pool_fields.columns(base, False, wanted[0] + wanted[1])
+        columns = []
+        for code, line, names, base_values in zip(LINES, self.lines, wanted, base_lines):
+            values = {}
+            for name in names:
+                if self._is_base(code, name):
+                    values[name] = list(base_values[name])
+                else:
+                    values[name] = [line[_FIELD_POSITIONS[name]]] * len(base.entry_nums)
+            columns.append(values)
+        return ErrorBatch(base.entry_nums, base.amounts, rngs, *columns, partner_nums=partner_nums)
+
+    def render(self, batch: ErrorBatch, base: EntryBase, pool_fields: PoolFields) -> List[bytes]:
+        """Encode every entry of a mutated batch: one bytes object per entry.
+
+        Declared fields come from the batch; the other base fields, which the
+        mutator cannot have changed, from the pre-encoded pools.
+        """
+        encoded = self._encoded.__getitem__
+        declared = self.mutator.fields
+        slot_values = []
+        undeclared = [name for fields in self.fields for name in fields if name not in declared]
+        for values, fields, base_values in zip(
+            (batch.dels, batch.recs), self.fields, pool_fields.columns(base, True, undeclared)
+        ):
+            for name in fields:
+                if name not in declared:
+                    slot_values.append(base_values[name])
+                elif name == "ENTRY_NUM":
+                    slot_values.append(values[name])
+                else:
+                    slot_values.append(list(map(encoded, values[name])))
+        return list(map(self.template.format.__mod__, zip(*slot_values)))
+
+    def rows(self, batch: ErrorBatch, i: int) -> List[List[str]]:
+        """Entry i of a mutated full batch (see new_batch) as CSV rows."""
+        rows = []
+        for line, values in zip(self.lines, (batch.dels, batch.recs)):
+            row = list(line)
+            for name, column in values.items():
+                row[_FIELD_POSITIONS[name]] = str(column[i])
+            rows.append(row)
+        return rows
+
+
+_error_layouts: Dict[Tuple[str, str], ErrorLayout] = {}
+
+
+def error_layout(error_type: str, accounting_date: str) -> ErrorLayout:
+    """The ErrorLayout for an error type and date, compiled once."""
+    key = (error_type, accounting_date)
+    layout = _error_layouts.get(key)
+    if layout is None:
+        layout = _error_layouts[key] = ErrorLayout(error_type, accounting_date)
+    return layout
+
+
+def compile_valid_template(accounting_date: str) -> RowTemplate:
+    """Compile the valid DEL/REC line pair into one bytes template for a given date."""
+    def line(trans_code: str, dr: object, cr: object) -> list:
+        return [
+            Slot("entry_num", numeric=True), JIRA_ID, Slot("asset_id"), POSITION,
+            accounting_date, Slot("natural_acct"), Slot("sub_acct"), trans_code, CURRENCY,
+            dr, cr, VALID_DESCRIPTION, TRANS_SUBCODE, FX_RATE, BUSINESS_UNIT,
+            BV_DELTA, BV_DELTA, RELATED_ASSET_ID, COMMISSION,
+            REFERENCE_VALUE, REFERENCE_TYPE, EXTERNAL_SOURCE
+        ]
+
+    return RowTemplate(
+        line("DEL", Slot("entered_dr"), ""),
+        line("REC", "", Slot("entered_cr")),
+    )
 
-    elif error_type == "past-date":
-        past = date.today() - timedelta(days=random.randint(730, 1000))
-        entry_date = past.isoformat()
 
-    elif error_type == "missing-amount":
-        dr_amount = ""
-        cr_amount = ""
+class ScenarioEntry(NamedTuple):
+    """One generated entry: its outcome (None if valid) and its CSV rows.
 
-    elif error_type == "negative-amount":
-        dr_amount = format_amount(-amount)
-        cr_amount = format_amount(-amount)
+    entry_num is the entry's place in the file; the ENTRY_NUM in its rows is
+    another entry's for a duplicate-entry-num entry.
+    """
+    entry_num: int
+    error_type: Optional[str]
+    rows: List[List[str]]
 
-    elif error_type == "zero-amount":
-        dr_amount = "0.0000000000"
-        cr_amount = "0.0000000000"
 
-    del_line = [
-        str(entry_num), JIRA_ID, asset_id, POSITION, entry_date,
-        source_natural, source_acct, "DEL", CURRENCY,
-        dr_amount, "",
-        description, TRANS_SUBCODE, FX_RATE, BUSINESS_UNIT,
-        BV_DELTA, BV_DELTA, RELATED_ASSET_ID, COMMISSION,
-        REFERENCE_VALUE, REFERENCE_TYPE, EXTERNAL_SOURCE
-    ]
+def resolve_error_types(error_type: Optional[str]) -> List[str]:
+    """Error types to draw from: one specific type, or MIXED_TYPES for 'mixed'."""
+    if error_type and error_type != "mixed":
+        if error_type not in ERROR_TYPES:
+            raise ValueError(f"Unknown error type: {error_type}. Valid: {ERROR_TYPES}")
+        return [error_type]
+    return MIXED_TYPES
 
-    rec_line = [
-        str(entry_num), JIRA_ID, asset_id, POSITION, entry_date,
-        dest_natural, dest_acct, "REC", CURRENCY,
-        "", cr_amount,
-        description, TRANS_SUBCODE, FX_RATE, BUSINESS_UNIT,
-        BV_DELTA, BV_DELTA, RELATED_ASSET_ID, COMMISSION,
-        REFERENCE_VALUE, REFERENCE_TYPE, EXTERNAL_SOURCE
+
+def count_errors(num_entries: int, error_percent: float) -> int:
+    """Number of error entries for a given total and percentage."""
+    return int(num_entries * error_percent / 100)
+
+
+def build_placement(
+    num_entries: int,
+    error_percent: float = 10.0,
+    error_type: Optional[str] = None,
+    shuffle: bool = False,
+    seed: Optional[int] = None
+) -> ErrorPlacement:
+    """Decide (lazily, in O(1) memory) which entries are errors and of which type."""
+    if seed is None:
+        seed = new_seed()
+    return ErrorPlacement(
+        num_entries,
+        count_errors(num_entries, error_percent),
+        resolve_error_types(error_type),
+        shuffle,
+        seed,
+        block_size=DEFAULT_BATCH_SIZE,
+        colliding=COLLIDING_TYPES,
+        collided=COLLIDED
+    )
+
+
+def iter_plan(
+    num_entries: int,
+    error_percent: float = 10.0,
+    error_type: Optional[str] = None,
+    shuffle: bool = False,
+    seed: Optional[int] = None
+) -> Iterator[Optional[str]]:
+    """Yield the outcome of each entry in order: None for valid, else its error type
+    (or COLLIDED, for a valid entry a duplicate-entry-num entry repeats)."""
+    placement = build_placement(num_entries, error_percent, error_type, shuffle, seed)
+    for block in range(placement.num_blocks):
+        yield from placement.block_outcomes(block)
+
+
+def _plan_batches(
+    num_entries: int,
+    error_percent: float,
+    error_type: Optional[str],
+    shuffle: bool,
+    seed: int,
+    first_block: int = 0
+) -> Iterator[Tuple[int, List[Optional[str]], Dict[int, int], List[int]]]:
+    """
+    Yield (batch_start, outcomes, partners, entry_bits) for batches of entries.
+    Every public iterator is built on this, so they all produce the same
+    entries for the same seed.
+
+    Batches line up with ErrorPlacement blocks, so memory stays bounded by one
+    batch: no per-entry plan is ever materialised. partners maps the offset of
+    each entry written with another entry's ENTRY_NUM to that number (see
+    ErrorPlacement.block_plan). entry_bits are each entry's counter-based
+    random bits (see entry_rng). first_block skips the batches before it, e.g.
+    to resume a checkpointed run.
+    """
+    placement = build_placement(num_entries, error_percent, error_type, shuffle, seed)
+    counter_rng = EntryRandom(seed)
+    for block in range(first_block, placement.num_blocks):
+        outcomes, partners = placement.block_plan(block)
+        batch_start = block * DEFAULT_BATCH_SIZE + 1
+        yield batch_start, outcomes, partners, counter_rng.bits_range(batch_start, batch_start + len(outcomes))
+
+
+def iter_entries(
+    num_entries: int,
+    error_percent: float = 10.0,
+    error_type: Optional[str] = None,
+    accounting_date: Optional[str] = None,
+    shuffle: bool = False,
+    seed: Optional[int] = None,
+    entry_options: EntryOptions = EntryOptions()
+) -> Iterator[ScenarioEntry]:
+    """Lazily generate entries as ScenarioEntry tuples (outcome plus CSV rows)."""
+    if accounting_date is None:
+        accounting_date = date.today().isoformat()
+    if seed is None:
+        seed = new_seed()
+
+    for batch_start, outcomes, partners, entry_bits in _plan_batches(
+        num_entries, error_percent, error_type, shuffle, seed
+    ):
+        for offset, (err_type, bits) in enumerate(zip(outcomes, entry_bits)):
+            entry_num = batch_start + offset
+            yield _build_entry(
+                entry_num, err_type, accounting_date, bits, partners.get(offset, entry_num), entry_options
+            )
+
+
+def _build_entry(
+    entry_num: int,
+    err_type: Optional[str],
+    accounting_date: str,
+    bits: int,
+    partner_num: int,
+    entry_options: EntryOptions
+) -> ScenarioEntry:
+    """Build one entry's rows from its outcome, random bits and partner (see _plan_batches)."""
+    if err_type:
+        rows = generate_error_entry(
+            entry_num, err_type, accounting_date, rng=EntryDraws(bits), partner_num=partner_num,
+            entry_options=entry_options
+        )
+    else:
+        rows = generate_valid_entry(entry_num, accounting_date, rng=EntryDraws(bits), entry_options=entry_options)
+    return ScenarioEntry(entry_num, err_type, rows)
+
+
+def regenerate_entry(
+    entry_num: int,
+    num_entries: int,
+    error_percent: float = 10.0,
+    error_type: Optional[str] = None,
+    accounting_date: Optional[str] = None,
+    shuffle: bool = False,
+    seed: int = 0,
+    entry_options: EntryOptions = EntryOptions()
+) -> ScenarioEntry:
+    """Rebuild one entry of a seeded run without generating the entries before it.
+
+    All arguments must match the original run (num_entries and error_percent
+    decide where the errors are placed).
+    """
+    if not 1 <= entry_num <= num_entries:
+        raise ValueError(f"entry_num must be in 1..{num_entries}, got {entry_num}")
+    if accounting_date is None:
+        accounting_date = date.today().isoformat()
+
+    placement = build_placement(num_entries, error_percent, error_type, shuffle, seed)
+    outcome, partner_num = placement.entry_plan(entry_num - 1)
+    return _build_entry(
+        entry_num, outcome, accounting_date, EntryRandom(seed).bits(entry_num), partner_num, entry_options
+    )
+
+
+def iter_rows(
+    num_entries: int,
+    error_percent: float = 10.0,
+    error_type: Optional[str] = None,
+    accounting_date: Optional[str] = None,
+    shuffle: bool = False,
+    seed: Optional[int] = None,
+    entry_options: EntryOptions = EntryOptions()
+) -> Iterator[List[str]]:
+    """Lazily generate CSV rows (DEL then REC per entry), without the header."""
+    for entry in iter_entries(num_entries, error_percent, error_type, accounting_date, shuffle, seed, entry_options):
+        yield from entry.rows
+
+
+def _encode_account(account: Tuple[str, str]) -> Tuple[bytes, bytes]:
+    """(sub_acct, natural_acct) -> (natural_bytes, sub_bytes), in column order."""
+    sub_acct, natural_acct = account
+    return encode_field(natural_acct), encode_field(sub_acct)
+
+
+def _iter_batches(
+    num_entries: int,
+    error_percent: float = 10.0,
+    error_type: Optional[str] = None,
+    accounting_date: Optional[str] = None,
+    shuffle: bool = False,
+    counts: Optional[Dict[str, int]] = None,
+    seed: Optional[int] = None,
+    encode: bool = True,
+    columns: bool = False,
+    telemetry: Optional[Telemetry] = None,
+    first_block: int = 0,
+    entry_options: EntryOptions = EntryOptions()
+) -> Iterator[Tuple[List[Optional[str]], Optional[List[bytes]], Optional[Dict[str, Column]]]]:
+    """Yield (outcomes, encoded entries, columns) per batch; the last two are None unless asked for.
+
+    All three come from the same planned batch, so CSV, columnar output and
+    the manifest can be written in one pass. If counts is given it is incremented per outcome
+    ('valid' or the error type) as batches are produced.
+
+    With telemetry, planning a batch (error placement and random bits) counts
+    as sampling; building the entries from their bits counts as formatting.
+    Batches before first_block are skipped (see _plan_batches).
+    """
+    if accounting_date is None:
+        accounting_date = date.today().isoformat()
+    if seed is None:
+        seed = new_seed()
+
+    # Valid entries are rendered one by one from a precompiled bytes template
+    # with pre-encoded pools (and, for columns, built as rows in one group from
+    # the same draws). Error entries are grouped by type: each group is drawn
+    # into columns, mutated in one call and rendered with its own template.
+    render_valid = compile_valid_template(accounting_date).render
+    pools = entry_options.pools()
+    offsets = pools.offsets
+    valid_assets = [
+        (encode_field(asset_id), offsets[i], offsets[i + 1] - offsets[i])
+        for i, asset_id in enumerate(pools.asset_ids)
     ]
+    members = pools.members.tolist()
+    writeoff = pools.writeoff.tolist()
+    accounts = LazyTable(lambda account_id: _encode_account(pools.accounts[account_id]))
+    amount_strs = [format_scaled_bytes(a) for a in SCALED_AMOUNTS]
+    num_assets, num_writeoff, num_amounts = len(valid_assets), len(writeoff), len(SCALED_AMOUNTS)
+    asset_table, source_tables, dest_tables = entry_options.samplers()
+    pool_fields = PoolFields(pools)
+    layouts = {
+        err_type: error_layout(err_type, accounting_date)
+        for err_type in outcome_types(resolve_error_types(error_type))
+    }
+    clock = time.perf_counter
+    batches = _plan_batches(num_entries, error_percent, error_type, shuffle, seed, first_block)
+
+    while True:
+        sampling_started = clock()
+        batch = next(batches, None)
+        if batch is None:
+            return
+        formatting_started = clock()
+        batch_start, outcomes, partners, entry_bits = batch
+
+        chunk = [None] * len(outcomes) if encode else None
+        entry_rows = [None] * len(outcomes) if columns else None
+        errors = defaultdict(list)      # error type -> base draws of its entries
+        valid = []                      # base draws of the valid entries, for columns
+        for position, (err_type, bits) in enumerate(zip(outcomes, entry_bits)):
+            if counts is not None:
+                counts[err_type or "valid"] += 1
+            # Same draws, in the same order, as draw_valid_accounts, then the amount
+            if asset_table is None:
+                bits, asset = divmod(bits, num_assets)
+            else:
+                bits, asset = asset_table.draw(bits)
+            asset_b, first, num_accounts = valid_assets[asset]
+            if source_tables is None:
+                bits, i = divmod(bits, num_accounts)
+            else:
+                bits, i = source_tables[num_accounts].draw(bits)
+            source = members[first + i]
+            if dest_tables is None:
+                bits, i = divmod(bits, num_writeoff)
+            else:
+                bits, i = dest_tables[num_writeoff].draw(bits)
+            dest = writeoff[i]
+            bits, amount = divmod(bits, num_amounts)
+            if err_type:
+                # The mutator draws from the bits that are left
+                errors[err_type].append((position, asset, source, dest, amount, bits))
+                continue
+
+            entry_num = batch_start + position
+            if columns:
+                valid.append((position, asset, source, dest, amount))
+            if encode:
+                source_natural_b, source_sub_b = accounts[source]
+                dest_natural_b, dest_sub_b = accounts[dest]
+                amount_str = amount_strs[amount]
+                chunk[position] = render_valid(
+                    entry_num, asset_b, source_natural_b, source_sub_b, amount_str,
+                    entry_num, asset_b, dest_natural_b, dest_sub_b, amount_str
+                )
+
+        if valid:
+            positions, assets, sources, dests, amounts = zip(*valid)
+            base = EntryBase(
+                [batch_start + position for position in positions], assets, sources, dests,
+                [SCALED_AMOUNTS[amount] for amount in amounts]
+            )
+            for position, rows in zip(positions, valid_entry_rows(base, pool_fields, accounting_date)):
+                entry_rows[position] = rows
+
+        for err_type, drawn in errors.items():
+            positions, assets, sources, dests, amounts, rest = zip(*drawn)
+            base = EntryBase(
+                [batch_start + position for position in positions], assets, sources, dests,
+                [SCALED_AMOUNTS[amount] for amount in amounts]
+            )
+            layout = layouts[err_type]
+            error_batch = layout.new_batch(
+                base, pool_fields, LazyDraws(rest), full=columns,
+                partner_nums=[partners.get(position, batch_start + position) for position in positions]
+            )
+            layout.mutator.apply(error_batch)
+            if encode:
+                for position, encoded in zip(positions, layout.render(error_batch, base, pool_fields)):
+                    chunk[position] = encoded
+            if columns:
+                for i, position in enumerate(positions):
+                    entry_rows[position] = layout.rows(error_batch, i)
+
+        batch_columns = (
+            rows_to_columns([row for rows in entry_rows for row in rows], CSV_HEADERS) if columns else None
+        )
+        if telemetry:
+            telemetry.add("sampling", formatting_started - sampling_started)
+            telemetry.add("formatting", clock() - formatting_started)
+        yield outcomes, chunk, batch_columns
+
+
+def iter_encoded_batches(
+    num_entries: int,
+    error_percent: float = 10.0,
+    error_type: Optional[str] = None,
+    accounting_date: Optional[str] = None,
+    shuffle: bool = False,
+    counts: Optional[Dict[str, int]] = None,
+    seed: Optional[int] = None,
+    entry_options: EntryOptions = EntryOptions()
+) -> Iterator[List[bytes]]:
+    """Lazily generate batches of encoded entries: one bytes object (DEL + REC lines) per entry.
+
+    This is the form output rotation needs, since it may only cut between
+    entries. If counts is given it is incremented per outcome ('valid' or the
+    error type) as batches are produced.
+    """
+    for _, encoded, _ in _iter_batches(
+        num_entries, error_percent, error_type, accounting_date, shuffle, counts, seed,
+        entry_options=entry_options
+    ):
+        yield encoded
 
-    return [del_line, rec_line]
+
+def iter_column_batches(
+    num_entries: int,
+    error_percent: float = 10.0,
+    error_type: Optional[str] = None,
+    accounting_date: Optional[str] = None,
+    shuffle: bool = False,
+    counts: Optional[Dict[str, int]] = None,
+    seed: Optional[int] = None,
+    entry_options: EntryOptions = EntryOptions()
+) -> Iterator[Dict[str, Column]]:
+    """Lazily generate batches as columns for columnar_output.ColumnarWriter.
+
+    Amounts are scaled integers (None where the CSV field is empty).
+    """
+    for _, _, batch_columns in _iter_batches(
+        num_entries, error_percent, error_type, accounting_date, shuffle, counts, seed,
+        encode=False, columns=True, entry_options=entry_options
+    ):
+        yield batch_columns
+
+
+def iter_chunks(
+    num_entries: int,
+    error_percent: float = 10.0,
+    error_type: Optional[str] = None,
+    accounting_date: Optional[str] = None,
+    shuffle: bool = False,
+    header: bool = True,
+    counts: Optional[Dict[str, int]] = None,
+    seed: Optional[int] = None,
+    entry_options: EntryOptions = EntryOptions()
+) -> Iterator[bytes]:
+    """Lazily generate the CSV as encoded byte chunks, one batch of entries each.
+
+    Memory is bounded by one batch (DEFAULT_BATCH_SIZE entries) regardless of
+    num_entries. If counts is given it is incremented per outcome ('valid' or
+    the error type) as chunks are produced.
+    """
+    if header:
+        yield encode_row(CSV_HEADERS)
+
+    for batch in iter_encoded_batches(
+        num_entries, error_percent, error_type, accounting_date, shuffle, counts, seed, entry_options
+    ):
+        yield b"".join(batch)
+
+
+def write_entries(
+    fileobj: BinaryIO,
+    num_entries: int,
+    error_percent: float = 10.0,
+    error_type: Optional[str] = None,
+    accounting_date: Optional[str] = None,
+    shuffle: bool = False,
+    header: bool = True,
+    progress: Optional[Callable[[int], None]] = None,
+    seed: Optional[int] = None,
+    entry_options: EntryOptions = EntryOptions()
+) -> Dict[str, int]:
+    """Stream entries into any binary file-like object (file, pipe, BytesIO, socket file).
+
+    Args:
+        fileobj: Anything with a write(bytes) method
+        progress: Optional callback, called after each batch with the number
+                  of entries written so far
+        entry_options: Pools and key distributions to draw with (see entry_options)
+
+    Returns:
+        Entry counts per outcome: 'valid' and each error type generated
+    """
+    counts: Dict[str, int] = defaultdict(int)
+    entries_done = 0
+    chunks = iter_chunks(
+        num_entries, error_percent, error_type, accounting_date, shuffle, header, counts, seed, entry_options
+    )
+    if header:
+        fileobj.write(next(chunks))
+    for chunk in chunks:
+        fileobj.write(chunk)
+        entries_done = min(entries_done + DEFAULT_BATCH_SIZE, num_entries)
+        if progress:
+            progress(entries_done)
+    return counts
+
+
+def write_outputs(
+    output_path: str,
+    num_entries: int,
+    error_percent: float = 10.0,
+    error_type: Optional[str] = None,
+    accounting_date: Optional[str] = None,
+    shuffle: bool = False,
+    seed: Optional[int] = None,
+    formats: Sequence[str] = ("csv",),
+    max_rows_per_file: Optional[int] = None,
+    max_bytes_per_file: Optional[int] = None,
+    compress: Optional[str] = None,
+    compress_level: Optional[int] = None,
+    counts: Optional[Dict[str, int]] = None,
+    telemetry: Optional[Telemetry] = None,
+    manifest: Optional[str] = None,
+    options: Optional[Dict[str, object]] = None,
+    checkpoint_interval: Optional[float] = DEFAULT_CHECKPOINT_INTERVAL,
+    resume_from: Optional[Checkpoint] = None,
+    entry_options: EntryOptions = EntryOptions()
+) -> Tuple[List[str], List[str], int]:
+    """Generate entries once and write every requested output format in the same pass.
+
+    Args:
+        formats: Any of 'csv', 'parquet', 'arrow'. Columnar files are named
+                 after output_path (see columnar_output.columnar_path).
+        max_rows_per_file, max_bytes_per_file: Rotate the CSV (see generate_csv)
+        compress, compress_level: Compress the CSV (see generate_csv)
+        counts: Incremented per outcome, as for iter_encoded_batches
+        telemetry: Progress and phase timing (see telemetry)
+        manifest: If given, also write the expected-outcome manifest there
+                  (see entry_manifest)
+        options, checkpoint_interval, resume_from: For a single plain CSV, which
+                  is written via a temp file with checkpoints (see checkpoint);
+                  the manifest goes via its own temp file and its writer state
+                  and the counts are saved in each checkpoint. resume_from
+                  continues an interrupted run at its next_entry.
+        entry_options: What entries are drawn from (see entry_options)
+
+    Returns:
+        (CSV paths, columnar paths, uncompressed CSV bytes written by this call)
+    """
+    rotate = max_rows_per_file is not None or max_bytes_per_file is not None
+    header = encode_row(CSV_HEADERS)
+    write_csv = "csv" in formats
+    checkpointed = list(formats) == ["csv"] and not rotate and not compress
+    if resume_from is not None and not checkpointed:
+        raise ValueError("Resuming needs a single plain CSV (no rotation, compression or columnar output)")
+
+    # Checkpoints are taken between batches, so a resume starts on a batch boundary
+    first_block = (resume_from.next_entry - 1) // DEFAULT_BATCH_SIZE if resume_from else 0
+    resumed_entries = first_block * DEFAULT_BATCH_SIZE
+    resumed_state = resume_from.state if resume_from else {}
+    if counts is not None:
+        counts.update(resumed_state.get("counts", {}))
+
+    csv_writer = None
+    if checkpointed:
+        csv_writer = CheckpointedFile(output_path, seed, options or {}, checkpoint_interval, resume_from)
+        if resume_from is None:
+            csv_writer.write(header)
+    elif write_csv and rotate:
+        csv_writer = RotatingWriter(
+            output_path, header, max_rows_per_file, max_bytes_per_file,
+            opener=lambda path: OutputFile(path, compress, compress_level)
+        )
+    elif write_csv:
+        csv_writer = OutputFile(output_path, compress, compress_level)
+        csv_writer.write(header)
+    resumed_bytes = csv_writer.raw_bytes if checkpointed else 0
+    columnar_writers = [
+        ColumnarWriter(columnar_path(output_path, fmt), CSV_HEADERS, fmt)
+        for fmt in formats if fmt != "csv"
+    ]
+    manifest_writer = None
+    if manifest:
+        manifest_writer = ManifestWriter(
+            partial_path(manifest) if checkpointed else manifest,
+            [(VALID, None)] + [
+                (outcome, EXPECTED_FAILURE_POINTS[outcome]) for outcome in outcome_types(ERROR_TYPES)
+            ],
+            block_size=DEFAULT_BATCH_SIZE,
+            state=resumed_state.get("manifest")
+        )
+
+    clock = time.perf_counter
+    entries_done = resumed_entries
+    for outcomes, encoded, batch_columns in _iter_batches(
+        num_entries, error_percent, error_type, accounting_date, shuffle, counts, seed,
+        encode=write_csv, columns=bool(columnar_writers), telemetry=telemetry, first_block=first_block,
+        entry_options=entry_options
+    ):
+        writing_started = clock()
+        if manifest_writer:
+            manifest_writer.add_batch(outcomes, list(map(len, encoded)) if write_csv else None)
+        if rotate:
+            csv_writer.write_batch(encoded)
+        elif write_csv:
+            csv_writer.write(b"".join(encoded))
+        for writer in columnar_writers:
+            writer.write_columns(batch_columns)
+        entries_done = min(entries_done + DEFAULT_BATCH_SIZE, num_entries)
+        if checkpointed and csv_writer.checkpoint_due():
+            state = {"counts": dict(counts or {})}
+            if manifest_writer:
+                state["manifest"] = manifest_writer.state()
+            csv_writer.checkpoint(entries_done + 1, state)
+        if telemetry:
+            telemetry.add("writing", clock() - writing_started)
+            raw_bytes = 0
+            if rotate:
+                raw_bytes = csv_writer.bytes_written
+            elif write_csv:
+                raw_bytes = csv_writer.raw_bytes - resumed_bytes
+            telemetry.update(entries_done - resumed_entries, raw_bytes)
+
+    csv_paths: List[str] = []
+    raw_bytes = 0
+    if rotate:
+        csv_paths = csv_writer.close()
+        raw_bytes = csv_writer.bytes_written
+    elif write_csv:
+        csv_paths = [csv_writer.name]
+        raw_bytes = csv_writer.raw_bytes - resumed_bytes
+        if not checkpointed:
+            csv_writer.close()
+    if manifest_writer:
+        first_entries = csv_writer.part_first_entries if rotate else [0] * len(csv_paths)
+        manifest_writer.close(
+            parts=[
+                {"path": os.path.basename(path), "first_entry": first + 1}
+                for path, first in zip(csv_paths, first_entries)
+            ],
+            csv_header_bytes=len(header),
+            compress=compress,
+            jira_id=JIRA_ID,
+            seed=seed,
+            accounting_date=accounting_date,
+            error_percent=error_percent,
+            error_type=error_type,
+            shuffle=shuffle,
+            distributions=entry_options.distributions.to_dict(),
+        )
+    if checkpointed:
+        # The manifest is complete before the CSV is renamed into place and its checkpoint dropped
+        csv_writer.commit()
+        csv_writer.close()
+        if manifest_writer:
+            os.replace(manifest_writer.path, manifest)
+    return csv_paths, [writer.close() for writer in columnar_writers], raw_bytes
+
+
+def checkpoint_options(
+    num_entries: int,
+    error_percent: float,
+    error_type: Optional[str],
+    accounting_date: str,
+    shuffle: bool,
+    manifest: bool,
+    entry_options: EntryOptions
+) -> Dict[str, object]:
+    """Everything besides the seed that a checkpointed file and its manifest depend on."""
+    return {
+        "script": "generate_error_scenarios",
+        "entries": num_entries,
+        "error_percent": error_percent,
+        "error_type": error_type,
+        "accounting_date": accounting_date,
+        "shuffle": shuffle,
+        "manifest": manifest,
+        "pools": entry_options.pool_digests(),
+        "distributions": entry_options.distributions.to_dict(),
+    }
 
 
 def generate_csv(
@@ -253,8 +1047,24 @@ def generate_csv(
     error_percent: float = 10.0,
     error_type: Optional[str] = None,
     accounting_date: str = None,
-    shuffle: bool = False
-) -> None:
+    shuffle: bool = False,
+    seed: Optional[int] = None,
+    max_rows_per_file: Optional[int] = None,
+    max_bytes_per_file: Optional[int] = None,
+    compress: Optional[str] = None,
+    compress_level: Optional[int] = None,
+    formats: Sequence[str] = ("csv",),
+    progress_interval: Optional[float] = DEFAULT_INTERVAL,
+    metrics_out: Optional[str] = None,
+    pool_file: Optional[str] = None,
+    writeoff_file: Optional[str] = None,
+    manifest: bool = True,
+    asset_distribution: Optional[str] = None,
+    source_distribution: Optional[str] = None,
+    dest_distribution: Optional[str] = None,
+    checkpoint_interval: Optional[float] = DEFAULT_CHECKPOINT_INTERVAL,
+    resume: bool = False
+) -> Dict[str, object]:
     """Generate CSV with mix of valid and error entries.
 
     Args:
@@ -264,21 +1074,77 @@ def generate_csv(
         error_type: Specific error type or 'mixed' for random mix
         accounting_date: Accounting date (YYYY-MM-DD), defaults to today
         shuffle: If True, shuffle errors throughout; if False, errors at end
+        seed: Generation seed; a random one is picked (and printed) if not given.
+              The same seed and options always regenerate the same file.
+        max_rows_per_file: Rotate into numbered part files of at most this many
+                           data rows each (see output_rotation)
+        max_bytes_per_file: Rotate into numbered part files of at most this many
+                            bytes each, header included
+        compress: Compress the output while writing: 'gzip', 'zstd' or 'xz'
+                  (see compressed_output). The format suffix is added to the
+                  output path(s).
+        compress_level: Compression level, format default if not given
+        formats: Outputs to write in one pass: 'csv' and/or the columnar
+                 'parquet' / 'arrow' (see columnar_output, needs pyarrow)
+        progress_interval: Seconds between live progress lines (rows/s, MB/s,
+                           ETA, RSS, phase split); None or 0 to disable
+        metrics_out: If given, write the final metrics record there as JSON
+        pool_file: Query 2 export (CSV/JSON) to draw valid assets and source
+                   accounts from, instead of pools/source_accounts.csv (see pool_index)
+        writeoff_file: Query 3 export to draw write-off accounts from,
+                       instead of pools/writeoff_accounts.csv
+        manifest: Also write the expected outcome, failure point and byte
+                  offset of every entry to a sidecar (out.csv -> out.manifest,
+                  see entry_manifest)
+        asset_distribution, source_distribution, dest_distribution: How valid
+                  assets and accounts are drawn, e.g. 'zipf:1.2' or 'hot:1:80'
+                  (see key_distributions); None for uniform
+        checkpoint_interval: Seconds between checkpoints of a single plain CSV,
+                             which (like its manifest) is written via a
+                             .partial file and renamed when complete (see
+                             checkpoint); None or 0 for no checkpoints
+        resume: Continue the unfinished run that left output_path.checkpoint.
+                Its seed and accounting date are used unless given; every
+                other option must match. Only for a single plain CSV.
+
+    Returns:
+        The final metrics record (see telemetry.Telemetry.metrics)
     """
+    entry_options = EntryOptions.build(
+        pool_file, writeoff_file, asset_distribution, source_distribution, dest_distribution
+    )
+    rotate = max_rows_per_file is not None or max_bytes_per_file is not None
+    resume_from = None
+    if resume:
+        if rotate or compress or list(formats) != ["csv"]:
+            raise ValueError("Resuming needs a single plain CSV (no rotation, compression or columnar output)")
+        resume_from = read_checkpoint(output_path)
+        if resume_from is None:
+            print(f"No checkpoint for {output_path}; starting from the beginning")
+        else:
+            seed = resume_from.seed if seed is None else seed
+            accounting_date = accounting_date or resume_from.options.get("accounting_date")
+
     if accounting_date is None:
         accounting_date = date.today().isoformat()
+    if seed is None:
+        seed = new_seed()
+
+    options = checkpoint_options(
+        num_entries, error_percent, error_type, accounting_date, shuffle, manifest, entry_options
+    )
+    if resume_from is not None:
+        check_resume(resume_from, seed, options)
+
+    if rotate:
+        check_limits(max_rows_per_file, max_bytes_per_file, encode_row(CSV_HEADERS))
 
     # Calculate counts
-    num_errors = int(num_entries * error_percent / 100)
+    num_errors = count_errors(num_entries, error_percent)
     num_valid = num_entries - num_errors
 
     # Determine error types to use
-    if error_type and error_type != "mixed":
-        if error_type not in ERROR_TYPES:
-            raise ValueError(f"Unknown error type: {error_type}. Valid: {ERROR_TYPES}")
-        error_types_to_use = [error_type]
-    else:
-        error_types_to_use = ERROR_TYPES
+    error_types_to_use = resolve_error_types(error_type)
 
     print(f"Generating {num_entries} total entries ({num_entries * 2} rows)...")
     print(f"  Valid entries: {num_valid} ({100 - error_percent:.1f}%)")
@@ -286,50 +1152,190 @@ def generate_csv(
     print(f"  Error types: {error_types_to_use}")
     print(f"  Accounting date: {accounting_date}")
     print(f"  Shuffle mode: {shuffle}")
+    if not entry_options.distributions.is_uniform:
+        print(f"  Key distributions: {entry_options.distributions.describe()}")
+    print(f"  Seed: {seed}")
+    if compress:
+        print(f"  Compression: {compress}")
+    if list(formats) != ["csv"]:
+        print(f"  Formats: {', '.join(formats)}")
+    resumed_entries = 0
+    if resume_from is not None:
+        resumed_entries = (resume_from.next_entry - 1) // DEFAULT_BATCH_SIZE * DEFAULT_BATCH_SIZE
+        print(f"  Resuming at entry {resumed_entries + 1} ({resume_from.data_bytes:,} bytes kept)")
+
+    telemetry = Telemetry(num_entries - resumed_entries, interval=progress_interval)
+    counts: Dict[str, int] = defaultdict(int)
+    manifest_out = manifest_path(output_path) if manifest else None
+    outputs, columnar_outputs, raw_bytes = write_outputs(
+        output_path, num_entries, error_percent, error_type, accounting_date, shuffle, seed,
+        formats=formats,
+        max_rows_per_file=max_rows_per_file,
+        max_bytes_per_file=max_bytes_per_file,
+        compress=compress,
+        compress_level=compress_level,
+        counts=counts,
+        telemetry=telemetry,
+        manifest=manifest_out,
+        options=options,
+        checkpoint_interval=checkpoint_interval,
+        resume_from=resume_from,
+        entry_options=entry_options
+    )
+    telemetry.finish()
 
-    # Build list of (is_error, error_type) for each entry
-    entries_plan = []
-    entries_plan.extend([(False, None)] * num_valid)
-    for _ in range(num_errors):
-        err_type = random.choice(error_types_to_use)
-        entries_plan.append((True, err_type))
-
-    if shuffle:
-        random.shuffle(entries_plan)
-    # else: valid entries first, errors at end (default)
-
-    # Track stats
-    error_counts = defaultdict(int)
-    valid_count = 0
-
-    with open(output_path, 'w', newline='') as f:
-        writer = csv.writer(f)
-        writer.writerow(CSV_HEADERS)
-
-        for entry_num, (is_error, err_type) in enumerate(entries_plan, start=1):
-            if is_error:
-                rows = generate_error_entry(entry_num, err_type, accounting_date)
-                error_counts[err_type] += 1
-            else:
-                rows = generate_valid_entry(entry_num, accounting_date)
-                valid_count += 1
-
-            writer.writerows(rows)
-
-            if entry_num % 50000 == 0:
-                print(f"  Generated {entry_num} entries...")
+    error_counts = dict(counts)
+    valid_count = error_counts.pop("valid", 0)
+    collided_count = error_counts.pop(COLLIDED, 0)
 
-    print(f"\nDone! Output: {output_path}")
+    print()
+    for path in outputs + columnar_outputs:
+        print(f"Done! Output: {path}")
+    if manifest_out:
+        print(f"Manifest: {manifest_out}")
     print(f"\nSummary:")
     print(f"  Valid entries: {valid_count}")
+    if collided_count:
+        print(f"  Valid entries repeated by a duplicate-entry-num (rejected with it): {collided_count}")
     if error_counts:
         print(f"  Error entries by type:")
         for err_type, count in sorted(error_counts.items()):
             print(f"    {err_type}: {count}")
 
-    import os
-    size_mb = os.path.getsize(output_path) / (1024 * 1024)
-    print(f"\nFile size: {size_mb:.2f} MB")
+    print()
+    stored_bytes = sum(os.path.getsize(path) for path in outputs)
+    if outputs:
+        print(f"File size: {stored_bytes / (1024 * 1024):.2f} MB")
+    if columnar_outputs:
+        columnar_mb = sum(os.path.getsize(path) for path in columnar_outputs) / (1024 * 1024)
+        print(f"Columnar file size: {columnar_mb:.2f} MB")
+    if outputs:
+        for line in describe_throughput(raw_bytes, stored_bytes, telemetry.elapsed, compress):
+            print(line)
+    print(f"Time split: {telemetry.split_line()} (wall {telemetry.elapsed:.2f}s)")
+    print(f"Peak RSS: {peak_rss_mb():.0f} MB")
+    print(f"Seed: {seed} (pass --seed {seed} to regenerate this file)")
+
+    metrics = telemetry.metrics(
+        script="generate_error_scenarios",
+        seed=seed,
+        accounting_date=accounting_date,
+        error_percent=error_percent,
+        error_type=error_type,
+        shuffle=shuffle,
+        distributions=entry_options.distributions.to_dict(),
+        resumed_at=resumed_entries + 1 if resume_from else None,
+        formats=list(formats),
+        compress=compress,
+        stored_bytes=stored_bytes,
+        outputs=outputs + columnar_outputs,
+        manifest=manifest_out,
+        counts=dict(sorted(counts.items())),
+    )
+    if metrics_out:
+        write_metrics(metrics_out, metrics)
+        print(f"Metrics: {metrics_out}")
+    return metrics
+
+
+def stream_csv(
+    output: str,
+    profile: RateProfile,
+    duration: Optional[float] = None,
+    num_entries: Optional[int] = None,
+    error_percent: float = 10.0,
+    error_type: Optional[str] = None,
+    accounting_date: Optional[str] = None,
+    shuffle: bool = False,
+    seed: Optional[int] = None,
+    max_rows_per_file: Optional[int] = None,
+    max_bytes_per_file: Optional[int] = None,
+    buffer_batches: int = DEFAULT_BUFFER_BATCHES,
+    report_interval: Optional[float] = DEFAULT_REPORT_INTERVAL,
+    metrics_out: Optional[str] = None,
+    pool_file: Optional[str] = None,
+    writeoff_file: Optional[str] = None,
+    asset_distribution: Optional[str] = None,
+    source_distribution: Optional[str] = None,
+    dest_distribution: Optional[str] = None
+) -> Dict[str, object]:
+    """Stream entries at the profile's row rate instead of as fast as possible (see rate_stream).
+
+    The stream is the start of the file generate_csv writes for the same
+    num_entries, error options and seed (num_entries decides where errors
+    go), so that file's manifest describes it. No manifest is written here.
+
+    Args:
+        output: '-' for stdout, 'fifo:PATH', or a file path (rolled into parts
+                with max_rows_per_file / max_bytes_per_file)
+        profile: Target rows/s over time (rate, ramp, bursts)
+        duration: Seconds to stream for; stops earlier if num_entries run out
+        num_entries: Entries to plan errors over; by default as many as `duration` needs
+        report_interval: Seconds between drift lines; None or 0 to disable
+        pool_file, writeoff_file, asset_distribution, source_distribution,
+        dest_distribution: As for generate_csv
+
+    Returns:
+        The final metrics record, including drift and scheduling lateness
+    """
+    if duration is None and num_entries is None:
+        raise ValueError("Streaming needs a duration, a number of entries, or both")
+    entry_options = EntryOptions.build(
+        pool_file, writeoff_file, asset_distribution, source_distribution, dest_distribution
+    )
+    if accounting_date is None:
+        accounting_date = date.today().isoformat()
+    if seed is None:
+        seed = new_seed()
+    if num_entries is None:
+        num_entries = planned_entries(profile, duration, 2)
+
+    header = encode_row(CSV_HEADERS)
+    if max_rows_per_file is not None or max_bytes_per_file is not None:
+        check_limits(max_rows_per_file, max_bytes_per_file, header)
+    # Keep stdout for the rows when streaming to it
+    log = sys.stderr if output == "-" else sys.stdout
+    output_stream = StreamOutput(output, header, max_rows_per_file, max_bytes_per_file)
+    limit = f"for {duration:g}s" if duration is not None else f"for {num_entries:,} entries"
+    print(f"Streaming to {output_stream.name} at {profile.describe()}, {limit} (seed {seed})", file=log, flush=True)
+    print(f"Errors: {error_percent:g}% {error_type or 'mixed'}{' shuffled' if shuffle else ' at the end'}, "
+          f"planned over {num_entries:,} entries", file=log, flush=True)
+    if not entry_options.distributions.is_uniform:
+        print(f"Key distributions: {entry_options.distributions.describe()}", file=log, flush=True)
+
+    try:
+        stats = stream(
+            iter_encoded_batches(
+                num_entries, error_percent, error_type, accounting_date, shuffle,
+                seed=seed, entry_options=entry_options
+            ),
+            output_stream, profile, duration, buffer_batches, report_interval, log
+        )
+    finally:
+        outputs = output_stream.close()
+    for line in describe_stream(stats):
+        print(line, file=log)
+    print(f"Seed: {seed} (same entries as --entries {num_entries} --seed {seed}, "
+          f"e.g. to write the manifest)", file=log)
+
+    metrics = stats.metrics()
+    metrics.update(
+        script="generate_error_scenarios",
+        seed=seed,
+        accounting_date=accounting_date,
+        num_entries=num_entries,
+        error_percent=error_percent,
+        error_type=error_type,
+        shuffle=shuffle,
+        distributions=entry_options.distributions.to_dict(),
+        rate=profile.rate,
+        duration_s=duration,
+        outputs=outputs,
+    )
+    if metrics_out:
+        write_metrics(metrics_out, metrics)
+        print(f"Metrics: {metrics_out}", file=log)
+    return metrics
 
 
 def main():
@@ -351,40 +1357,131 @@ Examples:
   python generate_error_scenarios.py --entries 100 --error-percent 100
 
 Error types:
-  unbalanced           DR != CR (will fail balancing validation)
-  invalid-asset        Non-existent asset ID
-  invalid-account      Non-existent sub-account ID
-  invalid-natural-acct Natural account doesn't match sub-account type
-  future-date          Accounting date 30+ days in future
-  past-date            Accounting date in closed period (>2 years ago)
-  missing-amount       Both DR and CR are empty
-  negative-amount      Negative amounts
-  zero-amount          Zero amounts
-  mixed                Random mix of all error types (default)
-"""
+""" + describe_error_types() + "\n"
     )
-    parser.add_argument("--entries", type=int, default=1000,
-                        help="Total number of entries (default: 1000)")
+    parser.add_argument("--entries", type=int, default=None,
+                        help="Total number of entries (default: 1000, or as many as --rate/--duration need)")
     parser.add_argument("--output", type=str, default="error_scenarios.csv",
                         help="Output file path")
     parser.add_argument("--error-percent", type=float, default=10.0,
                         help="Percentage of entries with errors (default: 10)")
     parser.add_argument("--error-type", type=str, default="mixed",
                         choices=ERROR_TYPES + ["mixed"],
-                        help="Specific error type or 'mixed' for all")
+                        help="Specific error type or 'mixed' for all but duplicate-entry-num")
     parser.add_argument("--date", type=str, default=None,
                         help="Accounting date (YYYY-MM-DD)")
     parser.add_argument("--shuffle", action="store_true",
                         help="Shuffle errors throughout (default: errors at end)")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="Generation seed; same seed and options give the same file (default: random)")
+    parser.add_argument("--max-rows-per-file", type=int, default=None,
+                        help="Rotate output into numbered part files of at most N data rows each")
+    parser.add_argument("--max-bytes-per-file", type=int, default=None,
+                        help="Rotate output into numbered part files of at most N bytes each")
+    parser.add_argument("--progress-interval", type=float, default=DEFAULT_INTERVAL,
+                        help=f"Seconds between progress lines; 0 disables them (default: {DEFAULT_INTERVAL:g})")
+    parser.add_argument("--metrics-out", type=str, default=None,
+                        help="Write the final metrics (rows/s, MB/s, peak RSS, phase times, "
+                             "counts per outcome) to this JSON file")
+    parser.add_argument("--format", type=str, default="csv",
+                        help="Comma-separated outputs to write in one pass: csv, parquet, arrow "
+                             "(e.g. csv,parquet; columnar formats need pyarrow; default: csv)")
+    parser.add_argument("--compress", choices=COMPRESSIONS, default=None,
+                        help="Compress while writing; adds .gz/.zst/.xz to the output name "
+                             "(zstd needs the zstandard package)")
+    parser.add_argument("--compress-level", type=int, default=None,
+                        help="Compression level (default: gzip 6, zstd 3, xz 6)")
+    parser.add_argument("--pool-file", type=str, default=None,
+                        help="Query 2 export (CSV or JSON) of source accounts "
+                             "(default: pools/source_accounts.csv)")
+    parser.add_argument("--writeoff-file", type=str, default=None,
+                        help="Query 3 export (CSV or JSON) of write-off accounts "
+                             "(default: pools/writeoff_accounts.csv)")
+    parser.add_argument("--only-entry", type=int, default=None, metavar="ENTRY_NUM",
+                        help="Print just this entry's rows (with header) to stdout instead of "
+                             "writing a file; use with the --seed and options of the original run")
+    parser.add_argument("--no-manifest", action="store_true",
+                        help="Don't write the expected-outcome manifest (out.csv -> out.manifest)")
+    add_distribution_arguments(parser)
+    add_stream_arguments(parser)
+    add_checkpoint_arguments(parser)
 
     args = parser.parse_args()
+    profile = profile_from_args(parser, args)
+    entry_options = entry_options_from_args(parser, args)
+
+    formats = [fmt.strip() for fmt in args.format.split(",") if fmt.strip()]
+    unknown = sorted(set(formats) - set(["csv"] + COLUMNAR_FORMATS))
+    if unknown or not formats:
+        parser.error(f"--format: expected csv, parquet and/or arrow, got {args.format!r}")
+
+    if args.only_entry is not None:
+        if args.seed is None:
+            parser.error("--only-entry requires --seed")
+        entry = regenerate_entry(
+            args.only_entry, args.entries if args.entries is not None else 1000,
+            args.error_percent, args.error_type, args.date, args.shuffle, args.seed, entry_options
+        )
+        sys.stdout.buffer.write(encode_row(CSV_HEADERS) + encode_rows(entry.rows))
+        return
+
+    rotate = args.max_rows_per_file is not None or args.max_bytes_per_file is not None
+    if args.resume and (args.compress or formats != ["csv"] or rotate):
+        parser.error("--resume needs a single plain CSV (no --compress, --format or --max-*-per-file)")
+
+    if profile is not None:
+        if args.compress or formats != ["csv"]:
+            parser.error("--rate streams plain CSV (no --compress or --format)")
+        if args.resume:
+            parser.error("--resume does not apply to --rate (a stream has no fixed end to resume towards)")
+        if args.duration is None and args.entries is None:
+            parser.error("--rate needs --duration, --entries, or both")
+        stream_csv(
+            args.output,
+            profile,
+            duration=args.duration,
+            num_entries=args.entries,
+            error_percent=args.error_percent,
+            error_type=args.error_type,
+            accounting_date=args.date,
+            shuffle=args.shuffle,
+            seed=args.seed,
+            max_rows_per_file=args.max_rows_per_file,
+            max_bytes_per_file=args.max_bytes_per_file,
+            buffer_batches=args.buffer_batches,
+            report_interval=args.progress_interval,
+            metrics_out=args.metrics_out,
+            pool_file=args.pool_file,
+            writeoff_file=args.writeoff_file,
+            asset_distribution=args.asset_distribution,
+            source_distribution=args.source_distribution,
+            dest_distribution=args.dest_distribution
+        )
+        return
+
     generate_csv(
-        args.entries,
+        args.entries if args.entries is not None else 1000,
         args.output,
         args.error_percent,
         args.error_type,
         args.date,
-        args.shuffle
+        args.shuffle,
+        seed=args.seed,
+        max_rows_per_file=args.max_rows_per_file,
+        max_bytes_per_file=args.max_bytes_per_file,
+        compress=args.compress,
+        compress_level=args.compress_level,
+        formats=formats,
+        progress_interval=args.progress_interval,
+        metrics_out=args.metrics_out,
+        pool_file=args.pool_file,
+        writeoff_file=args.writeoff_file,
+        asset_distribution=args.asset_distribution,
+        source_distribution=args.source_distribution,
+        dest_distribution=args.dest_distribution,
+        manifest=not args.no_manifest,
+        checkpoint_interval=args.checkpoint_interval,
+        resume=args.resume
     )
 
 
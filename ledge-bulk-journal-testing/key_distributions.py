@@ -0,0 +1,261 @@
+"""
+Key distributions: how often each asset, source account and write-off
+account is drawn.
+
+By default every draw is uniform, so a pool's smallest asset gets as many
+entries as its largest, and no account is ever hot. Production contention
+in GL Publisher and Oracle comes from hot code combinations. To model it, a
+run can skew each of the three draws:
+
+    uniform          every key equally likely (default)
+    weighted         assets only: in proportion to their number of source accounts
+    zipf[:S]         the k-th key of a pool has weight 1/k**S (S defaults to 1)
+    hot:P[:SHARE]    the first P% of a pool's keys get SHARE% of the draws
+                     (SHARE defaults to 90), e.g. hot:1:80
+
+Keys are ranked in pool order, i.e. export row order (see pool_index).
+Rank 1 of the Zipf curve and the hot set are therefore the first rows of
+the export. Source accounts are ranked within their asset. Write-off
+accounts are ranked within the Query 3 pool. A same-asset destination
+(--no-writeoff-accounts) is ranked among the asset's other accounts.
+
+Skewed draws use Vose alias tables, built once per pool:
+
+    prob[i], alias[i]   column i keeps key i with probability prob[i] / ALIAS_SCALE,
+                        and hands the draw to key alias[i] otherwise
+
+Drawing a column and a threshold is a single divmod of the entry's random
+bits by n * ALIAS_SCALE (see entry_rng), so every draw is O(1) even for
+pools of 100k+ accounts. The thresholds are integers, so tables, and
+therefore seeded files, are the same on every platform. Source and
+destination weights depend only on the pool size, so one table serves every
+asset of that size.
+
+Uniform draws keep their single divmod by n: with every distribution left
+at uniform, files are byte-identical to those from before this module.
+"""
+
+import functools
+import math
+from typing import List, NamedTuple, Optional, Sequence, Tuple, Union
+
+from pool_index import LazyTable, PoolIndex
+
+# Resolution of the alias thresholds: 32 random bits per skewed draw
+ALIAS_BITS = 32
+ALIAS_SCALE = 1 << ALIAS_BITS
+
+KINDS = ("uniform", "weighted", "zipf", "hot")
+DEFAULT_ZIPF_EXPONENT = 1.0
+DEFAULT_HOT_SHARE = 90.0
+
+
+class AliasTable:
+    """Vose alias table over keys 0..n-1 for the given (relative) weights."""
+
+    __slots__ = ("n", "span", "prob", "alias")
+
+    def __init__(self, weights: Sequence[float]):
+        n = len(weights)
+        if not n:
+            raise ValueError("Alias table needs at least one key")
+        if any(w < 0 or not math.isfinite(w) for w in weights):
+            raise ValueError("Alias table weights must be finite and non-negative")
+        total = math.fsum(weights)
+        if total <= 0:
+            raise ValueError("Alias table weights must not all be zero")
+
+        # Scale the weights to integers averaging exactly ALIAS_SCALE; the
+        # rounding remainder (a few units in 2**32 per key) goes to the heaviest
+        full = n * ALIAS_SCALE
+        scaled = [int(w * full / total) for w in weights]
+        scaled[max(range(n), key=scaled.__getitem__)] += full - sum(scaled)
+
+        prob = [ALIAS_SCALE] * n
+        alias = list(range(n))
+        small = [i for i, p in enumerate(scaled) if p < ALIAS_SCALE]
+        large = [i for i, p in enumerate(scaled) if p >= ALIAS_SCALE]
+        while small and large:
+            s = small.pop()
+            l = large[-1]
+            prob[s] = scaled[s]
+            alias[s] = l
+            scaled[l] -= ALIAS_SCALE - scaled[s]
+            if scaled[l] < ALIAS_SCALE:
+                small.append(large.pop())
+        # Integer arithmetic: whatever is left is exactly ALIAS_SCALE
+
+        self.n = n
+        self.span = full
+        self.prob = prob
+        self.alias = alias
+
+    def draw(self, bits: int) -> Tuple[int, int]:
+        """(remaining bits, key) for one draw taken from an entry's random bits."""
+        bits, r = divmod(bits, self.span)
+        u, i = divmod(r, self.n)
+        return bits, i if u < self.prob[i] else self.alias[i]
+
+    def sample(self, rng) -> int:
+        """One key from anything with randint (random.Random, EntryDraws).
+
+        The same two draws as draw(), so EntryDraws gives the same key.
+        """
+        i = rng.randint(0, self.n - 1)
+        return i if rng.randint(0, ALIAS_SCALE - 1) < self.prob[i] else self.alias[i]
+
+
+class Distribution(NamedTuple):
+    """A parsed --*-distribution spec (see module docstring)."""
+    kind: str = "uniform"
+    exponent: float = DEFAULT_ZIPF_EXPONENT   # zipf
+    hot_percent: float = 0.0                  # hot: share of the keys in the hot set
+    hot_share: float = DEFAULT_HOT_SHARE      # hot: share of the draws they get
+
+    @property
+    def spec(self) -> str:
+        if self.kind == "zipf":
+            return f"zipf:{self.exponent:g}"
+        if self.kind == "hot":
+            return f"hot:{self.hot_percent:g}:{self.hot_share:g}"
+        return self.kind
+
+    def weights(self, n: int, sizes: Optional[Sequence[int]] = None) -> Optional[List[float]]:
+        """Weights of keys 0..n-1, or None for uniform. `weighted` needs the pool sizes."""
+        if self.kind == "uniform":
+            return None
+        if self.kind == "weighted":
+            if sizes is None:
+                raise ValueError("'weighted' only applies to assets")
+            return [float(size) for size in sizes]
+        if self.kind == "zipf":
+            return [k ** -self.exponent for k in range(1, n + 1)]
+        hot = min(n, max(1, round(n * self.hot_percent / 100)))
+        if hot == n:
+            return [1.0] * n
+        return [self.hot_share / hot] * hot + [(100 - self.hot_share) / (n - hot)] * (n - hot)
+
+    def table(self, n: int, sizes: Optional[Sequence[int]] = None) -> Optional[AliasTable]:
+        """Alias table over n keys, or None for uniform (a plain divmod by n)."""
+        weights = self.weights(n, sizes)
+        return None if weights is None else AliasTable(weights)
+
+
+UNIFORM = Distribution()
+
+
+def parse_distribution(spec: str) -> Distribution:
+    """'uniform', 'weighted', 'zipf[:S]' or 'hot:P[:SHARE]' -> Distribution."""
+    kind, *params = spec.strip().lower().split(":")
+    if kind not in KINDS:
+        raise ValueError(f"Unknown distribution {spec!r}: expected one of {', '.join(KINDS)}")
+    try:
+        values = [float(p) for p in params]
+    except ValueError:
+        raise ValueError(f"Distribution {spec!r}: parameters must be numbers") from None
+
+    if kind in ("uniform", "weighted"):
+        if values:
+            raise ValueError(f"Distribution {spec!r}: '{kind}' takes no parameters")
+        return Distribution(kind)
+    if kind == "zipf":
+        if len(values) > 1 or (values and not values[0] > 0):
+            raise ValueError(f"Distribution {spec!r}: expected zipf or zipf:S with S > 0")
+        return Distribution(kind, exponent=values[0] if values else DEFAULT_ZIPF_EXPONENT)
+    if not 1 <= len(values) <= 2:
+        raise ValueError(f"Distribution {spec!r}: expected hot:P or hot:P:SHARE")
+    percent, share = values[0], values[1] if len(values) > 1 else DEFAULT_HOT_SHARE
+    if not (0 < percent <= 100 and 0 <= share <= 100):
+        raise ValueError(f"Distribution {spec!r}: P must be in (0, 100] and SHARE in [0, 100]")
+    return Distribution(kind, hot_percent=percent, hot_share=share)
+
+
+class KeyDistributions(NamedTuple):
+    """Distribution of each draw: assets, source accounts, destination accounts."""
+    assets: Distribution = UNIFORM
+    sources: Distribution = UNIFORM
+    dests: Distribution = UNIFORM
+
+    @property
+    def is_uniform(self) -> bool:
+        return self == KeyDistributions()
+
+    def describe(self) -> str:
+        return f"assets {self.assets.spec}, sources {self.sources.spec}, dests {self.dests.spec}"
+
+    def to_dict(self) -> dict:
+        """Specs by draw, for metrics and manifests."""
+        return {name: dist.spec for name, dist in self._asdict().items()}
+
+
+def parse_distributions(
+    assets: Union[str, Distribution, None] = None,
+    sources: Union[str, Distribution, None] = None,
+    dests: Union[str, Distribution, None] = None
+) -> KeyDistributions:
+    """The draws for --asset/--source/--dest-distribution.
+
+    Each is a spec string or a Distribution; None for uniform.
+    Raises ValueError for a bad spec, or 'weighted' for accounts.
+    """
+    chosen = []
+    for name, value in zip(KeyDistributions._fields, (assets, sources, dests)):
+        if isinstance(value, str):
+            value = parse_distribution(value)
+        value = UNIFORM if value is None else value
+        if value.kind == "weighted" and name != "assets":
+            raise ValueError(
+                f"'weighted' only applies to assets (by number of accounts), not {name}"
+            )
+        chosen.append(value)
+    return KeyDistributions(*chosen)
+
+
+class KeySamplers(NamedTuple):
+    """Alias tables for one pool index; None where the draw is uniform.
+
+    sources and dests map a pool size to the table for a pool of that size
+    (built on first use): sources[asset_size], dests[len(writeoff)] or, for
+    a same-asset destination, dests[asset_size - 1].
+    """
+    assets: Optional[AliasTable]
+    sources: Optional[LazyTable]
+    dests: Optional[LazyTable]
+
+
+@functools.lru_cache(maxsize=8)
+def key_samplers(pools: PoolIndex, dists: KeyDistributions) -> KeySamplers:
+    """The tables for drawing from `pools` with `dists`, shared per process."""
+    sizes = None
+    if dists.assets.kind == "weighted":
+        offsets = pools.offsets
+        sizes = [offsets[i + 1] - offsets[i] for i in range(pools.num_assets)]
+
+    def by_size(dist: Distribution) -> Optional[LazyTable]:
+        return None if dist.kind == "uniform" else LazyTable(dist.table)
+
+    return KeySamplers(
+        dists.assets.table(pools.num_assets, sizes),
+        by_size(dists.sources),
+        by_size(dists.dests),
+    )
+
+
+# =============================================================================
+# CLI
+# =============================================================================
+
+def add_distribution_arguments(parser) -> None:
+    """The --asset/--source/--dest-distribution options shared by the generators."""
+    group = parser.add_argument_group(
+        "key distributions (hot keys)",
+        "uniform (default), weighted (assets only: by number of accounts), zipf[:S] "
+        "(k-th key in pool order has weight 1/k**S), or hot:P[:SHARE] (first P% of "
+        "the pool gets SHARE% of the draws, default 90)"
+    )
+    group.add_argument("--asset-distribution", type=str, default=None, metavar="DIST",
+                       help="How assets are drawn (default: uniform)")
+    group.add_argument("--source-distribution", type=str, default=None, metavar="DIST",
+                       help="How source accounts are drawn within their asset (default: uniform)")
+    group.add_argument("--dest-distribution", type=str, default=None, metavar="DIST",
+                       help="How destination (write-off) accounts are drawn (default: uniform)")
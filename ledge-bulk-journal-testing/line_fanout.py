@@ -0,0 +1,166 @@
+"""
+Multi-line (fan-out) journal entries: how many DEL and REC lines an entry has.
+
+By default every entry is one DEL and one REC line. Real write-off batches
+post many source lines against one write-off account under a single
+ENTRY_NUM, which is what stresses grouping in GL Publisher and the Oracle
+import. --lines-per-entry DEBITS[/CREDITS] sets the line count of each side
+(CREDITS defaults to 1), each one of:
+
+    N                 exactly N lines
+    LO-HI             uniform in LO..HI
+    LO-HI:zipf[:S]    LO..HI, the k-th count weighted 1/k**S (S defaults to 1),
+                      so small entries are common and huge ones rare
+
+e.g. 50 (50 DEL lines, 1 REC), 1-1000:zipf/1, or 10/2-3.
+
+Amounts stay exact in 10-decimal fixed point (see amount_engine): the side
+with more lines draws one amount per line, and their sum is split across the
+other side's lines with amount_engine.split_scaled, all in integers. An
+unbalanced entry's last REC line is one unit (0.0000000001) over.
+
+Draws: the entry's lane 0 bits (see entry_rng) give the asset, then the
+debit and credit counts. The lines (DEL lines first) draw their account and
+amount, or split weight, from lanes 1, 2, ...: each lane's 256 bits serve
+lines until fewer than LINE_BITS_MIN are left, so a line costs about a third
+of a hash. The default 1/1 keeps the plain pair path, so files without
+--lines-per-entry are unchanged.
+"""
+
+from typing import NamedTuple, Optional, Tuple
+
+from key_distributions import AliasTable
+
+DEFAULT_ZIPF_EXPONENT = 1.0
+
+# Upper bound on the lines of one side, to catch typos like 1-1000000000
+MAX_LINES = 100000
+
+# Split weights are drawn in 1..SPLIT_WEIGHT_RANGE
+SPLIT_WEIGHT_RANGE = 1 << 16
+
+# A line takes the next lane once its bits drop below this; a line draws at
+# most ~66 bits (a skewed account over 2**17 keys, then an amount or weight)
+LINE_BITS_MIN = 1 << 96
+
+
+class LineCount:
+    """The number of lines on one side of an entry (see module docstring)."""
+
+    __slots__ = ("low", "high", "exponent", "_table")
+
+    def __init__(self, low: int, high: Optional[int] = None, exponent: Optional[float] = None):
+        high = low if high is None else high
+        if not 1 <= low <= high <= MAX_LINES:
+            raise ValueError(f"Line counts must be in 1..{MAX_LINES} with LO <= HI, got {low}-{high}")
+        self.low = low
+        self.high = high
+        self.exponent = exponent
+        self._table = None
+        if exponent is not None and high > low:
+            self._table = AliasTable([k ** -exponent for k in range(1, high - low + 2)])
+
+    @property
+    def is_fixed(self) -> bool:
+        return self.low == self.high
+
+    @property
+    def spec(self) -> str:
+        if self.is_fixed:
+            return str(self.low)
+        if self.exponent is None:
+            return f"{self.low}-{self.high}"
+        return f"{self.low}-{self.high}:zipf:{self.exponent:g}"
+
+    def mean(self) -> float:
+        if self._table is None:
+            return (self.low + self.high) / 2
+        weights = [k ** -self.exponent for k in range(1, self.high - self.low + 2)]
+        return self.low + sum(i * w for i, w in enumerate(weights)) / sum(weights)
+
+    def draw(self, bits: int) -> Tuple[int, int]:
+        """(remaining bits, count) from an entry's random bits; fixed counts draw nothing."""
+        if self.is_fixed:
+            return bits, self.low
+        if self._table is None:
+            bits, i = divmod(bits, self.high - self.low + 1)
+            return bits, self.low + i
+        bits, i = self._table.draw(bits)
+        return bits, self.low + i
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, LineCount) and self.spec == other.spec
+
+    def __hash__(self) -> int:
+        return hash(self.spec)
+
+    def __reduce__(self):
+        # Rebuild the alias table in worker processes rather than pickling it
+        return LineCount, (self.low, self.high, self.exponent)
+
+    def __repr__(self) -> str:
+        return f"LineCount({self.spec!r})"
+
+
+class LinesPerEntry(NamedTuple):
+    """Line counts of the DEL (debit) and REC (credit) sides of an entry."""
+    debits: LineCount = LineCount(1)
+    credits: LineCount = LineCount(1)
+
+    @property
+    def is_pair(self) -> bool:
+        """One DEL and one REC line: the plain pair path."""
+        return self == PAIR
+
+    @property
+    def spec(self) -> str:
+        return f"{self.debits.spec}/{self.credits.spec}"
+
+    def mean_lines(self) -> float:
+        """Expected CSV rows per entry, e.g. for progress and rate planning."""
+        return self.debits.mean() + self.credits.mean()
+
+
+PAIR = LinesPerEntry()
+
+
+def parse_line_count(spec: str) -> LineCount:
+    """'N', 'LO-HI' or 'LO-HI:zipf[:S]' -> LineCount."""
+    text = spec.strip().lower()
+    span, _, dist = text.partition(":")
+    try:
+        low, _, high = span.partition("-")
+        low = int(low)
+        high = int(high) if high else None
+    except ValueError:
+        raise ValueError(f"Line count {spec!r}: expected N, LO-HI or LO-HI:zipf[:S]") from None
+
+    if not dist:
+        return LineCount(low, high)
+    kind, _, exponent = dist.partition(":")
+    if kind != "zipf" or high is None:
+        raise ValueError(f"Line count {spec!r}: expected N, LO-HI or LO-HI:zipf[:S]")
+    try:
+        exponent = float(exponent) if exponent else DEFAULT_ZIPF_EXPONENT
+    except ValueError:
+        raise ValueError(f"Line count {spec!r}: the zipf exponent must be a number") from None
+    if not exponent > 0:
+        raise ValueError(f"Line count {spec!r}: the zipf exponent must be > 0")
+    return LineCount(low, high, exponent)
+
+
+def parse_lines_per_entry(spec: str) -> LinesPerEntry:
+    """'DEBITS[/CREDITS]' -> LinesPerEntry (CREDITS defaults to 1)."""
+    debits, _, credits = spec.partition("/")
+    return LinesPerEntry(parse_line_count(debits), parse_line_count(credits or "1"))
+
+
+# =============================================================================
+# CLI
+# =============================================================================
+
+def add_fanout_arguments(parser) -> None:
+    """The --lines-per-entry option."""
+    parser.add_argument("--lines-per-entry", type=str, default=None, metavar="DEBITS[/CREDITS]",
+                        help="DEL and REC lines per entry, each N, LO-HI or LO-HI:zipf[:S] "
+                             "(e.g. 50, 1-1000:zipf/1, 10/2-3; CREDITS defaults to 1; default: 1/1)")
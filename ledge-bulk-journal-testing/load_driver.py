@@ -0,0 +1,753 @@
+#!/usr/bin/env python3
+"""
+Replay generated bulk journal files against a bulk-upload HTTP endpoint.
+
+Takes files written by generate_bulk_writeoff.py / generate_error_scenarios.py
+and uploads them over and over, either:
+
+    --concurrency N   closed loop: N uploads in flight, each starting as the
+                      previous one finishes
+    --rate R          open loop: R uploads/s on a fixed (or --arrival poisson)
+                      schedule, whatever the server's latency. Latency is
+                      measured from the scheduled start, so a slow server
+                      can't hide queueing delay (coordinated omission).
+
+Bodies are streamed from disk in CHUNK_SIZE pieces (raw, or wrapped as a
+multipart/form-data file with --form-field) over a pool of keep-alive
+HTTP/1.1 connections; nothing is loaded whole into memory. Latencies go into
+log-bucketed histograms (~1% precision, constant memory) per file-size bucket
+and error mix (from the file's manifest, see entry_manifest), and the report
+gives p50/p95/p99/max, throughput and failures (HTTP status or exception) per
+group.
+
+A local stub server is included so the driver can run offline or in CI:
+
+    # Terminal 1: stub endpoint with 20ms + 5ms/MB latency and 1% 503s
+    python load_driver.py stub --port 8080 --latency-ms 20 --latency-ms-per-mb 5 --fail-percent 1
+
+    # Terminal 2: 8 uploads in flight for 60s
+    python load_driver.py run http://localhost:8080/bulk-journal *.csv --concurrency 8 --duration 60
+
+    # 5 uploads/s for 200 uploads, as multipart, with an auth header
+    python load_driver.py run https://ledge.staging/api/bulk-journal big.csv errors.csv --rate 5 --requests 200 \\
+        --form-field file --header "Authorization: Bearer $TOKEN"
+
+    # Both in one process (CI smoke test)
+    python load_driver.py run --stub errors.csv --concurrency 4 --requests 100 --report-json load.json
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import os
+import random
+import ssl
+import sys
+import time
+import uuid
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+
+from entry_manifest import EntryManifest, manifest_path
+
+CHUNK_SIZE = 256 * 1024
+
+DEFAULT_CONCURRENCY = 4
+DEFAULT_REQUESTS = 100
+DEFAULT_TIMEOUT = 300.0
+
+# Upper bounds of the file-size buckets latencies are grouped by
+SIZE_BUCKETS_MB = [1, 10, 100, 1000]
+
+# Content-Encoding sent for compressed inputs (the bytes are sent as they are)
+CONTENT_ENCODINGS = {".gz": "gzip", ".zst": "zstd", ".xz": "xz"}
+
+_MB = 1024 * 1024
+
+
+# =============================================================================
+# LATENCY HISTOGRAM
+# =============================================================================
+
+class LatencyHistogram:
+    """Log-bucketed latency histogram: constant memory, ~1% relative error.
+
+    Values are seconds; bucket i holds values in [GROWTH**i, GROWTH**(i+1)) microseconds.
+    """
+
+    GROWTH = 1.02
+
+    def __init__(self):
+        self.buckets: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float) -> None:
+        micros = max(seconds * 1e6, 1.0)
+        index = int(math.log(micros, self.GROWTH))
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def percentile(self, percent: float) -> float:
+        """Latency (seconds, bucket midpoint) below which `percent` of values fall."""
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(self.count * percent / 100))
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                return min(self.GROWTH ** (index + 0.5) / 1e6, self.max)
+        return self.max
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count * 1000, 2) if self.count else 0.0,
+            "p50_ms": round(self.percentile(50) * 1000, 2),
+            "p95_ms": round(self.percentile(95) * 1000, 2),
+            "p99_ms": round(self.percentile(99) * 1000, 2),
+            "max_ms": round(self.max * 1000, 2),
+        }
+
+
+# =============================================================================
+# INPUT FILES
+# =============================================================================
+
+class UploadFile(NamedTuple):
+    """One input file and the group its latencies are reported under."""
+    path: str
+    size: int
+    group: str
+
+
+def size_bucket(size: int) -> str:
+    for limit in SIZE_BUCKETS_MB:
+        if size <= limit * _MB:
+            return f"<={limit} MB"
+    return f">{SIZE_BUCKETS_MB[-1]} MB"
+
+
+def error_mix(path: str) -> str:
+    """'valid', or e.g. '10% mixed' / '5% unbalanced' from the file's manifest."""
+    for candidate in (manifest_path(path), manifest_path(os.path.splitext(path)[0])):
+        if os.path.exists(candidate):
+            with EntryManifest(candidate) as manifest:
+                footer = manifest.footer
+            percent = footer.get("error_percent") or 0
+            if not percent:
+                return "valid"
+            return f"{percent:g}% {footer.get('error_type') or 'mixed'}"
+    return "valid"
+
+
+def describe_files(paths: Sequence[str]) -> List[UploadFile]:
+    files = []
+    for path in paths:
+        size = os.path.getsize(path)
+        files.append(UploadFile(path, size, f"{size_bucket(size)} / {error_mix(path)}"))
+    return files
+
+
+# =============================================================================
+# HTTP/1.1 CLIENT
+# =============================================================================
+
+class HttpError(Exception):
+    """The server broke the protocol (bad status line, early close, ...)."""
+
+
+class _Connection:
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self.requests = 0
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+class ConnectionPool:
+    """Keep-alive connections to one host, at most `size` open at a time."""
+
+    def __init__(self, host: str, port: int, use_ssl: bool, size: int):
+        self.host = host
+        self.port = port
+        self.ssl = ssl.create_default_context() if use_ssl else None
+        self.size = size
+        self.opened = 0
+        self._open = 0
+        self._idle: List[_Connection] = []
+        self._slots = asyncio.Semaphore(size)
+
+    async def acquire(self) -> Tuple[_Connection, bool]:
+        """(connection, reused) - reused connections may have been closed by the server."""
+        await self._slots.acquire()
+        if self._idle:
+            return self._idle.pop(), True
+        try:
+            reader, writer = await asyncio.open_connection(self.host, self.port, ssl=self.ssl, limit=CHUNK_SIZE)
+        except BaseException:
+            self._slots.release()
+            raise
+        self.opened += 1
+        return _Connection(reader, writer), False
+
+    def release(self, conn: _Connection, keep: bool) -> None:
+        if keep:
+            self._idle.append(conn)
+        else:
+            conn.close()
+        self._slots.release()
+
+    def close(self) -> None:
+        for conn in self._idle:
+            conn.close()
+        self._idle = []
+
+
+class UploadRequest(NamedTuple):
+    """Everything about the request that doesn't change between uploads of one file."""
+    head: bytes             # request line and headers
+    prefix: bytes           # multipart preamble (or b"")
+    suffix: bytes           # multipart closing boundary (or b"")
+
+
+def build_request(
+    url: str,
+    upload: UploadFile,
+    headers: Sequence[Tuple[str, str]],
+    form_field: Optional[str]
+) -> UploadRequest:
+    parts = urlsplit(url)
+    target = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+    name = os.path.basename(upload.path)
+    prefix = suffix = b""
+    encoding = CONTENT_ENCODINGS.get(os.path.splitext(name)[1])
+    if form_field:
+        boundary = uuid.uuid4().hex
+        content_type = f"multipart/form-data; boundary={boundary}"
+        file_type = "application/octet-stream" if encoding else "text/csv"
+        prefix = (
+            f"--{boundary}\r\n"
+            f'Content-Disposition: form-data; name="{form_field}"; filename="{name}"\r\n'
+            f"Content-Type: {file_type}\r\n\r\n"
+        ).encode()
+        suffix = f"\r\n--{boundary}--\r\n".encode()
+        encoding = None
+    else:
+        content_type = "text/csv"
+    lines = [
+        f"POST {target} HTTP/1.1",
+        f"Host: {parts.netloc}",
+        f"Content-Type: {content_type}",
+        f"Content-Length: {len(prefix) + upload.size + len(suffix)}",
+        "Connection: keep-alive",
+    ]
+    if encoding:
+        lines.append(f"Content-Encoding: {encoding}")
+    lines.extend(f"{key}: {value}" for key, value in headers)
+    return UploadRequest(("\r\n".join(lines) + "\r\n\r\n").encode(), prefix, suffix)
+
+
+async def _read_headers(reader: asyncio.StreamReader) -> Tuple[int, Dict[str, str]]:
+    status_line = await reader.readline()
+    if not status_line:
+        raise HttpError("connection closed before the response")
+    fields = status_line.split(None, 2)
+    if len(fields) < 2 or not fields[0].startswith(b"HTTP/"):
+        raise HttpError(f"bad status line {status_line[:80]!r}")
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        key, _, value = line.decode("latin-1").partition(":")
+        headers[key.strip().lower()] = value.strip()
+    return int(fields[1]), headers
+
+
+async def _read_body(reader: asyncio.StreamReader, headers: Dict[str, str]) -> int:
+    """Read (and discard) a response body; returns its size."""
+    if headers.get("transfer-encoding", "").lower() == "chunked":
+        size = 0
+        while True:
+            chunk_size = int((await reader.readline()).split(b";")[0], 16)
+            if not chunk_size:
+                while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    pass
+                return size
+            await reader.readexactly(chunk_size + 2)
+            size += chunk_size
+    length = int(headers.get("content-length", "0"))
+    if length:
+        await reader.readexactly(length)
+    return length
+
+
+async def _send_file(writer: asyncio.StreamWriter, path: str) -> None:
+    """Stream a file into the connection, with backpressure."""
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(CHUNK_SIZE)
+            if not chunk:
+                return
+            writer.write(chunk)
+            await writer.drain()
+
+
+async def upload_once(pool: ConnectionPool, request: UploadRequest, upload: UploadFile) -> int:
+    """POST one file; returns the HTTP status. A reused connection that turns
+    out to be closed is retried once on a fresh one."""
+    for attempt in range(2):
+        conn, reused = await pool.acquire()
+        keep = False
+        try:
+            conn.writer.write(request.head + request.prefix)
+            await _send_file(conn.writer, upload.path)
+            conn.writer.write(request.suffix)
+            await conn.writer.drain()
+            status, headers = await _read_headers(conn.reader)
+            await _read_body(conn.reader, headers)
+            conn.requests += 1
+            keep = headers.get("connection", "").lower() != "close"
+            return status
+        except (ConnectionError, HttpError, asyncio.IncompleteReadError):
+            if not reused or attempt:
+                raise
+        finally:
+            pool.release(conn, keep)
+    raise HttpError("unreachable")
+
+
+# =============================================================================
+# DRIVER
+# =============================================================================
+
+class GroupStats:
+    """Latencies and failures of one (size bucket, error mix) group."""
+
+    def __init__(self):
+        self.latency = LatencyHistogram()
+        self.requests = 0
+        self.bytes = 0
+        self.failures: Dict[str, int] = {}
+
+    def record(self, seconds: float, size: int, failure: Optional[str]) -> None:
+        self.requests += 1
+        self.latency.record(seconds)
+        if failure:
+            self.failures[failure] = self.failures.get(failure, 0) + 1
+        else:
+            self.bytes += size
+
+
+class LoadReport(NamedTuple):
+    groups: Dict[str, GroupStats]
+    wall_s: float
+    connections_opened: int
+
+
+async def drive(
+    url: str,
+    files: Sequence[UploadFile],
+    concurrency: int = DEFAULT_CONCURRENCY,
+    rate: Optional[float] = None,
+    arrival: str = "fixed",
+    requests: Optional[int] = DEFAULT_REQUESTS,
+    duration: Optional[float] = None,
+    headers: Sequence[Tuple[str, str]] = (),
+    form_field: Optional[str] = None,
+    timeout: float = DEFAULT_TIMEOUT,
+    seed: int = 0,
+    progress_interval: Optional[float] = None
+) -> LoadReport:
+    """Upload `files` round-robin until `requests` uploads or `duration` seconds.
+
+    Args:
+        concurrency: Uploads in flight (closed loop), or the cap on in-flight
+                     uploads with `rate`; also the connection pool size
+        rate: Uploads per second (open loop); None for closed loop
+        arrival: 'fixed' intervals or 'poisson' (exponential gaps) with rate
+        timeout: Seconds before one upload counts as failed ('timeout')
+
+    Returns:
+        LoadReport with per-group histograms and failure counts
+    """
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https"):
+        raise ValueError(f"Expected an http(s) URL, got {url!r}")
+    port = parts.port or (443 if parts.scheme == "https" else 80)
+    pool = ConnectionPool(parts.hostname, port, parts.scheme == "https", concurrency)
+    prepared = [(upload, build_request(url, upload, headers, form_field)) for upload in files]
+    groups: Dict[str, GroupStats] = {upload.group: GroupStats() for upload in files}
+    clock = time.perf_counter
+    started = clock()
+    deadline = started + duration if duration else None
+    next_file = itertools.cycle(prepared)
+    done = 0
+
+    async def one(upload: UploadFile, request: UploadRequest, scheduled: float) -> None:
+        nonlocal done
+        failure = None
+        try:
+            status = await asyncio.wait_for(upload_once(pool, request, upload), timeout)
+            if status >= 400:
+                failure = f"HTTP {status}"
+        except asyncio.TimeoutError:
+            failure = "timeout"
+        except (OSError, HttpError, asyncio.IncompleteReadError) as e:
+            failure = type(e).__name__
+        groups[upload.group].record(clock() - scheduled, upload.size, failure)
+        done += 1
+
+    def more(issued: int) -> bool:
+        if requests is not None and issued >= requests:
+            return False
+        return deadline is None or clock() < deadline
+
+    async def report_progress() -> None:
+        while progress_interval:
+            await asyncio.sleep(progress_interval)
+            elapsed = clock() - started
+            print(f"  {done:,} uploads in {elapsed:.0f}s ({done / elapsed:.1f}/s), "
+                  f"{pool.opened} connection(s) opened", flush=True)
+
+    reporter = asyncio.ensure_future(report_progress())
+    try:
+        if rate is None:
+            issued = 0
+
+            async def worker() -> None:
+                nonlocal issued
+                while more(issued):
+                    issued += 1
+                    upload, request = next(next_file)
+                    await one(upload, request, clock())
+
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+        else:
+            # Open loop: start on schedule; `in_flight` caps memory, not the schedule
+            rng = random.Random(seed)
+            in_flight = asyncio.Semaphore(concurrency * 16)
+            tasks = set()
+            scheduled = started
+            issued = 0
+            while more(issued):
+                delay = scheduled - clock()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                await in_flight.acquire()
+                upload, request = next(next_file)
+                task = asyncio.ensure_future(one(upload, request, scheduled))
+                task.add_done_callback(lambda _: in_flight.release())
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+                issued += 1
+                gap = rng.expovariate(rate) if arrival == "poisson" else 1.0 / rate
+                scheduled += gap
+            if tasks:
+                await asyncio.gather(*tasks)
+    finally:
+        reporter.cancel()
+        pool.close()
+    return LoadReport(groups, clock() - started, pool.opened)
+
+
+def describe(report: LoadReport) -> List[str]:
+    """Report lines: one per group, then totals."""
+    lines = [
+        f"  {'Group':<26} {'Uploads':>8} {'Failed':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}"
+        f" {'max ms':>9} {'MB/s':>8}"
+    ]
+    total = LatencyHistogram()
+    total_requests = total_failed = total_bytes = 0
+    for name, stats in report.groups.items():
+        if not stats.requests:
+            continue
+        s = stats.latency.summary()
+        failed = sum(stats.failures.values())
+        lines.append(
+            f"  {name:<26} {stats.requests:>8,} {failed:>7,} {s['p50_ms']:>9.1f} {s['p95_ms']:>9.1f}"
+            f" {s['p99_ms']:>9.1f} {s['max_ms']:>9.1f} {stats.bytes / _MB / report.wall_s:>8.1f}"
+        )
+        total.merge(stats.latency)
+        total_requests += stats.requests
+        total_failed += failed
+        total_bytes += stats.bytes
+    s = total.summary()
+    lines.append(
+        f"  {'all':<26} {total_requests:>8,} {total_failed:>7,} {s['p50_ms']:>9.1f} {s['p95_ms']:>9.1f}"
+        f" {s['p99_ms']:>9.1f} {s['max_ms']:>9.1f} {total_bytes / _MB / report.wall_s:>8.1f}"
+    )
+    for name, stats in report.groups.items():
+        for failure, count in sorted(stats.failures.items()):
+            lines.append(f"  {name}: {count:,} x {failure}")
+    lines.append(f"{total_requests:,} uploads in {report.wall_s:.1f}s "
+                 f"({total_requests / report.wall_s:.1f}/s) over {report.connections_opened} connection(s)")
+    return lines
+
+
+def report_record(report: LoadReport) -> Dict[str, object]:
+    """JSON-ready report (--report-json)."""
+    return {
+        "wall_s": round(report.wall_s, 3),
+        "connections_opened": report.connections_opened,
+        "groups": {
+            name: dict(
+                stats.latency.summary(),
+                requests=stats.requests,
+                failures=stats.failures,
+                mb_per_s=round(stats.bytes / _MB / report.wall_s, 2),
+            )
+            for name, stats in report.groups.items() if stats.requests
+        },
+    }
+
+
+# =============================================================================
+# STUB SERVER
+# =============================================================================
+
+class StubServer:
+    """Minimal keep-alive HTTP/1.1 upload endpoint for offline runs.
+
+    Reads each request body as it streams in (Content-Length or chunked),
+    counts bytes and lines, waits `latency_ms + latency_ms_per_mb * MB`, and
+    answers 202 with {"bytes": ..., "lines": ...} - or 503 for `fail_percent`
+    of requests.
+    """
+
+    def __init__(self, latency_ms: float = 0.0, latency_ms_per_mb: float = 0.0,
+                 fail_percent: float = 0.0, seed: int = 0):
+        self.latency_ms = latency_ms
+        self.latency_ms_per_mb = latency_ms_per_mb
+        self.fail_percent = fail_percent
+        self.rng = random.Random(seed)
+        self.requests = 0
+        self.bytes = 0
+        self._connections = set()
+
+    async def _read_body(self, reader: asyncio.StreamReader, headers: Dict[str, str]) -> Tuple[int, int]:
+        size = lines = 0
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            while True:
+                chunk_size = int((await reader.readline()).split(b";")[0], 16)
+                if not chunk_size:
+                    await reader.readline()
+                    return size, lines
+                chunk = await reader.readexactly(chunk_size + 2)
+                size += chunk_size
+                lines += chunk.count(b"\n", 0, chunk_size)
+        remaining = int(headers.get("content-length", "0"))
+        while remaining:
+            chunk = await reader.read(min(remaining, CHUNK_SIZE))
+            if not chunk:
+                raise asyncio.IncompleteReadError(b"", remaining)
+            size += len(chunk)
+            lines += chunk.count(b"\n")
+            remaining -= len(chunk)
+        return size, lines
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self._connections.add(writer)
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    return
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    key, _, value = line.decode("latin-1").partition(":")
+                    headers[key.strip().lower()] = value.strip()
+                size, lines = await self._read_body(reader, headers)
+                self.requests += 1
+                self.bytes += size
+
+                delay = (self.latency_ms + self.latency_ms_per_mb * size / _MB) / 1000
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                if self.rng.random() * 100 < self.fail_percent:
+                    status, body = "503 Service Unavailable", b'{"error": "stub failure"}'
+                else:
+                    status, body = "202 Accepted", json.dumps({"bytes": size, "lines": lines}).encode()
+                close = headers.get("connection", "").lower() == "close"
+                writer.write(
+                    f"HTTP/1.1 {status}\r\nContent-Type: application/json\r\n"
+                    f"Content-Length: {len(body)}\r\nConnection: {'close' if close else 'keep-alive'}\r\n\r\n"
+                    .encode() + body
+                )
+                await writer.drain()
+                if close:
+                    return
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            return
+        finally:
+            self._connections.discard(writer)
+            writer.close()
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> asyncio.AbstractServer:
+        return await asyncio.start_server(self.handle, host, port, limit=CHUNK_SIZE)
+
+    async def stop(self, server: asyncio.AbstractServer) -> None:
+        """Stop listening and hang up idle keep-alive connections."""
+        server.close()
+        for writer in list(self._connections):
+            writer.close()
+        await server.wait_closed()
+        while self._connections:
+            await asyncio.sleep(0.01)
+
+
+# =============================================================================
+# CLI
+# =============================================================================
+
+def _parse_header(text: str) -> Tuple[str, str]:
+    key, sep, value = text.partition(":")
+    if not sep:
+        raise argparse.ArgumentTypeError(f"expected 'Name: value', got {text!r}")
+    return key.strip(), value.strip()
+
+
+async def _run(args) -> int:
+    files = describe_files(args.files)
+    stub = server = None
+    url = args.url
+    if args.stub:
+        stub = StubServer(args.latency_ms, args.latency_ms_per_mb, args.fail_percent, args.seed)
+        server = await stub.start()
+        port = server.sockets[0].getsockname()[1]
+        url = f"http://127.0.0.1:{port}/bulk-journal"
+    if not url:
+        raise SystemExit("give an endpoint URL, or --stub to run against the local stub server")
+
+    mode = f"{args.rate:g} uploads/s ({args.arrival})" if args.rate else f"concurrency {args.concurrency}"
+    limit = f"{args.duration:g}s" if args.duration else f"{args.requests:,} uploads"
+    print(f"Uploading {len(files)} file(s) to {url}: {mode}, {limit}")
+    for upload in files:
+        print(f"  {upload.path} ({upload.size / _MB:.1f} MB, {upload.group})")
+
+    try:
+        report = await drive(
+            url, files,
+            concurrency=args.concurrency,
+            rate=args.rate,
+            arrival=args.arrival,
+            requests=None if args.duration and not args.requests_given else args.requests,
+            duration=args.duration,
+            headers=args.header,
+            form_field=args.form_field,
+            timeout=args.timeout,
+            seed=args.seed,
+            progress_interval=args.progress_interval or None
+        )
+    finally:
+        if server is not None:
+            await stub.stop(server)
+
+    print()
+    for line in describe(report):
+        print(line)
+    if args.report_json:
+        with open(args.report_json, "w") as f:
+            json.dump(report_record(report), f, indent=2)
+            f.write("\n")
+        print(f"Report: {args.report_json}")
+    failed = sum(sum(stats.failures.values()) for stats in report.groups.values())
+    return 1 if failed and args.fail_on_errors else 0
+
+
+async def _serve(args) -> None:
+    stub = StubServer(args.latency_ms, args.latency_ms_per_mb, args.fail_percent, args.seed)
+    server = await stub.start(args.host, args.port)
+    port = server.sockets[0].getsockname()[1]
+    print(f"Stub bulk-upload endpoint on http://{args.host}:{port}/ (Ctrl-C to stop)", flush=True)
+    async with server:
+        await server.serve_forever()
+
+
+def _add_stub_options(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Stub: fixed latency per upload (default: 0)")
+    parser.add_argument("--latency-ms-per-mb", type=float, default=0.0,
+                        help="Stub: extra latency per MB uploaded (default: 0)")
+    parser.add_argument("--fail-percent", type=float, default=0.0,
+                        help="Stub: answer 503 to this share of uploads (default: 0)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay generated bulk journal files against an upload endpoint")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Upload files at a concurrency or arrival rate")
+    run.add_argument("url", nargs="?", default=None, help="Upload endpoint, e.g. http://localhost:8080/bulk-journal")
+    run.add_argument("files", nargs="+", help="Files written by the generators (.csv, .csv.gz, ...)")
+    run.add_argument("--stub", action="store_true",
+                     help="Start the local stub server in-process and upload to it (no URL needed)")
+    run.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                     help=f"Uploads in flight / pooled connections (default: {DEFAULT_CONCURRENCY})")
+    run.add_argument("--rate", type=float, default=None, help="Open loop: start this many uploads per second")
+    run.add_argument("--arrival", choices=["fixed", "poisson"], default="fixed",
+                     help="With --rate: fixed gaps or Poisson arrivals (default: fixed)")
+    run.add_argument("--requests", type=int, default=None,
+                     help=f"Stop after this many uploads (default: {DEFAULT_REQUESTS}, or none with --duration)")
+    run.add_argument("--duration", type=float, default=None, help="Stop starting uploads after this many seconds")
+    run.add_argument("--header", type=_parse_header, action="append", default=[],
+                     help="Extra request header 'Name: value' (repeatable)")
+    run.add_argument("--form-field", type=str, default=None,
+                     help="Send each file as multipart/form-data under this field name instead of a raw body")
+    run.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT,
+                     help=f"Seconds before an upload counts as failed (default: {DEFAULT_TIMEOUT:g})")
+    run.add_argument("--seed", type=int, default=0, help="Seed for Poisson arrivals and stub failures")
+    run.add_argument("--progress-interval", type=float, default=10.0,
+                     help="Seconds between progress lines; 0 disables them (default: 10)")
+    run.add_argument("--report-json", type=str, default=None, help="Also write the report as JSON")
+    run.add_argument("--fail-on-errors", action="store_true", help="Exit 1 if any upload failed")
+    _add_stub_options(run)
+
+    stub = commands.add_parser("stub", help="Run the stub upload endpoint")
+    stub.add_argument("--host", type=str, default="127.0.0.1")
+    stub.add_argument("--port", type=int, default=8080)
+    stub.add_argument("--seed", type=int, default=0, help="Seed for which uploads fail")
+    _add_stub_options(stub)
+
+    args = parser.parse_args()
+    if args.command == "stub":
+        try:
+            asyncio.run(_serve(args))
+        except KeyboardInterrupt:
+            pass
+        return
+
+    # With --stub the first positional is a file, not a URL
+    if args.stub and args.url:
+        args.files.insert(0, args.url)
+        args.url = None
+    args.requests_given = args.requests is not None
+    if args.requests is None:
+        args.requests = DEFAULT_REQUESTS
+    if args.concurrency < 1:
+        parser.error("--concurrency must be at least 1")
+    if args.rate is not None and args.rate <= 0:
+        parser.error("--rate must be positive")
+    sys.exit(asyncio.run(_run(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Size- and row-bounded rotation of generated CSV output into part files.
+
+The bulk upload path has practical ceilings on file size and row count, so
+instead of one monolithic file the generators can write numbered parts:
+
+    large.csv  ->  large.part0000.csv, large.part0001.csv, ...
+
+Each part starts with its own header. Rotation only ever happens between
+entries, so the lines of one ENTRY_NUM (its DEL/REC pair) never end up in
+different files.
+
+Limits:
+    max_rows:  data rows per part, not counting the header
+    max_bytes: total part size in bytes, header included
+
+An entry that on its own exceeds a limit still gets written, alone in its
+part, rather than being split.
+
+Parts can be written through any opener, e.g. compressed_output.OutputFile for
+out.part0000.csv.gz, ...; the limits then apply to the uncompressed content.
+"""
+
+import os
+from typing import BinaryIO, Callable, List, Optional, Sequence
+
+
+def part_path(output_path: str, part_index: int) -> str:
+    """Path of one rotated part, e.g. out.part0003.csv."""
+    root, ext = os.path.splitext(output_path)
+    return f"{root}.part{part_index:04d}{ext}"
+
+
+def check_limits(max_rows: Optional[int], max_bytes: Optional[int], header: bytes) -> None:
+    """Reject limits that can never be met."""
+    if max_rows is not None and max_rows < 1:
+        raise ValueError(f"max_rows must be at least 1, got {max_rows}")
+    if max_bytes is not None and max_bytes <= len(header):
+        raise ValueError(f"max_bytes must be larger than the header ({len(header)} bytes), got {max_bytes}")
+
+
+class RotatingWriter:
+    """Write batches of encoded entries, rotating to a new part before a limit is crossed.
+
+    Args:
+        output_path: Base path; parts are named with part_path()
+        header: Encoded header row written at the top of every part
+        max_rows: Maximum data rows per part (None for no limit)
+        max_bytes: Maximum bytes per part including the header (None for no limit)
+        opener: Called with each part path to open it for writing (default: a
+                plain binary file). If the returned object has a `name`, that
+                is recorded as the part's path (e.g. with a .gz suffix added).
+    """
+
+    def __init__(
+        self,
+        output_path: str,
+        header: bytes,
+        max_rows: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        opener: Optional[Callable[[str], BinaryIO]] = None
+    ):
+        check_limits(max_rows, max_bytes, header)
+        self.output_path = output_path
+        self.header = header
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        self.opener = opener or (lambda path: open(path, 'wb'))
+        self.paths: List[str] = []
+        # 0-based index of the first entry written to each part
+        self.part_first_entries: List[int] = []
+        self.bytes_written = 0
+        self.entries_written = 0
+        self._file = None
+        self._rows = 0
+        self._bytes = 0
+
+    def _fits(self, rows: int, size: int) -> bool:
+        return ((self.max_rows is None or self._rows + rows <= self.max_rows)
+                and (self.max_bytes is None or self._bytes + size <= self.max_bytes))
+
+    def _rotate(self) -> None:
+        if self._file is not None:
+            self._file.close()
+        path = part_path(self.output_path, len(self.paths))
+        self._file = self.opener(path)
+        self.paths.append(getattr(self._file, "name", path))
+        self.part_first_entries.append(self.entries_written)
+        self._file.write(self.header)
+        self.bytes_written += len(self.header)
+        self._rows = 0
+        self._bytes = len(self.header)
+
+    def _write(self, data: bytes, rows: int, entries: int) -> None:
+        self._file.write(data)
+        self.bytes_written += len(data)
+        self.entries_written += entries
+        self._rows += rows
+        self._bytes += len(data)
+
+    def write_batch(self, entries: Sequence[bytes]) -> None:
+        """Write encoded entries (one bytes object per ENTRY_NUM, all its lines)."""
+        if self._file is None:
+            self._rotate()
+
+        # Fast path: the whole batch fits in the current part
+        chunk = b"".join(entries)
+        rows = chunk.count(b"\n")
+        if self._fits(rows, len(chunk)):
+            self._write(chunk, rows, len(entries))
+            return
+
+        # Slow path: find the cut points, but still write each run in one call
+        pending: List[bytes] = []
+        pending_rows = pending_bytes = 0
+        for entry in entries:
+            rows = entry.count(b"\n")
+            if not self._fits(pending_rows + rows, pending_bytes + len(entry)) and (self._rows or pending):
+                if pending:
+                    self._write(b"".join(pending), pending_rows, len(pending))
+                    pending, pending_rows, pending_bytes = [], 0, 0
+                if self._rows:
+                    self._rotate()
+            pending.append(entry)
+            pending_rows += rows
+            pending_bytes += len(entry)
+        if pending:
+            self._write(b"".join(pending), pending_rows, len(pending))
+
+    def flush(self) -> None:
+        """Flush the current part, e.g. so a consumer tailing it sees every entry."""
+        if self._file is not None:
+            self._file.flush()
+
+    def close(self) -> List[str]:
+        """Close the current part and return every part path written."""
+        if self._file is None:
+            # No entries at all: still produce one (header-only) part
+            self._rotate()
+        self._file.close()
+        return self.paths
+
+    def __enter__(self) -> "RotatingWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -0,0 +1,429 @@
+"""
+Asset/account pools: external staging exports compiled into a compact,
+memory-mapped index.
+
+The pools are versioned files next to the scripts (pools/), exported from
+staging_data_queries.sql:
+
+    pools/source_accounts.csv    Query 2: SUB_ACCT, NATURAL_ACCT, ASSET_ID, ...
+    pools/writeoff_accounts.csv  Query 3: ACCT_ID, NATURAL_ACCOUNT, ...
+
+Exports may be CSV (with a header row) or JSON (a list of objects, or SQL
+Developer's {"results": [{"items": [...]}]}). Columns are matched by name,
+case-insensitively, so the full query output can be saved as is.
+
+Both generators draw from one PoolIndex, stored as flat arrays:
+
+    accounts   every distinct (sub_acct, natural_acct), interned: id -> pair
+    asset_ids  assets with at least `min_accounts` accounts, in first-seen order
+    offsets    asset i owns members[offsets[i]:offsets[i + 1]]
+    members    account ids, contiguous per asset
+    writeoff   account ids of the write-off accounts
+
+so drawing a source and a different destination of the same asset is two
+array lookups (see other_index), with no per-entry list building.
+
+On first use the exports are compiled into a binary cache file keyed by a
+hash of their contents (see load_or_build). Later runs mmap that file: the
+arrays are used in place and strings are decoded only when looked up, so
+startup stays flat as the pools grow to 100k+ accounts.
+"""
+
+import array
+import csv
+import functools
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from collections.abc import Sequence as SequenceABC
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+Account = Tuple[str, str]
+
+MAGIC = b"LPIX"
+VERSION = 2
+
+# magic, version, accounts, assets, members, writeoff, string table bytes
+_HEADER = struct.Struct("<4sIIIIII")
+
+POOLS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pools")
+DEFAULT_SOURCE_FILE = os.path.join(POOLS_DIR, "source_accounts.csv")
+DEFAULT_WRITEOFF_FILE = os.path.join(POOLS_DIR, "writeoff_accounts.csv")
+
+# Accepted column names per field, first match wins (Query 2 / Query 3 aliases)
+SOURCE_COLUMNS = {
+    "sub_acct": ("SUB_ACCT", "ACCT_ID"),
+    "natural_acct": ("NATURAL_ACCT", "NATURAL_ACCOUNT"),
+    "asset_id": ("ASSET_ID",),
+}
+WRITEOFF_COLUMNS = {
+    "sub_acct": ("ACCT_ID", "SUB_ACCT"),
+    "natural_acct": ("NATURAL_ACCOUNT", "NATURAL_ACCT"),
+}
+
+CACHE_DIR_ENV = "LEDGE_POOL_CACHE_DIR"
+
+_HASH_CHUNK = 1024 * 1024
+
+
+def _uint32_array(values: Iterable[int] = ()) -> array.array:
+    """array of unsigned 32-bit ints ('I' is 4 bytes on every supported platform)."""
+    return array.array("I", values)
+
+
+class _StringTable(SequenceABC):
+    """Strings stored back to back in a buffer; decoded only when looked up."""
+
+    def __init__(self, blob: memoryview, ends: Sequence[int]):
+        self._blob = blob
+        self._ends = ends
+
+    def __len__(self) -> int:
+        return len(self._ends) - 1
+
+    def __getitem__(self, i: int) -> str:
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return str(self._blob[self._ends[i]:self._ends[i + 1]], "utf-8")
+
+
+class _AccountTable(SequenceABC):
+    """(sub_acct, natural_acct) pairs over a _StringTable holding sub, natural, sub, ..."""
+
+    def __init__(self, strings: _StringTable, count: int):
+        self._strings = strings
+        self._count = count
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, i: int) -> Account:
+        if i < 0:
+            i += self._count
+        if not 0 <= i < self._count:
+            raise IndexError(i)
+        return self._strings[2 * i], self._strings[2 * i + 1]
+
+
+class PoolIndex:
+    """Interned account pools grouped by asset (see module docstring).
+
+    Build with PoolIndex.build(rows, writeoff_accounts), or load the pools
+    with load_pools. `accounts` and `asset_ids` are lists when built and
+    lazy read-only sequences when mapped from a cache file.
+    """
+
+    def __init__(
+        self,
+        accounts: Sequence[Account],
+        asset_ids: Sequence[str],
+        offsets: Sequence[int],
+        members: Sequence[int],
+        writeoff: Sequence[int]
+    ):
+        self.accounts = accounts
+        self.asset_ids = asset_ids
+        self.offsets = offsets
+        self.members = members
+        self.writeoff = writeoff
+
+    @classmethod
+    def build(
+        cls,
+        rows: Iterable[Tuple[str, str, str]],
+        writeoff_accounts: Iterable[Account],
+        min_accounts: int = 2
+    ) -> "PoolIndex":
+        """Index (sub_acct, natural_acct, asset_id) rows and the write-off accounts.
+
+        Assets with fewer than `min_accounts` accounts are dropped (they can't
+        be paired). Account order within an asset is row order.
+        """
+        ids: Dict[Account, int] = {}
+        accounts: List[Account] = []
+
+        def intern(account: Account) -> int:
+            account_id = ids.get(account)
+            if account_id is None:
+                account_id = ids[account] = len(accounts)
+                accounts.append(account)
+            return account_id
+
+        by_asset: Dict[str, List[int]] = {}
+        for sub_acct, natural_acct, asset_id in rows:
+            by_asset.setdefault(asset_id, []).append(intern((sub_acct, natural_acct)))
+        writeoff = _uint32_array(intern(tuple(a)) for a in writeoff_accounts)
+
+        asset_ids = []
+        offsets = _uint32_array([0])
+        members = _uint32_array()
+        for asset_id, account_ids in by_asset.items():
+            if len(account_ids) >= min_accounts:
+                asset_ids.append(asset_id)
+                members.extend(account_ids)
+                offsets.append(len(members))
+        return cls(accounts, asset_ids, offsets, members, writeoff)
+
+    @property
+    def num_assets(self) -> int:
+        return len(self.asset_ids)
+
+    def asset_size(self, asset: int) -> int:
+        """Number of accounts of asset number `asset`."""
+        return self.offsets[asset + 1] - self.offsets[asset]
+
+    def asset_account(self, asset: int, k: int) -> Account:
+        """The k-th account of asset number `asset`, in O(1)."""
+        return self.accounts[self.members[self.offsets[asset] + k]]
+
+    def asset_accounts(self, asset: int) -> List[Account]:
+        """(sub_acct, natural_acct) pairs of asset number `asset`."""
+        members = self.members[self.offsets[asset]:self.offsets[asset + 1]]
+        return [self.accounts[m] for m in members]
+
+    def writeoff_accounts(self) -> List[Account]:
+        return [self.accounts[w] for w in self.writeoff]
+
+    def to_dict(self) -> Dict[str, List[Account]]:
+        """{asset_id: [(sub_acct, natural_acct), ...]}, as parse_raw_data returns."""
+        return {asset_id: self.asset_accounts(i) for i, asset_id in enumerate(self.asset_ids)}
+
+    # -- serialization -------------------------------------------------------
+
+    def to_bytes(self) -> bytes:
+        """Header, then the offsets/members/writeoff arrays and the string end
+        offsets (all little-endian uint32), then the UTF-8 string table:
+        sub, natural per account, then the asset ids."""
+        strings = [field.encode("utf-8") for account in self.accounts for field in account]
+        strings += [asset_id.encode("utf-8") for asset_id in self.asset_ids]
+        ends = _uint32_array([0])
+        for s in strings:
+            ends.append(ends[-1] + len(s))
+
+        arrays = [_uint32_array(a) for a in (self.offsets, self.members, self.writeoff)] + [ends]
+        if sys.byteorder != "little":
+            for a in arrays:
+                a.byteswap()
+        header = _HEADER.pack(
+            MAGIC, VERSION, len(self.accounts), len(self.asset_ids),
+            len(self.members), len(self.writeoff), ends[-1]
+        )
+        return b"".join([header] + [a.tobytes() for a in arrays] + strings)
+
+    @classmethod
+    def from_buffer(cls, data) -> "PoolIndex":
+        """Inverse of to_bytes, without copying: `data` (bytes or an mmap) is
+        used in place. Raises ValueError if it is not a valid index."""
+        view = memoryview(data)
+        if len(view) < _HEADER.size:
+            raise ValueError("Truncated pool index")
+        magic, version, n_accounts, n_assets, n_members, n_writeoff, n_string_bytes = \
+            _HEADER.unpack_from(view)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("Not a pool index (or an older version)")
+        itemsize = _uint32_array().itemsize
+        sizes = [n_assets + 1, n_members, n_writeoff, 2 * n_accounts + n_assets + 1]
+        if len(view) != _HEADER.size + itemsize * sum(sizes) + n_string_bytes:
+            raise ValueError("Truncated pool index")
+
+        arrays = []
+        position = _HEADER.size
+        for size in sizes:
+            chunk = view[position:position + itemsize * size]
+            if sys.byteorder == "little":
+                arrays.append(chunk.cast("I"))
+            else:
+                a = _uint32_array()
+                a.frombytes(chunk)
+                a.byteswap()
+                arrays.append(a)
+            position += itemsize * size
+        offsets, members, writeoff, ends = arrays
+        if ends[-1] != n_string_bytes:
+            raise ValueError("Corrupt pool index string table")
+
+        strings = _StringTable(view[position:], ends)
+        asset_ids = _StringTable(view[position:], ends[2 * n_accounts:])
+        return cls(_AccountTable(strings, n_accounts), asset_ids, offsets, members, writeoff)
+
+
+def other_index(draw: int, exclude: int) -> int:
+    """Map a draw in [0, n-1) to an index in [0, n) that skips `exclude`.
+
+    Draw uniformly from the n-1 other slots, then shift past the excluded one:
+    the same result as indexing [a for a in items if a is not items[exclude]].
+    """
+    return draw + (draw >= exclude)
+
+
+class LazyTable(dict):
+    """id -> make(id), computed on first lookup (e.g. CSV-encoded accounts),
+    so only the pool members a run actually draws are ever converted."""
+
+    def __init__(self, make: Callable[[int], object]):
+        super().__init__()
+        self._make = make
+
+    def __missing__(self, key: int) -> object:
+        value = self[key] = self._make(key)
+        return value
+
+
+# =============================================================================
+# EXPORT FILES
+# =============================================================================
+
+def _read_records(path: str) -> Iterator[Dict[str, str]]:
+    """Rows of a CSV or JSON export as {UPPERCASE_COLUMN: value}."""
+    if path.lower().endswith(".json"):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            # SQL Developer: {"results": [{"columns": [...], "items": [...]}]}
+            results = data.get("results")
+            data = results[0].get("items", []) if results else data.get("items", [])
+        for record in data:
+            yield {str(k).strip().upper(): "" if v is None else str(v) for k, v in record.items()}
+        return
+
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.reader(f)
+        header = [name.strip().upper() for name in next(reader, [])]
+        for row in reader:
+            if row:
+                yield dict(zip(header, row))
+
+
+def _pick_columns(
+    path: str,
+    columns: Dict[str, Tuple[str, ...]]
+) -> Iterator[Tuple[str, ...]]:
+    """Values of `columns` (in order) from each record of an export."""
+    names: Optional[List[str]] = None
+    for record in _read_records(path):
+        if names is None:
+            names = []
+            for field, aliases in columns.items():
+                name = next((a for a in aliases if a in record), None)
+                if name is None:
+                    raise ValueError(
+                        f"{path}: no {field} column (expected one of {', '.join(aliases)})"
+                    )
+                names.append(name)
+        yield tuple(record.get(name, "").strip() for name in names)
+
+
+def read_source_accounts(path: str) -> List[Tuple[str, str, str]]:
+    """(sub_acct, natural_acct, asset_id) rows of a Query 2 export."""
+    return list(_pick_columns(path, SOURCE_COLUMNS))
+
+
+def read_writeoff_accounts(path: str) -> List[Account]:
+    """(sub_acct, natural_acct) rows of a Query 3 export."""
+    return list(_pick_columns(path, WRITEOFF_COLUMNS))
+
+
+# =============================================================================
+# ON-DISK CACHE
+# =============================================================================
+
+def file_digest(path: str) -> str:
+    """SHA-256 of a file's contents."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def source_key(*parts: object) -> str:
+    """Cache key for an index built from `parts` (file digests, options, ...)."""
+    h = hashlib.sha256(f"pool-index-v{VERSION}".encode())
+    for part in parts:
+        data = part if isinstance(part, bytes) else repr(part).encode("utf-8")
+        h.update(len(data).to_bytes(8, "little"))
+        h.update(data)
+    return h.hexdigest()
+
+
+def default_cache_dir() -> str:
+    """$LEDGE_POOL_CACHE_DIR, else $XDG_CACHE_HOME/ledge-bulk-journal (~/.cache by default)."""
+    configured = os.environ.get(CACHE_DIR_ENV)
+    if configured:
+        return configured
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "ledge-bulk-journal")
+
+
+def _map_file(path: str) -> PoolIndex:
+    with open(path, "rb") as f:
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return PoolIndex.from_buffer(data)
+
+
+def load_or_build(
+    key: str,
+    build: Callable[[], PoolIndex],
+    cache_dir: Optional[str] = None
+) -> PoolIndex:
+    """Map the index cached under `key`, or build it, cache it and map that.
+
+    A missing, unreadable or corrupt cache file just means a rebuild; failing
+    to write the cache (read-only home, ...) is not an error either, the built
+    index is used directly.
+    """
+    cache_dir = cache_dir or default_cache_dir()
+    path = os.path.join(cache_dir, f"pool-{key[:32]}.idx")
+    try:
+        return _map_file(path)
+    except (OSError, ValueError):
+        pass
+
+    index = build()
+    tmp_path = None
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        # Write then rename, so concurrent runs never map a half-written file
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(index.to_bytes())
+        os.replace(tmp_path, path)
+    except OSError:
+        if tmp_path is not None and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return index
+
+
+@functools.lru_cache(maxsize=None)
+def load_pools(
+    source_file: str = DEFAULT_SOURCE_FILE,
+    writeoff_file: str = DEFAULT_WRITEOFF_FILE,
+    cache_dir: Optional[str] = None
+) -> PoolIndex:
+    """The pools from a Query 2 and a Query 3 export, via the on-disk cache.
+
+    Cached per process too, so every caller shares one index.
+    """
+    key = source_key(file_digest(source_file), file_digest(writeoff_file))
+    return load_or_build(
+        key,
+        lambda: PoolIndex.build(read_source_accounts(source_file), read_writeoff_accounts(writeoff_file)),
+        cache_dir
+    )
+
+
+def resolve_pool_files(source_file: Optional[str] = None, writeoff_file: Optional[str] = None) -> Tuple[str, str]:
+    """(source_file, writeoff_file) as absolute paths (--pool-file / --writeoff-file).
+
+    None picks the versioned export for that pool.
+    """
+    return (
+        os.path.abspath(source_file or DEFAULT_SOURCE_FILE),
+        os.path.abspath(writeoff_file or DEFAULT_WRITEOFF_FILE),
+    )
@@ -0,0 +1,537 @@
+#!/usr/bin/env python3
+"""
+Refresh and verify the data pools against staging (or an offline stand-in).
+
+Runs the staging_data_queries.sql logic through a pluggable backend instead of
+by hand in SQL Developer:
+
+    refresh  Query 2 / Query 3 -> pools/source_accounts.csv, pools/writeoff_accounts.csv
+    verify   Query 4, set-based: every (SUB_ACCT, ASSET_ID) pair of the pool or
+             of generated CSVs checked in one join
+    counts   Query 5: accounts per crypto asset
+
+Backends:
+    sqlite  (default) a local SQLite fixture of GL_CODE_COMBINATIONS,
+            XXBRK_LISTINGS, XXBRK_ASSETS and XXBRKACCT, attached as schema
+            APPS so the Oracle SQL runs unchanged. `init-fixture` builds one
+            from the current pool files.
+    oracle  staging Oracle itself, via the optional `oracledb` package
+
+Refreshing diffs the query result against the current pool file. Existing
+rows keep their order (so seeded runs stay as stable as the data allows),
+removed rows are dropped and new rows are appended. An unchanged pool is not
+touched at all, and a pool that only gained rows is appended to in place.
+
+Usage:
+    # Build the offline stand-in from the current pools, then refresh from it
+    python pool_refresh.py init-fixture
+    python pool_refresh.py refresh --dry-run
+
+    # Refresh from staging Oracle (password from $ORACLE_PASSWORD)
+    python pool_refresh.py refresh --backend oracle --dsn sws2e-host:1521/SWS2E --user me
+
+    # Check every source account/asset pair of a generated file in one query
+    python pool_refresh.py verify large_writeoff.csv.gz
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import re
+import sqlite3
+import sys
+import tempfile
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+from compressed_output import open_input
+from pool_index import (
+    DEFAULT_SOURCE_FILE,
+    DEFAULT_WRITEOFF_FILE,
+    default_cache_dir,
+    read_source_accounts,
+    read_writeoff_accounts,
+)
+
+QUERIES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "staging_data_queries.sql")
+
+DEFAULT_FIXTURE = "staging_fixture.sqlite"
+
+# Columns written to the pool files, and the key columns the diff compares
+SOURCE_HEADER = ["SUB_ACCT", "NATURAL_ACCT", "ASSET_ID"]
+WRITEOFF_HEADER = ["ACCT_ID", "NATURAL_ACCOUNT"]
+
+# Names for the fixture's assets; any other asset is named after its ID
+KNOWN_ASSET_NAMES = {
+    "00000000000000026236": "BTC",
+    "00000000000000026237": "ETH",
+    "00000000000000026264": "SOL",
+    "00000000000000026261": "ADA",
+    "00000000000000026255": "DOGE",
+    "00000000000000026277": "USDC",
+}
+
+# Query 4 for many pairs at once: the pairs are bound as one JSON array of
+# [SUB_ACCT, ASSET_ID] and the backend turns them into a row source (see
+# StagingBackend.pairs_table), so the check is a single anti-join
+VERIFY_PAIRS_SQL = """
+SELECT p.SUB_ACCT, p.ASSET_ID
+FROM {pairs} p
+WHERE NOT EXISTS (
+    SELECT 1
+    FROM APPS.GL_CODE_COMBINATIONS cc
+    JOIN APPS.XXBRK_LISTINGS l ON cc.SEGMENT5 = l.LISTING_ID
+    JOIN APPS.XXBRK_ASSETS a ON l.ASSET_ID = a.ASSET_ID
+    WHERE cc.SEGMENT4 = p.SUB_ACCT
+      AND a.ASSET_ID = p.ASSET_ID
+      AND cc.ENABLED_FLAG = 'Y'
+)
+ORDER BY p.ASSET_ID, p.SUB_ACCT
+"""
+
+Pair = Tuple[str, str]
+
+
+def load_queries(path: str = QUERIES_FILE) -> Dict[int, str]:
+    """{query number: SQL} from staging_data_queries.sql, one SELECT per
+    '-- Query N:' section, without the trailing semicolon."""
+    with open(path) as f:
+        text = f.read()
+    queries = {}
+    sections = re.split(r"^-- Query (\d+):.*$", text, flags=re.MULTILINE)
+    for number, body in zip(sections[1::2], sections[2::2]):
+        start = re.search(r"^SELECT\b", body, flags=re.MULTILINE)
+        if start:
+            queries[int(number)] = body[start.start():body.index(";", start.start())].strip()
+    return queries
+
+
+# =============================================================================
+# BACKENDS
+# =============================================================================
+
+class StagingBackend:
+    """Runs staging SQL. Subclasses wrap one kind of connection.
+
+    The queries use the APPS schema prefix and :name binds, as written for
+    staging Oracle.
+    """
+
+    name = "base"
+
+    # Row source of (SUB_ACCT, ASSET_ID) from the :pairs JSON bind
+    pairs_table = ""
+
+    def query(self, sql: str, params: Optional[Dict[str, object]] = None) -> Iterator[Dict[str, object]]:
+        """Rows as {UPPERCASE_COLUMN: value}."""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self) -> "StagingBackend":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class SQLiteBackend(StagingBackend):
+    """A SQLite fixture database, attached as APPS (see build_fixture)."""
+
+    name = "sqlite"
+    pairs_table = (
+        "(SELECT json_extract(value, '$[0]') AS SUB_ACCT, "
+        "json_extract(value, '$[1]') AS ASSET_ID FROM json_each(:pairs))"
+    )
+
+    def __init__(self, path: str):
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"No staging fixture at {path} (create one with: pool_refresh.py init-fixture)")
+        self.path = path
+        self._conn = sqlite3.connect(":memory:")
+        self._conn.execute("ATTACH DATABASE ? AS APPS", (path,))
+
+    def query(self, sql: str, params: Optional[Dict[str, object]] = None) -> Iterator[Dict[str, object]]:
+        cursor = self._conn.execute(sql, params or {})
+        names = [d[0].upper() for d in cursor.description]
+        for row in cursor:
+            yield dict(zip(names, row))
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+class OracleBackend(StagingBackend):
+    """Staging Oracle through python-oracledb (pip install oracledb)."""
+
+    name = "oracle"
+    pairs_table = (
+        "JSON_TABLE(:pairs, '$[*]' COLUMNS ("
+        "SUB_ACCT VARCHAR2(64) PATH '$[0]', ASSET_ID VARCHAR2(64) PATH '$[1]'))"
+    )
+
+    def __init__(self, dsn: str, user: Optional[str] = None, password: Optional[str] = None):
+        try:
+            import oracledb
+        except ImportError:
+            raise ImportError("The oracle backend needs the oracledb package: pip install oracledb") from None
+        self._oracledb = oracledb
+        self._conn = oracledb.connect(user=user, password=password, dsn=dsn)
+
+    def query(self, sql: str, params: Optional[Dict[str, object]] = None) -> Iterator[Dict[str, object]]:
+        cursor = self._conn.cursor()
+        try:
+            if params and "pairs" in params:
+                # The pair list is far larger than a VARCHAR2 bind
+                cursor.setinputsizes(pairs=self._oracledb.DB_TYPE_CLOB)
+            cursor.execute(sql, params or {})
+            names = [d[0].upper() for d in cursor.description]
+            for row in cursor:
+                yield dict(zip(names, row))
+        finally:
+            cursor.close()
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+BACKENDS = ["sqlite", "oracle"]
+
+
+def default_fixture_path() -> str:
+    return os.path.join(default_cache_dir(), DEFAULT_FIXTURE)
+
+
+def open_backend(
+    backend: str = "sqlite",
+    db: Optional[str] = None,
+    dsn: Optional[str] = None,
+    user: Optional[str] = None,
+    password: Optional[str] = None
+) -> StagingBackend:
+    """Open one of BACKENDS: sqlite at `db` (default: the fixture in the pool
+    cache directory), or oracle at `dsn`."""
+    if backend == "sqlite":
+        return SQLiteBackend(db or default_fixture_path())
+    if backend == "oracle":
+        if not dsn:
+            raise ValueError("The oracle backend needs a DSN (--dsn host:port/service)")
+        return OracleBackend(dsn, user, password)
+    raise ValueError(f"Unknown backend {backend!r}, expected one of {BACKENDS}")
+
+
+# =============================================================================
+# OFFLINE FIXTURE
+# =============================================================================
+
+FIXTURE_SCHEMA = """
+CREATE TABLE XXBRK_ASSETS (
+    ASSET_ID TEXT PRIMARY KEY,
+    ASSET_NAME TEXT NOT NULL,
+    ASSET_TYPE TEXT NOT NULL,
+    END_DATE_ACTIVE TEXT
+);
+CREATE TABLE XXBRK_LISTINGS (
+    LISTING_ID TEXT PRIMARY KEY,
+    ASSET_ID TEXT NOT NULL REFERENCES XXBRK_ASSETS (ASSET_ID),
+    CURRENCY TEXT NOT NULL
+);
+CREATE TABLE XXBRKACCT (
+    ACCT_ID TEXT PRIMARY KEY,
+    ACCT_NAME TEXT NOT NULL,
+    NATURAL_ACCOUNT TEXT,
+    CURRENCY TEXT,
+    ACCT_TYPE TEXT
+);
+CREATE TABLE GL_CODE_COMBINATIONS (
+    CODE_COMBINATION_ID INTEGER PRIMARY KEY,
+    SEGMENT3 TEXT,
+    SEGMENT4 TEXT,
+    SEGMENT5 TEXT,
+    SEGMENT6 TEXT,
+    ENABLED_FLAG TEXT NOT NULL
+);
+CREATE INDEX GL_CC_ACCT_LISTING ON GL_CODE_COMBINATIONS (SEGMENT4, SEGMENT5);
+CREATE INDEX LISTINGS_ASSET ON XXBRK_LISTINGS (ASSET_ID);
+"""
+
+
+def _account_currency(acct_id: str) -> str:
+    """Staging account IDs end in their currency (…CAD, …USD)."""
+    suffix = acct_id[-3:]
+    return suffix if suffix in ("CAD", "USD") else "CAD"
+
+
+def build_fixture(
+    path: str,
+    source_rows: Iterable[Tuple[str, str, str]],
+    writeoff_accounts: Iterable[Pair]
+) -> str:
+    """Create a SQLite stand-in for the staging tables that reproduces the
+    given pools: Query 2 returns `source_rows`, Query 3 `writeoff_accounts`.
+
+    One crypto listing per asset, one enabled client-position code
+    combination per (sub_acct, natural_acct, asset). Replaces `path`.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+    os.close(fd)
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.executescript(FIXTURE_SCHEMA)
+        accounts: Dict[str, Tuple[str, str, str, str, str]] = {}
+        listings: Dict[str, str] = {}
+        combinations = []
+        for sub_acct, natural_acct, asset_id in source_rows:
+            listing_id = listings.setdefault(asset_id, f"L{len(listings) + 1:05d}")
+            combinations.append((natural_acct, sub_acct, listing_id, "CP", "Y"))
+            accounts.setdefault(sub_acct, (
+                sub_acct, f"CLIENT {sub_acct}", natural_acct, _account_currency(sub_acct), "CLIENT"
+            ))
+        # Numbered names keep Query 3's ORDER BY ACCT_NAME in file order
+        for i, (acct_id, natural_account) in enumerate(writeoff_accounts):
+            accounts[acct_id] = (
+                acct_id, f"CRYPTO WRITE-OFF {i:04d}", natural_account, _account_currency(acct_id), "SUSPENSE"
+            )
+
+        conn.executemany(
+            "INSERT INTO XXBRK_ASSETS VALUES (?, ?, 'CRYPTO', NULL)",
+            [(asset_id, KNOWN_ASSET_NAMES.get(asset_id, asset_id)) for asset_id in listings]
+        )
+        conn.executemany(
+            "INSERT INTO XXBRK_LISTINGS VALUES (?, ?, 'CAD')",
+            [(listing_id, asset_id) for asset_id, listing_id in listings.items()]
+        )
+        conn.executemany("INSERT INTO XXBRKACCT VALUES (?, ?, ?, ?, ?)", accounts.values())
+        conn.executemany(
+            "INSERT INTO GL_CODE_COMBINATIONS (SEGMENT3, SEGMENT4, SEGMENT5, SEGMENT6, ENABLED_FLAG) "
+            "VALUES (?, ?, ?, ?, ?)",
+            combinations
+        )
+        conn.commit()
+    finally:
+        conn.close()
+    os.replace(tmp_path, path)
+    return path
+
+
+# =============================================================================
+# REFRESH: QUERY 2 / 3 AND INCREMENTAL POOL DIFF
+# =============================================================================
+
+class PoolDiff(NamedTuple):
+    """Result of comparing a pool file with a fresh query result."""
+    rows: List[Tuple[str, ...]]       # the new pool: kept rows in file order, then added
+    added: List[Tuple[str, ...]]
+    removed: List[Tuple[str, ...]]
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.added or self.removed)
+
+
+def diff_pool(current: Sequence[Tuple[str, ...]], fresh: Iterable[Tuple[str, ...]]) -> PoolDiff:
+    """Kept rows stay in their current order; new rows go at the end in query order."""
+    fresh_rows = list(dict.fromkeys(fresh))
+    fresh_set = set(fresh_rows)
+    current_rows = list(dict.fromkeys(current))
+    current_set = set(current_rows)
+    kept = [row for row in current_rows if row in fresh_set]
+    added = [row for row in fresh_rows if row not in current_set]
+    removed = [row for row in current_rows if row not in fresh_set]
+    return PoolDiff(kept + added, added, removed)
+
+
+def query_source_accounts(backend: StagingBackend) -> List[Tuple[str, str, str]]:
+    """Query 2: (sub_acct, natural_acct, asset_id) of client crypto positions."""
+    sql = load_queries()[2]
+    return [(r["SUB_ACCT"], r["NATURAL_ACCT"], r["ASSET_ID"]) for r in backend.query(sql)]
+
+
+def query_writeoff_accounts(backend: StagingBackend) -> List[Pair]:
+    """Query 3: (acct_id, natural_account) of write-off / suspense accounts."""
+    sql = load_queries()[3]
+    return [(r["ACCT_ID"], r["NATURAL_ACCOUNT"]) for r in backend.query(sql)]
+
+
+def query_asset_counts(backend: StagingBackend) -> List[Tuple[str, str, int]]:
+    """Query 5: (asset_id, asset_name, number of accounts), most accounts first."""
+    sql = load_queries()[5]
+    return [(r["ASSET_ID"], r["ASSET_NAME"], r["NUM_ACCOUNTS"]) for r in backend.query(sql)]
+
+
+def _csv_header(path: str) -> Optional[List[str]]:
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        return next(csv.reader(f), None)
+
+
+def write_pool_file(path: str, header: Sequence[str], diff: PoolDiff) -> str:
+    """Apply a diff to a pool file, rewriting as little as possible.
+
+    Returns what was done: 'unchanged', 'appended' (only new rows written) or
+    'rewritten' (rows were removed, or the file had another layout).
+    """
+    exists = os.path.exists(path)
+    if exists and not diff.changed:
+        return "unchanged"
+
+    is_json = path.lower().endswith(".json")
+    if exists and not diff.removed and not is_json and _csv_header(path) == list(header):
+        with open(path, "rb+") as f:
+            # Make sure the last existing row is terminated before appending
+            f.seek(0, os.SEEK_END)
+            if f.tell():
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    f.write(b"\n")
+        with open(path, "a", newline="", encoding="utf-8") as f:
+            csv.writer(f, lineterminator="\n").writerows(diff.added)
+        return "appended"
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    with os.fdopen(fd, "w", newline="", encoding="utf-8") as f:
+        if is_json:
+            json.dump([dict(zip(header, row)) for row in diff.rows], f, indent=1)
+            f.write("\n")
+        else:
+            writer = csv.writer(f, lineterminator="\n")
+            writer.writerow(header)
+            writer.writerows(diff.rows)
+    os.replace(tmp_path, path)
+    return "rewritten"
+
+
+def refresh_pools(
+    backend: StagingBackend,
+    source_file: str = DEFAULT_SOURCE_FILE,
+    writeoff_file: str = DEFAULT_WRITEOFF_FILE,
+    dry_run: bool = False
+) -> Dict[str, Tuple[PoolDiff, str]]:
+    """Run Query 2 and Query 3 and bring both pool files up to date.
+
+    Returns {path: (diff, action)}; with dry_run the action is 'dry-run' and
+    no file is written.
+    """
+    results = {}
+    for path, header, fresh, read_current in (
+        (source_file, SOURCE_HEADER, query_source_accounts(backend), read_source_accounts),
+        (writeoff_file, WRITEOFF_HEADER, query_writeoff_accounts(backend), read_writeoff_accounts),
+    ):
+        current = read_current(path) if os.path.exists(path) else []
+        diff = diff_pool(current, fresh)
+        action = "dry-run" if dry_run else write_pool_file(path, header, diff)
+        results[path] = (diff, action)
+    return results
+
+
+# =============================================================================
+# VERIFY: SET-BASED QUERY 4
+# =============================================================================
+
+def verify_pairs(backend: StagingBackend, pairs: Iterable[Pair]) -> List[Pair]:
+    """(sub_acct, asset_id) pairs with no enabled code combination in staging,
+    checked with one query however many pairs there are."""
+    payload = json.dumps(sorted(set(pairs)), separators=(",", ":"))
+    sql = VERIFY_PAIRS_SQL.format(pairs=backend.pairs_table)
+    return [(r["SUB_ACCT"], r["ASSET_ID"]) for r in backend.query(sql, {"pairs": payload})]
+
+
+def pool_pairs(source_file: str = DEFAULT_SOURCE_FILE) -> Set[Pair]:
+    """Distinct (sub_acct, asset_id) pairs of a Query 2 pool file."""
+    return {(sub_acct, asset_id) for sub_acct, _, asset_id in read_source_accounts(source_file)}
+
+
+def csv_pairs(path: str, exclude_accounts: Iterable[str] = ()) -> Set[Pair]:
+    """Distinct (SUB_ACCT, ASSET_ID) pairs of a generated CSV (plain or compressed).
+
+    Lines whose SUB_ACCT is in exclude_accounts (the write-off destinations)
+    are skipped: those accounts don't hold client positions.
+    """
+    excluded = set(exclude_accounts)
+    pairs: Set[Pair] = set()
+    with open_input(path) as raw:
+        reader = csv.reader(io.TextIOWrapper(raw, encoding="utf-8", newline=""))
+        header = next(reader, [])
+        sub_col = header.index("SUB_ACCT")
+        asset_col = header.index("ASSET_ID")
+        for row in reader:
+            if len(row) > max(sub_col, asset_col) and row[sub_col] not in excluded:
+                pairs.add((row[sub_col], row[asset_col]))
+    return pairs
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Refresh and verify the data pools against staging or a local fixture"
+    )
+    parser.add_argument("command", choices=["refresh", "verify", "counts", "init-fixture"],
+                        help="refresh: Query 2/3 into the pool files; verify: set-based Query 4; "
+                             "counts: Query 5; init-fixture: build the SQLite stand-in from the pools")
+    parser.add_argument("files", nargs="*",
+                        help="verify: generated CSVs (.gz/.zst/.xz too) whose pairs to check "
+                             "(default: the source pool itself)")
+    parser.add_argument("--backend", choices=BACKENDS, default="sqlite",
+                        help="Where the staging tables live (default: sqlite)")
+    parser.add_argument("--db", type=str, default=None,
+                        help=f"SQLite fixture (default: {DEFAULT_FIXTURE} in the pool cache directory)")
+    parser.add_argument("--dsn", type=str, default=None,
+                        help="Oracle DSN, e.g. host:1521/SWS2E (--backend oracle)")
+    parser.add_argument("--user", type=str, default=None,
+                        help="Oracle user; the password is read from $ORACLE_PASSWORD")
+    parser.add_argument("--pool-file", type=str, default=DEFAULT_SOURCE_FILE,
+                        help="Query 2 pool file to refresh / verify")
+    parser.add_argument("--writeoff-file", type=str, default=DEFAULT_WRITEOFF_FILE,
+                        help="Query 3 pool file to refresh")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="refresh: report the diff without writing the pool files")
+    parser.add_argument("--show", type=int, default=20,
+                        help="Changed / invalid rows to list (default: 20)")
+
+    args = parser.parse_intermixed_args()
+
+    if args.command == "init-fixture":
+        path = build_fixture(
+            args.db or default_fixture_path(),
+            read_source_accounts(args.pool_file),
+            read_writeoff_accounts(args.writeoff_file)
+        )
+        print(f"Staging fixture: {path}")
+        return
+
+    backend = open_backend(args.backend, args.db, args.dsn, args.user, os.environ.get("ORACLE_PASSWORD"))
+    with backend:
+        if args.command == "refresh":
+            results = refresh_pools(backend, args.pool_file, args.writeoff_file, args.dry_run)
+            for path, (diff, action) in results.items():
+                print(f"{path}: {len(diff.rows)} rows, +{len(diff.added)} -{len(diff.removed)} ({action})")
+                for sign, rows in (("+", diff.added), ("-", diff.removed)):
+                    for row in rows[:args.show]:
+                        print(f"  {sign} {','.join(row)}")
+            return
+
+        if args.command == "counts":
+            for asset_id, asset_name, num_accounts in query_asset_counts(backend):
+                print(f"{asset_id}  {asset_name:<12} {num_accounts:>8,}")
+            return
+
+        if args.files:
+            writeoff = [acct_id for acct_id, _ in query_writeoff_accounts(backend)]
+            pairs = set()
+            for path in args.files:
+                pairs |= csv_pairs(path, writeoff)
+        else:
+            pairs = pool_pairs(args.pool_file)
+        invalid = verify_pairs(backend, pairs)
+        print(f"Checked {len(pairs):,} (SUB_ACCT, ASSET_ID) pairs against {backend.name}: "
+              f"{len(invalid):,} without an enabled code combination")
+        for sub_acct, asset_id in invalid[:args.show]:
+            print(f"  {sub_acct} {asset_id}")
+        if invalid:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
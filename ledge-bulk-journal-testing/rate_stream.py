@@ -0,0 +1,506 @@
+"""
+Open-loop, rate-controlled streaming of generated entries for soak tests.
+
+Instead of writing a file as fast as possible, the generators can emit a
+steady row stream that a consumer tails: N rows/s for T seconds, optionally
+ramping up and with periodic bursts:
+
+    rate(t) = ramp_from + (rate - ramp_from) * t / ramp   while t < ramp, then rate
+              x burst factor during each burst window
+
+Scheduling is by deadline, not by sleeping per row: every TICK seconds the
+stream works out how many rows the profile owes by now (its integral up to
+t) and writes that many whole entries in one call. Late wake-ups don't
+accumulate error, because the next tick catches up to the integral. Entries
+are never split, so the stream is at most one entry ahead or behind.
+
+Generation runs ahead on a thread into a bounded queue of batches
+(buffer_batches), so a slow batch doesn't stall the schedule. Every
+report_interval seconds a line gives the target and emitted rates, the
+drift of emitted rows against the profile, buffer fill, underruns (the
+buffer was empty when rows were due) and wake-up lateness.
+
+Outputs:
+    -               stdout
+    fifo:PATH       named pipe, created if missing; waits for a reader
+    PATH            file, flushed every tick; with max_rows / max_bytes it
+                    rolls over into numbered parts (see output_rotation)
+"""
+
+import math
+import os
+import queue
+import re
+import sys
+import threading
+import time
+from typing import BinaryIO, Dict, Iterator, List, Optional, TextIO, Tuple
+
+from output_rotation import RotatingWriter
+
+TICK = 0.01
+DEFAULT_BUFFER_BATCHES = 8
+DEFAULT_REPORT_INTERVAL = 10.0
+
+# "3x10/60": 3 times the rate for 10s, every 60s
+_BURST_SPEC = re.compile(r"^\s*([0-9.]+)\s*x\s*([0-9.]+)\s*/\s*([0-9.]+)\s*$")
+_DURATION_SPEC = re.compile(r"^\s*([0-9.]+)\s*([smhd]?)\s*$")
+_DURATION_UNITS = {"": 1, "s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+# =============================================================================
+# RATE PROFILE
+# =============================================================================
+
+class RateProfile:
+    """Target row rate over time, and its integral (rows owed by time t).
+
+    Args:
+        rate: Rows per second once ramped up
+        ramp: Seconds to ramp linearly from ramp_from to rate (0 for none)
+        ramp_from: Starting rate of the ramp
+        burst_factor: Rate multiplier during bursts (1 for none)
+        burst_seconds: Length of each burst
+        burst_every: Seconds between burst starts; the first starts at burst_every
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        ramp: float = 0.0,
+        ramp_from: float = 0.0,
+        burst_factor: float = 1.0,
+        burst_seconds: float = 0.0,
+        burst_every: float = 0.0
+    ):
+        if rate <= 0:
+            raise ValueError(f"rate must be positive, got {rate}")
+        if ramp < 0 or ramp_from < 0:
+            raise ValueError("ramp and ramp_from can't be negative")
+        if burst_factor != 1.0 and not 0 < burst_seconds <= burst_every:
+            raise ValueError("bursts need 0 < burst seconds <= burst interval")
+        if burst_factor < 0:
+            raise ValueError(f"burst factor can't be negative, got {burst_factor}")
+        self.rate = rate
+        self.ramp = ramp
+        self.ramp_from = ramp_from
+        self.burst_factor = burst_factor
+        self.burst_seconds = burst_seconds
+        self.burst_every = burst_every
+        # Extra rows of the bursts that are over, for monotonic rows_due() calls
+        self._bursts_done = 0
+        self._burst_rows_done = 0.0
+
+    def _base_rate(self, t: float) -> float:
+        if t < self.ramp:
+            return self.ramp_from + (self.rate - self.ramp_from) * t / self.ramp
+        return self.rate
+
+    def _base_rows(self, t: float) -> float:
+        """Integral of the ramp/constant rate over [0, t]."""
+        if t <= 0:
+            return 0.0
+        if t < self.ramp:
+            return self.ramp_from * t + (self.rate - self.ramp_from) * t * t / (2 * self.ramp)
+        return (self.ramp_from + self.rate) * self.ramp / 2 + self.rate * (t - self.ramp)
+
+    def _burst_rows(self, k: int, t: float) -> float:
+        """Extra rows of burst k (1-based) up to time t."""
+        start = k * self.burst_every
+        return (self.burst_factor - 1) * (
+            self._base_rows(min(t, start + self.burst_seconds)) - self._base_rows(min(t, start))
+        )
+
+    def in_burst(self, t: float) -> bool:
+        if self.burst_factor == 1.0 or t < self.burst_every:
+            return False
+        return t % self.burst_every < self.burst_seconds
+
+    def rate_at(self, t: float) -> float:
+        """Target rows/s at time t."""
+        return self._base_rate(t) * (self.burst_factor if self.in_burst(t) else 1.0)
+
+    def rows_due(self, t: float) -> float:
+        """Rows the profile owes by time t (seconds since the start)."""
+        rows = self._base_rows(t)
+        if self.burst_factor == 1.0 or t < self.burst_every:
+            return rows
+        current = int(t // self.burst_every)
+        if current <= self._bursts_done:
+            # Earlier t than the last call (e.g. after planned_entries): start over
+            self._bursts_done, self._burst_rows_done = 0, 0.0
+        # Bursts before the current one are complete; cache their extra rows
+        while self._bursts_done < current - 1:
+            self._bursts_done += 1
+            self._burst_rows_done += self._burst_rows(self._bursts_done, math.inf)
+        return rows + self._burst_rows_done + self._burst_rows(current, t)
+
+    def describe(self) -> str:
+        parts = [f"{self.rate:,.0f} rows/s"]
+        if self.ramp:
+            parts.append(f"ramp from {self.ramp_from:,.0f} over {self.ramp:g}s")
+        if self.burst_factor != 1.0:
+            parts.append(f"{self.burst_factor:g}x bursts of {self.burst_seconds:g}s every {self.burst_every:g}s")
+        return ", ".join(parts)
+
+
+def parse_duration(text: str) -> float:
+    """'90', '90s', '15m', '4h' -> seconds."""
+    match = _DURATION_SPEC.match(text)
+    if not match:
+        raise ValueError(f"expected a duration like 90s, 15m or 4h, got {text!r}")
+    return float(match.group(1)) * _DURATION_UNITS[match.group(2)]
+
+
+def parse_burst(text: str) -> Tuple[float, float, float]:
+    """'3x10/60' -> (factor 3, 10 seconds, every 60 seconds)."""
+    match = _BURST_SPEC.match(text)
+    if not match:
+        raise ValueError(f"expected FACTORxSECONDS/EVERY like 3x10/60, got {text!r}")
+    return float(match.group(1)), float(match.group(2)), float(match.group(3))
+
+
+# =============================================================================
+# OUTPUTS
+# =============================================================================
+
+class StreamOutput:
+    """stdout, a FIFO, or a (rolling) file, flushed after every write.
+
+    Args:
+        spec: '-', 'fifo:PATH' or a file path
+        header: Encoded CSV header, written once (or at the top of each part)
+        max_rows, max_bytes: Roll a file output into parts (see output_rotation)
+    """
+
+    def __init__(
+        self,
+        spec: str,
+        header: bytes,
+        max_rows: Optional[int] = None,
+        max_bytes: Optional[int] = None
+    ):
+        self._rotating: Optional[RotatingWriter] = None
+        self._owned = True
+        if spec == "-":
+            self.name = "stdout"
+            self._file: BinaryIO = sys.stdout.buffer
+            self._owned = False
+        elif spec.startswith("fifo:"):
+            self.name = spec[len("fifo:"):]
+            if not os.path.exists(self.name):
+                os.mkfifo(self.name)
+            print(f"Waiting for a reader on {self.name} ...", file=sys.stderr, flush=True)
+            self._file = open(self.name, "wb")
+        elif max_rows is not None or max_bytes is not None:
+            self.name = spec
+            self._rotating = RotatingWriter(spec, header, max_rows, max_bytes)
+        else:
+            self.name = spec
+            self._file = open(spec, "wb")
+        if self._rotating is None:
+            self._file.write(header)
+            self._file.flush()
+
+    def write(self, entries: List[bytes]) -> None:
+        if self._rotating is not None:
+            self._rotating.write_batch(entries)
+            self._rotating.flush()
+        else:
+            self._file.write(b"".join(entries))
+            self._file.flush()
+
+    def close(self) -> List[str]:
+        """Close the output; returns the files written (none for stdout/FIFO)."""
+        if self._rotating is not None:
+            return self._rotating.close()
+        if self._owned:
+            self._file.close()
+        return [] if self.name == "stdout" or not os.path.isfile(self.name) else [self.name]
+
+
+# =============================================================================
+# STREAMING
+# =============================================================================
+
+class _RunAhead:
+    """Generate batches on a thread into a bounded queue."""
+
+    _DONE = object()
+
+    def __init__(self, batches: Iterator[List[bytes]], max_batches: int):
+        self.queue: "queue.Queue" = queue.Queue(maxsize=max_batches)
+        self.max_batches = max_batches
+        self.error: Optional[BaseException] = None
+        self.finished = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(batches,), name="run-ahead", daemon=True)
+        self._thread.start()
+
+    def _put(self, item) -> bool:
+        while not self._stop.is_set():
+            try:
+                self.queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _run(self, batches: Iterator[List[bytes]]) -> None:
+        try:
+            for batch in batches:
+                # Rows per entry, counted here so the emitting thread doesn't have to
+                if not self._put((batch, [entry.count(b"\n") for entry in batch])):
+                    return
+        except BaseException as e:
+            self.error = e
+        self.finished = True
+        self._put(self._DONE)
+
+    def fill(self) -> None:
+        """Wait until the buffer is full (or generation is over)."""
+        while not self.finished and self.queue.qsize() < self.max_batches:
+            time.sleep(0.001)
+
+    def get(self) -> Optional[Tuple[List[bytes], List[int]]]:
+        """Next (entries, rows per entry) without waiting; None if none is ready.
+
+        Raises StopIteration once the generator is exhausted.
+        """
+        try:
+            item = self.queue.get_nowait()
+        except queue.Empty:
+            return None
+        if item is self._DONE:
+            if self.error is not None:
+                raise self.error
+            raise StopIteration
+        return item
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+
+class StreamStats:
+    """Running totals of one stream, reported every interval and at the end."""
+
+    def __init__(self):
+        self.rows = 0
+        self.entries = 0
+        self.bytes = 0
+        self.ticks = 0
+        self.late_ticks = 0
+        self.total_late = 0.0
+        self.max_late = 0.0
+        self.underruns = 0
+        self.min_buffer = 0
+        self.max_buffer = 0
+        self.elapsed = 0.0
+        self.rows_due = 0.0
+
+    def drift_rows(self) -> float:
+        return self.rows - self.rows_due
+
+    def metrics(self) -> Dict[str, object]:
+        elapsed = self.elapsed or 1e-9
+        return {
+            "stream_rows": self.rows,
+            "stream_entries": self.entries,
+            "stream_bytes": self.bytes,
+            "stream_wall_s": round(self.elapsed, 3),
+            "stream_rows_per_s": round(self.rows / elapsed, 1),
+            "target_rows": round(self.rows_due, 1),
+            "drift_rows": round(self.drift_rows(), 1),
+            "drift_percent": round(100 * self.drift_rows() / self.rows_due, 4) if self.rows_due else 0.0,
+            "late_ticks": self.late_ticks,
+            "mean_late_ms": round(1000 * self.total_late / self.ticks, 3) if self.ticks else 0.0,
+            "max_late_ms": round(1000 * self.max_late, 3),
+            "underruns": self.underruns,
+            "min_buffer_batches": self.min_buffer,
+        }
+
+
+def stream(
+    batches: Iterator[List[bytes]],
+    output: StreamOutput,
+    profile: RateProfile,
+    duration: Optional[float] = None,
+    buffer_batches: int = DEFAULT_BUFFER_BATCHES,
+    report_interval: Optional[float] = DEFAULT_REPORT_INTERVAL,
+    log: Optional[TextIO] = None,
+    tick: float = TICK
+) -> StreamStats:
+    """Write batches of encoded entries to output at the profile's row rate.
+
+    Stops after `duration` seconds or when the batches run out, whichever
+    comes first.
+
+    Args:
+        batches: Encoded entries, one bytes object (all its lines) per entry
+        buffer_batches: Batches generated ahead of the schedule
+        report_interval: Seconds between drift lines on `log`; None or 0 for none
+        tick: Scheduling interval in seconds
+
+    Returns:
+        StreamStats with the totals, drift and scheduling lateness
+    """
+    log = log or sys.stderr
+    stats = StreamStats()
+    # The lowest count is only taken while the generator is still running
+    stats.min_buffer = stats.max_buffer = buffer_batches
+    run_ahead = _RunAhead(batches, buffer_batches)
+    run_ahead.fill()
+    clock = time.perf_counter
+    # The emitting thread must get the GIL back promptly from the generator thread
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(min(switch_interval, tick / 10))
+
+    pending: List[bytes] = []
+    pending_rows: List[int] = []
+    position = 0
+    exhausted = False
+    started = clock()
+    next_report = started + report_interval if report_interval else None
+    last_report = (started, 0, 0.0)    # time, rows, rows due
+    deadline = started
+
+    try:
+        while not exhausted:
+            now = clock()
+            late = now - deadline
+            stats.ticks += 1
+            stats.total_late += late
+            stats.max_late = max(stats.max_late, late)
+            if late > tick:
+                stats.late_ticks += 1
+            t = now - started
+            if duration is not None and t >= duration:
+                t = duration
+            stats.rows_due = profile.rows_due(t)
+            owed = int(stats.rows_due) - stats.rows
+
+            # Take whole entries until the next one would overshoot what is owed
+            out: List[bytes] = []
+            while owed > 0:
+                if position == len(pending):
+                    try:
+                        item = run_ahead.get()
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    if item is None:
+                        stats.underruns += 1
+                        break
+                    pending, pending_rows = item
+                    position = 0
+                rows = pending_rows[position]
+                if rows > owed:
+                    break
+                out.append(pending[position])
+                position += 1
+                owed -= rows
+                stats.rows += rows
+            if out:
+                output.write(out)
+                stats.entries += len(out)
+                stats.bytes += sum(map(len, out))
+
+            buffered = run_ahead.queue.qsize()
+            if not run_ahead.finished and buffered < stats.min_buffer:
+                stats.min_buffer = buffered
+            if next_report is not None and now >= next_report:
+                print(_report_line(stats, t, now, last_report, buffered, run_ahead.max_batches),
+                      file=log, flush=True)
+                last_report = (now, stats.rows, stats.rows_due)
+                next_report = now + report_interval
+            if duration is not None and t >= duration:
+                break
+
+            # Next deadline on the tick grid; if we overran, skip the missed ticks
+            deadline += tick
+            now = clock()
+            if deadline < now:
+                deadline = now - (now - started) % tick + tick
+            time.sleep(max(0.0, deadline - now))
+    finally:
+        sys.setswitchinterval(switch_interval)
+        run_ahead.stop()
+        stats.elapsed = clock() - started
+    return stats
+
+
+def _report_line(stats: StreamStats, t: float, now: float, last_report: Tuple[float, int, float],
+                 buffered: int, max_buffered: int) -> str:
+    """One drift line; rates are averages since the last line."""
+    last_time, last_rows, last_due = last_report
+    interval = (now - last_time) or 1e-9
+    drift = round(stats.drift_rows())
+    drift_percent = 100 * drift / stats.rows_due if stats.rows_due else 0.0
+    return (
+        f"  [{t:7.0f}s] target {(stats.rows_due - last_due) / interval:,.0f} rows/s"
+        f" | emitted {(stats.rows - last_rows) / interval:,.0f} rows/s"
+        f" | {stats.rows:,} rows, drift {drift:+,} ({drift_percent:+.3f}%)"
+        f" | buffer {buffered}/{max_buffered} | underruns {stats.underruns:,}"
+        f" | late ticks {stats.late_ticks:,} (max {1000 * stats.max_late:.1f} ms)"
+    )
+
+
+def describe(stats: StreamStats) -> List[str]:
+    """Summary lines for the end of a stream."""
+    m = stats.metrics()
+    return [
+        f"Streamed {stats.rows:,} rows ({stats.entries:,} entries, {stats.bytes / 1024 / 1024:.1f} MB) "
+        f"in {stats.elapsed:.1f}s = {m['stream_rows_per_s']:,.0f} rows/s",
+        f"Target {m['target_rows']:,.0f} rows; drift {m['drift_rows']:+,.0f} rows ({m['drift_percent']:+.4f}%)",
+        f"Ticks late by >{TICK * 1000:.0f} ms: {stats.late_ticks:,} of {stats.ticks:,} "
+        f"(mean {m['mean_late_ms']:.2f} ms, max {m['max_late_ms']:.1f} ms); "
+        f"underruns {stats.underruns:,}; lowest buffer {stats.min_buffer} of {stats.max_buffer} batches",
+    ]
+
+
+def planned_entries(profile: RateProfile, duration: float, rows_per_entry: float) -> int:
+    """Entries needed to keep the profile fed for `duration` seconds."""
+    return int(math.ceil(profile.rows_due(duration) / rows_per_entry)) + 1
+
+
+# =============================================================================
+# CLI
+# =============================================================================
+
+def add_stream_arguments(parser) -> None:
+    """The --rate/--duration/... options shared by both generators."""
+    group = parser.add_argument_group(
+        "streaming (soak tests)",
+        "With --rate, rows are emitted at a controlled rate to --output, which may "
+        "also be '-' (stdout) or fifo:PATH; --max-rows/bytes-per-file roll a file output"
+    )
+    group.add_argument("--rate", type=float, default=None,
+                       help="Stream at this many rows/s instead of writing as fast as possible")
+    group.add_argument("--duration", type=parse_duration, default=None,
+                       help="Stream for this long, e.g. 90s, 30m, 4h (default: until --entries are written)")
+    group.add_argument("--ramp", type=parse_duration, default=0.0,
+                       help="Ramp up linearly from --ramp-from to --rate over this long")
+    group.add_argument("--ramp-from", type=float, default=0.0, help="Starting rate of the ramp (default: 0)")
+    group.add_argument("--burst", type=str, default=None, metavar="FACTORxSECONDS/EVERY",
+                       help="Periodic bursts, e.g. 3x10/60: 3x the rate for 10s every 60s")
+    group.add_argument("--buffer-batches", type=int, default=DEFAULT_BUFFER_BATCHES,
+                       help=f"Batches generated ahead of the schedule (default: {DEFAULT_BUFFER_BATCHES})")
+
+
+def profile_from_args(parser, args) -> Optional[RateProfile]:
+    """RateProfile from the parsed options, or None without --rate."""
+    if args.rate is None:
+        for option in ("duration", "burst"):
+            if getattr(args, option):
+                parser.error(f"--{option} needs --rate")
+        return None
+    if args.buffer_batches < 1:
+        parser.error("--buffer-batches must be at least 1")
+    burst = (1.0, 0.0, 0.0)
+    try:
+        if args.burst:
+            burst = parse_burst(args.burst)
+        return RateProfile(args.rate, args.ramp, args.ramp_from, *burst)
+    except ValueError as e:
+        parser.error(str(e))
@@ -0,0 +1,847 @@
+#!/usr/bin/env python3
+"""
+Reconcile a bulk load's GL import results against what was generated.
+
+After a bulk journal file goes through Ledge and GL Publisher, every ENTRY_NUM
+ends up imported (GL_JE_HEADERS / GL_JE_LINES), rejected (a GL_INTERFACE
+error status, or a GL Publisher failure), still pending, or nowhere. This
+script joins an export of those results with the expected outcomes and
+reports, per error type:
+
+    false accepts   error entries that were imported
+    false rejects   valid entries that were rejected
+    missing         entries with no result row at all
+    other reason    error entries rejected, but not for the injected error
+
+Expected outcomes come from the manifest written by generate_error_scenarios.py
+(out.manifest, see entry_manifest), or from the generated CSV itself (from
+LINE_DESCRIPTION: 'ERROR: <TYPE>' or valid).
+
+An ENTRY_NUM can belong to more than one entry: a duplicate-entry-num entry is
+written with the number of the entry it collides with. Each of them is counted
+as an entry of its own outcome, and all get the result rows of that number.
+
+Results come from a CSV export (plain or .gz/.zst/.xz), or from a query
+against a pool_refresh backend (the SQLite stand-in or staging Oracle). One
+row per journal line or per entry. The columns are matched by name:
+
+    ENTRY_NUM                     required
+    JIRA_ID                       optional; other JIRA_IDs are skipped
+    STATUS                        optional; e.g. PROCESSED, NEW, EF04, REJECTED
+                                  (no STATUS column: every row was imported)
+    ERROR_CODE / REASON / ERROR_MESSAGE   optional rejection reason
+
+Both sides are streamed into ENTRY_NUM-range partitions of packed 64-bit
+records (a Grace hash join on a dense key). Partitions stay in memory up to
+--memory-mb and are spilled to temp files past it; each partition is then
+joined in a flat array and tallied in C. Memory stays bounded however many
+millions of rows there are.
+
+Usage:
+    python reconcile_gl_import.py reconcile scattered.manifest gl_results.csv
+    python reconcile_gl_import.py reconcile scattered.csv gl_results.csv.gz --report-json recon.json
+    python reconcile_gl_import.py reconcile scattered.manifest --backend oracle --dsn host:1521/SWS2E \\
+        --query "SELECT REFERENCE21 AS ENTRY_NUM, STATUS FROM GL.GL_INTERFACE WHERE GROUP_ID = 1234"
+
+    # Offline: fake an import result (5% dropped, 1% flipped) and reconcile it
+    python reconcile_gl_import.py simulate scattered.manifest --output gl_results.csv --drop-percent 5 --flip-percent 1
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+from array import array
+from collections import Counter
+from itertools import chain
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from compressed_output import open_input
+from entry_manifest import VALID, EntryManifest
+from error_mutators import COLLIDED, COLLIDING_TYPES, outcome_types
+from error_placement import collision_span, pair_collisions
+from generate_error_scenarios import CSV_HEADERS, ERROR_TYPES, JIRA_ID
+from pool_refresh import BACKENDS, open_backend
+
+# =============================================================================
+# RESULT ROWS
+# =============================================================================
+
+ENTRY_COLUMNS = ("ENTRY_NUM",)
+JIRA_COLUMNS = ("JIRA_ID",)
+STATUS_COLUMNS = ("STATUS", "IMPORT_STATUS")
+REASON_COLUMNS = ("ERROR_CODE", "REASON", "ERROR_MESSAGE")
+
+# GL_INTERFACE / activity statuses; any other non-empty status is a rejection
+ACCEPTED_STATUSES = {"PROCESSED", "POSTED", "IMPORTED", "ACCEPTED", "COMPLETED", "COMPLETE", "P"}
+PENDING_STATUSES = {"NEW", "PROCESSING", "STARTED", "PENDING", ""}
+
+# Rejection reasons (status or reason text, case-insensitive substrings) that
+# match each injected error type. Override with --reason-map.
+REJECTION_REASONS: Dict[str, Sequence[str]] = {
+    "unbalanced": ("UNBALANCED", "NOT BALANCED"),
+    "invalid-asset": ("EF04", "EF05", "ASSET", "SEGMENT5"),
+    "invalid-account": ("EF01", "EF04", "EF05", "ACCOUNT"),
+    "invalid-natural-acct": ("EF02", "EF04", "NATURAL"),
+    "future-date": ("EP01", "PERIOD", "FUTURE"),
+    "past-date": ("EP01", "PERIOD", "CLOSED"),
+    "missing-amount": ("MISSING AMOUNT", "AMOUNT REQUIRED", "NO AMOUNT"),
+    "negative-amount": ("NEGATIVE",),
+    "zero-amount": ("ZERO",),
+    "duplicate-entry-num": ("DUPLICATE", "ALREADY EXISTS"),
+    "wrong-currency": ("CURRENCY",),
+    "bad-fx-rate": ("FX_RATE", "FX RATE", "CONVERSION RATE", "EXCHANGE RATE"),
+    COLLIDED: ("DUPLICATE", "ALREADY EXISTS"),
+}
+
+# Table the `simulate` command writes to a SQLite stand-in, and its default query
+RESULTS_TABLE = "GL_IMPORT_RESULTS"
+DEFAULT_RESULTS_QUERY = f"SELECT ENTRY_NUM, JIRA_ID, STATUS, ERROR_CODE FROM APPS.{RESULTS_TABLE}"
+
+# Per-entry state (one uint32 per ENTRY_NUM in a partition):
+#   bits 0-3   results: accepted, rejected, pending, a reason was given
+#   bits 4-11  expected outcome code + 1 (0: not in the generated file)
+#   bits 12-30 which error types the rejection reasons match
+_ACCEPTED, _REJECTED, _PENDING, _REASON = 1, 2, 4, 8
+_EXPECTED_SHIFT = 4
+_EXPECTED_BITS = 8
+_EXPECTED_MASK = ((1 << _EXPECTED_BITS) - 1) << _EXPECTED_SHIFT
+_MATCH_SHIFT = _EXPECTED_SHIFT + _EXPECTED_BITS
+# Expected record payload: the manifest's entry is written with another ENTRY_NUM
+_MOVED = 1 << 31
+
+# Distinct expected outcomes, and error types with rejection reasons, that fit the state
+MAX_OUTCOMES = (1 << _EXPECTED_BITS) - 1
+MAX_REASON_TYPES = 31 - _MATCH_SHIFT
+
+# Records are ENTRY_NUM << _KEY_SHIFT | payload, in uint64 arrays
+_KEY_SHIFT = 32
+_PAYLOAD_MASK = (1 << _KEY_SHIFT) - 1
+
+DEFAULT_MEMORY_MB = 256
+DEFAULT_EXAMPLES = 10
+
+
+def _pick(names: Sequence[str], aliases: Sequence[str], override: Optional[str] = None) -> Optional[int]:
+    """Index of the first column in `names` matching override or one of aliases."""
+    wanted = [override.upper()] if override else list(aliases)
+    for alias in wanted:
+        if alias in names:
+            return names.index(alias)
+    return None
+
+
+class ResultRows(NamedTuple):
+    """A stream of (entry_num, jira_id, status, reason) from a results export."""
+    rows: Iterator[Tuple[object, object, object, object]]
+    has_jira: bool
+    has_status: bool
+    has_reason: bool
+
+
+def read_results_csv(path: str, entry_column: Optional[str] = None) -> ResultRows:
+    """Stream result rows from a CSV export (plain or compressed)."""
+    text = io.TextIOWrapper(open_input(path), encoding="utf-8-sig", newline="")
+    reader = csv.reader(text)
+    names = [name.strip().upper() for name in next(reader, [])]
+    entry = _pick(names, ENTRY_COLUMNS, entry_column)
+    if entry is None:
+        text.close()
+        raise ValueError(f"{path} has no {entry_column or ENTRY_COLUMNS[0]} column (columns: {names})")
+    columns = [entry] + [_pick(names, aliases) for aliases in (JIRA_COLUMNS, STATUS_COLUMNS, REASON_COLUMNS)]
+
+    def rows() -> Iterator[Tuple[object, object, object, object]]:
+        with text:
+            for row in reader:
+                if row:
+                    yield tuple(row[i] if i is not None and i < len(row) else None for i in columns)
+
+    return ResultRows(rows(), columns[1] is not None, columns[2] is not None, columns[3] is not None)
+
+
+def read_results_query(backend, sql: str, entry_column: Optional[str] = None) -> ResultRows:
+    """Stream result rows from a query against a pool_refresh backend."""
+    cursor = backend.query(sql)
+    first = next(cursor, None)
+    names = list(first) if first else []
+    picked = [
+        names[i] if i is not None else None
+        for i in (_pick(names, ENTRY_COLUMNS, entry_column),) + tuple(
+            _pick(names, aliases) for aliases in (JIRA_COLUMNS, STATUS_COLUMNS, REASON_COLUMNS)
+        )
+    ]
+    if first is not None and picked[0] is None:
+        raise ValueError(f"The results query returns no {entry_column or ENTRY_COLUMNS[0]} column (columns: {names})")
+
+    def rows() -> Iterator[Tuple[object, object, object, object]]:
+        if first is None:
+            return
+        yield tuple(first[name] if name else None for name in picked)
+        for record in cursor:
+            yield tuple(record[name] if name else None for name in picked)
+
+    return ResultRows(rows(), picked[1] is not None, picked[2] is not None, picked[3] is not None)
+
+
+# =============================================================================
+# PARTITIONS
+# =============================================================================
+
+class SpillPartitions:
+    """uint64 records grouped into ENTRY_NUM ranges of `width`, spilled to temp
+    files once more than `max_buffered` records are held in memory.
+
+    Args:
+        width: ENTRY_NUMs per partition
+        max_buffered: Records kept in memory before every buffer is spilled
+        spill_dir: Directory for the spill files (default: the system temp dir)
+    """
+
+    def __init__(self, width: int, max_buffered: int, spill_dir: Optional[str] = None):
+        self.width = width
+        self.max_buffered = max_buffered
+        self.spill_dir = spill_dir
+        self.buffers: Dict[int, array] = {}
+        self.files: Dict[int, str] = {}
+        self.buffered = 0
+        self.records = 0
+        self.spills = 0
+        self.max_key = 0
+
+    def add(self, key: int, payload: int) -> None:
+        if key > self.max_key:
+            self.max_key = key
+        partition = (key - 1) // self.width
+        buffer = self.buffers.get(partition)
+        if buffer is None:
+            buffer = self.buffers[partition] = array("Q")
+        buffer.append(key << _KEY_SHIFT | payload)
+        self.buffered += 1
+        if self.buffered >= self.max_buffered:
+            self.spill()
+
+    def spill(self) -> None:
+        """Append every buffer to its partition's file and free the memory."""
+        for partition, buffer in self.buffers.items():
+            if not buffer:
+                continue
+            path = self.files.get(partition)
+            if path is None:
+                fd, path = tempfile.mkstemp(prefix=f"reconcile.p{partition}.", suffix=".bin", dir=self.spill_dir)
+                os.close(fd)
+                self.files[partition] = path
+            with open(path, "ab") as f:
+                buffer.tofile(f)
+        self.records += self.buffered
+        self.buffers = {}
+        self.buffered = 0
+        self.spills += 1
+
+    def partitions(self) -> List[int]:
+        return sorted(set(self.buffers) | set(self.files))
+
+    def take(self, partition: int) -> array:
+        """Every record of one partition (spilled and buffered); frees both."""
+        records = array("Q")
+        path = self.files.pop(partition, None)
+        if path is not None:
+            with open(path, "rb") as f:
+                records.frombytes(f.read())
+            os.remove(path)
+        records.extend(self.buffers.pop(partition, ()))
+        return records
+
+    def close(self) -> None:
+        for path in self.files.values():
+            if os.path.exists(path):
+                os.remove(path)
+        self.files = {}
+        self.buffers = {}
+
+
+# =============================================================================
+# EXPECTED OUTCOMES
+# =============================================================================
+
+class Expected(NamedTuple):
+    """Expected outcomes: a manifest (runs, plus records for the entries written
+    with another ENTRY_NUM), or CSV records partitioned like the results."""
+    outcomes: List[str]
+    jira_id: Optional[str]
+    entries: int
+    manifest: Optional[EntryManifest]
+    partitions: Optional[SpillPartitions]
+
+
+def _expected_bits(code: int) -> int:
+    """State bits of the expected outcome with this code (see MAX_OUTCOMES)."""
+    if code >= MAX_OUTCOMES:
+        raise ValueError(f"Too many distinct expected outcomes: at most {MAX_OUTCOMES} can be reconciled")
+    return (code + 1) << _EXPECTED_SHIFT
+
+
+def outcome_from_description(description: str) -> str:
+    """Expected outcome of a generated line from its LINE_DESCRIPTION."""
+    if description.startswith("ERROR: "):
+        return description[len("ERROR: "):].lower()
+    return VALID
+
+
+def _is_manifest(path: str) -> bool:
+    with open(path, "rb") as f:
+        return f.read(4) == b"LMAN"
+
+
+def moved_entries(manifest: EntryManifest) -> Iterator[Tuple[int, int, str]]:
+    """(entry, ENTRY_NUM it is written with, outcome) for every entry of a
+    manifest not written with its own number, in order: the placement's pairs
+    (error_placement.pair_collisions), found again from the spans' outcomes."""
+    colliding = {name for name, _ in manifest.outcomes if name in COLLIDING_TYPES}
+    if not colliding:
+        return
+    block_size = manifest.block_size
+    done = -1
+    for run in manifest.runs():
+        if run.outcome not in colliding:
+            continue
+        for block in range((run.first_entry - 1) // block_size, (run.last_entry - 1) // block_size + 1):
+            span = collision_span(block, manifest.entries, block_size)
+            if span[-1] <= done:
+                continue
+            done = span[-1]
+            outcomes = [outcome for b in span for outcome in manifest.block_outcomes(b)]
+            first = span[0] * block_size + 1
+            for position, partner in sorted(pair_collisions(outcomes, colliding, COLLIDED).items()):
+                yield first + position, first + partner, outcomes[position]
+
+
+def csv_entries(path: str) -> Iterator[Tuple[int, str, str]]:
+    """(ENTRY_NUM, LINE_DESCRIPTION, JIRA_ID) of every entry of a generated CSV,
+    in order. Consecutive lines with the same ENTRY_NUM are one entry, unless a
+    DEL line follows a REC line (another entry repeating the number), as in
+    validate_bulk_csv."""
+    entry_col = CSV_HEADERS.index("ENTRY_NUM")
+    jira_col = CSV_HEADERS.index("JIRA_ID")
+    description_col = CSV_HEADERS.index("LINE_DESCRIPTION")
+    code_col = CSV_HEADERS.index("TRANS_CODE")
+    with io.TextIOWrapper(open_input(path), encoding="utf-8-sig", newline="") as text:
+        reader = csv.reader(text)
+        next(reader, None)
+        previous = None
+        recs = False
+        for row in reader:
+            key = row[entry_col]
+            code = row[code_col] if len(row) > code_col else ""
+            if key != previous or (recs and code == "DEL"):
+                previous = key
+                recs = False
+                yield int(key), row[description_col], row[jira_col]
+            recs = recs or code == "REC"
+
+
+def read_expected(path: str, width: int, max_buffered: int, spill_dir: Optional[str] = None) -> Expected:
+    """Open a manifest, or stream a generated CSV into partitions."""
+    if _is_manifest(path):
+        manifest = EntryManifest(path)
+        outcomes = [name for name, _ in manifest.outcomes]
+        codes = {name: code for code, name in enumerate(outcomes)}
+        partitions = None
+        for entry, entry_num, outcome in moved_entries(manifest):
+            if partitions is None:
+                partitions = SpillPartitions(width, max_buffered, spill_dir)
+            partitions.add(entry, _MOVED)
+            partitions.add(entry_num, _expected_bits(codes[outcome]))
+        return Expected(outcomes, manifest.footer.get("jira_id", JIRA_ID), manifest.entries, manifest, partitions)
+
+    outcomes = [VALID] + outcome_types(ERROR_TYPES)
+    codes = {name: code for code, name in enumerate(outcomes)}
+    partitions = SpillPartitions(width, max_buffered, spill_dir)
+    payloads: Dict[str, int] = {}
+    jira_id = None
+    entries = 0
+    for entry_num, description, row_jira in csv_entries(path):
+        payload = payloads.get(description)
+        if payload is None:
+            outcome = outcome_from_description(description)
+            if outcome not in codes:
+                codes[outcome] = len(outcomes)
+                outcomes.append(outcome)
+            payload = payloads[description] = _expected_bits(codes[outcome])
+        partitions.add(entry_num, payload)
+        entries += 1
+        jira_id = jira_id or row_jira
+    return Expected(outcomes, jira_id, max(entries, partitions.max_key), None, partitions)
+
+
+# =============================================================================
+# JOIN
+# =============================================================================
+
+class Reconciliation(NamedTuple):
+    """Per expected outcome: entries, accepted, rejected (matching / other / no
+    reason), pending, missing; plus totals and example ENTRY_NUMs."""
+    outcomes: Dict[str, Dict[str, int]]
+    totals: Dict[str, int]
+    examples: Dict[str, List[int]]
+
+
+OUTCOME_FIELDS = ["entries", "accepted", "rejected", "rejected_matching", "rejected_other", "rejected_no_reason",
+                  "pending", "missing"]
+TOTAL_FIELDS = ["false_accepts", "false_rejects", "missing", "rejected_other", "unexpected",
+                "other_jira_rows", "unparsed_rows", "result_rows"]
+
+
+def _reason_masks(reason_map: Dict[str, Sequence[str]]) -> Tuple[Dict[str, int], List[Tuple[int, Sequence[str]]]]:
+    """Bit per error type, and (bit, uppercase patterns) to test reasons with."""
+    if len(reason_map) > MAX_REASON_TYPES:
+        raise ValueError(f"At most {MAX_REASON_TYPES} error types can have rejection reasons, got {len(reason_map)}")
+    bits = {name: 1 << i for i, name in enumerate(reason_map)}
+    return bits, [(bits[name], [p.upper() for p in patterns]) for name, patterns in reason_map.items()]
+
+
+def _classify(status: object, reason: object, has_status: bool, patterns) -> int:
+    """State bits for one result row."""
+    status_text = "" if status is None else str(status).strip().upper()
+    reason_text = "" if reason is None else str(reason).strip().upper()
+    if not has_status or status_text in ACCEPTED_STATUSES:
+        return _ACCEPTED
+    if status_text in PENDING_STATUSES and not reason_text:
+        return _PENDING
+    bits = _REJECTED
+    text = f"{status_text} {reason_text}".strip()
+    if text and text not in {"REJECTED", "FAILED", "ERROR", "E"}:
+        bits |= _REASON
+        for bit, needles in patterns:
+            if any(needle in text for needle in needles):
+                bits |= bit << _MATCH_SHIFT
+    return bits
+
+
+def partition_results(
+    results: ResultRows,
+    jira_id: Optional[str],
+    reason_map: Dict[str, Sequence[str]],
+    width: int,
+    max_buffered: int,
+    spill_dir: Optional[str] = None
+) -> Tuple[SpillPartitions, Counter]:
+    """Stream result rows into partitions of (ENTRY_NUM, state bits) records."""
+    _, patterns = _reason_masks(reason_map)
+    partitions = SpillPartitions(width, max_buffered, spill_dir)
+    classified: Dict[Tuple[object, object], int] = {}
+    skipped: Counter = Counter()
+    filter_jira = results.has_jira and jira_id
+    add = partitions.add
+    rows = 0
+    for entry_num, row_jira, status, reason in results.rows:
+        rows += 1
+        if filter_jira and row_jira != jira_id:
+            skipped["other_jira_rows"] += 1
+            continue
+        try:
+            key = int(entry_num)
+        except (TypeError, ValueError):
+            skipped["unparsed_rows"] += 1
+            continue
+        if key < 1:
+            skipped["unparsed_rows"] += 1
+            continue
+        bits = classified.get((status, reason))
+        if bits is None:
+            bits = classified[(status, reason)] = _classify(status, reason, results.has_status, patterns)
+        add(key, bits)
+    skipped["result_rows"] = rows
+    return partitions, skipped
+
+
+def _expected_runs(manifest: EntryManifest, codes: Dict[str, int]) -> Iterator[Tuple[int, int, int]]:
+    """(first, last, state bits) per run of the manifest."""
+    for run in manifest.runs():
+        yield run.first_entry, run.last_entry, _expected_bits(codes[run.outcome])
+
+
+def reconcile(
+    expected: Expected,
+    results: SpillPartitions,
+    reason_map: Dict[str, Sequence[str]],
+    skipped: Counter,
+    max_examples: int = DEFAULT_EXAMPLES
+) -> Reconciliation:
+    """Join the expected outcomes with the partitioned results, one partition at a time."""
+    width = results.width
+    outcomes = expected.outcomes
+    codes = {name: code for code, name in enumerate(outcomes)}
+    match_bits, _ = _reason_masks(reason_map)
+
+    num_partitions = -(-expected.entries // width)
+    partitions = sorted(set(range(num_partitions)) | set(results.partitions())
+                        | set(expected.partitions.partitions() if expected.partitions else ()))
+    runs = _expected_runs(expected.manifest, codes) if expected.manifest else iter(())
+    run = next(runs, None)
+
+    last_key = max(expected.entries, results.max_key,
+                   expected.partitions.max_key if expected.partitions else 0)
+
+    tally: Counter = Counter()
+    examples: Dict[Tuple[str, str], List[int]] = {}
+    for partition in partitions:
+        base = partition * width + 1
+        end = min(base + width, last_key + 1)
+        state = array("I", bytes(4 * (end - base)))
+
+        # Expected outcomes: slices of runs, or one record per entry
+        while run is not None and run[0] < end:
+            first, last, bits = run
+            lo, hi = max(first, base), min(last, end - 1)
+            state[lo - base:hi - base + 1] = array("I", [bits]) * (hi - lo + 1)
+            if last >= end:
+                break
+            run = next(runs, None)
+        # Entries sharing an ENTRY_NUM: the first fills its state, the others
+        # are tallied below with the same results
+        extras = array("Q")
+        if expected.partitions:
+            records = expected.partitions.take(partition)
+            for record in records:
+                if record & _MOVED:
+                    state[(record >> _KEY_SHIFT) - base] = 0
+            for record in records:
+                payload = record & _PAYLOAD_MASK
+                if payload & _MOVED:
+                    continue
+                index = (record >> _KEY_SHIFT) - base
+                if state[index] & _EXPECTED_MASK:
+                    extras.append(record)
+                else:
+                    state[index] = payload
+
+        for record in results.take(partition):
+            state[(record >> _KEY_SHIFT) - base] |= record & _PAYLOAD_MASK
+
+        # Tally distinct states in C, then find examples for the interesting ones
+        for value, count in Counter(state).items():
+            if not value:
+                continue
+            category = _category(value, outcomes, match_bits)
+            tally[category] += count
+            if category[1] not in ("accepted", "rejected_matching") and (
+                len(examples.get(category, ())) < max_examples
+            ):
+                kept = examples.setdefault(category, [])
+                index = -1
+                while len(kept) < max_examples:
+                    try:
+                        index = state.index(value, index + 1)
+                    except ValueError:
+                        break
+                    kept.append(base + index)
+        for record in extras:
+            key = record >> _KEY_SHIFT
+            value = state[key - base] & ~_EXPECTED_MASK | record & _PAYLOAD_MASK
+            category = _category(value, outcomes, match_bits)
+            tally[category] += 1
+            if category[1] not in ("accepted", "rejected_matching"):
+                kept = examples.setdefault(category, [])
+                if len(kept) < max_examples:
+                    kept.append(key)
+
+    per_outcome = {name: {field: 0 for field in OUTCOME_FIELDS} for name in outcomes}
+    totals = {field: 0 for field in TOTAL_FIELDS}
+    for (outcome, result), count in tally.items():
+        if outcome is None:
+            totals["unexpected"] += count
+            continue
+        row = per_outcome[outcome]
+        row["entries"] += count
+        row[result] += count
+        if result.startswith("rejected_"):
+            row["rejected"] += count
+        if result == "missing":
+            totals["missing"] += count
+        elif outcome == VALID and result.startswith("rejected"):
+            totals["false_rejects"] += count
+        elif outcome != VALID and result == "accepted":
+            totals["false_accepts"] += count
+        elif outcome != VALID and result == "rejected_other":
+            totals["rejected_other"] += count
+    for field in ("other_jira_rows", "unparsed_rows", "result_rows"):
+        totals[field] = skipped.get(field, 0)
+
+    named_examples = {}
+    for (outcome, result), entry_nums in sorted(examples.items(), key=lambda item: str(item[0])):
+        named_examples[f"{outcome or 'unexpected'}/{result}"] = sorted(entry_nums)[:max_examples]
+    return Reconciliation(per_outcome, totals, named_examples)
+
+
+def _category(value: int, outcomes: List[str], match_bits: Dict[str, int]) -> Tuple[Optional[str], str]:
+    """(expected outcome or None, result) for one state value."""
+    code = (value & _EXPECTED_MASK) >> _EXPECTED_SHIFT
+    outcome = outcomes[code - 1] if code else None
+    if value & _REJECTED:
+        if outcome is None or outcome == VALID:
+            result = "rejected_other"
+        elif not value & _REASON:
+            result = "rejected_no_reason"
+        elif (value >> _MATCH_SHIFT) & match_bits.get(outcome, 0):
+            result = "rejected_matching"
+        else:
+            result = "rejected_other"
+    elif value & _ACCEPTED:
+        result = "accepted"
+    elif value & _PENDING:
+        result = "pending"
+    else:
+        result = "missing"
+    return outcome, result
+
+
+def describe(recon: Reconciliation) -> List[str]:
+    """Report lines: a table per expected outcome, then the discrepancies."""
+    lines = [
+        f"  {'Expected':<22} {'Entries':>10} {'Accepted':>10} {'Rejected':>10}"
+        f" {'(match/other/no reason)':>27} {'Pending':>9} {'Missing':>9}"
+    ]
+    for name, row in recon.outcomes.items():
+        if not row["entries"]:
+            continue
+        split = f"{row['rejected_matching']:,}/{row['rejected_other']:,}/{row['rejected_no_reason']:,}"
+        lines.append(
+            f"  {name:<22} {row['entries']:>10,} {row['accepted']:>10,} {row['rejected']:>10,}"
+            f" {split:>27} {row['pending']:>9,} {row['missing']:>9,}"
+        )
+    totals = recon.totals
+    lines.append("")
+    lines.append(f"False accepts (error entries imported): {totals['false_accepts']:,}")
+    lines.append(f"False rejects (valid entries rejected): {totals['false_rejects']:,}")
+    lines.append(f"Missing (no result row):                {totals['missing']:,}")
+    lines.append(f"Rejected for another reason:            {totals['rejected_other']:,}")
+    if totals["unexpected"]:
+        lines.append(f"Results for ENTRY_NUMs not generated:   {totals['unexpected']:,}")
+    if totals["other_jira_rows"] or totals["unparsed_rows"]:
+        lines.append(f"Skipped result rows: {totals['other_jira_rows']:,} other JIRA_ID, "
+                     f"{totals['unparsed_rows']:,} without a valid ENTRY_NUM")
+    for category, entry_nums in recon.examples.items():
+        lines.append(f"  e.g. {category}: ENTRY_NUM {', '.join(map(str, entry_nums))}")
+    return lines
+
+
+# =============================================================================
+# SIMULATED RESULTS
+# =============================================================================
+
+# Status / reason a simulated import gives each error type's rejection
+SIMULATED_REJECTIONS = {
+    "unbalanced": ("REJECTED", "Journal entry is unbalanced"),
+    "invalid-asset": ("EF04", "Invalid asset ID (segment5)"),
+    "invalid-account": ("EF04", "Invalid sub-account"),
+    "invalid-natural-acct": ("EF04", "Natural account does not match"),
+    "future-date": ("EP01", "Date not in an open or future-enterable period"),
+    "past-date": ("EP01", "Date is in a closed period"),
+    "missing-amount": ("REJECTED", "Missing amount"),
+    "negative-amount": ("REJECTED", "Negative amount"),
+    "zero-amount": ("REJECTED", "Zero amount"),
+    "duplicate-entry-num": ("REJECTED", "Duplicate ENTRY_NUM"),
+    "wrong-currency": ("EC01", "Invalid currency code"),
+    "bad-fx-rate": ("REJECTED", "Invalid conversion rate"),
+    COLLIDED: ("REJECTED", "Duplicate ENTRY_NUM"),
+}
+
+
+def file_entries(path: str) -> Tuple[str, Iterator[Tuple[int, str]]]:
+    """The JIRA_ID of a manifest or generated CSV, and (ENTRY_NUM as written,
+    expected outcome) for each of its entries, in file order."""
+    if not _is_manifest(path):
+        rows = csv_entries(path)
+        first = next(rows, None)
+        rows = chain([first] if first else [], rows)
+        return (first[2] if first else JIRA_ID), (
+            (entry_num, outcome_from_description(description)) for entry_num, description, _ in rows
+        )
+
+    manifest = EntryManifest(path)
+
+    def entries() -> Iterator[Tuple[int, str]]:
+        with manifest:
+            moved = moved_entries(manifest)
+            next_moved = next(moved, None)
+            for run in manifest.runs():
+                for entry in range(run.first_entry, run.last_entry + 1):
+                    if next_moved is not None and next_moved[0] == entry:
+                        yield next_moved[1], run.outcome
+                        next_moved = next(moved, None)
+                    else:
+                        yield entry, run.outcome
+
+    return manifest.footer.get("jira_id", JIRA_ID), entries()
+
+
+def simulate_results(
+    entries: Iterable[Tuple[int, str]],
+    jira_id: str = JIRA_ID,
+    drop_percent: float = 0.0,
+    flip_percent: float = 0.0,
+    seed: int = 0
+) -> Iterator[Tuple[int, str, str, str]]:
+    """Result rows (ENTRY_NUM, JIRA_ID, STATUS, ERROR_CODE), two per entry (see
+    file_entries), of an import that rejects every error for its own reason
+    and imports every valid entry, except for `drop_percent` of entries with no
+    rows at all and `flip_percent` with the opposite result."""
+    rng = random.Random(seed)
+    drop = drop_percent / 100
+    flip = drop + flip_percent / 100
+    for entry_num, outcome in entries:
+        draw = rng.random()
+        if draw < drop:
+            continue
+        rejected = (outcome != VALID) != (draw < flip)
+        if not rejected:
+            status, reason = "PROCESSED", ""
+        elif outcome == VALID:
+            status, reason = "REJECTED", "Simulated rejection"
+        else:
+            status, reason = SIMULATED_REJECTIONS.get(outcome, ("REJECTED", outcome))
+        row = (entry_num, jira_id, status, reason)
+        yield row
+        yield row
+
+
+def write_simulated(rows: Iterable[Tuple[int, str, str, str]], output: str) -> int:
+    """Write simulated rows to a CSV, or to a SQLite stand-in (.db/.sqlite) table."""
+    columns = ["ENTRY_NUM", "JIRA_ID", "STATUS", "ERROR_CODE"]
+    if output.endswith((".db", ".sqlite")):
+        conn = sqlite3.connect(output)
+        with conn:
+            conn.execute(f"DROP TABLE IF EXISTS {RESULTS_TABLE}")
+            conn.execute(f"CREATE TABLE {RESULTS_TABLE} (ENTRY_NUM INTEGER, JIRA_ID TEXT, STATUS TEXT, ERROR_CODE TEXT)")
+            cursor = conn.executemany(f"INSERT INTO {RESULTS_TABLE} VALUES (?, ?, ?, ?)", rows)
+            count = cursor.rowcount
+        conn.close()
+        return count
+    count = 0
+    with open(output, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+    return count
+
+
+# =============================================================================
+# CLI
+# =============================================================================
+
+def _partition_sizes(memory_mb: int) -> Tuple[int, int]:
+    """(ENTRY_NUMs per partition, records buffered before spilling) for a budget."""
+    budget = memory_mb * 1024 * 1024
+    # A quarter for the join array (4 bytes per ENTRY_NUM), the rest for buffered 8-byte records
+    return max(budget // 4 // 4, 1024), max(budget * 3 // 4 // 8 // 2, 1024)
+
+
+def run_reconcile(args) -> int:
+    reason_map = dict(REJECTION_REASONS)
+    if args.reason_map:
+        with open(args.reason_map) as f:
+            reason_map.update(json.load(f))
+    width, max_buffered = _partition_sizes(args.memory_mb)
+
+    expected = read_expected(args.expected, width, max_buffered, args.spill_dir)
+    backend = None
+    try:
+        if args.results:
+            results = read_results_csv(args.results, args.entry_column)
+        else:
+            backend = open_backend(args.backend, args.db, args.dsn, args.user, os.environ.get("ORACLE_PASSWORD"))
+            results = read_results_query(backend, args.query, args.entry_column)
+        jira_id = args.jira_id or expected.jira_id
+        partitions, skipped = partition_results(
+            results, jira_id, reason_map, width, max_buffered, args.spill_dir
+        )
+        spills = partitions.spills + (expected.partitions.spills if expected.partitions else 0)
+        try:
+            recon = reconcile(expected, partitions, reason_map, skipped, args.examples)
+        finally:
+            partitions.close()
+            if expected.partitions:
+                expected.partitions.close()
+    finally:
+        if backend is not None:
+            backend.close()
+        if expected.manifest:
+            expected.manifest.close()
+
+    print(f"Expected: {expected.entries:,} entries ({args.expected})")
+    print(f"Results:  {recon.totals['result_rows']:,} rows"
+          + (f", spilled to disk {spills} time(s)" if spills else ""))
+    print()
+    for line in describe(recon):
+        print(line)
+
+    if args.report_json:
+        with open(args.report_json, "w") as f:
+            json.dump(recon._asdict(), f, indent=2)
+            f.write("\n")
+        print(f"\nReport: {args.report_json}")
+
+    totals = recon.totals
+    problems = (totals["false_accepts"] + totals["false_rejects"] + totals["missing"]
+                + totals["rejected_other"] + totals["unexpected"])
+    return 1 if problems else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reconcile GL import results against generated bulk journal files")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    recon = commands.add_parser("reconcile", help="Join import results with the expected outcomes")
+    recon.add_argument("expected", help="Manifest (out.manifest) or generated CSV")
+    recon.add_argument("results", nargs="?", default=None,
+                       help="Results export CSV (.gz/.zst/.xz ok); omit to query --backend instead")
+    recon.add_argument("--backend", choices=BACKENDS, default="sqlite",
+                       help="Where to query the results when no export is given (default: sqlite)")
+    recon.add_argument("--db", type=str, default=None, help="SQLite stand-in (e.g. from the simulate command)")
+    recon.add_argument("--dsn", type=str, default=None, help="Oracle DSN, host:port/service")
+    recon.add_argument("--user", type=str, default=None, help="Oracle user (password from $ORACLE_PASSWORD)")
+    recon.add_argument("--query", type=str, default=DEFAULT_RESULTS_QUERY,
+                       help="Results query; must return ENTRY_NUM and optionally JIRA_ID, STATUS, ERROR_CODE "
+                            f"(default: the stand-in's {RESULTS_TABLE} table)")
+    recon.add_argument("--entry-column", type=str, default=None,
+                       help="Results column holding the ENTRY_NUM (default: ENTRY_NUM)")
+    recon.add_argument("--jira-id", type=str, default=None,
+                       help=f"Only count result rows with this JIRA_ID (default: the generated file's, {JIRA_ID})")
+    recon.add_argument("--reason-map", type=str, default=None,
+                       help="JSON {error type: [reason substrings]} merged over the built-in matches")
+    recon.add_argument("--memory-mb", type=int, default=DEFAULT_MEMORY_MB,
+                       help=f"Memory for partitions before they spill to disk (default: {DEFAULT_MEMORY_MB})")
+    recon.add_argument("--spill-dir", type=str, default=None, help="Directory for spill files (default: temp dir)")
+    recon.add_argument("--examples", type=int, default=DEFAULT_EXAMPLES,
+                       help=f"ENTRY_NUMs listed per discrepancy (default: {DEFAULT_EXAMPLES})")
+    recon.add_argument("--report-json", type=str, default=None, help="Also write the report as JSON")
+
+    sim = commands.add_parser("simulate", help="Write fake import results for a generated file (offline testing)")
+    sim.add_argument("expected", help="Manifest (out.manifest) or generated CSV")
+    sim.add_argument("--output", type=str, default="gl_results.csv",
+                     help="CSV, or .db/.sqlite for a SQLite stand-in table (default: gl_results.csv)")
+    sim.add_argument("--drop-percent", type=float, default=0.0, help="Entries with no result rows (default: 0)")
+    sim.add_argument("--flip-percent", type=float, default=0.0,
+                     help="Entries with the wrong result: valid rejected, errors imported (default: 0)")
+    sim.add_argument("--seed", type=int, default=0, help="Seed for which entries are dropped/flipped")
+
+    args = parser.parse_args()
+    if args.command == "simulate":
+        jira_id, entries = file_entries(args.expected)
+        count = write_simulated(
+            simulate_results(entries, jira_id, args.drop_percent, args.flip_percent, args.seed), args.output
+        )
+        print(f"Wrote {count:,} result rows to {args.output}")
+        return
+    sys.exit(run_reconcile(args))
+
+
+if __name__ == "__main__":
+    main()
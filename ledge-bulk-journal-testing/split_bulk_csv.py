@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+Split an existing bulk journal CSV into part files on entry boundaries.
+
+The companion to --max-rows-per-file / --max-bytes-per-file for files that were
+generated before rotation existed. Every part gets its own header, and the
+lines of one ENTRY_NUM are never split across parts.
+
+The file is never parsed line by line:
+  - with a row limit, newlines are counted per 8 MB block in parallel processes
+  - cut points are found by seeking near each limit and scanning a small window
+    backwards for the nearest ENTRY_NUM change
+  - the parts are then copied as raw byte ranges in parallel
+
+Usage:
+    # At most 1M data rows per part: large.part0000.csv, large.part0001.csv, ...
+    python split_bulk_csv.py large.csv --max-rows-per-file 1000000
+
+    # At most 50 MB per part, written next to a different base name
+    python split_bulk_csv.py large.csv --max-bytes-per-file 50000000 --output upload.csv
+"""
+
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+from output_rotation import check_limits, part_path
+
+BLOCK_SIZE = 8 * 1024 * 1024
+WINDOW_SIZE = 64 * 1024
+COPY_CHUNK = 16 * 1024 * 1024
+
+
+def _count_newlines(path: str, start: int, stop: int) -> int:
+    """Process-pool entry point: newlines in path[start:stop]."""
+    with open(path, 'rb') as f:
+        f.seek(start)
+        return f.read(stop - start).count(b"\n")
+
+
+class _CsvScanner:
+    """Random-access helpers over the data section of a bulk journal CSV."""
+
+    def __init__(self, path: str, workers: int):
+        self.path = path
+        self.workers = workers
+        self.f = open(path, 'rb')
+        self.header = self.f.readline()
+        self.data_start = len(self.header)
+        self.eof = os.path.getsize(path)
+        self._block_lines: Optional[List[int]] = None
+
+    def close(self) -> None:
+        self.f.close()
+
+    def _read(self, start: int, stop: int) -> bytes:
+        self.f.seek(start)
+        return self.f.read(stop - start)
+
+    def _key(self, offset: int) -> bytes:
+        """ENTRY_NUM of the line starting at offset."""
+        self.f.seek(offset)
+        return self.f.readline().split(b",", 1)[0]
+
+    # -- line counting (only needed for row limits) --------------------------
+
+    def block_lines(self) -> List[int]:
+        """Cumulative newline counts at each block start, counted in parallel."""
+        if self._block_lines is None:
+            starts = list(range(self.data_start, self.eof, BLOCK_SIZE))
+            stops = [min(s + BLOCK_SIZE, self.eof) for s in starts]
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                counts = list(pool.map(_count_newlines, [self.path] * len(starts), starts, stops))
+            cumulative = [0]
+            for count in counts:
+                cumulative.append(cumulative[-1] + count)
+            self._block_lines = cumulative
+        return self._block_lines
+
+    def total_lines(self) -> int:
+        return self.block_lines()[-1]
+
+    def lines_before(self, offset: int) -> int:
+        """Number of data lines that start before offset (offset is a line start)."""
+        block = (offset - self.data_start) // BLOCK_SIZE
+        block_start = self.data_start + block * BLOCK_SIZE
+        return self.block_lines()[block] + self._read(block_start, offset).count(b"\n")
+
+    def line_offset(self, line_index: int) -> int:
+        """Offset where data line number line_index (0-based) starts."""
+        if line_index <= 0:
+            return self.data_start
+        cumulative = self.block_lines()
+        if line_index >= cumulative[-1]:
+            return self.eof
+        # Block containing the line_index-th newline
+        lo, hi = 0, len(cumulative) - 1
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if cumulative[mid + 1] < line_index:
+                lo = mid + 1
+            else:
+                hi = mid
+        block_start = self.data_start + lo * BLOCK_SIZE
+        data = self._read(block_start, min(block_start + BLOCK_SIZE, self.eof))
+        pos = -1
+        for _ in range(line_index - cumulative[lo]):
+            pos = data.index(b"\n", pos + 1)
+        return block_start + pos + 1
+
+    # -- entry boundaries ----------------------------------------------------
+
+    def boundary_at_or_before(self, target: int, low: int) -> int:
+        """Largest entry boundary in (low, target], or low if there is none.
+
+        An entry boundary is a line start whose ENTRY_NUM differs from the
+        previous line's. Scans a window before target, widening it as needed.
+        """
+        window = WINDOW_SIZE
+        while True:
+            start = max(low, target - window)
+            data = self._read(start, target)
+            line_starts = [start] if start == low else []
+            pos = data.find(b"\n")
+            while pos != -1:
+                line_starts.append(start + pos + 1)
+                pos = data.find(b"\n", pos + 1)
+
+            # Walk back from target; usually the boundary is within a line or two
+            key = self._key(line_starts[-1]) if line_starts else None
+            for j in range(len(line_starts) - 1, 0, -1):
+                previous = self._key(line_starts[j - 1])
+                if previous != key:
+                    return line_starts[j]
+                key = previous
+            if start == low:
+                return low
+            window *= 2
+
+    def boundary_after(self, offset: int) -> int:
+        """First entry boundary after offset (or EOF), for entries larger than a part."""
+        key = self._key(offset)
+        self.f.seek(offset)
+        position = offset
+        for line in iter(self.f.readline, b""):
+            if line.split(b",", 1)[0] != key:
+                return position
+            position += len(line)
+        return self.eof
+
+
+def find_cut_points(
+    scanner: _CsvScanner,
+    max_rows: Optional[int],
+    max_bytes: Optional[int]
+) -> List[int]:
+    """Offsets [data_start, cut1, ..., eof] such that each part respects the limits."""
+    payload = None if max_bytes is None else max_bytes - len(scanner.header)
+    cuts = [scanner.data_start]
+    start = scanner.data_start
+    start_line = 0
+
+    while start < scanner.eof:
+        target = scanner.eof
+        if payload is not None:
+            target = min(target, start + payload)
+        if max_rows is not None:
+            target = min(target, scanner.line_offset(start_line + max_rows))
+
+        if target >= scanner.eof:
+            cut = scanner.eof
+        else:
+            cut = scanner.boundary_at_or_before(target, start)
+            if cut <= start:
+                # A single entry is bigger than the limit: give it a part of its own
+                cut = scanner.boundary_after(start)
+
+        cuts.append(cut)
+        if max_rows is not None:
+            start_line = scanner.lines_before(cut) if cut < scanner.eof else scanner.total_lines()
+        start = cut
+
+    return cuts
+
+
+def entry_ranges(path: str, count: int) -> List[Tuple[int, int]]:
+    """Split the data section of a CSV into about `count` byte ranges of
+    similar size, each starting and ending on an entry boundary.
+
+    Lets a file be processed in parallel with every entry seen by exactly
+    one worker (see validate_bulk_csv).
+    """
+    scanner = _CsvScanner(path, 1)
+    try:
+        size = scanner.eof - scanner.data_start
+        cuts = [scanner.data_start]
+        for i in range(1, count):
+            target = scanner.data_start + size * i // count
+            if target <= cuts[-1]:
+                continue
+            cut = scanner.boundary_at_or_before(target, cuts[-1])
+            if cut > cuts[-1]:
+                cuts.append(cut)
+        cuts.append(scanner.eof)
+    finally:
+        scanner.close()
+    return [(start, stop) for start, stop in zip(cuts, cuts[1:]) if stop > start]
+
+
+def _copy_part(input_path: str, header: bytes, start: int, stop: int, out_path: str) -> str:
+    """Thread-pool entry point: write header + input[start:stop] to out_path."""
+    with open(input_path, 'rb') as src, open(out_path, 'wb') as dst:
+        dst.write(header)
+        dst.flush()
+        remaining = stop - start
+        offset = start
+        copy_file_range = getattr(os, "copy_file_range", None)
+        while remaining:
+            if copy_file_range is not None:
+                copied = copy_file_range(src.fileno(), dst.fileno(), min(remaining, COPY_CHUNK), offset)
+            else:
+                src.seek(offset)
+                copied = dst.write(src.read(min(remaining, COPY_CHUNK)))
+            if not copied:
+                raise IOError(f"Unexpected end of {input_path} at byte {offset}")
+            offset += copied
+            remaining -= copied
+    return out_path
+
+
+def split_csv(
+    input_path: str,
+    output_path: Optional[str] = None,
+    max_rows: Optional[int] = None,
+    max_bytes: Optional[int] = None,
+    workers: Optional[int] = None
+) -> List[str]:
+    """Split a bulk journal CSV into part files on entry boundaries.
+
+    Args:
+        input_path: CSV to split (left untouched)
+        output_path: Base name for the parts (see output_rotation.part_path),
+                     defaults to input_path
+        max_rows: Maximum data rows per part, header excluded
+        max_bytes: Maximum bytes per part, header included
+        workers: Processes/threads for counting and copying (default: CPU count)
+
+    Returns:
+        Paths of the parts, in ENTRY_NUM order
+    """
+    if max_rows is None and max_bytes is None:
+        raise ValueError("Give at least one of max_rows / max_bytes")
+    workers = workers or os.cpu_count() or 1
+    output_path = output_path or input_path
+
+    scanner = _CsvScanner(input_path, workers)
+    try:
+        check_limits(max_rows, max_bytes, scanner.header)
+        cuts = find_cut_points(scanner, max_rows, max_bytes)
+    finally:
+        scanner.close()
+
+    ranges = list(zip(cuts, cuts[1:])) or [(scanner.data_start, scanner.data_start)]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(_copy_part, input_path, scanner.header, start, stop, part_path(output_path, i))
+            for i, (start, stop) in enumerate(ranges)
+        ]
+        return [future.result() for future in futures]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Split a bulk journal CSV into part files without splitting entries"
+    )
+    parser.add_argument("input", help="CSV file to split")
+    parser.add_argument("--output", type=str, default=None,
+                        help="Base name for the parts (default: the input path)")
+    parser.add_argument("--max-rows-per-file", type=int, default=None,
+                        help="Maximum data rows per part (header excluded)")
+    parser.add_argument("--max-bytes-per-file", type=int, default=None,
+                        help="Maximum bytes per part (header included)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Parallel processes/threads (default: CPU count)")
+
+    args = parser.parse_args()
+    if args.max_rows_per_file is None and args.max_bytes_per_file is None:
+        parser.error("give --max-rows-per-file and/or --max-bytes-per-file")
+
+    parts = split_csv(
+        args.input, args.output, args.max_rows_per_file, args.max_bytes_per_file, args.workers
+    )
+    for path in parts:
+        size_mb = os.path.getsize(path) / (1024 * 1024)
+        print(f"{path}: {size_mb:.2f} MB")
+    print(f"\nDone! {len(parts)} parts")
+
+
+if __name__ == "__main__":
+    main()
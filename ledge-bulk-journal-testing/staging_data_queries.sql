@@ -29,7 +29,7 @@ ORDER BY a.ASSET_NAME;
 -- -----------------------------------------------------------------------------
 -- These are accounts that have existing crypto positions in GL
 -- Output format: SUB_ACCT, NATURAL_ACCT, LISTING_ID, ACCT_CURRENCY, ASSET_ID, ASSET_NAME
--- Use these as SOURCE_ACCOUNTS in the Python script
+-- Export (CSV or JSON) to pools/source_accounts.csv; used as source accounts by both scripts
 SELECT DISTINCT
     cc.SEGMENT4 AS SUB_ACCT,
     cc.SEGMENT3 AS NATURAL_ACCT,
@@ -53,6 +53,7 @@ ORDER BY a.ASSET_NAME, cc.SEGMENT4;
 -- -----------------------------------------------------------------------------
 -- These are accounts used as the destination for write-offs
 -- Look for accounts with "DISC", "WRITE", or "SUSPENSE" in the name
+-- Export (CSV or JSON) to pools/writeoff_accounts.csv
 SELECT
     acct.ACCT_ID,
     acct.ACCT_NAME,
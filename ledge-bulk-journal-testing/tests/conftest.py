@@ -0,0 +1,45 @@
+"""Shared setup: the scripts import as top-level modules (the way they import
+each other), and the `interrupt` fixture stops a run at a checkpoint."""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from checkpoint import CheckpointedFile, partial_path, read_checkpoint  # noqa: E402
+
+
+class Crash(Exception):
+    pass
+
+
+@pytest.fixture
+def interrupt(monkeypatch):
+    """Run generate(seed=7, checkpoint_interval=...) into output until its n-th
+    checkpoint and stop it there, with torn bytes past the checkpoint (which a
+    resume cuts off again). Returns the checkpoint."""
+    def run(generate, output, checkpoints):
+        checkpoint = CheckpointedFile.checkpoint
+        taken = []
+
+        def checkpoint_then_crash(self, next_entry, state=None):
+            checkpoint(self, next_entry, state)
+            taken.append(next_entry)
+            if len(taken) == checkpoints:
+                raise Crash(next_entry)
+
+        monkeypatch.setattr(CheckpointedFile, "checkpoint", checkpoint_then_crash)
+        try:
+            with pytest.raises(Crash):
+                generate(seed=7, checkpoint_interval=1e-9)
+        finally:
+            monkeypatch.setattr(CheckpointedFile, "checkpoint", checkpoint)
+        assert not os.path.exists(output)
+        kept = read_checkpoint(output)
+        assert kept is not None and kept.next_entry > 1
+        with open(partial_path(output), "ab") as f:
+            f.write(b"torn write")
+        return kept
+    return run
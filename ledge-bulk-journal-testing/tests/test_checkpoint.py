@@ -0,0 +1,54 @@
+"""Tests for checkpoint.py: interrupted runs resume to the same bytes."""
+
+import os
+
+import pytest
+
+import generate_bulk_writeoff as gen
+import generate_error_scenarios as scenarios
+from checkpoint import checkpoint_path, partial_path
+
+DATE = "2026-01-15"
+
+
+@pytest.mark.parametrize("lines", [None, "1-12/1-2"])
+def test_resumed_writeoff_run_matches_an_uninterrupted_one(tmp_path, interrupt, lines):
+    def generate(output, **options):
+        return gen.generate_csv(12000, output, DATE, progress_interval=0, lines=lines, **options)
+
+    whole = str(tmp_path / "whole.csv")
+    generate(whole, seed=7)
+    output = str(tmp_path / "out.csv")
+    kept = interrupt(lambda **options: generate(output, **options), output, 2)
+
+    metrics = generate(output, resume=True)
+    assert metrics["resumed_at"] == kept.next_entry
+    assert metrics["seed"] == 7
+    with open(output, "rb") as resumed, open(whole, "rb") as expected:
+        assert resumed.read() == expected.read()
+    assert not os.path.exists(checkpoint_path(output))
+    assert not os.path.exists(partial_path(output))
+
+
+def test_resumed_error_run_matches_file_and_manifest(tmp_path, interrupt):
+    def generate(directory, **options):
+        (tmp_path / directory).mkdir(exist_ok=True)
+        output = str(tmp_path / directory / "out.csv")
+        scenarios.generate_csv(12000, output, 20, "mixed", DATE, shuffle=True, progress_interval=0, **options)
+        return output
+
+    whole = generate("whole", seed=7)
+    output = str(tmp_path / "resumed" / "out.csv")
+    interrupt(lambda **options: generate("resumed", **options), output, 2)
+    generate("resumed", resume=True)
+    for suffix in (".csv", ".manifest"):
+        with open(output.replace(".csv", suffix), "rb") as resumed, open(whole.replace(".csv", suffix), "rb") as f:
+            assert resumed.read() == f.read()
+
+
+def test_resume_refuses_other_options(tmp_path, interrupt):
+    output = str(tmp_path / "out.csv")
+    interrupt(lambda **options: gen.generate_csv(12000, output, DATE, progress_interval=0, **options),
+              output, 1)
+    with pytest.raises(ValueError):
+        gen.generate_csv(12000, output, DATE, unbalanced=True, progress_interval=0, resume=True)
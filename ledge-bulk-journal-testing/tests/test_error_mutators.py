@@ -0,0 +1,88 @@
+"""Tests for error_mutators.py: colliding entries and their partners."""
+
+import random
+from collections import Counter, defaultdict
+
+import pytest
+
+import generate_error_scenarios as scenarios
+from activity_events import iter_activity_batches
+from entry_manifest import VALID
+from error_mutators import COLLIDED
+from error_placement import pair_collisions
+
+DATE = "2026-01-15"
+DUPLICATE = "duplicate-entry-num"
+
+
+def groups(partners, size):
+    """Positions that share an ENTRY_NUM, keyed by the position whose number it is."""
+    shared = defaultdict(set)
+    for position in range(size):
+        shared[partners.get(position, position)].add(position)
+    return [group for group in shared.values() if len(group) > 1]
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_pair_collisions_shares_every_colliding_number(seed):
+    rng = random.Random(seed)
+    size = rng.randint(2, 60)
+    share = rng.random()
+    outcomes = [DUPLICATE if rng.random() < share else rng.choice([None, None, "unbalanced"])
+                for _ in range(size)]
+    placed = list(outcomes)
+    partners = pair_collisions(outcomes, {DUPLICATE}, COLLIDED)
+
+    assert all(partners.get(partner, partner) == partner for partner in partners.values())
+    shared = groups(partners, size)
+    grouped = set().union(*shared) if shared else set()
+    assert {i for i, outcome in enumerate(placed) if outcome == DUPLICATE} <= grouped
+    assert all(len(group) <= 3 for group in shared)
+    for i, (before, after) in enumerate(zip(placed, outcomes)):
+        if before is None:
+            assert after == (COLLIDED if i in grouped else None)
+        else:
+            assert after == before
+
+    # The manifest's outcomes (valid entries as VALID or COLLIDED) pair the same way
+    repaired = [VALID if outcome is None else outcome for outcome in outcomes]
+    assert pair_collisions(repaired, {DUPLICATE}, COLLIDED) == partners
+
+
+@pytest.mark.parametrize("error_percent", [30, 100])
+def test_generated_duplicates_repeat_another_entrys_number(error_percent):
+    written = defaultdict(list)
+    for entry in scenarios.iter_entries(9000, error_percent, DUPLICATE, DATE, shuffle=True, seed=5):
+        numbers = {row[0] for row in entry.rows}
+        assert len(numbers) == 1
+        written[int(numbers.pop())].append(entry.error_type or VALID)
+
+    for outcomes in written.values():
+        if len(outcomes) == 1:
+            assert outcomes[0] not in (DUPLICATE, COLLIDED)
+        else:
+            assert 2 <= len(outcomes) <= 3
+            assert DUPLICATE in outcomes
+            assert outcomes.count(COLLIDED) <= 1
+    assert sum(outcomes.count(DUPLICATE) for outcomes in written.values()) == \
+        scenarios.count_errors(9000, error_percent)
+
+
+def test_mixed_runs_fail_only_their_error_entries():
+    assert DUPLICATE not in scenarios.resolve_error_types("mixed")
+    outcomes = Counter(entry.error_type for entry in scenarios.iter_entries(9000, 40, "mixed", DATE, seed=5))
+    assert outcomes[None] == 9000 - scenarios.count_errors(9000, 40)
+    assert not outcomes.keys() & {DUPLICATE, COLLIDED}
+
+
+def test_duplicate_activities_repeat_the_idempotency_key():
+    activities = [activity for batch in iter_activity_batches(
+        "errors", 3000, DATE, seed=5, error_percent=30, error_type=DUPLICATE, shuffle=True
+    ) for activity in batch]
+    keys = Counter(activity.idempotency_key for activity in activities)
+    for activity in activities:
+        assert activity.entry_num == int(activity.rows[0][0])
+        if activity.outcome in (DUPLICATE, COLLIDED):
+            assert keys[activity.idempotency_key] > 1
+        else:
+            assert keys[activity.idempotency_key] == 1
@@ -0,0 +1,104 @@
+"""Tests for error_placement.py and the error counts it gives generate_error_scenarios.py."""
+
+import math
+import random
+from collections import Counter
+
+import pytest
+
+import generate_error_scenarios as scenarios
+from error_placement import ErrorPlacement, _hypergeometric, _log_choose
+from entry_manifest import EntryManifest, manifest_path
+
+ERROR_TYPES = ["unbalanced", "future-date", "zero-amount"]
+
+
+def placed_errors(placement):
+    return sum(
+        outcome is not None
+        for block in range(placement.num_blocks)
+        for outcome in placement.block_outcomes(block)
+    )
+
+
+@pytest.mark.parametrize("shuffle", [True, False])
+@pytest.mark.parametrize("num_entries,num_errors,block_size", [
+    (10000, 0, 256),
+    (10000, 1, 256),
+    (10000, 1234, 256),
+    (10000, 10000, 256),
+    (1025, 513, 64),
+    (7, 3, 4096),
+])
+def test_places_exactly_num_errors(shuffle, num_entries, num_errors, block_size):
+    placement = ErrorPlacement(num_entries, num_errors, ERROR_TYPES, shuffle, seed=11, block_size=block_size)
+    counts = [placement.block_error_count(block) for block in range(placement.num_blocks)]
+    assert sum(counts) == num_errors
+    assert all(0 <= count <= placement._block_len(block) for block, count in enumerate(counts))
+    assert placed_errors(placement) == num_errors
+
+
+def test_legacy_layout_puts_errors_last():
+    placement = ErrorPlacement(1000, 150, ERROR_TYPES, shuffle=False, seed=1, block_size=64)
+    outcomes = [placement.outcome(i) for i in range(1000)]
+    assert outcomes[:850] == [None] * 850
+    assert None not in outcomes[850:]
+
+
+def test_same_seed_same_placement_in_any_block_order():
+    forward = ErrorPlacement(20000, 3000, ERROR_TYPES, True, seed=5, block_size=128)
+    backward = ErrorPlacement(20000, 3000, ERROR_TYPES, True, seed=5, block_size=128)
+    blocks = range(forward.num_blocks)
+    assert [forward.block_outcomes(b) for b in blocks] == \
+        [backward.block_outcomes(b) for b in reversed(blocks)][::-1]
+    other = ErrorPlacement(20000, 3000, ERROR_TYPES, True, seed=6, block_size=128)
+    assert [other.block_outcomes(b) for b in blocks] != [forward.block_outcomes(b) for b in blocks]
+
+
+@pytest.mark.parametrize("draws,good,total", [
+    (10, 30, 100),          # sampled directly
+    (400, 300, 1000),       # inverted from the mode
+    (900, 300, 1000),       # by symmetry
+])
+def test_hypergeometric_matches_the_exact_distribution(draws, good, total):
+    rng = random.Random(42)
+    trials = 4000
+    seen = Counter(_hypergeometric(rng, draws, good, total) for _ in range(trials))
+    low, high = max(0, draws - (total - good)), min(draws, good)
+    assert low <= min(seen) and max(seen) <= high
+
+    def pmf(k):
+        return math.exp(_log_choose(good, k) + _log_choose(total - good, draws - k) - _log_choose(total, draws))
+
+    mean = draws * good / total
+    observed = sum(k * n for k, n in seen.items()) / trials
+    sd = math.sqrt(sum((k - mean) ** 2 * pmf(k) for k in range(low, high + 1)))
+    assert abs(observed - mean) < 4 * sd / math.sqrt(trials)
+    # Chi-square over the values with enough expected hits, against a loose bound
+    cells = [k for k in range(low, high + 1) if pmf(k) * trials >= 20]
+    chi2 = sum((seen[k] - pmf(k) * trials) ** 2 / (pmf(k) * trials) for k in cells)
+    assert chi2 < 2 * len(cells) + 30
+
+
+def test_hypergeometric_edges():
+    rng = random.Random(0)
+    assert _hypergeometric(rng, 0, 5, 10) == 0
+    assert _hypergeometric(rng, 5, 0, 10) == 0
+    assert _hypergeometric(rng, 7, 10, 10) == 7
+    assert _hypergeometric(rng, 10, 4, 10) == 4
+
+
+@pytest.mark.parametrize("error_percent", [0, 0.1, 7.5, 100])
+def test_generated_file_has_the_exact_error_count(tmp_path, error_percent):
+    output = tmp_path / "errors.csv"
+    metrics = scenarios.generate_csv(
+        9000, str(output), error_percent, "mixed", "2026-01-15", shuffle=True, seed=3, progress_interval=0
+    )
+    expected = scenarios.count_errors(9000, error_percent)
+    counts = metrics["counts"]
+    errors = sum(n for outcome, n in counts.items() if outcome not in ("valid", scenarios.COLLIDED))
+    assert errors == expected
+    assert sum(counts.values()) == 9000
+    with EntryManifest(manifest_path(str(output))) as manifest:
+        assert {outcome: n for outcome, n in manifest.counts.items() if n} == \
+            {outcome: n for outcome, n in counts.items() if n}
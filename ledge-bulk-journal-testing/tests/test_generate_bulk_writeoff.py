@@ -0,0 +1,55 @@
+"""Tests for generate_bulk_writeoff.py."""
+
+import io
+
+import pytest
+
+import generate_bulk_writeoff as gen
+
+DATE = "2026-01-15"
+
+
+def generate(path, num_entries=9000, **options):
+    options.setdefault("seed", 7)
+    gen.generate_csv(num_entries, str(path), DATE, progress_interval=0, **options)
+    return path.read_bytes()
+
+
+@pytest.mark.parametrize("num_entries,num_shards", [(10, 3), (9, 3), (2, 5), (1, 1)])
+def test_split_entry_range_covers_every_entry_once(num_entries, num_shards):
+    ranges = gen.split_entry_range(num_entries, num_shards)
+    assert ranges[0][0] == 1
+    assert ranges[-1][1] == num_entries + 1
+    assert all(stop == start for (_, stop), (start, _) in zip(ranges, ranges[1:]))
+    sizes = [stop - start for start, stop in ranges]
+    assert max(sizes) - min(sizes) <= 1
+
+
+@pytest.mark.parametrize("workers", [2, 3])
+def test_workers_write_the_serial_file(tmp_path, workers):
+    serial = generate(tmp_path / "serial.csv")
+    assert generate(tmp_path / "sharded.csv", workers=workers) == serial
+    assert not list(tmp_path.glob("*.shard*"))
+
+
+def test_keep_shards_concatenate_to_the_serial_file(tmp_path):
+    serial = generate(tmp_path / "serial.csv")
+    gen.generate_csv(9000, str(tmp_path / "out.csv"), DATE, workers=3, keep_shards=True, seed=7, progress_interval=0)
+    header, _, _ = serial.partition(b"\n")
+    shards = [open(gen.shard_path(str(tmp_path / "out.csv"), i), "rb").read() for i in range(3)]
+    assert all(shard.startswith(header + b"\n") for shard in shards)
+    assert header + b"\n" + b"".join(shard[len(header) + 1:] for shard in shards) == serial
+
+
+def test_same_seed_same_file(tmp_path):
+    first = generate(tmp_path / "first.csv")
+    assert generate(tmp_path / "second.csv") == first
+    assert generate(tmp_path / "other.csv", seed=8) != first
+
+
+@pytest.mark.parametrize("entry_num", [1, 4096, 4097, 9000])
+def test_only_entry_rebuilds_the_entry_from_the_file(tmp_path, entry_num):
+    rows = generate(tmp_path / "out.csv").splitlines(keepends=True)
+    buffer = io.BytesIO()
+    gen.write_entries(buffer, 1, DATE, seed=7, start=entry_num, header=False)
+    assert buffer.getvalue() == b"".join(rows[2 * entry_num - 1:2 * entry_num + 1])
@@ -0,0 +1,52 @@
+"""Tests for generate_error_scenarios.py."""
+
+import pytest
+
+import generate_error_scenarios as scenarios
+from columnar_output import rows_to_columns
+from entry_manifest import VALID, EntryManifest, manifest_path
+from entry_options import EntryOptions
+from row_templates import encode_rows
+
+DATE = "2026-01-15"
+
+
+def generate(path, num_entries=9000, **options):
+    options.setdefault("error_percent", 20)
+    options.setdefault("error_type", "mixed")
+    options.setdefault("shuffle", True)
+    options.setdefault("seed", 7)
+    scenarios.generate_csv(num_entries, str(path), accounting_date=DATE, progress_interval=0, **options)
+    return path.read_bytes()
+
+
+def test_same_seed_same_file_and_manifest(tmp_path):
+    # Same file name in each run: the manifest records its part files
+    for run in ("first", "second", "other"):
+        (tmp_path / run).mkdir()
+    first = generate(tmp_path / "first" / "out.csv")
+    assert generate(tmp_path / "second" / "out.csv") == first
+    assert (tmp_path / "second" / "out.manifest").read_bytes() == (tmp_path / "first" / "out.manifest").read_bytes()
+    assert generate(tmp_path / "other" / "out.csv", seed=8) != first
+
+
+@pytest.mark.parametrize("error_type", ["mixed", "duplicate-entry-num"])
+@pytest.mark.parametrize("shuffle", [True, False])
+def test_regenerate_entry_matches_the_file(tmp_path, shuffle, error_type):
+    output = tmp_path / "out.csv"
+    data = generate(output, shuffle=shuffle, error_type=error_type)
+    with EntryManifest(manifest_path(str(output))) as manifest:
+        for entry_num in [1, 2, 4095, 4096, 4097, 8999, 9000] + list(manifest.entry_nums("duplicate-entry-num"))[:5]:
+            entry = scenarios.regenerate_entry(entry_num, 9000, 20, error_type, DATE, shuffle, seed=7)
+            location = manifest.location(entry_num)
+            assert encode_rows(entry.rows) == data[location.offset:location.offset + location.length]
+            assert (entry.error_type or VALID) == manifest.outcome(entry_num)
+
+
+def test_column_batches_match_the_rows():
+    options = EntryOptions.build(source_distribution="zipf")
+    rows = scenarios.iter_rows(9000, 20, "mixed", DATE, shuffle=True, seed=7, entry_options=options)
+    expected = rows_to_columns(list(rows), scenarios.CSV_HEADERS)
+    batches = list(scenarios.iter_column_batches(9000, 20, "mixed", DATE, shuffle=True, seed=7, entry_options=options))
+    for name in scenarios.CSV_HEADERS:
+        assert [value for batch in batches for value in batch[name]] == list(expected[name])
@@ -0,0 +1,120 @@
+"""Tests for line_fanout.py, amount_engine.split_scaled and multi-line entries."""
+
+import random
+from collections import defaultdict
+from datetime import date
+
+import pytest
+
+import generate_bulk_writeoff as gen
+import validate_bulk_csv as validator
+from amount_engine import parse_scaled, split_scaled
+from entry_options import EntryOptions
+from line_fanout import LineCount, parse_lines_per_entry
+
+DATE = "2026-01-15"
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_split_scaled_parts_sum_exactly(seed):
+    rng = random.Random(seed)
+    count = rng.randint(1, 200)
+    weights = [rng.randint(1, 1 << 16) for _ in range(count)]
+    total = rng.randint(count, 10 ** rng.randint(3, 20))
+    parts = split_scaled(total, weights)
+    assert len(parts) == count
+    assert sum(parts) == total
+    assert min(parts) >= 1
+    # Each part is its share of the rest (after one unit each), less than a unit off
+    rest, weight_sum = total - count, sum(weights)
+    assert all(abs((part - 1) * weight_sum - rest * weight) < weight_sum for part, weight in zip(parts, weights))
+
+
+def test_split_scaled_needs_a_unit_per_part():
+    assert split_scaled(3, [5, 1, 9]) == [1, 1, 1]
+    with pytest.raises(ValueError):
+        split_scaled(2, [1, 1, 1])
+
+
+@pytest.mark.parametrize("spec,debits,credits", [
+    ("1/1", "1", "1"),
+    ("50", "50", "1"),
+    ("10/2-3", "10", "2-3"),
+    ("1-1000:zipf/1", "1-1000:zipf:1", "1"),
+    ("2-9:zipf:1.5/1-4", "2-9:zipf:1.5", "1-4"),
+])
+def test_parse_lines_per_entry(spec, debits, credits):
+    parsed = parse_lines_per_entry(spec)
+    assert (parsed.debits.spec, parsed.credits.spec) == (debits, credits)
+    assert parse_lines_per_entry(parsed.spec) == parsed
+    assert parsed.is_pair == (spec == "1/1")
+
+
+@pytest.mark.parametrize("spec", ["0", "5-2", "x", "1-5:uniform", "1-5:zipf:0", "7:zipf", "1-200000"])
+def test_bad_line_counts_are_rejected(spec):
+    with pytest.raises(ValueError):
+        parse_lines_per_entry(spec)
+
+
+def test_line_count_draws_stay_in_range():
+    count = LineCount(3, 40, 1.2)
+    rng = random.Random(1)
+    drawn = [count.draw(rng.getrandbits(256))[1] for _ in range(2000)]
+    assert min(drawn) >= 3 and max(drawn) <= 40
+    assert sum(drawn) / len(drawn) == pytest.approx(count.mean(), rel=0.15)
+
+
+def entry_sums(data):
+    """{ENTRY_NUM: [DEL lines, REC lines, total DR, total CR]} of a CSV."""
+    entries = defaultdict(lambda: [0, 0, 0, 0])
+    lines = data.decode().splitlines()
+    header = lines[0].split(",")
+    num, code, dr, cr = (header.index(name) for name in ("ENTRY_NUM", "TRANS_CODE", "ENTERED_DR", "ENTERED_CR"))
+    for line in lines[1:]:
+        fields = line.split(",")
+        entry = entries[int(fields[num])]
+        if fields[code] == "DEL":
+            entry[0] += 1
+            entry[2] += parse_scaled(fields[dr])
+        else:
+            entry[1] += 1
+            entry[3] += parse_scaled(fields[cr])
+    return entries
+
+
+@pytest.mark.parametrize("spec", ["1-20/1-3", "2-50:zipf/1", "1/4"])
+def test_fanout_entries_balance_exactly(tmp_path, spec):
+    output = tmp_path / "fanout.csv"
+    gen.generate_csv(3000, str(output), DATE, seed=7, progress_interval=0, lines=spec)
+    limits = parse_lines_per_entry(spec)
+    entries = entry_sums(output.read_bytes())
+    assert sorted(entries) == list(range(1, 3001))
+    for debit_lines, credit_lines, debits, credits in entries.values():
+        assert limits.debits.low <= debit_lines <= limits.debits.high
+        assert limits.credits.low <= credit_lines <= limits.credits.high
+        assert debits == credits
+    result = validator.validate_file(str(output), as_of=date(2026, 1, 15), workers=1)
+    assert result.counts["valid"] == 3000
+
+
+def test_unbalanced_fanout_entries_are_one_unit_over(tmp_path):
+    output = tmp_path / "fanout.csv"
+    gen.generate_csv(2000, str(output), DATE, unbalanced=True, seed=7, progress_interval=0, lines="1-20/1-3")
+    assert all(credits - debits == 1 for _, _, debits, credits in entry_sums(output.read_bytes()).values())
+
+
+def test_fanout_workers_write_the_serial_file(tmp_path):
+    for name, workers in (("serial.csv", 1), ("sharded.csv", 3)):
+        gen.generate_csv(6000, str(tmp_path / name), DATE, workers=workers, seed=7, progress_interval=0,
+                         lines="1-30:zipf/1-2")
+    assert (tmp_path / "sharded.csv").read_bytes() == (tmp_path / "serial.csv").read_bytes()
+
+
+def test_iterators_draw_with_the_options_they_are_given(tmp_path):
+    options = {"lines": "1-20/1-3", "source_distribution": "zipf"}
+    for name, run_options in (("fanout.csv", options), ("plain.csv", {})):
+        gen.generate_csv(3000, str(tmp_path / name), DATE, seed=7, progress_interval=0, **run_options)
+    chunks = gen.iter_chunks(3000, DATE, seed=7, entry_options=EntryOptions.build(**options))
+    assert b"".join(chunks) == (tmp_path / "fanout.csv").read_bytes()
+    # Without options an iterator draws plain pairs, whatever an earlier call used
+    assert b"".join(gen.iter_chunks(3000, DATE, seed=7)) == (tmp_path / "plain.csv").read_bytes()
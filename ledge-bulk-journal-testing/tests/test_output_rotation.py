@@ -0,0 +1,135 @@
+"""Tests for output_rotation.py and rotated generator output."""
+
+import os
+
+import pytest
+
+import generate_bulk_writeoff as gen
+import generate_error_scenarios as scenarios
+from entry_manifest import EntryManifest, manifest_path
+from output_rotation import RotatingWriter, check_limits, part_path
+from row_templates import encode_rows
+from split_bulk_csv import entry_ranges, split_csv
+
+HEADER = b"H\n"
+DATE = "2026-01-15"
+
+
+def entry(n, lines=2):
+    return b"".join(b"%d,%d\n" % (n, line) for line in range(lines))
+
+
+def body(data):
+    return data[len(data.split(b"\n", 1)[0]) + 1:]
+
+
+def read_parts(paths):
+    parts = []
+    for path in paths:
+        with open(path, "rb") as f:
+            parts.append(f.read())
+    return parts
+
+
+def test_check_limits():
+    check_limits(1, 3, HEADER)
+    with pytest.raises(ValueError):
+        check_limits(0, None, HEADER)
+    with pytest.raises(ValueError):
+        check_limits(None, len(HEADER), HEADER)
+
+
+@pytest.mark.parametrize("max_rows,max_bytes", [(5, None), (4, None), (None, 20), (3, 17)])
+def test_parts_respect_limits_and_keep_entries_whole(tmp_path, max_rows, max_bytes):
+    entries = [entry(n) for n in range(50)]
+    with RotatingWriter(str(tmp_path / "out.csv"), HEADER, max_rows, max_bytes) as writer:
+        for start in range(0, 50, 7):
+            writer.write_batch(entries[start:start + 7])
+    parts = read_parts(writer.paths)
+    assert writer.paths == [part_path(str(tmp_path / "out.csv"), i) for i in range(len(parts))]
+
+    bodies = []
+    for part in parts:
+        assert part.startswith(HEADER)
+        bodies.append(part[len(HEADER):])
+        assert max_rows is None or bodies[-1].count(b"\n") <= max_rows
+        assert max_bytes is None or len(part) <= max_bytes
+        assert bodies[-1].count(b"\n") % 2 == 0
+    assert b"".join(bodies) == b"".join(entries)
+    firsts = [int(b.split(b",", 1)[0]) for b in bodies]
+    assert writer.part_first_entries == firsts
+
+
+def test_oversized_entry_gets_a_part_of_its_own(tmp_path):
+    entries = [entry(0), entry(1, lines=5), entry(2)]
+    with RotatingWriter(str(tmp_path / "out.csv"), HEADER, max_rows=3) as writer:
+        writer.write_batch(entries)
+    assert [part[len(HEADER):] for part in read_parts(writer.paths)] == entries
+
+
+def test_no_entries_still_writes_a_header_only_part(tmp_path):
+    writer = RotatingWriter(str(tmp_path / "out.csv"), HEADER, max_rows=5)
+    assert read_parts(writer.close()) == [HEADER]
+
+
+@pytest.mark.parametrize("limits", [{"max_rows_per_file": 1001}, {"max_bytes_per_file": 100000}])
+def test_rotated_writeoff_parts_rejoin_to_the_single_file(tmp_path, limits):
+    single = tmp_path / "single.csv"
+    gen.generate_csv(9000, str(single), DATE, seed=7, progress_interval=0)
+    metrics = gen.generate_csv(9000, str(tmp_path / "parts.csv"), DATE, seed=7, progress_interval=0, **limits)
+    data = single.read_bytes()
+    header = data[:len(data) - len(body(data))]
+    parts = read_parts(metrics["outputs"])
+    assert len(parts) > 1
+    assert all(part.startswith(header) for part in parts)
+    assert header + b"".join(body(part) for part in parts) == data
+    for part in parts:
+        assert body(part).count(b"\n") <= limits.get("max_rows_per_file", float("inf"))
+        assert len(part) <= limits.get("max_bytes_per_file", float("inf"))
+        # DEL and REC of an entry stay in one part
+        entry_nums = [line.split(b",", 1)[0] for line in body(part).splitlines()]
+        assert entry_nums[0::2] == entry_nums[1::2]
+
+
+def test_manifest_locates_entries_in_their_parts(tmp_path):
+    output = tmp_path / "errors.csv"
+    metrics = scenarios.generate_csv(
+        9000, str(output), 20, "mixed", DATE, shuffle=True, seed=7, progress_interval=0, max_rows_per_file=999
+    )
+    # The manifest names parts relative to its own directory
+    parts = dict(zip(map(os.path.basename, metrics["outputs"]), read_parts(metrics["outputs"])))
+    with EntryManifest(manifest_path(str(output))) as manifest:
+        for entry_num in (1, 499, 500, 501, 4097, 9000):
+            location = manifest.location(entry_num)
+            rows = scenarios.regenerate_entry(entry_num, 9000, 20, "mixed", DATE, shuffle=True, seed=7).rows
+            data = parts[location.path]
+            assert data[location.offset:location.offset + location.length] == encode_rows(rows)
+
+
+@pytest.mark.parametrize("lines", [None, "1-40:zipf/1-3"])
+@pytest.mark.parametrize("limits", [{"max_rows": 999}, {"max_bytes": 65536}, {"max_rows": 200, "max_bytes": 40000}])
+def test_split_csv_cuts_like_rotation(tmp_path, lines, limits):
+    single = str(tmp_path / "single.csv")
+    gen.generate_csv(4000, single, DATE, seed=7, progress_interval=0, lines=lines)
+    split = split_csv(single, str(tmp_path / "split.csv"), workers=2, **limits)
+    rotated = gen.generate_csv(
+        4000, str(tmp_path / "rotated.csv"), DATE, seed=7, progress_interval=0, lines=lines,
+        max_rows_per_file=limits.get("max_rows"), max_bytes_per_file=limits.get("max_bytes")
+    )["outputs"]
+    assert read_parts(split) == read_parts(rotated)
+
+
+@pytest.mark.parametrize("count", [1, 2, 7, 64])
+def test_entry_ranges_cover_the_data_on_entry_boundaries(tmp_path, count):
+    path = str(tmp_path / "fanout.csv")
+    gen.generate_csv(3000, path, DATE, seed=7, progress_interval=0, lines="1-40:zipf/1-3")
+    with open(path, "rb") as f:
+        data = f.read()
+    ranges = entry_ranges(path, count)
+    assert ranges[0][0] == len(data.split(b"\n", 1)[0]) + 1
+    assert ranges[-1][1] == len(data)
+    assert all(stop == start for (_, stop), (start, _) in zip(ranges, ranges[1:]))
+    assert len(ranges) <= count
+    for (_, stop), _ in zip(ranges, ranges[1:]):
+        before = data[:stop].rsplit(b"\n", 2)[-2]
+        assert before.split(b",", 1)[0] != data[stop:].split(b",", 1)[0]
@@ -0,0 +1,139 @@
+"""Tests for reconcile_gl_import.py."""
+
+import csv
+import json
+import sys
+
+import pytest
+
+import generate_error_scenarios as scenarios
+import reconcile_gl_import as recon
+from entry_manifest import VALID, EntryManifest
+
+DATE = "2026-01-15"
+
+
+def run(monkeypatch, *argv):
+    monkeypatch.setattr(sys, "argv", ["reconcile_gl_import.py"] + [str(arg) for arg in argv])
+    try:
+        recon.main()
+    except SystemExit as exit:
+        return exit.code
+    return 0
+
+
+def reconcile(monkeypatch, tmp_path, expected, results):
+    report = tmp_path / "report.json"
+    code = run(monkeypatch, "reconcile", expected, results, "--report-json", report)
+    with open(report) as f:
+        return code, json.load(f)
+
+
+@pytest.fixture(params=[("mixed", 30), ("duplicate-entry-num", 100), ("duplicate-entry-num", 50)],
+                ids=["mixed", "all-duplicates", "half-duplicates"])
+def generated(request, tmp_path):
+    error_type, error_percent = request.param
+    output = tmp_path / "errors.csv"
+    metrics = scenarios.generate_csv(
+        9000, str(output), error_percent, error_type, DATE, shuffle=True, seed=3, progress_interval=0
+    )
+    return output, tmp_path / "errors.manifest", metrics["counts"]
+
+
+@pytest.mark.parametrize("source", ["manifest", "csv"])
+def test_faithful_import_reconciles_clean(monkeypatch, tmp_path, generated, source):
+    output, manifest, counts = generated
+    expected = manifest if source == "manifest" else output
+    results = tmp_path / "results.csv"
+    assert run(monkeypatch, "simulate", expected, "--output", results) == 0
+
+    code, report = reconcile(monkeypatch, tmp_path, expected, results)
+    assert code == 0
+    assert {name: n for name, n in report["totals"].items() if name != "result_rows" and n} == {}
+    assert {outcome: row["entries"] for outcome, row in report["outcomes"].items() if row["entries"]} == \
+        {outcome: n for outcome, n in counts.items() if n}
+
+
+def test_manifest_and_csv_give_the_same_report(monkeypatch, tmp_path, generated):
+    output, manifest, _ = generated
+    results = tmp_path / "results.csv"
+    run(monkeypatch, "simulate", manifest, "--output", results, "--drop-percent", 3, "--flip-percent", 2)
+    from_manifest = reconcile(monkeypatch, tmp_path, manifest, results)
+    assert from_manifest[0] == 1
+    assert reconcile(monkeypatch, tmp_path, output, results) == from_manifest
+
+    # Partitions small enough to spill give the same join
+    monkeypatch.setattr(recon, "_partition_sizes", lambda memory_mb: (1024, 1024))
+    assert reconcile(monkeypatch, tmp_path, manifest, results) == from_manifest
+
+
+def test_dropped_and_flipped_entries_are_counted_exactly(monkeypatch, tmp_path, generated):
+    _, manifest, _ = generated
+    jira_id, entries = recon.file_entries(str(manifest))
+    entries = list(entries)
+    rows = list(recon.simulate_results(entries, jira_id, drop_percent=5, flip_percent=2, seed=9))
+    recon.write_simulated(iter(rows), str(tmp_path / "results.csv"))
+
+    # An entry gets every result row of its written ENTRY_NUM (shared numbers
+    # share rows), and any rejected row makes it rejected
+    with_rows = {entry_num for entry_num, _, _, _ in rows}
+    rejected = {entry_num for entry_num, _, status, _ in rows if status != "PROCESSED"}
+    missing = sum(entry_num not in with_rows for entry_num, _ in entries)
+    false_accepts = sum(outcome != VALID and entry_num in with_rows and entry_num not in rejected
+                        for entry_num, outcome in entries)
+    false_rejects = sum(outcome == VALID and entry_num in rejected for entry_num, outcome in entries)
+
+    _, report = reconcile(monkeypatch, tmp_path, manifest, tmp_path / "results.csv")
+    totals = report["totals"]
+    assert (totals["missing"], totals["false_accepts"], totals["false_rejects"]) == \
+        (missing, false_accepts, false_rejects)
+    assert totals["result_rows"] == len(rows)
+    with EntryManifest(str(manifest)) as m:
+        assert sum(row["entries"] for row in report["outcomes"].values()) == len(m)
+
+
+def relabel(source, target, labels):
+    """Copy a generated CSV, giving entry i the outcome labels[i % len(labels)] (None: keep)."""
+    entry_col = scenarios.CSV_HEADERS.index("ENTRY_NUM")
+    description_col = scenarios.CSV_HEADERS.index("LINE_DESCRIPTION")
+    with open(source, newline="") as src, open(target, "w", newline="") as dst:
+        reader, writer = csv.reader(src), csv.writer(dst)
+        writer.writerow(next(reader))
+        for row in reader:
+            label = labels[int(row[entry_col]) % len(labels)]
+            if label is not None:
+                row[description_col] = f"ERROR: {label}"
+            writer.writerow(row)
+
+
+def test_more_than_fifteen_outcomes(monkeypatch, tmp_path):
+    output = tmp_path / "valid.csv"
+    scenarios.generate_csv(2000, str(output), 0, "mixed", DATE, seed=3, progress_interval=0)
+    expected = tmp_path / "relabelled.csv"
+    extra = [f"x-{i}" for i in range(16)]
+    relabel(output, expected, [None] * 4 + [label.upper() for label in extra])
+    results = tmp_path / "results.csv"
+    run(monkeypatch, "simulate", expected, "--output", results)
+
+    code, report = reconcile(monkeypatch, tmp_path, expected, results)
+    assert {outcome: row["entries"] for outcome, row in report["outcomes"].items() if row["entries"]} == \
+        {VALID: 400, **{label: 100 for label in extra}}
+    # The new types have no rejection reasons, so their rejections count as other reasons
+    assert code == 1
+    assert {name: n for name, n in report["totals"].items() if name != "result_rows" and n} == \
+        {"rejected_other": 1600}
+
+
+def test_too_many_outcomes_is_an_error(tmp_path):
+    output = tmp_path / "valid.csv"
+    scenarios.generate_csv(300, str(output), 0, "mixed", DATE, seed=3, progress_interval=0)
+    expected = tmp_path / "relabelled.csv"
+    relabel(output, expected, [f"X-{i}" for i in range(recon.MAX_OUTCOMES)])
+    with pytest.raises(ValueError, match="expected outcomes"):
+        recon.read_expected(str(expected), 1 << 16, 1 << 16)
+
+
+def test_too_many_reason_types_is_an_error():
+    reasons = {f"x-{i}": ("X",) for i in range(recon.MAX_REASON_TYPES + 1)}
+    with pytest.raises(ValueError, match="rejection reasons"):
+        recon._reason_masks(reasons)
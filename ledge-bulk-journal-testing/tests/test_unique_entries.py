@@ -0,0 +1,88 @@
+"""Tests for unique_entries.py (--unique)."""
+
+import os
+import sys
+from datetime import date
+
+import pytest
+
+import generate_bulk_writeoff as gen
+import validate_bulk_csv as validator
+from checkpoint import checkpoint_path, partial_path
+from unique_entries import FilterFull, checkpoint_filter_path
+
+DATE = "2026-01-15"
+# Hot keys make tuples collide in a small file, so entries get redrawn
+HOT = {"source_distribution": "hot:1:100", "dest_distribution": "hot:5:100"}
+
+
+def tuples(path):
+    """(asset, source account, destination account, amount) of every entry."""
+    with open(path, "rb") as f:
+        header = f.readline().rstrip(b"\n").split(b",")
+        asset, natural, sub, dr, cr = (header.index(name) for name in (
+            b"ASSET_ID", b"NATURAL_ACCT", b"SUB_ACCT", b"ENTERED_DR", b"ENTERED_CR"))
+        lines = f.read().splitlines()
+    entries = []
+    for debit, credit in zip(lines[0::2], lines[1::2]):
+        debit, credit = debit.split(b","), credit.split(b",")
+        entries.append((debit[asset], (debit[sub], debit[natural]), (credit[sub], credit[natural]), debit[dr]))
+        assert credit[cr] == debit[dr]
+    return entries
+
+
+def generate(path, num_entries=20000, **options):
+    options = {**HOT, "seed": 7, "progress_interval": 0, **options}
+    return gen.generate_csv(num_entries, str(path), DATE, **options)
+
+
+@pytest.mark.parametrize("memory_mb,widened", [(64, False), (0.01, True)])
+def test_unique_file_has_no_repeated_tuple(tmp_path, memory_mb, widened):
+    plain = tuples(generate(tmp_path / "plain.csv")["outputs"][0])
+    assert len(set(plain)) < len(plain)
+
+    metrics = generate(tmp_path / "unique.csv", unique=True, unique_memory_mb=memory_mb)
+    assert metrics["unique"]["redraws"] > 0
+    assert (metrics["unique"]["widening"] > 0) == widened
+    unique = tuples(tmp_path / "unique.csv")
+    assert len(set(unique)) == len(unique) == 20000
+    # Up to its first redraw an entry is the plain one
+    assert unique[0] == plain[0]
+    assert validator.validate_file(str(tmp_path / "unique.csv"), as_of=date(2026, 1, 15), workers=1) \
+        .counts["valid"] == 20000
+
+
+def test_unique_state_spans_files(tmp_path):
+    state = str(tmp_path / "tuples.state")
+    generate(tmp_path / "first.csv", 10000, unique=True, unique_state=state)
+    generate(tmp_path / "second.csv", 10000, unique=True, unique_state=state, seed=8)
+    both = tuples(tmp_path / "first.csv") + tuples(tmp_path / "second.csv")
+    assert len(set(both)) == len(both)
+
+
+def test_resumed_unique_run_matches_an_uninterrupted_one(tmp_path, interrupt):
+    generate(tmp_path / "whole.csv", unique=True)
+    output = str(tmp_path / "out.csv")
+    interrupt(lambda **options: generate(output, unique=True, **options), output, 3)
+    assert os.path.exists(checkpoint_filter_path(output))
+    generate(output, unique=True, resume=True)
+    with open(output, "rb") as resumed:
+        assert resumed.read() == (tmp_path / "whole.csv").read_bytes()
+    assert not os.path.exists(checkpoint_filter_path(output))
+
+
+def test_full_filter_stops_the_run(tmp_path, monkeypatch, capsys):
+    with pytest.raises(FilterFull):
+        generate(tmp_path / "api.csv", unique=True, unique_memory_mb=0.001)
+
+    output = str(tmp_path / "cli.csv")
+    monkeypatch.setattr(sys, "argv", [
+        "generate_bulk_writeoff.py", "--entries", "20000", "--output", output, "--date", DATE, "--seed", "7",
+        "--unique", "--unique-memory", "0.001", "--checkpoint-interval", "1e-9", "--progress-interval", "0",
+    ])
+    with pytest.raises(SystemExit) as stopped:
+        gen.main()
+    assert stopped.value.code == 1
+    assert "can't be resumed" in capsys.readouterr().err
+    for path in (output, partial_path(output), checkpoint_path(output), checkpoint_filter_path(output)):
+        assert not os.path.exists(path)
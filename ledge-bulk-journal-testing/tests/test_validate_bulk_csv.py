@@ -0,0 +1,87 @@
+"""Tests for validate_bulk_csv.py."""
+
+from datetime import date
+
+import pytest
+
+import generate_bulk_writeoff as gen
+import generate_error_scenarios as scenarios
+import validate_bulk_csv as validator
+from row_templates import encode_row
+
+DATE = "2026-01-15"
+AS_OF = date(2026, 1, 15)
+
+
+def expected_counts(generated):
+    """Validator counts for a generated file: a collided entry is itself valid."""
+    counts = {name: 0 for name in ["valid"] + validator.VIOLATIONS}
+    for outcome, n in generated.items():
+        counts["valid" if outcome == scenarios.COLLIDED else outcome] += n
+    return counts
+
+
+def test_writeoff_file_is_all_valid(tmp_path):
+    output = tmp_path / "out.csv"
+    gen.generate_csv(5000, str(output), DATE, seed=7, progress_interval=0)
+    result = validator.validate_file(str(output), as_of=AS_OF, workers=1)
+    assert result.entries == 5000
+    assert result.lines == 10000
+    assert result.bytes == output.stat().st_size
+    assert result.counts["valid"] == 5000
+    assert (result.first_entry, result.last_entry) == (1, 5000)
+
+
+@pytest.mark.parametrize("error_type", scenarios.ERROR_TYPES)
+def test_each_error_type_gets_its_own_class(tmp_path, error_type):
+    output = tmp_path / "errors.csv"
+    metrics = scenarios.generate_csv(
+        3000, str(output), 25, error_type, DATE, shuffle=True, seed=3, progress_interval=0
+    )
+    result = validator.validate_file(str(output), as_of=AS_OF, workers=1)
+    assert result.counts == expected_counts(metrics["counts"])
+    assert result.counts[error_type] == 750
+
+
+def test_parallel_ranges_match_one_process(tmp_path, monkeypatch):
+    output = tmp_path / "mixed.csv"
+    metrics = scenarios.generate_csv(
+        9000, str(output), 30, "mixed", DATE, shuffle=True, seed=3, progress_interval=0
+    )
+    serial = validator.validate_file(str(output), as_of=AS_OF, workers=1)
+    monkeypatch.setattr(validator, "MIN_PARALLEL_BYTES", 0)
+    parallel = validator.validate_file(str(output), as_of=AS_OF, workers=3)
+    assert parallel.counts == serial.counts == expected_counts(metrics["counts"])
+    assert parallel._replace(examples={}) == serial._replace(examples={})
+
+
+def test_compressed_blocks_in_workers_match_one_process(tmp_path, monkeypatch):
+    metrics = scenarios.generate_csv(
+        9000, str(tmp_path / "mixed.csv"), 30, "mixed", DATE, shuffle=True, seed=3, progress_interval=0,
+        compress="gzip"
+    )
+    output = metrics["outputs"][0]
+    serial = validator.validate_file(output, as_of=AS_OF, workers=1)
+    # Small reads, so the file is handed to the workers in many blocks
+    monkeypatch.setattr(validator, "READ_SIZE", 64 * 1024)
+    parallel = validator.validate_file(output, as_of=AS_OF, workers=3)
+    assert parallel.counts == serial.counts == expected_counts(metrics["counts"])
+    assert parallel._replace(examples={}) == serial._replace(examples={})
+
+
+def test_malformed_entries(tmp_path):
+    valid = [
+        ["1", "BTC", DATE, "1001", "SUB1", "DEL", "STAT", "1.5", "", "1"],
+        ["1", "BTC", DATE, "1002", "SUB2", "REC", "STAT", "", "1.5", "1"],
+    ]
+    output = tmp_path / "bad.csv"
+    output.write_bytes(b"".join(map(encode_row, [
+        scenarios.CSV_HEADERS,
+        ["x"] + valid[0][1:], ["x"] + valid[1][1:],             # non-numeric ENTRY_NUM
+        ["3"] + valid[0][1:],                                   # no REC line
+        ["4"] + valid[1][1:],                                   # no DEL line
+        ["5"] + valid[0][1:7] + ["1.2.3", "", "1"], ["5"] + valid[1][1:],  # bad amount
+        ["6"] + valid[0][1:], ["6"] + valid[1][1:-1],           # missing field
+    ])))
+    result = validator.validate_file(str(output), as_of=AS_OF, workers=1)
+    assert result.counts["malformed"] == result.entries == 5
@@ -0,0 +1,344 @@
+"""
+Globally unique entries (--unique): no two entries share (asset, source, destination, amount).
+
+Amounts are drawn from ~30k mantissa/exponent slots (see amount_engine), so
+large files contain many entries that differ only in ENTRY_NUM. That hides
+idempotency and dedup bugs downstream and makes reconciliation ambiguous.
+With --unique every (asset, source account, destination account, amount)
+tuple is used at most once per file, or per set of files (--unique-state).
+
+Tracking: the tuples seen so far go into a Bloom filter of --unique-memory MB
+(default 64), so memory is fixed whatever the number of entries; there is no
+set of tuples. A Bloom filter never forgets a tuple it has seen, so a tuple
+it reports as new really is new. A false positive only costs one redraw of
+a tuple that was in fact free. 64 MB holds 50M tuples at ~10.7 bits each,
+for ~1.4% false positives (see BloomFilter).
+
+Redraws: a taken tuple keeps its asset and accounts, so the key
+distributions still hold. Only the amount is drawn again, from the entry's
+next lane of random bits (lane 1, 2, ...; see entry_rng). The first draw is
+exactly the normal one, so a --unique file matches the plain file up to the
+first redraw.
+
+Widening: if a batch needed more than WIDEN_REDRAW_RATE redraws per
+entry, the amount space widens 10x (amount_engine.num_amounts). This
+happens when the hot tuples are used up or the filter is filling. An entry
+that collides MAX_REDRAWS times in a row also widens it on the spot. Once
+fully widened (MAX_WIDENING), an entry that still can't find a free tuple
+means the filter is full, and the run stops with FilterFull.
+
+Uniqueness is sequential: whether entry N is redrawn depends on every entry
+before it. So --unique runs in one process (no --workers), and --only-entry
+can't rebuild a single entry. It also needs one DEL and one REC line per
+entry. A checkpointed run saves the filter next to its checkpoint
+(out.csv.checkpoint.unique), so --resume continues exactly. --unique-state
+PATH loads the filter from PATH if it exists and saves it back once the run
+completes. Files generated one after another then share one set of tuples.
+Tuples are keyed on pool ids, so the state file records the pool digests
+and refuses different pools.
+"""
+
+import json
+import math
+import os
+import struct
+import sys
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from amount_engine import MAX_WIDENING, format_scaled, max_scaled_amount, num_amounts, scaled_amount
+from checkpoint import checkpoint_path, write_atomic
+from entry_rng import EntryRandom
+
+DEFAULT_MEMORY_MB = 64.0
+
+# Bits each key sets in its word (unrolled in BloomFilter.add)
+HASHES = 5
+
+# A batch with more redraws than this per entry widens the amounts
+WIDEN_REDRAW_RATE = 0.25
+
+# An entry that collides this many times in a row widens the amounts on the spot
+MAX_REDRAWS = 32
+
+# Past this share of set bits the filter is over capacity: false positives climb fast
+FULL_FILL = 0.5
+
+MAGIC = b"LEDGEUNQ"
+VERSION = 1
+_HEADER_LENGTH = struct.Struct("<I")
+_MASK64 = (1 << 64) - 1
+_WORD_BYTES = 8
+
+# Odd 128-bit constant (from the golden ratio) for the multiplicative hash
+_HASH_MULTIPLIER = 0x9E3779B97F4A7C15F39CC0605CEDC835
+
+
+class BloomFilter:
+    """A fixed-size blocked Bloom filter over tuple keys.
+
+    Each key sets HASHES bits of one 64-bit word, so adding or testing it
+    touches one word (one cache miss) instead of HASHES scattered bits.
+    That costs a little accuracy: at ~10.7 bits per key and 5 hashes, ~1.4%
+    false positives instead of ~0.7% (see false_positive_rate).
+
+    Keys are hashed arithmetically (a 128-bit multiplicative hash of the
+    packed tuple), so a saved filter means the same on every platform and
+    Python version.
+    """
+
+    __slots__ = ("words", "num_words", "keys")
+
+    def __init__(self, num_bytes: int, data: Optional[bytearray] = None, keys: int = 0):
+        if data is None:
+            data = bytearray(max(_WORD_BYTES, num_bytes - num_bytes % _WORD_BYTES))
+        self.words = memoryview(data).cast("Q")
+        self.num_words = len(self.words)
+        self.keys = keys
+
+    @property
+    def num_bytes(self) -> int:
+        return self.num_words * _WORD_BYTES
+
+    def add(self, asset: int, source: int, dest: int, amount: int) -> bool:
+        """Add a tuple: True if it is new, False if it was (probably) added before."""
+        # Pool ids fit in 24 bits and scaled amounts in 42; wider ids only
+        # make distinct tuples share a key, which costs a redraw, never a duplicate
+        h = ((((asset << 24 | source) << 24 | dest) << 42 | amount) * _HASH_MULTIPLIER) >> 64
+        word = (h & _MASK64) * self.num_words >> 64
+        mask = (1 << (h >> 64 & 63) | 1 << (h >> 70 & 63) | 1 << (h >> 76 & 63)
+                | 1 << (h >> 82 & 63) | 1 << (h >> 88 & 63))
+        value = self.words[word]
+        if value & mask == mask:
+            return False
+        self.words[word] = value | mask
+        self.keys += 1
+        return True
+
+    # Keys per word are Poisson distributed with mean `load`, and a bit of a
+    # word holding j keys is still clear with probability (1 - 1/64) ** (HASHES * j)
+
+    @property
+    def fill(self) -> float:
+        """Expected share of the bits that are set."""
+        load = self.keys / self.num_words
+        return 1 - math.exp(-load * (1 - (1 - 1 / 64) ** HASHES))
+
+    def false_positive_rate(self) -> float:
+        """Expected chance that a new key is taken for one already added."""
+        load = self.keys / self.num_words
+        term = math.exp(-load)     # probability of j keys in a word, from j = 0 up
+        rate = 0.0
+        for j in range(1, int(load * 4) + 64):
+            term *= load / j
+            rate += term * (1 - (1 - 1 / 64) ** (HASHES * j)) ** HASHES
+        return rate
+
+
+class FilterFull(ValueError):
+    """No free tuple left for an entry: the filter needs more memory.
+
+    Rerunning (or resuming) with the same filter draws the same tuples and
+    stops at the same entry."""
+
+
+class UniqueTuples:
+    """The (asset, source, destination, amount) tuples used so far, and how wide amounts are.
+
+    Build with UniqueTuples.create, or load a saved one (see open_unique_tuples).
+    """
+
+    def __init__(
+        self,
+        bloom: BloomFilter,
+        pools: Sequence[str] = (),
+        widening: int = 0,
+        redraws: int = 0,
+        widened_at: Sequence[int] = ()
+    ):
+        self.bloom = bloom
+        self.pools = list(pools)
+        self.widening = widening
+        self.redraws = redraws          # draws rejected as (probably) taken
+        self.widened_at = list(widened_at)
+        self._num_amounts = num_amounts(widening)
+        self._batch_redraws = redraws
+
+    @classmethod
+    def create(cls, memory_mb: float = DEFAULT_MEMORY_MB, pools: Sequence[str] = ()) -> "UniqueTuples":
+        """An empty filter of memory_mb MB for tuples drawn from `pools` (their file digests)."""
+        if not memory_mb > 0:
+            raise ValueError(f"--unique-memory must be > 0, got {memory_mb:g}")
+        return cls(BloomFilter(int(memory_mb * (1 << 20))), pools)
+
+    def claim(self, asset: int, source: int, dest: int, bits: int, rng: EntryRandom, entry_num: int) -> int:
+        """The scaled amount of an entry whose asset and accounts are drawn, making its tuple unique.
+
+        The first draw comes from the entry's remaining bits, as without
+        --unique; each redraw from its next lane.
+        """
+        add = self.bloom.add
+        amount = scaled_amount(bits % self._num_amounts)
+        lane = 0
+        while not add(asset, source, dest, amount):
+            lane += 1
+            if lane % MAX_REDRAWS == 0:
+                self.widen(entry_num)
+            amount = scaled_amount(rng.bits(entry_num, lane) % self._num_amounts)
+        self.redraws += lane
+        return amount
+
+    def end_batch(self, num_entries: int, next_entry: int) -> None:
+        """Widen the amounts if the last batch needed too many redraws."""
+        redraws = self.redraws - self._batch_redraws
+        self._batch_redraws = self.redraws
+        if redraws > WIDEN_REDRAW_RATE * num_entries and self.widening < MAX_WIDENING:
+            self.widen(next_entry)
+
+    def widen(self, entry_num: int) -> None:
+        """Draw amounts from a 10x wider space from entry_num on."""
+        if self.widening == MAX_WIDENING:
+            raise FilterFull(
+                f"--unique: no free tuple found for entry {entry_num}; the filter is full "
+                f"({self.bloom.fill:.0%} of its bits set). Raise --unique-memory."
+            )
+        self.widening += 1
+        self._num_amounts = num_amounts(self.widening)
+        self.widened_at.append(entry_num)
+
+    @property
+    def entries(self) -> int:
+        """Tuples claimed so far."""
+        return self.bloom.keys
+
+    @property
+    def max_amount(self) -> str:
+        """Largest amount drawn at the current widening."""
+        return format_scaled(max_scaled_amount(self.widening))
+
+    @property
+    def over_capacity(self) -> bool:
+        return self.bloom.fill > FULL_FILL
+
+    @property
+    def spec(self) -> Dict[str, object]:
+        """The filter's shape, e.g. for checkpoint options."""
+        return {"memory_bytes": self.bloom.num_bytes, "hashes": HASHES}
+
+    def summary(self) -> Dict[str, object]:
+        """Counters for metrics records."""
+        return {
+            "tuples": self.entries,
+            "redraws": self.redraws,
+            "widening": self.widening,
+            "widened_at": self.widened_at,
+            "max_amount": self.max_amount,
+            "memory_mb": round(self.bloom.num_bytes / (1 << 20), 3),
+            "fill": round(self.bloom.fill, 6),
+            "false_positive_rate": self.bloom.false_positive_rate(),
+        }
+
+    def describe(self) -> List[str]:
+        """Summary lines for the end of a run."""
+        lines = [
+            f"Unique tuples: {self.entries:,} ({self.redraws:,} redraws), amounts up to "
+            f"{self.max_amount} (widening {self.widening})",
+            f"Unique filter: {self.bloom.num_bytes / (1 << 20):g} MB, {self.bloom.fill:.1%} full, "
+            f"~{self.bloom.false_positive_rate():.2%} false positives",
+        ]
+        if self.over_capacity:
+            lines.append("Warning: the unique filter is over capacity; raise --unique-memory for more entries")
+        return lines
+
+    def save(self, path: str, **info: object) -> None:
+        """Write the filter and counters to `path` atomically; `info` goes in the header."""
+        header = {
+            "version": VERSION,
+            "byteorder": sys.byteorder,
+            "hashes": HASHES,
+            "keys": self.bloom.keys,
+            "pools": self.pools,
+            "widening": self.widening,
+            "redraws": self.redraws,
+            "widened_at": self.widened_at,
+        }
+        header.update(info)
+        encoded = json.dumps(header).encode()
+        write_atomic(path, MAGIC, _HEADER_LENGTH.pack(len(encoded)), encoded, self.bloom.words)
+
+    @classmethod
+    def load(cls, path: str) -> Tuple["UniqueTuples", Dict[str, object]]:
+        """(tracker, header) from a file written by save()."""
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path}: not a unique-tuples filter")
+            (length,) = _HEADER_LENGTH.unpack(f.read(_HEADER_LENGTH.size))
+            header = json.loads(f.read(length))
+            if header.get("version") != VERSION:
+                raise ValueError(f"{path}: unsupported filter version {header.get('version')!r}")
+            if header["byteorder"] != sys.byteorder or header["hashes"] != HASHES:
+                raise ValueError(f"{path}: saved in another layout ({header['byteorder']}-endian, "
+                                 f"{header['hashes']} hashes)")
+            data = bytearray(os.fstat(f.fileno()).st_size - f.tell())
+            f.readinto(data)
+        bloom = BloomFilter(len(data), data, header["keys"])
+        tracker = cls(
+            bloom, header["pools"], header["widening"], header["redraws"], header["widened_at"]
+        )
+        return tracker, header
+
+
+def checkpoint_filter_path(output_path: str) -> str:
+    """Filter saved with each checkpoint of a --unique run, e.g. out.csv.checkpoint.unique."""
+    return checkpoint_path(output_path) + ".unique"
+
+
+def open_unique_tuples(
+    state_path: Optional[str] = None,
+    memory_mb: float = DEFAULT_MEMORY_MB,
+    pools: Sequence[str] = ()
+) -> UniqueTuples:
+    """The filter saved at state_path if there is one (shared by a set of files), else an empty one.
+
+    Raises ValueError if the saved filter was built from other pools.
+    """
+    if state_path is None or not os.path.exists(state_path):
+        return UniqueTuples.create(memory_mb, pools)
+    tracker, _ = UniqueTuples.load(state_path)
+    if tracker.pools != list(pools):
+        raise ValueError(f"{state_path}: the filter was built from other pool files; tuples would not match")
+    return tracker
+
+
+def resume_unique_tuples(output_path: str, next_entry: int) -> UniqueTuples:
+    """The filter saved with the checkpoint an interrupted --unique run will resume from."""
+    path = checkpoint_filter_path(output_path)
+    if not os.path.exists(path):
+        raise ValueError(f"Cannot resume: {path} is missing (the filter of the --unique run)")
+    tracker, header = UniqueTuples.load(path)
+    if header.get("next_entry") != next_entry:
+        raise ValueError(
+            f"Cannot resume: {path} is for entry {header.get('next_entry')}, the checkpoint for entry {next_entry}"
+        )
+    return tracker
+
+
+# =============================================================================
+# CLI
+# =============================================================================
+
+def add_unique_arguments(parser) -> None:
+    """The --unique, --unique-memory and --unique-state options."""
+    group = parser.add_argument_group(
+        "unique entries",
+        "never repeat an (asset, source, destination, amount) tuple; amounts are "
+        "redrawn, and widened when too many are taken"
+    )
+    group.add_argument("--unique", action="store_true",
+                       help="Make every entry's (asset, source, destination, amount) unique "
+                            "(one process; one DEL and one REC line per entry)")
+    group.add_argument("--unique-memory", type=float, default=DEFAULT_MEMORY_MB, metavar="MB",
+                       help=f"Memory of the filter of seen tuples (default: {DEFAULT_MEMORY_MB:g}; "
+                            "about 1.3 MB per million entries keeps false positives near 1%%)")
+    group.add_argument("--unique-state", type=str, default=None, metavar="PATH",
+                       help="Load the filter from PATH if it exists and save it back when done, "
+                            "to keep tuples unique across a set of files")
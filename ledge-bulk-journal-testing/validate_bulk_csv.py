@@ -0,0 +1,569 @@
+#!/usr/bin/env python3
+"""
+Validate a generated bulk journal CSV before uploading it.
+
+Streams the file (plain, or .gz/.zst/.xz) and checks every entry:
+
+  - it has one or more DEL lines followed by one or more REC lines
+  - total DR equals total CR exactly (amounts are parsed to scaled integers, units of 1e-10)
+  - every ASSET_ID, SUB_ACCT and (SUB_ACCT, NATURAL_ACCT) is in the pools
+  - the accounting date is neither in the future nor in a closed period
+  - amounts are present, positive and non-zero
+  - CURRENCY is STAT and FX_RATE is 1
+  - ENTRY_NUM is above every ENTRY_NUM before it (else it repeats one)
+
+Violations are classified with the generate_error_scenarios.ERROR_TYPES
+taxonomy, plus 'malformed' for entries that don't parse as bulk journal
+lines (no DEL or no REC line, wrong field count, bad amount or date, non-numeric
+ENTRY_NUM). A file from generate_bulk_writeoff.py should be all valid; a file
+from generate_error_scenarios.py should show its error mix.
+
+Lines are checked as bytes without decoding, and repeated values (amounts,
+dates) are parsed once and cached. Even so the per-line checks run in
+Python, at roughly 45-70 MB/s per process, so files are validated in
+parallel processes by default and throughput grows with the CPU count
+(`benchmarks/run_benchmarks.py --cases validate` measures both rates).
+Plain files are split into byte ranges on entry boundaries that each worker
+reads itself; compressed files are decompressed once and their blocks of
+whole entries handed to the workers.
+
+Usage:
+    python validate_bulk_csv.py large_writeoff.csv
+    python validate_bulk_csv.py scattered.csv.gz --report-json report.json
+    python validate_bulk_csv.py huge.csv --workers 8 --as-of 2026-01-30
+"""
+
+import argparse
+import csv
+import functools
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import date, timedelta
+from itertools import chain, islice
+from typing import Deque, Dict, FrozenSet, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from amount_engine import parse_scaled
+from compressed_output import SUFFIXES as COMPRESSED_SUFFIXES, open_input
+from generate_error_scenarios import CSV_HEADERS, CURRENCY, ERROR_TYPES, FX_RATE
+from pool_index import PoolIndex, load_pools, resolve_pool_files
+from split_bulk_csv import entry_ranges
+
+# Violation classes: the generator's taxonomy, then anything unparseable
+VIOLATIONS = ERROR_TYPES + ["malformed"]
+_BIT = {name: 1 << i for i, name in enumerate(VIOLATIONS)}
+
+UNBALANCED = _BIT["unbalanced"]
+INVALID_ASSET = _BIT["invalid-asset"]
+INVALID_ACCOUNT = _BIT["invalid-account"]
+INVALID_NATURAL = _BIT["invalid-natural-acct"]
+FUTURE_DATE = _BIT["future-date"]
+PAST_DATE = _BIT["past-date"]
+MISSING_AMOUNT = _BIT["missing-amount"]
+NEGATIVE_AMOUNT = _BIT["negative-amount"]
+ZERO_AMOUNT = _BIT["zero-amount"]
+DUPLICATE_ENTRY_NUM = _BIT["duplicate-entry-num"]
+WRONG_CURRENCY = _BIT["wrong-currency"]
+BAD_FX_RATE = _BIT["bad-fx-rate"]
+MALFORMED = _BIT["malformed"]
+
+# Dates older than this many days before --as-of are in a closed period
+DEFAULT_MAX_AGE_DAYS = 365
+
+# Plain files smaller than this are validated in-process (a worker costs
+# ~20 ms to start, about what one process takes to check 1 MB)
+MIN_PARALLEL_BYTES = 8 * 1024 * 1024
+
+READ_SIZE = 8 * 1024 * 1024
+
+# Blocks of a compressed file queued per worker (each is up to READ_SIZE)
+_BLOCKS_PER_WORKER = 2
+
+# Example entries kept per violation class
+DEFAULT_EXAMPLES = 10
+
+# Distinct amount strings cached; generated files use a few thousand
+_AMOUNT_CACHE_LIMIT = 1 << 20
+
+_NUM_FIELDS = len(CSV_HEADERS)
+(_ENTRY_NUM, _ASSET_ID, _ACCOUNTING_DATE, _NATURAL_ACCT, _SUB_ACCT,
+ _TRANS_CODE, _CURRENCY, _ENTERED_DR, _ENTERED_CR, _FX_RATE) = (
+    CSV_HEADERS.index(name) for name in (
+        "ENTRY_NUM", "ASSET_ID", "ACCOUNTING_DATE", "NATURAL_ACCT", "SUB_ACCT",
+        "TRANS_CODE", "CURRENCY", "ENTERED_DR", "ENTERED_CR", "FX_RATE"
+    )
+)
+_CURRENCY_BYTES = CURRENCY.encode()
+_FX_RATE_BYTES = FX_RATE.encode()
+
+
+def violation_names(mask: int) -> List[str]:
+    """Violation classes set in a mask, in VIOLATIONS order."""
+    return [name for name in VIOLATIONS if mask & _BIT[name]]
+
+
+class PoolSets(NamedTuple):
+    """Pool membership as hash sets of the CSV field bytes."""
+    assets: FrozenSet[bytes]
+    subs: FrozenSet[bytes]
+    pairs: FrozenSet[Tuple[bytes, bytes]]   # (sub_acct, natural_acct)
+
+
+def pool_sets(pools: PoolIndex) -> PoolSets:
+    accounts = [(sub.encode(), natural.encode()) for sub, natural in pools.accounts]
+    return PoolSets(
+        frozenset(asset_id.encode() for asset_id in pools.asset_ids),
+        frozenset(sub for sub, _ in accounts),
+        frozenset(accounts),
+    )
+
+
+@functools.lru_cache(maxsize=4)
+def _load_pool_sets(pools: Tuple[str, str]) -> PoolSets:
+    """pool_sets of the (source, write-off) pool files, built once per process."""
+    return pool_sets(load_pools(*pools))
+
+
+class ValidationResult(NamedTuple):
+    """Totals for one file (or one byte range of it)."""
+    entries: int
+    lines: int
+    bytes: int
+    counts: Dict[str, int]                  # entries per violation class, plus 'valid'
+    examples: Dict[str, List[int]]          # first ENTRY_NUMs per violation class
+    first_entry: Optional[int]
+    last_entry: Optional[int]               # the highest ENTRY_NUM
+
+
+def merge_results(results: Sequence[ValidationResult], max_examples: int = DEFAULT_EXAMPLES) -> ValidationResult:
+    """Combine the results of consecutive byte ranges, in file order."""
+    counts = {name: 0 for name in ["valid"] + VIOLATIONS}
+    examples: Dict[str, List[int]] = {}
+    previous_last = None
+    for result in results:
+        for name, count in result.counts.items():
+            counts[name] += count
+        for name, entry_nums in result.examples.items():
+            examples.setdefault(name, []).extend(entry_nums)
+        # ENTRY_NUM must keep increasing across range boundaries as well
+        if previous_last is not None and result.first_entry is not None and result.first_entry <= previous_last:
+            counts["duplicate-entry-num"] += 1
+            examples.setdefault("duplicate-entry-num", []).append(result.first_entry)
+        if result.last_entry is not None:
+            previous_last = max(previous_last or 0, result.last_entry)
+    non_empty = [r for r in results if r.first_entry is not None]
+    return ValidationResult(
+        sum(r.entries for r in results),
+        sum(r.lines for r in results),
+        sum(r.bytes for r in results),
+        counts,
+        {name: entry_nums[:max_examples] for name, entry_nums in examples.items()},
+        non_empty[0].first_entry if non_empty else None,
+        non_empty[-1].last_entry if non_empty else None,
+    )
+
+
+class _Checker:
+    """Entry-by-entry checks over a stream of lines (without the header)."""
+
+    def __init__(self, pools: PoolSets, as_of: date, max_age_days: int, max_examples: int):
+        self.pools = pools
+        self.as_of = as_of
+        self.closed_before = as_of - timedelta(days=max_age_days)
+        self.max_examples = max_examples
+        self._amounts: Dict[bytes, Tuple[int, int]] = {b"": (0, MISSING_AMOUNT)}
+        self._dates: Dict[bytes, int] = {}
+        self.mask_counts: Dict[int, int] = {}
+        self.examples: Dict[str, List[int]] = {}
+        self.entries = 0
+        self.lines = 0
+        self.bytes = 0
+        self.first_entry: Optional[int] = None
+        self.last_entry: Optional[int] = None
+
+    # -- cached field checks -------------------------------------------------
+
+    def _amount(self, text: bytes) -> Tuple[int, int]:
+        """(scaled value, violation bits) of an amount field."""
+        try:
+            value = parse_scaled(text.decode())
+        except (ValueError, ArithmeticError, UnicodeDecodeError):
+            result = (0, MALFORMED)
+        else:
+            if value is None:
+                result = (0, MISSING_AMOUNT)
+            elif value < 0:
+                result = (value, NEGATIVE_AMOUNT)
+            elif value == 0:
+                result = (0, ZERO_AMOUNT)
+            else:
+                result = (value, 0)
+        if len(self._amounts) < _AMOUNT_CACHE_LIMIT:
+            self._amounts[text] = result
+        return result
+
+    def _date(self, text: bytes) -> int:
+        try:
+            day = date.fromisoformat(text.decode())
+        except (ValueError, UnicodeDecodeError):
+            bits = MALFORMED
+        else:
+            bits = FUTURE_DATE if day > self.as_of else PAST_DATE if day < self.closed_before else 0
+        self._dates[text] = bits
+        return bits
+
+    @staticmethod
+    def _reparse(line: bytes) -> List[bytes]:
+        """Fields of a line with quoted fields (generated files never quote)."""
+        if b'"' not in line:
+            return []
+        row = next(csv.reader([line.decode("utf-8", "replace").rstrip("\r\n")]), [])
+        return [field.encode() for field in row]
+
+    # -- the loop ------------------------------------------------------------
+
+    def check(self, lines: Sequence[bytes]) -> None:
+        """Check a complete run of entries (entries must not straddle calls)."""
+        assets, subs, pairs = self.pools
+        amounts = self._amounts
+        dates = self._dates
+        mask_counts = self.mask_counts
+        reparse = self._reparse
+
+        entry_key = None
+        entry_num = highest = self.last_entry
+        mask = dels = recs = dr_total = cr_total = 0
+        entries = 0
+
+        for line in lines:
+            fields = line.split(b",")
+            if len(fields) != _NUM_FIELDS:
+                fields = reparse(line) or fields
+            key = fields[0]
+
+            # A DEL after a REC with the same ENTRY_NUM starts another entry that repeats it
+            if key != entry_key or (recs and len(fields) == _NUM_FIELDS and fields[_TRANS_CODE] == b"DEL"):
+                if entry_key is not None:
+                    # Close the previous entry
+                    if not dels or not recs:
+                        mask |= MALFORMED
+                    if dr_total != cr_total:
+                        mask |= UNBALANCED
+                    mask_counts[mask] = mask_counts.get(mask, 0) + 1
+                    if mask:
+                        self._example(mask, entry_num)
+                entries += 1
+                entry_key = key
+                mask = dels = recs = dr_total = cr_total = 0
+                previous = entry_num
+                try:
+                    entry_num = int(key)
+                except ValueError:
+                    entry_num = previous
+                    mask |= MALFORMED
+                else:
+                    # Generated ENTRY_NUMs only increase, so one that doesn't repeats an earlier one
+                    if highest is not None and entry_num <= highest:
+                        mask |= DUPLICATE_ENTRY_NUM
+                    else:
+                        highest = entry_num
+                    if self.first_entry is None:
+                        self.first_entry = entry_num
+
+            if len(fields) != _NUM_FIELDS:
+                mask |= MALFORMED
+                continue
+
+            if fields[_ASSET_ID] not in assets:
+                mask |= INVALID_ASSET
+            sub = fields[_SUB_ACCT]
+            if (sub, fields[_NATURAL_ACCT]) not in pairs:
+                mask |= INVALID_NATURAL if sub in subs else INVALID_ACCOUNT
+            if fields[_CURRENCY] != _CURRENCY_BYTES:
+                mask |= WRONG_CURRENCY
+            if fields[_FX_RATE] != _FX_RATE_BYTES:
+                mask |= BAD_FX_RATE
+            day = fields[_ACCOUNTING_DATE]
+            bits = dates.get(day)
+            if bits is None:
+                bits = self._date(day)
+            mask |= bits
+
+            code = fields[_TRANS_CODE]
+            if code == b"DEL":
+                dels += 1
+                text = fields[_ENTERED_DR]
+                parsed = amounts.get(text) or self._amount(text)
+                dr_total += parsed[0]
+                mask |= parsed[1]
+                if fields[_ENTERED_CR]:
+                    mask |= MALFORMED
+            elif code == b"REC":
+                recs += 1
+                text = fields[_ENTERED_CR]
+                parsed = amounts.get(text) or self._amount(text)
+                cr_total += parsed[0]
+                mask |= parsed[1]
+                if fields[_ENTERED_DR]:
+                    mask |= MALFORMED
+            else:
+                mask |= MALFORMED
+
+        if entry_key is not None:
+            if not dels or not recs:
+                mask |= MALFORMED
+            if dr_total != cr_total:
+                mask |= UNBALANCED
+            mask_counts[mask] = mask_counts.get(mask, 0) + 1
+            if mask:
+                self._example(mask, entry_num)
+
+        self.entries += entries
+        self.lines += len(lines)
+        self.bytes += sum(map(len, lines))
+        self.last_entry = highest
+
+    def _example(self, mask: int, entry_num: Optional[int]) -> None:
+        for name in violation_names(mask):
+            kept = self.examples.setdefault(name, [])
+            if len(kept) < self.max_examples and entry_num is not None:
+                kept.append(entry_num)
+
+    def result(self) -> ValidationResult:
+        counts = {name: 0 for name in ["valid"] + VIOLATIONS}
+        for mask, count in self.mask_counts.items():
+            if not mask:
+                counts["valid"] += count
+            for name in violation_names(mask):
+                counts[name] += count
+        return ValidationResult(
+            self.entries, self.lines, self.bytes, counts, self.examples,
+            self.first_entry, self.last_entry
+        )
+
+
+def _last_entry_start(data: bytes) -> int:
+    """Offset of the last entry's first line in data (0 if it is all one entry).
+
+    The entry's lines are those after the last line with another ENTRY_NUM,
+    plus any trailing partial line.
+    """
+    end = data.rfind(b"\n") + 1
+    if not end:
+        return 0
+    start = data.rfind(b"\n", 0, end - 1) + 1
+    key = data[start:end].split(b",", 1)[0]
+    while start:
+        previous = data.rfind(b"\n", 0, start - 1) + 1
+        if data[previous:start].split(b",", 1)[0] != key:
+            return start
+        start = previous
+    return 0
+
+
+def _iter_entry_data(f, stop: Optional[int] = None) -> Iterator[bytes]:
+    """A binary stream in blocks of whole lines that end on an entry boundary.
+
+    Reads READ_SIZE at a time (up to byte `stop` if given); a trailing partial
+    line and the last entry of each block are carried into the next block.
+    """
+    carry = b""
+    remaining = stop
+    while True:
+        size = READ_SIZE if remaining is None else min(READ_SIZE, remaining)
+        data = f.read(size) if size else b""
+        if remaining is not None:
+            remaining -= len(data)
+        if not data:
+            if carry:
+                yield carry
+            return
+        data = carry + data
+        cut = _last_entry_start(data)
+        carry = data[cut:]
+        if cut:
+            yield data[:cut]
+
+
+def _iter_entry_blocks(f, stop: Optional[int] = None) -> Iterator[List[bytes]]:
+    """Lines of a binary stream in blocks that end on an entry boundary."""
+    for data in _iter_entry_data(f, stop):
+        yield data.splitlines(keepends=True)
+
+
+def _check_header(header: bytes) -> None:
+    names = header.decode("utf-8-sig").rstrip("\r\n").split(",")
+    if names != CSV_HEADERS:
+        raise ValueError(f"Not a bulk journal CSV: header is {header[:200]!r}")
+
+
+def _validate_range(
+    path: str,
+    start: int,
+    stop: int,
+    pools: Tuple[str, str],
+    as_of: date,
+    max_age_days: int,
+    max_examples: int
+) -> ValidationResult:
+    """Process-pool entry point: validate the entries in path[start:stop]."""
+    checker = _Checker(_load_pool_sets(pools), as_of, max_age_days, max_examples)
+    with open(path, "rb") as f:
+        f.seek(start)
+        for lines in _iter_entry_blocks(f, stop - start):
+            checker.check(lines)
+    return checker.result()
+
+
+def _validate_block(
+    data: bytes,
+    pools: Tuple[str, str],
+    as_of: date,
+    max_age_days: int,
+    max_examples: int
+) -> ValidationResult:
+    """Process-pool entry point: validate one block of whole entries."""
+    checker = _Checker(_load_pool_sets(pools), as_of, max_age_days, max_examples)
+    checker.check(data.splitlines(keepends=True))
+    return checker.result()
+
+
+def _validate_blocks(
+    blocks: Iterable[bytes],
+    pools: Tuple[str, str],
+    as_of: date,
+    max_age_days: int,
+    max_examples: int,
+    workers: int
+) -> List[ValidationResult]:
+    """Validate blocks in worker processes, in order, reading ahead only
+    _BLOCKS_PER_WORKER blocks per worker."""
+    results = []
+    pending: Deque[Future] = deque()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for data in blocks:
+            pending.append(pool.submit(_validate_block, data, pools, as_of, max_age_days, max_examples))
+            if len(pending) >= workers * _BLOCKS_PER_WORKER:
+                results.append(pending.popleft().result())
+        results.extend(future.result() for future in pending)
+    return results
+
+
+def validate_file(
+    path: str,
+    as_of: Optional[date] = None,
+    max_age_days: int = DEFAULT_MAX_AGE_DAYS,
+    workers: Optional[int] = None,
+    max_examples: int = DEFAULT_EXAMPLES,
+    pool_file: Optional[str] = None,
+    writeoff_file: Optional[str] = None
+) -> ValidationResult:
+    """Validate a bulk journal CSV against the pools it was generated from (see pool_index).
+
+    Args:
+        path: CSV to check; .gz/.zst/.xz files are decompressed while streaming
+        as_of: Reference date for future / closed-period checks (default: today)
+        max_age_days: Dates more than this many days before as_of are past-date
+        workers: Processes (default: CPU count); files that fit in one
+                 READ_SIZE block, and plain files under MIN_PARALLEL_BYTES, use one
+        max_examples: ENTRY_NUMs kept per violation class
+        pool_file, writeoff_file: The Query 2 / Query 3 exports, as for the
+                 generators; None for the versioned ones
+
+    Returns:
+        ValidationResult with entry counts per violation class
+    """
+    as_of = as_of or date.today()
+    workers = workers or os.cpu_count() or 1
+    pools = resolve_pool_files(pool_file, writeoff_file)
+    compressed = path.endswith(tuple(COMPRESSED_SUFFIXES.values()))
+
+    with open_input(path) as f:
+        header = f.readline()
+    _check_header(header)
+
+    if not compressed and workers > 1 and os.path.getsize(path) >= MIN_PARALLEL_BYTES:
+        ranges = entry_ranges(path, workers)
+        with ProcessPoolExecutor(max_workers=len(ranges)) as pool:
+            futures = [
+                pool.submit(_validate_range, path, start, stop, pools, as_of, max_age_days, max_examples)
+                for start, stop in ranges
+            ]
+            results = [future.result() for future in futures]
+        merged = merge_results(results, max_examples)
+        return merged._replace(bytes=merged.bytes + len(header))
+
+    with open_input(path) as f:
+        f.readline()
+        blocks = _iter_entry_data(f)
+        head = list(islice(blocks, 2))
+        if workers > 1 and len(head) > 1:
+            results = _validate_blocks(chain(head, blocks), pools, as_of, max_age_days, max_examples, workers)
+            result = merge_results(results, max_examples)
+        else:
+            checker = _Checker(_load_pool_sets(pools), as_of, max_age_days, max_examples)
+            for data in chain(head, blocks):
+                checker.check(data.splitlines(keepends=True))
+            result = checker.result()
+    return result._replace(bytes=result.bytes + len(header))
+
+
+def describe(result: ValidationResult) -> List[str]:
+    """Report lines: totals, then entries per violation class with examples."""
+    lines = [f"Entries: {result.entries:,} ({result.lines:,} lines)"]
+    lines.append(f"  {'valid':<22} {result.counts['valid']:>12,}")
+    for name in VIOLATIONS:
+        count = result.counts[name]
+        if count:
+            examples = ", ".join(str(n) for n in result.examples.get(name, []))
+            lines.append(f"  {name:<22} {count:>12,}   e.g. ENTRY_NUM {examples}")
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Validate a generated bulk journal CSV")
+    parser.add_argument("input", help="CSV to validate (.gz/.zst/.xz are decompressed on the fly)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Parallel processes (default: CPU count)")
+    parser.add_argument("--as-of", type=str, default=None,
+                        help="Reference date for future/past-date checks, YYYY-MM-DD (default: today)")
+    parser.add_argument("--max-age-days", type=int, default=DEFAULT_MAX_AGE_DAYS,
+                        help=f"Dates older than this many days are a closed period "
+                             f"(default: {DEFAULT_MAX_AGE_DAYS})")
+    parser.add_argument("--pool-file", type=str, default=None,
+                        help="Query 2 export the accounts/assets must be in (default: pools/source_accounts.csv)")
+    parser.add_argument("--writeoff-file", type=str, default=None,
+                        help="Query 3 export (default: pools/writeoff_accounts.csv)")
+    parser.add_argument("--examples", type=int, default=DEFAULT_EXAMPLES,
+                        help=f"ENTRY_NUMs listed per violation class (default: {DEFAULT_EXAMPLES})")
+    parser.add_argument("--report-json", type=str, default=None,
+                        help="Also write the counts and examples to this JSON file")
+
+    args = parser.parse_args()
+    as_of = date.fromisoformat(args.as_of) if args.as_of else None
+
+    started = time.perf_counter()
+    result = validate_file(
+        args.input, as_of, args.max_age_days, args.workers, args.examples, args.pool_file, args.writeoff_file
+    )
+    elapsed = time.perf_counter() - started
+
+    for line in describe(result):
+        print(line)
+    rate = result.bytes / (1024 * 1024) / elapsed if elapsed > 0 else float("inf")
+    print(f"Validated {result.bytes / (1024 * 1024):.1f} MB in {elapsed:.2f}s ({rate:.0f} MB/s)")
+
+    if args.report_json:
+        with open(args.report_json, "w") as f:
+            json.dump(dict(result._asdict(), seconds=round(elapsed, 4)), f, indent=2)
+            f.write("\n")
+
+    invalid = result.entries - result.counts["valid"]
+    print("OK: every entry is valid" if not invalid else f"{invalid:,} entries with violations")
+    raise SystemExit(1 if invalid else 0)
+
+
+if __name__ == "__main__":
+    main()